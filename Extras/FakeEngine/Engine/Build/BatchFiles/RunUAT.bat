@@ -0,0 +1,6 @@
+@echo off
+REM FakeEngine: engine-free RunUAT stand-in for testing uebuild (see Extras/FakeEngine/README.md).
+set PYTHON=python
+
+%PYTHON% "%~dp0fakeuat.py" %*
+exit /b %ERRORLEVEL%
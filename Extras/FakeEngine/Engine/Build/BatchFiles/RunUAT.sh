@@ -0,0 +1,8 @@
+#!/usr/bin/env bash
+# FakeEngine: engine-free RunUAT stand-in for testing uebuild (see Extras/FakeEngine/README.md).
+set -euo pipefail
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PYTHON_BIN="${PYTHON_BIN:-python3}"
+
+exec "$PYTHON_BIN" "$SCRIPT_DIR/fakeuat.py" "$@"
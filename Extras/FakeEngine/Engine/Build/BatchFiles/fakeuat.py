@@ -0,0 +1,524 @@
+"""Engine-free stand-in for RunUAT BuildCookRun (see Extras/FakeEngine/README.md).
+
+Parses the BuildCookRun arguments uebuild passes, prints UAT/UBT/cook/pak style logs at a
+configurable rate and volume, burns configurable CPU/memory and writes synthetic outputs
+(Binaries, Saved/Cooked, staging, archive) where the real tool would. Tuned via FAKEUAT_* env.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import struct
+import sys
+import time
+import zlib
+from pathlib import Path
+
+_COOK_DIRS = {"WIN64": "Windows", "WINDOWS": "Windows", "ANDROID": "Android", "IOS": "IOS", "MAC": "Mac", "LINUX": "Linux"}
+_MB = 1024 * 1024
+_PAK_MAGIC = 0x5A6F12E1
+_TOC_MAGIC = b"-==--==--==--==-"
+# Filler entries per pak: (suffix, share of the container, fraction of incompressible bytes).
+_FILLER = ((".uasset", 0.05, 0.2), (".uexp", 0.45, 0.3), (".ubulk", 0.5, 0.85))
+_CODECS = {"Zlib": lambda data, level: zlib.compress(data, level), "Gzip": lambda data, level: _gzip(data, level)}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(_env_float(name, default))
+
+
+class Settings:
+    def __init__(self) -> None:
+        self.lines_per_sec = _env_float("FAKEUAT_LINES_PER_SEC", 2000.0)  # 0: as fast as possible
+        self.log_scale = _env_float("FAKEUAT_LOG_SCALE", 1.0)  # 10 for "10x real log volume"
+        self.compile_actions = _env_int("FAKEUAT_COMPILE_ACTIONS", 200)
+        self.cook_packages = _env_int("FAKEUAT_COOK_PACKAGES", 2000)
+        self.cook_files = _env_int("FAKEUAT_COOK_FILES", 50)
+        self.warning_rate = _env_float("FAKEUAT_WARNING_RATE", 0.01)
+        self.archive_mb = _env_float("FAKEUAT_ARCHIVE_MB", 10.0)
+        self.archive_files = max(1, _env_int("FAKEUAT_ARCHIVE_FILES", 20))
+        self.cpu_workers = _env_int("FAKEUAT_CPU_WORKERS", 0)
+        self.memory_mb = _env_int("FAKEUAT_MEMORY_MB", 0)
+        self.fail_stage = os.environ.get("FAKEUAT_FAIL_STAGE", "").lower()
+        self.exit_code = _env_int("FAKEUAT_EXIT_CODE", 25)
+        seed = os.environ.get("FAKEUAT_SEED", "0")
+        # A fixed seed gives byte-identical outputs run to run (what dedupe/caching should see).
+        self.seed = random.randrange(1 << 30) if seed == "random" else int(seed) if seed.isdigit() else 0
+
+
+class Args:
+    def __init__(self, argv: list[str]) -> None:
+        self.command = argv[0] if argv else ""
+        self.flags: set[str] = set()
+        self.values: dict[str, str] = {}
+        for a in argv[1:]:
+            key, sep, value = a.lstrip("-").partition("=")
+            if sep:
+                self.values[key.lower()] = value
+            else:
+                self.flags.add(key.lower())
+
+    def has(self, flag: str) -> bool:
+        return flag in self.flags
+
+
+class Emitter:
+    """Prints lines at ``lines_per_sec``, counting them for the summary."""
+
+    def __init__(self, rate: float, log_file: Path | None) -> None:
+        self.rate = rate
+        self.count = 0
+        self._t0 = time.monotonic()
+        self._log = log_file.open("a", encoding="utf-8") if log_file is not None else None
+
+    def __call__(self, line: str, *, err: bool = False) -> None:
+        (sys.stderr if err else sys.stdout).write(line + "\n")
+        if self._log is not None:
+            self._log.write(line + "\n")
+        self.count += 1
+        if self.rate > 0:
+            ahead = self.count / self.rate - (time.monotonic() - self._t0)
+            if ahead > 0.005:
+                sys.stdout.flush()
+                time.sleep(ahead)
+
+    def close(self) -> None:
+        sys.stdout.flush()
+        if self._log is not None:
+            self._log.close()
+
+
+def _burn(stop: "multiprocessing.synchronize.Event") -> None:  # type: ignore[name-defined]
+    x = 0
+    while not stop.is_set():
+        for i in range(100000):
+            x ^= i
+
+
+def _write_random(path: Path, size: int, rng: random.Random) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as fh:
+        left = size
+        while left > 0:
+            n = min(left, _MB)
+            fh.write(rng.getrandbits(n * 8).to_bytes(n, "little") if n else b"")
+            left -= n
+    return size
+
+
+def _payload(rng: random.Random, size: int, entropy: float) -> bytes:
+    """``size`` bytes of which about ``entropy`` is random and the rest repeats a small dictionary."""
+    words = rng.getrandbits(256 * 8).to_bytes(256, "little")
+    out = bytearray()
+    while len(out) < size:
+        n = min(4096, size - len(out))
+        noisy = int(n * entropy)
+        out += rng.getrandbits(noisy * 8).to_bytes(noisy, "little") if noisy else b""
+        out += (words * (n // 256 + 1))[: n - noisy]
+    return bytes(out)
+
+
+def _gzip(data: bytes, level: int) -> bytes:
+    c = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return c.compress(data) + c.flush()
+
+
+def _fstring(text: str) -> bytes:
+    raw = text.encode("ascii") + b"\0"
+    return struct.pack("<i", len(raw)) + raw
+
+
+class Compression:
+    """What UnrealPak would use: -compressed plus PakFileCompressionFormats/-compresslevel/-compressionblocksize from -ini: overrides."""
+
+    def __init__(self, args: Args, emit: "Emitter") -> None:
+        def ini(key: str) -> str:
+            return next((v for k, v in args.values.items() if k.startswith("ini:") and k.endswith(":" + key)), "")
+
+        options = {k.lower(): v for k, _, v in (o.lstrip("-").partition("=") for o in ini("pakfileadditionalcompressionoptions").split())}
+        formats = [f.strip() for f in ini("pakfilecompressionformats").split(",") if f.strip()] or ["Zlib"]
+        self.method = formats[0] if args.has("compressed") else None
+        if self.method is not None and self.method not in _CODECS:
+            emit(f"LogPakFile: Warning: Compression format {self.method} is not available, falling back to Zlib")
+            self.method = "Zlib"
+        level = options.get("compresslevel", "6")
+        self.level = int(level) if level.lstrip("-").isdigit() else 6
+        size = options.get("compressionblocksize", "64KB").upper()
+        self.block_size = int(size[:-2]) * 1024 if size.endswith("KB") else int(size) if size.isdigit() else 64 * 1024
+
+    def blocks(self, data: bytes) -> tuple[int, list[bytes]]:
+        """(method index, stored blocks); like UnrealPak, data that does not shrink is stored as is."""
+        if self.method is None or not data:
+            return 0, [data]
+        level = min(9, max(0, self.level))
+        blocks = [_CODECS[self.method](data[i : i + self.block_size], level) for i in range(0, len(data), self.block_size)]
+        if sum(len(b) for b in blocks) >= len(data):
+            return 0, [data]
+        return 1, blocks
+
+
+def _write_pak(path: Path, entries: list[tuple[str, bytes]], comp: Compression) -> int:
+    """A version 11 .pak: entries, bit-packed entry table, full directory index, footer."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    encoded = bytearray()
+    directories: dict[str, list[tuple[str, int]]] = {}
+    with path.open("wb") as fh:
+        for rel, data in entries:
+            offset = fh.tell()
+            method, blocks = comp.blocks(data)
+            stored = sum(len(b) for b in blocks)
+            count = len(blocks) if method else 0
+            header_size = 8 * 3 + 4 + 20 + (4 + 16 * count if method else 0) + 1 + 4
+            header = struct.pack("<qqqI", 0, stored, len(data), method) + hashlib.sha1(data).digest()
+            if method:
+                header += struct.pack("<I", count)
+                start = header_size
+                for b in blocks:
+                    header += struct.pack("<qq", start, start + len(b))
+                    start += len(b)
+            header += struct.pack("<BI", 0, comp.block_size if method else 0)
+            fh.write(header)
+            for b in blocks:
+                fh.write(b)
+            directory, _, name = ("/" + rel).rpartition("/")
+            directories.setdefault(directory.lstrip("/") + "/", []).append((name, len(encoded)))
+            # FPakFile::EncodePakEntry
+            value = (comp.block_size >> 11) & 0x3F if method else 0
+            value |= (count & 0xFFFF) << 6 | method << 23
+            value |= (offset < 1 << 32) << 31 | (len(data) < 1 << 32) << 30 | (stored < 1 << 32) << 29
+            encoded += struct.pack("<I", value)
+            encoded += struct.pack("<I" if offset < 1 << 32 else "<Q", offset)
+            encoded += struct.pack("<I" if len(data) < 1 << 32 else "<Q", len(data))
+            if method:
+                encoded += struct.pack("<I" if stored < 1 << 32 else "<Q", stored)
+                if count > 1:
+                    encoded += b"".join(struct.pack("<I", len(b)) for b in blocks)
+        full_index = struct.pack("<i", len(directories))
+        for directory, files in directories.items():
+            full_index += _fstring(directory) + struct.pack("<i", len(files))
+            full_index += b"".join(_fstring(name) + struct.pack("<i", loc) for name, loc in files)
+        index_offset = fh.tell()
+        head = _fstring("../../../") + struct.pack("<iQII", len(entries), 0, 0, 1)
+        tail = struct.pack("<i", len(encoded)) + bytes(encoded) + struct.pack("<i", 0)
+        full_at = index_offset + len(head) + 8 + 8 + 20 + len(tail)
+        index = head + struct.pack("<qq", full_at, len(full_index)) + hashlib.sha1(full_index).digest() + tail
+        fh.write(index)
+        fh.write(full_index)
+        names = [(comp.method or "").encode("ascii")] + [b""] * 4
+        fh.write(bytes(16) + b"\0" + struct.pack("<Iiqq", _PAK_MAGIC, 11, index_offset, len(index)) + hashlib.sha1(index).digest())
+        fh.write(b"".join(n.ljust(32, b"\0") for n in names))
+        return fh.tell()
+
+
+def _write_iostore(path: Path, chunks: list[tuple[str, int, bytes]], comp: Compression) -> int:
+    """A version 8 .utoc/.ucas pair with a directory index; ``chunks`` are (path, EIoChunkType, data)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    bs = comp.block_size
+    ids, spans, blocks = bytearray(), bytearray(), bytearray()
+    offset = 0
+    with path.with_suffix(".ucas").open("wb") as cas:
+        for rel, kind, data in chunks:
+            ids += hashlib.blake2b(rel.encode("utf-8"), digest_size=8).digest() + struct.pack("<HBB", 0, 0, kind)
+            spans += offset.to_bytes(5, "big") + len(data).to_bytes(5, "big")
+            for i in range(0, max(len(data), 1), bs):
+                piece = data[i : i + bs]
+                method, stored = comp.blocks(piece)
+                blocks += cas.tell().to_bytes(5, "little") + len(stored[0]).to_bytes(3, "little")
+                blocks += len(piece).to_bytes(3, "little") + bytes([method])
+                cas.write(stored[0])
+            offset += -(-max(len(data), 1) // bs) * bs  # every chunk starts a new block
+        cas_bytes = cas.tell()
+    # Directory index: directory entries (name, first child, next sibling, first file), file entries, strings.
+    strings: dict[str, int] = {}
+    dirs: list[list[int]] = [[0xFFFFFFFF] * 4]
+    files: list[list[int]] = []
+    children: dict[tuple[int, str], int] = {}
+
+    def string(text: str) -> int:
+        return strings.setdefault(text, len(strings))
+
+    for toc_index, (rel, _, _) in enumerate(chunks):
+        *parts, name = rel.split("/")
+        d = 0
+        for part in parts:
+            key = (d, part)
+            if key not in children:
+                children[key] = len(dirs)
+                dirs.append([string(part), 0xFFFFFFFF, dirs[d][1], 0xFFFFFFFF])
+                dirs[d][1] = children[key]
+            d = children[key]
+        files.append([string(name), dirs[d][3], toc_index])
+        dirs[d][3] = len(files) - 1
+    directory = _fstring("../../../")
+    directory += struct.pack("<i", len(dirs)) + b"".join(struct.pack("<4I", *e) for e in dirs)
+    directory += struct.pack("<i", len(files)) + b"".join(struct.pack("<3I", *e) for e in files)
+    directory += struct.pack("<i", len(strings)) + b"".join(_fstring(s) for s in strings)
+    names = [comp.method.encode("ascii")] if comp.method else []
+    header = struct.pack(
+        "<16sBBH9IQ16sBBHIQII5Q",
+        _TOC_MAGIC, 8, 0, 0, 144, len(chunks), len(blocks) // 12, 12, len(names), 32, bs, len(directory), 1,
+        int.from_bytes(hashlib.blake2b(path.stem.encode("utf-8"), digest_size=8).digest(), "little"), bytes(16),
+        (0x01 if names else 0) | 0x08, 0, 0, 0, (1 << 64) - 1, 0, 0, 0, 0, 0, 0, 0,
+    )
+    toc = header + bytes(ids) + bytes(spans) + bytes(blocks) + b"".join(n.ljust(32, b"\0") for n in names) + directory
+    toc += bytes(33 * len(chunks))  # per-chunk hash and flags: zeros
+    path.write_bytes(toc)
+    return len(toc) + cas_bytes
+
+
+class Simulator:
+    def __init__(self, args: Args, settings: Settings) -> None:
+        self.args = args
+        self.s = settings
+        project = Path(args.values.get("project", "Fake.uproject"))
+        self.project_root = project.parent
+        self.project = project.stem
+        self.platform = args.values.get("platform", "Win64")
+        self.config = args.values.get("clientconfig", "Development")
+        self.cook_dir = _COOK_DIRS.get(self.platform.upper(), self.platform)
+        self.archive_dir = Path(args.values["archivedirectory"]) if "archivedirectory" in args.values else None
+        self.staging_dir = Path(
+            args.values.get("stagingdirectory") or self.project_root / "Saved" / "StagedBuilds" / self.cook_dir
+        )
+        log_folder = os.environ.get("uebp_LogFolder")
+        self.log_folder = Path(log_folder) if log_folder else None
+        log_file = self.log_folder / "FakeUAT-Log.txt" if self.log_folder else None
+        self.bytes_written = 0
+        if log_file is not None:
+            log_file.parent.mkdir(parents=True, exist_ok=True)
+        self.emit = Emitter(settings.lines_per_sec, log_file)
+        self.rng = random.Random(settings.seed)
+
+    def _n(self, base: int) -> int:
+        return max(1, int(base * self.s.log_scale))
+
+    def _finish(self, returncode: int) -> int:
+        """Close the log and leave FakeUAT-Stats.json next to it.
+
+        ``seconds`` is the simulator's own wall time: the caller's wall time minus this is the
+        orchestration overhead (spawn, log streaming, hooks, hashing, publishing, scheduling).
+        """
+        seconds = time.monotonic() - self.emit._t0
+        self.emit(f"AutomationTool executed for {seconds:.1f}s ({self.emit.count + 2} lines)")
+        result = "Success" if returncode == 0 else "Error_Unknown"
+        self.emit(f"AutomationTool exiting with ExitCode={returncode} ({result})")
+        self.emit.close()
+        if self.log_folder is not None:
+            stats = {"seconds": round(seconds, 3), "lines": self.emit.count, "bytes_written": self.bytes_written, "returncode": returncode}
+            (self.log_folder / "FakeUAT-Stats.json").write_text(json.dumps(stats, indent=2), encoding="utf-8")
+        return returncode
+
+    def _fail_if(self, stage: str) -> None:
+        if self.s.fail_stage == stage:
+            self.emit(f"LogInit: Error: Simulated {stage} failure (FAKEUAT_FAIL_STAGE)", err=True)
+            sys.exit(self._finish(self.s.exit_code))
+
+    def _binary_name(self) -> str:
+        ext = ".exe" if self.cook_dir == "Windows" else ""
+        suffix = "" if self.config == "Development" else f"-{self.platform}-{self.config}"
+        return f"{self.project}{suffix}{ext}"
+
+    def build(self) -> None:
+        e = self.emit
+        e("********** BUILD COMMAND STARTED **********")
+        t0 = time.monotonic()
+        e(f"Building {self.project} {self.platform} {self.config}...")
+        total = self._n(self.s.compile_actions)
+        for i in range(1, total + 1):
+            e(f"[{i}/{total + 1}] Compile [x64] Module.{self.project}.{i:05d}.cpp")
+        self._fail_if("build")
+        binary = self.project_root / "Binaries" / self.platform / self._binary_name()
+        e(f"[{total + 1}/{total + 1}] Link [x64] {binary.name}")
+        self.bytes_written += _write_random(binary, 256 * 1024, self.rng)
+        e(f"Total execution time: {time.monotonic() - t0:.2f} seconds")
+        e(f"Took {time.monotonic() - t0:.1f}s to run UnrealBuildTool, ExitCode=0")
+        e("********** BUILD COMMAND COMPLETED **********")
+
+    def cook(self) -> None:
+        e = self.emit
+        e("********** COOK COMMAND STARTED **********")
+        stop = multiprocessing.Event()
+        workers = [multiprocessing.Process(target=_burn, args=(stop,), daemon=True) for _ in range(self.s.cpu_workers)]
+        for w in workers:
+            w.start()
+        ballast = bytearray(self.s.memory_mb * _MB)
+        for i in range(0, len(ballast), 4096):
+            ballast[i] = 1  # touch every page so it counts as RSS
+        out = Path(self.args.values.get("cookoutputdir") or self.project_root / "Saved" / "Cooked" / self.cook_dir)
+        maps = [m for m in self.args.values.get("map", "").split("+") if m]
+        cook_dirs = [d for d in self.args.values.get("cookdir", "").split("+") if d]
+        try:
+            if maps or cook_dirs:
+                self._cook_subset(maps, cook_dirs, out)
+            else:
+                packages = self._n(self.s.cook_packages)
+                if self.args.has("iterate"):
+                    packages = max(1, packages // 10)
+                for i in range(1, packages + 1):
+                    e(f"LogCook: Display: Cooking /Game/Content/Pkg_{i:06d} -> {self.cook_dir}")
+                    if self.rng.random() < self.s.warning_rate:
+                        e(f"LogCook: Warning: /Game/Content/Pkg_{i:06d}: Failed to load optional dependency /Game/Missing_{i % 7}", err=True)
+                    if i % 500 == 0:
+                        e(f"LogCook: Display: Cooked packages {i} Packages Remain {packages - i} Total {packages}")
+                self._fail_if("cook")
+                for i in range(self.s.cook_files):
+                    self.bytes_written += _write_random(out / self.project / "Content" / f"Pkg_{i:04d}.uasset", 16 * 1024, self.rng)
+            # Like the real registry it covers only what this cook saw: shards disagree on it.
+            listing = sorted(p.relative_to(out).as_posix() for p in (out / self.project / "Content").rglob("*") if p.is_file())
+            registry = out / self.project / "AssetRegistry.bin"
+            registry.parent.mkdir(parents=True, exist_ok=True)
+            registry.write_text("\n".join(listing) + "\n", encoding="utf-8")
+        finally:
+            stop.set()
+            for w in workers:
+                w.join()
+            del ballast
+        e("********** COOK COMMAND COMPLETED **********")
+
+    def _cook_subset(self, maps: list[str], cook_dirs: list[str], out: Path) -> None:
+        """Sharded cook: only the -map maps (plus shared content they all use) and -cookdir dirs.
+
+        Log volume follows each package's size on disk, and package bytes depend only on the
+        package path, so shards that cook the same shared package write identical files.
+        """
+        e = self.emit
+        content = self.project_root / "Content"
+        packages: dict[str, int] = {}  # path under Content -> source bytes
+        for m in maps:
+            rel = m.split("/", 2)[2] if m.startswith("/Game/") else m
+            src = content / f"{rel}.umap"
+            packages[f"{rel}.umap"] = src.stat().st_size if src.is_file() else 64 * 1024
+            for k in range(3):
+                packages[f"Shared/Common_{k}.uasset"] = 16 * 1024
+        for d in cook_dirs:
+            root = Path(d)
+            for src in sorted(root.rglob("*")) if root.is_dir() else []:
+                if src.is_file():
+                    packages[src.relative_to(content).with_suffix(".uasset").as_posix()] = src.stat().st_size
+        for rel, size in packages.items():
+            name = "/Game/" + rel.rsplit(".", 1)[0]
+            e(f"LogCook: Display: Cooking {name} -> {self.cook_dir}")
+            for i in range(self._n(size // 4096)):
+                e(f"LogCook: Verbose: {name}: saved export {i}")
+        self._fail_if("cook")
+        for rel, size in packages.items():
+            rng = random.Random(f"{self.s.seed}:{rel}")
+            self.bytes_written += _write_random(out / self.project / "Content" / rel, min(max(size, 1024), 64 * 1024), rng)
+        e(f"LogCook: Display: Cooked {len(packages)} packages into {out}")
+
+    def stage(self) -> None:
+        e = self.emit
+        e("********** STAGE COMMAND STARTED **********")
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        content = self.staging_dir / self.project / "Content" / "Paks"
+        binary = self.project_root / "Binaries" / self.platform / self._binary_name()
+        if binary.exists():
+            (self.staging_dir / self.project / "Binaries" / self.platform).mkdir(parents=True, exist_ok=True)
+            shutil.copy2(binary, self.staging_dir / self.project / "Binaries" / self.platform / binary.name)
+        for i in range(self._n(50)):
+            e(f"Staging {self.project}/Content/File_{i:05d}.uasset")
+        self._fail_if("stage")
+        size = int(self.s.archive_mb * _MB)
+        count = self.s.archive_files
+        if self.args.has("pak"):
+            e(f"Running UnrealPak with response file {self.staging_dir / 'PakList.txt'}")
+            t0 = time.monotonic()
+            comp = Compression(self.args, e)
+            for i, entries in enumerate(self._pak_entries(count, size // count)):
+                name = f"pakchunk{i}-{self.cook_dir}"
+                if self.args.has("iostore"):
+                    # Packages go to the IoStore container; everything else stays in a small .pak.
+                    chunks = [(rel, 2 if rel.endswith(".ubulk") else 1, data) for rel, data in entries if rel.endswith((".uasset", ".umap", ".ubulk"))]
+                    rest = [(rel, data) for rel, data in entries if not rel.endswith((".uasset", ".umap", ".ubulk", ".uexp"))]
+                    self.bytes_written += _write_iostore(content / f"{name}.utoc", chunks, comp)
+                    self.bytes_written += _write_pak(content / f"{name}.pak", rest, comp)
+                    e(f"LogIoStore: Display: Container {name}: {len(chunks)} chunks")
+                else:
+                    self.bytes_written += _write_pak(content / f"{name}.pak", entries, comp)
+                e(f"LogPakFile: Display: Added {len(entries)} entries to {name}.pak")
+            e(f"Took {time.monotonic() - t0:.1f}s to run UnrealPak, ExitCode=0")
+        else:
+            for i in range(count):
+                self.bytes_written += _write_random(content.parent / f"Loose_{i:04d}.uasset", size // count, self.rng)
+        e("********** STAGE COMMAND COMPLETED **********")
+
+    def _pak_entries(self, count: int, filler: int) -> list[list[tuple[str, bytes]]]:
+        """Cooked files round-robin over ``count`` paks, each topped up with ``filler`` bytes of synthetic assets.
+
+        For -iostore a package's .uexp is folded into its .uasset, as the IoStore writer does.
+        """
+        paks: list[list[tuple[str, bytes]]] = [[] for _ in range(count)]
+        cooked = self.project_root / "Saved" / "Cooked" / self.cook_dir
+        files = sorted(p for p in cooked.rglob("*") if p.is_file()) if cooked.is_dir() else []
+        for n, src in enumerate(files):
+            paks[n % count].append((src.relative_to(cooked).as_posix(), src.read_bytes()))
+        per_asset = 256 * 1024
+        for i, entries in enumerate(paks):
+            rng = random.Random(f"{self.s.seed}:pak{i}")
+            for j in range(max(1, filler // per_asset)):
+                stem = f"{self.project}/Content/Chunk{i}/Asset_{j:04d}"
+                parts = {suffix: _payload(rng, int(per_asset * share), entropy) for suffix, share, entropy in _FILLER}
+                if self.args.has("iostore"):
+                    entries.append((stem + ".uasset", parts[".uasset"] + parts[".uexp"]))
+                    entries.append((stem + ".ubulk", parts[".ubulk"]))
+                else:
+                    entries.extend((stem + suffix, data) for suffix, data in parts.items())
+        return paks
+
+    def package(self) -> None:
+        e = self.emit
+        e("********** PACKAGE COMMAND STARTED **********")
+        for i in range(self._n(30)):
+            e(f"Package: {self.platform} step {i}")
+        self._fail_if("package")
+        e("********** PACKAGE COMMAND COMPLETED **********")
+
+    def archive(self) -> None:
+        e = self.emit
+        if self.archive_dir is None:
+            return
+        e("********** ARCHIVE COMMAND STARTED **********")
+        self._fail_if("archive")
+        dest = self.archive_dir / self.cook_dir
+        if self.staging_dir.is_dir():
+            shutil.copytree(self.staging_dir, dest, dirs_exist_ok=True)
+        e(f"Archived to {dest}")
+        e("********** ARCHIVE COMMAND COMPLETED **********")
+
+    def run(self) -> int:
+        if self.args.command.lower() != "buildcookrun":
+            self.emit(f"ERROR: FakeUAT only simulates BuildCookRun (got '{self.args.command}')", err=True)
+            return 1
+        self.emit(f"Parsing command line: {' '.join(sys.argv[1:])}")
+        if self.args.has("build"):
+            self.build()
+        if self.args.has("cook") and not self.args.has("skipcook"):
+            self.cook()
+        if self.args.has("stage") and not self.args.has("skipstage"):
+            self.stage()
+        if self.args.has("package"):
+            self.package()
+        if self.args.has("archive"):
+            self.archive()
+        self.emit("BUILD SUCCESSFUL")
+        return self._finish(0)
+
+
+def main(argv: list[str]) -> int:
+    return Simulator(Args(argv), Settings()).run()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
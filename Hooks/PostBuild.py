@@ -1,2 +1,9 @@
-print("[hook] PostBuild")
 
+def post_build(ctx):
+    """Runs in-process after a successful build; ``ctx`` is a uehooks.HookContext."""
+    print(f"[hook] PostBuild ({len(ctx.artifacts)} artifacts)")
+
+
+if __name__ == "__main__":
+    # Legacy entrypoint: older SDK versions run hooks as `python PostBuild.py`.
+    print("[hook] PostBuild")
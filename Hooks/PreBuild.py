@@ -1,5 +1,13 @@
 import os
 
-print("[hook] PreBuild")
-print(f"[hook] UE_SHARED_DDC={os.environ.get('UE_SHARED_DDC', '')}")
 
+def pre_build(ctx):
+    """Runs in-process before BuildCookRun; ``ctx`` is a uehooks.HookContext."""
+    print("[hook] PreBuild")
+    print(f"[hook] UE_SHARED_DDC={ctx.env.get('UE_SHARED_DDC', '')}")
+
+
+if __name__ == "__main__":
+    # Legacy entrypoint: older SDK versions run hooks as `python PreBuild.py`.
+    print("[hook] PreBuild")
+    print(f"[hook] UE_SHARED_DDC={os.environ.get('UE_SHARED_DDC', '')}")
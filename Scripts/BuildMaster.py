@@ -4,12 +4,35 @@ import argparse
 from pathlib import Path
 
 import uebuildlib
+import uecache
+import ueconfig
+import uephases
+import uepipeline
+import uestream
 
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="UE5 Build SDK - BuildMaster (compat entrypoint)")
-    parser.add_argument("--platform", required=True, help="Win64 / Android / IOS")
+    parser.add_argument("--platform", default=None, help="Win64 / Android / IOS")
     parser.add_argument("--config", default="Development", help="Development / Shipping / etc")
+    parser.add_argument(
+        "--matrix",
+        default=None,
+        help="Build a platform x config matrix in parallel, e.g. Win64,Android:Development,Shipping",
+    )
+    parser.add_argument(
+        "--phases",
+        action="store_true",
+        help="Split BuildCookRun into cached compile/cook/stage/package phases run concurrently (Phases.Enabled)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Ignore BuildCache and always run BuildCookRun")
+    parser.add_argument(
+        "--console",
+        choices=["full", "compact", "off"],
+        default=None,
+        help="Console view of UAT output (default: Logging.Console, or compact for --matrix)",
+    )
+    parser.add_argument("--max-jobs", type=int, default=0, help="Max parallel matrix jobs (default: Matrix.MaxParallelJobs)")
     parser.add_argument(
         "--config-path",
         default=None,
@@ -33,8 +56,8 @@ def main() -> int:
     override = args.config_path or args.json_config
     config_path = Path(override).expanduser().resolve() if override else uebuildlib.default_config_path(build_root)
 
-    cfg = uebuildlib.read_json(config_path)
-    result = uebuildlib.validate_config(cfg, config_path=config_path)
+    loaded, result = ueconfig.load_validated(config_path)
+    cfg = loaded.cfg
     for w in result.warnings:
         print(f"[warn] {w}")
     if not result.ok:
@@ -42,25 +65,60 @@ def main() -> int:
             print(f"[error] {e}")
         return 2
 
-    hooks_dir = build_root / "Hooks"
+    if args.matrix:
+        import uematrix
 
-    cmd, env = uebuildlib.build_uat_command(
+        try:
+            jobs = uematrix.parse_matrix(args.matrix)
+        except uebuildlib.ConfigError as exc:
+            print(f"[error] {exc}")
+            return 2
+        return uematrix.run_matrix(
+            cfg=cfg,
+            config_path=config_path,
+            build_root=build_root,
+            jobs=jobs,
+            extra_uat_args=args.extra_uat_arg,
+            max_jobs=args.max_jobs or uematrix.default_max_jobs(cfg),
+            dry_run=args.dry_run,
+            console=args.console,
+            use_cache=not args.no_cache,
+            phases=args.phases or uephases.enabled(cfg),
+        )
+
+    if not args.platform:
+        print("[error] --platform is required unless --matrix is given")
+        return 2
+
+    job = uepipeline.plan_job(
         cfg=cfg,
         config_path=config_path,
         platform=args.platform,
         build_config=args.config,
         extra_uat_args=args.extra_uat_arg,
+        log_root=uebuildlib.build_log_dir(uebuildlib.resolve_project_root(config_path)),
+    )
+    log_settings = uestream.LogSettings.from_config(cfg, console=args.console)
+    if args.phases or uephases.enabled(cfg):
+        return uephases.run_phases(
+            cfg=cfg,
+            config_path=config_path,
+            build_root=build_root,
+            jobs=[job],
+            extra_uat_args=args.extra_uat_arg,
+            dry_run=args.dry_run,
+            log_settings=log_settings,
+            use_cache=not args.no_cache,
+        )
+    return uepipeline.run_job(
+        job,
+        build_root=build_root,
+        cwd=uebuildlib.get_project_root(build_root),
+        dry_run=args.dry_run,
+        log_settings=log_settings,
+        cfg=cfg,
+        cache=None if args.no_cache else uecache.BuildCache.from_config(cfg, uebuildlib.resolve_project_root(config_path)),
     )
-
-    rc = uebuildlib.run_hook("PreBuild", hooks_dir=hooks_dir, env=env, dry_run=args.dry_run)
-    if rc != 0:
-        return rc
-
-    rc = uebuildlib.run(cmd, cwd=uebuildlib.get_project_root(build_root), env=env, dry_run=args.dry_run)
-    if rc != 0:
-        return rc
-
-    return uebuildlib.run_hook("PostBuild", hooks_dir=hooks_dir, env=env, dry_run=args.dry_run)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
 import argparse
+import copy
+import difflib
 import os
 import sys
+import time
 import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import uebuildlib
+import ueconfig
+import uetune
 
 
 def _is_windows() -> bool:
@@ -32,23 +38,35 @@ def _ensure_parent(path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
 
 
+_NAMESPACE = "https://www.unrealengine.com/BuildConfiguration"
+# Write the file's default namespace back as such, not as "ns0:" prefixes.
+ET.register_namespace("", _NAMESPACE)
+
+
 def _ns(tag: str) -> str:
-    return f"{{https://www.unrealengine.com/BuildConfiguration}}{tag}"
+    return f"{{{_NAMESPACE}}}{tag}"
 
 
 def _load_or_create_tree(path: Path) -> ET.ElementTree:
     if path.exists():
-        return ET.parse(path)
+        # Keep hand-written comments: the file is shared with whoever edits it by hand.
+        return ET.parse(path, parser=ET.XMLParser(target=ET.TreeBuilder(insert_comments=True)))
 
     root = ET.Element(_ns("Configuration"))
     return ET.ElementTree(element=root)
 
 
-def _find_or_create(parent: ET.Element, tag: str) -> ET.Element:
+def _find(parent: ET.Element, tag: str) -> ET.Element | None:
     for child in parent:
         if child.tag == tag:
             return child
-    child = ET.SubElement(parent, tag)
+    return None
+
+
+def _find_or_create(parent: ET.Element, tag: str) -> ET.Element:
+    child = _find(parent, tag)
+    if child is None:
+        child = ET.SubElement(parent, tag)
     return child
 
 
@@ -56,10 +74,32 @@ def _set_text(elem: ET.Element, value: str) -> None:
     elem.text = value
 
 
-def inject_uba_coordinator(*, coordinator_ip: str, path: Path) -> None:
-    _ensure_parent(path)
+def _render(tree: ET.ElementTree) -> str:
+    # Pretty-ish formatting (ElementTree doesn't indent by default)
+    try:
+        ET.indent(tree, space="  ", level=0)  # py3.9+
+    except Exception:
+        pass
+    return ET.tostring(tree.getroot(), encoding="unicode", xml_declaration=True) + "\n"
+
+
+@dataclass
+class MergeResult:
+    changed: list[tuple[str, str | None, str]] = field(default_factory=list)  # (Section/Key, old, new)
+    kept: list[tuple[str, str, str]] = field(default_factory=list)  # hand-written: (Section/Key, current, wanted)
+    diff: str = ""
+
+
+def merge_values(path: Path, values: dict[str, str], *, owned: dict[str, str], force: bool = False, dry_run: bool = False) -> MergeResult:
+    """Set ``Section/Key`` entries in BuildConfiguration.xml, touching nothing else.
+
+    A key we wrote before (its value is still ``owned[key]``) or that is absent is ours to
+    update; a key holding any other value was set by hand and is kept unless ``force``.
+    The file is only rewritten when a value actually changes, so repeated runs are no-ops.
+    """
     tree = _load_or_create_tree(path)
     root = tree.getroot()
+    before = _render(copy.deepcopy(tree))
 
     # Support both namespaced and non-namespaced existing XMLs.
     if root.tag.endswith("Configuration"):
@@ -70,21 +110,81 @@ def inject_uba_coordinator(*, coordinator_ip: str, path: Path) -> None:
     def tag(name: str) -> str:
         return _ns(name) if use_ns else name
 
-    uba = _find_or_create(root, tag("UnrealBuildAccelerator"))
-    coordinator = _find_or_create(uba, tag("Coordinator"))
-    _set_text(coordinator, coordinator_ip)
+    result = MergeResult()
+    for key, value in values.items():
+        section_name, _, name = key.partition("/")
+        section = _find(root, tag(section_name))
+        elem = _find(section, tag(name)) if section is not None else None
+        current = (elem.text or "").strip() if elem is not None else None
+        if current == value:
+            continue
+        if current is not None and current != owned.get(key) and not force:
+            result.kept.append((key, current, value))
+            continue
+        _set_text(_find_or_create(_find_or_create(root, tag(section_name)), tag(name)), value)
+        result.changed.append((key, current, value))
+
+    after = _render(tree)
+    result.diff = "".join(
+        difflib.unified_diff(before.splitlines(True), after.splitlines(True), fromfile=str(path), tofile=f"{path} (tuned)")
+    )
+    if result.changed and not dry_run:
+        _ensure_parent(path)
+        tmp = path.with_suffix(f".tmp-{os.getpid()}")
+        tmp.write_text(after, encoding="utf-8")
+        os.replace(tmp, path)
+    return result
 
-    # Pretty-ish formatting (ElementTree doesn't indent by default)
-    try:
-        ET.indent(tree, space="  ", level=0)  # py3.9+
-    except Exception:
-        pass
 
-    tree.write(path, encoding="utf-8", xml_declaration=True)
+def inject_uba_coordinator(*, coordinator_ip: str, path: Path) -> None:
+    merge_values(path, {"UnrealBuildAccelerator/Coordinator": coordinator_ip}, owned={}, force=True)
+
+
+def tune(*, cfg: dict, project_root: Path, path: Path, dry_run: bool, reprobe: bool, force: bool, coordinator_ip: str | None) -> int:
+    """``--tune``: probe the host, refine its profile from recorded compiles, merge executor settings."""
+    settings = uetune.TuneSettings.from_config(cfg, project_root)
+    profile = uetune.MachineProfile.load(settings.profile_path)
+    probe = profile.probe
+    if reprobe or probe is None or time.time() - probe.probed_at > settings.probe_days * 86400:
+        print(f"[info] Probing host (writes {settings.probe_mb} MB under {settings.probe_dir})")
+        probe = profile.probe = uetune.probe_host(settings)
+    print(f"[info] Host: {probe.describe()}")
+    used = profile.refine(uetune.history_records(cfg, project_root))
+    if used:
+        print(f"[info] Folded {used} new compile run(s) from build metrics into the profile")
+
+    uba = cfg.get("UBA", {}) if isinstance(cfg.get("UBA"), dict) else {}
+    rec = uetune.recommend(probe, profile, settings, uba=bool(uba.get("Enabled", False)))
+    for reason in rec.reasons:
+        print(f"[info] {reason}")
+    values = rec.values(settings.keys)
+    if coordinator_ip:
+        values["UnrealBuildAccelerator/Coordinator"] = coordinator_ip
+
+    result = merge_values(path, values, owned=profile.written, force=force, dry_run=dry_run)
+    for key, current, wanted in result.kept:
+        print(f"[warn] {key} = {current} was set by hand; keeping it (tuned value {wanted}; --force to overwrite)")
+    if dry_run:
+        print(result.diff or f"[ok] {path} already up to date")
+        return 0
+
+    kept = {key for key, _, _ in result.kept}
+    profile.written = {k: v for k, v in values.items() if k not in kept}
+    if not profile.applied or int(profile.applied[-1]["actions"]) != rec.actions:
+        profile.applied.append({"ts": time.time(), "actions": rec.actions})
+        del profile.applied[:-50]
+    profile.save(settings.profile_path)
+    if result.changed:
+        for key, old, new in result.changed:
+            print(f"[ok] {key}: {old if old is not None else '(unset)'} -> {new}")
+        print(f"[ok] Updated: {path}")
+    else:
+        print(f"[ok] {path} already up to date")
+    return 0
 
 
 def main() -> int:
-    parser = argparse.ArgumentParser(description="Inject UBA coordinator into UBT BuildConfiguration.xml")
+    parser = argparse.ArgumentParser(description="Inject UBA coordinator (and with --tune, host-sized executor settings) into UBT BuildConfiguration.xml")
     parser.add_argument(
         "--config-path",
         default=None,
@@ -95,15 +195,37 @@ def main() -> int:
         action="store_true",
         help="Allow writing BuildConfiguration.xml on non-Windows (UBA is typically Windows-only).",
     )
+    parser.add_argument("--tune", action="store_true", help="Size UBT parallelism (and UBA action limits) to this machine")
+    parser.add_argument("--dry-run", action="store_true", help="--tune: print the XML diff instead of writing it")
+    parser.add_argument("--reprobe", action="store_true", help="--tune: measure cores/RAM/disk again instead of using the cached probe")
+    parser.add_argument("--force", action="store_true", help="--tune: also overwrite values that were edited by hand")
+    parser.add_argument("--xml-path", default=None, help="BuildConfiguration.xml to update (default: the per-user UBT one)")
     args = parser.parse_args()
 
     build_root = uebuildlib.get_build_root(Path(__file__))
     config_path = Path(args.config_path).expanduser().resolve() if args.config_path else uebuildlib.default_config_path(build_root)
 
-    cfg = uebuildlib.read_json(config_path)
+    cfg = ueconfig.load(config_path).cfg
     uba = cfg.get("UBA", {}) if isinstance(cfg.get("UBA"), dict) else {}
     enabled = bool(uba.get("Enabled", False))
     coordinator_ip = uba.get("CoordinatorIP")
+    xml_path = Path(args.xml_path).expanduser() if args.xml_path else _buildconfiguration_xml_path()
+
+    if args.tune:
+        # UBT reads BuildConfiguration.xml on every platform; only the coordinator is Windows-gated.
+        if enabled and (not isinstance(coordinator_ip, str) or not coordinator_ip.strip()):
+            print("[error] UBA.Enabled is true but UBA.CoordinatorIP is missing.")
+            return 2
+        inject = enabled and (_is_windows() or args.force_non_windows)
+        return tune(
+            cfg=cfg,
+            project_root=uebuildlib.resolve_project_root(config_path),
+            path=xml_path,
+            dry_run=args.dry_run,
+            reprobe=args.reprobe,
+            force=args.force,
+            coordinator_ip=coordinator_ip.strip() if inject else None,
+        )
 
     if not enabled:
         print("[info] UBA is disabled in config; nothing to inject.")
@@ -117,7 +239,6 @@ def main() -> int:
         print("[info] Host is non-Windows; skip injection (use --force-non-windows to override).")
         return 0
 
-    xml_path = _buildconfiguration_xml_path()
     inject_uba_coordinator(coordinator_ip=coordinator_ip.strip(), path=xml_path)
     print(f"[ok] Updated: {xml_path}")
     return 0
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import uetreeindex
+
+
+def make_tree(root: Path, *, files: int, large_files: int, large_mb: int, seed: int) -> int:
+    """Synthetic UE-like tree: many small assets/sources plus a few large .uasset/.umap."""
+    rng = random.Random(seed)
+    total = 0
+    per_dir = 200
+    for i in range(files):
+        d = root / "Content" / f"Dir{i // per_dir:04d}"
+        if i % per_dir == 0:
+            d.mkdir(parents=True, exist_ok=True)
+        size = rng.choice((512, 2048, 8192, 32768))
+        (d / f"Asset{i:06d}.uasset").write_bytes(os.urandom(size))
+        total += size
+    big = root / "Content" / "Maps"
+    big.mkdir(parents=True, exist_ok=True)
+    for i in range(large_files):
+        path = big / f"Map{i:02d}.umap"
+        with path.open("wb") as fh:
+            block = os.urandom(1024 * 1024)
+            for _ in range(large_mb):
+                fh.write(block)
+        total += large_mb * 1024 * 1024
+    return total
+
+
+def _timed_scan(index: uetreeindex.TreeIndex, label: str) -> None:
+    stats = index.scan()
+    mb = stats.hashed_bytes / (1024 * 1024)
+    print(
+        f"{label:<8} files={stats.files:<7} hashed={stats.hashed:<7} "
+        f"({mb:8.1f} MB) {stats.seconds:7.2f}s  diff: +{len(stats.diff.added)} ~{len(stats.diff.modified)} -{len(stats.diff.removed)}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark uetreeindex cold/warm scans over a synthetic tree")
+    parser.add_argument("--files", type=int, default=100_000, help="Number of small files (default: 100000)")
+    parser.add_argument("--large-files", type=int, default=4, help="Number of large .umap files hashed via mmap")
+    parser.add_argument("--large-mb", type=int, default=64, help="Size of each large file in MB")
+    parser.add_argument("--touch-percent", type=float, default=1.0, help="Percent of files modified before the incremental pass")
+    parser.add_argument("--workers", type=int, default=0, help="Hashing threads (default: auto)")
+    parser.add_argument("--dir", default=None, help="Use/keep this directory instead of a temp dir")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    work = Path(args.dir) if args.dir else Path(tempfile.mkdtemp(prefix="treeindex-bench-"))
+    root = work / "Project"
+    db = work / "index.sqlite"
+    try:
+        if not root.exists():
+            started = time.monotonic()
+            total = make_tree(root, files=args.files, large_files=args.large_files, large_mb=args.large_mb, seed=args.seed)
+            print(f"[info] Generated {args.files + args.large_files} files ({total / (1024 * 1024):.0f} MB) in {time.monotonic() - started:.1f}s")
+        if db.exists():
+            db.unlink()
+
+        with uetreeindex.TreeIndex(db, root, workers=args.workers or None) as index:
+            _timed_scan(index, "cold")
+            index.snapshot("bench")
+            _timed_scan(index, "warm")
+
+            rng = random.Random(args.seed + 1)
+            all_files = sorted((root / "Content").rglob("*.uasset"))
+            touched = rng.sample(all_files, max(1, int(len(all_files) * args.touch_percent / 100)))
+            for path in touched:
+                with path.open("ab") as fh:
+                    fh.write(b"x")
+            _timed_scan(index, "touched")
+            diff = index.diff("bench")
+            print(f"[info] diff since snapshot: +{len(diff.added)} ~{len(diff.modified)} -{len(diff.removed)}")
+    finally:
+        if not args.dir:
+            shutil.rmtree(work, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,512 @@
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import os
+import secrets
+import socket
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import uebuildlib
+import uepublish
+
+# Under ArtifactsDir: one JSON record per build, written once with an atomic rename, so any
+# number of build machines can add records to a share without a lock.
+_RECORDS_DIR = Path(".index") / "builds"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    platform TEXT NOT NULL,
+    config TEXT NOT NULL,
+    dir TEXT NOT NULL,
+    created REAL NOT NULL,
+    host TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    files INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    build TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    key TEXT NOT NULL  -- content digest when published through the CAS, else <dir>/<path>
+);
+CREATE INDEX IF NOT EXISTS files_build ON files(build);
+CREATE INDEX IF NOT EXISTS files_key ON files(key);
+CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT NOT NULL);
+"""
+
+
+@dataclass(frozen=True)
+class Retention:
+    keep_last: int  # per platform/config
+    keep_tags: tuple[str, ...]  # builds with a tag matching one of these are never collected
+    max_total_bytes: int | None
+    orphan_age_hours: float  # younger unreferenced CAS objects may belong to a publish in flight
+
+
+@dataclass(frozen=True)
+class ArtifactSettings:
+    index: bool  # record every archived build in <ArtifactsDir>/.index (default: same as versioned)
+    versioned: bool  # archive each build into <Platform>/<Config>/<BuildId> instead of overwriting
+    cache_dir: Path  # local mirror of the index; planning never touches the share
+    workers: int
+    retention: Retention
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any], project_root: Path) -> "ArtifactSettings":
+        a = uebuildlib._get_dict(cfg, "Artifacts")
+        keep_last = a.get("KeepLast", 5)
+        keep_tags = a.get("KeepTags")
+        max_gb = a.get("MaxTotalGB")
+        workers = a.get("Workers", 16)
+        age = a.get("OrphanAgeHours", 24)
+        versioned = uebuildlib._bool(a.get("Versioned"), False)
+        return cls(
+            # Indexing pays off once builds are kept side by side; a single overwritten archive needs no index.
+            index=uebuildlib._bool(a.get("Index"), versioned),
+            versioned=versioned,
+            cache_dir=project_root / "Saved" / "ArtifactsIndex",
+            workers=workers if isinstance(workers, int) and workers > 0 else 16,
+            retention=Retention(
+                keep_last=keep_last if isinstance(keep_last, int) and keep_last > 0 else 5,
+                keep_tags=tuple(keep_tags) if isinstance(keep_tags, list) else ("*",),
+                max_total_bytes=int(max_gb * 1024**3) if isinstance(max_gb, (int, float)) and max_gb > 0 else None,
+                orphan_age_hours=float(age) if isinstance(age, (int, float)) and age >= 0 else 24.0,
+            ),
+        )
+
+
+def new_build_id(platform: str, build_config: str) -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{platform}-{build_config}-{secrets.token_hex(2)}"
+
+
+@dataclass
+class BuildRecord:
+    id: str
+    platform: str
+    config: str
+    dir: str  # relative to ArtifactsDir, posix
+    created: float
+    host: str
+    tags: list[str] = field(default_factory=list)
+    files: dict[str, list[Any]] = field(default_factory=dict)  # rel -> [size, sha256 or None]
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "platform": self.platform,
+            "config": self.config,
+            "dir": self.dir,
+            "created": self.created,
+            "host": self.host,
+            "tags": self.tags,
+            "files": self.files,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> "BuildRecord":
+        return cls(
+            id=str(data["id"]),
+            platform=str(data["platform"]),
+            config=str(data["config"]),
+            dir=str(data["dir"]),
+            created=float(data["created"]),
+            host=str(data.get("host", "")),
+            tags=[str(t) for t in data.get("tags", [])],
+            files={str(k): list(v) for k, v in data.get("files", {}).items()},
+        )
+
+
+def files_in(directory: Path) -> dict[str, list[Any]]:
+    """File list of a build that was archived without the CAS (one walk, at archive time)."""
+    files: dict[str, list[Any]] = {}
+    stack = [directory]
+    while stack:
+        d = stack.pop()
+        try:
+            entries = list(os.scandir(d))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(Path(entry.path))
+            elif entry.is_file(follow_symlinks=False):
+                files[Path(entry.path).relative_to(directory).as_posix()] = [entry.stat().st_size, None]
+    return files
+
+
+def published_files(dest_dir: Path) -> dict[str, list[Any]] | None:
+    """File list with content digests from the manifest a publish leaves in its destination."""
+    try:
+        manifest = json.loads((dest_dir / uepublish._DEST_MANIFEST).read_text(encoding="utf-8"))["files"]
+        return {rel: [int(e["size"]), str(e["sha256"])] for rel, e in manifest.items()}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def write_record(artifacts_root: Path, record: BuildRecord) -> Path:
+    path = artifacts_root / _RECORDS_DIR / f"{record.id}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    tmp.write_text(json.dumps(record.to_json(), separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+@dataclass(frozen=True)
+class Build:
+    id: str
+    platform: str
+    config: str
+    dir: str
+    created: float
+    host: str
+    tags: tuple[str, ...]
+    files: int
+    bytes: int
+
+    @property
+    def group(self) -> tuple[str, str]:
+        return self.platform, self.config
+
+
+class ArtifactIndex:
+    """Local SQLite mirror of ``<ArtifactsDir>/.index/builds``.
+
+    ``sync`` stats the records directory; only when its mtime moved does it list it, and then
+    it reads just the records it has not seen. Everything else is queries on the mirror.
+    """
+
+    def __init__(self, artifacts_root: Path, settings: ArtifactSettings) -> None:
+        self.root = artifacts_root
+        self.settings = settings
+        self.records = artifacts_root / _RECORDS_DIR
+        key = hashlib.sha1(str(artifacts_root).encode("utf-8")).hexdigest()[:12]
+        settings.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(settings.cache_dir / f"{key}.sqlite"))
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "ArtifactIndex":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _meta(self, k: str) -> str | None:
+        row = self._db.execute("SELECT v FROM meta WHERE k = ?", (k,)).fetchone()
+        return row[0] if row else None
+
+    def sync(self, *, force: bool = False) -> int:
+        """Bring the mirror up to date; returns the number of records (re)read."""
+        try:
+            dir_mtime = str(self.records.stat().st_mtime_ns)
+        except OSError:
+            dir_mtime = "missing"
+        if not force and self._meta("records_mtime") == dir_mtime:
+            return 0
+        on_share: dict[str, int] = {}
+        try:
+            for entry in os.scandir(self.records):
+                if entry.name.endswith(".json") and not entry.name.startswith("."):
+                    on_share[entry.name[: -len(".json")]] = entry.stat().st_mtime_ns
+        except OSError:
+            pass
+        known = dict(self._db.execute("SELECT id, mtime_ns FROM builds"))
+        read = 0
+        with self._db:
+            for build_id in set(known) - set(on_share):
+                self._forget(build_id)
+            for build_id, mtime_ns in on_share.items():
+                if known.get(build_id) == mtime_ns:
+                    continue
+                try:
+                    record = BuildRecord.from_json(json.loads((self.records / f"{build_id}.json").read_text(encoding="utf-8")))
+                except (OSError, ValueError, KeyError, TypeError):
+                    continue  # half-copied or foreign file: retried on the next sync
+                self._forget(build_id)
+                self._ingest(record, mtime_ns)
+                read += 1
+            self._db.execute("INSERT OR REPLACE INTO meta (k, v) VALUES ('records_mtime', ?)", (dir_mtime,))
+        return read
+
+    def _forget(self, build_id: str) -> None:
+        self._db.execute("DELETE FROM builds WHERE id = ?", (build_id,))
+        self._db.execute("DELETE FROM files WHERE build = ?", (build_id,))
+
+    def _ingest(self, record: BuildRecord, mtime_ns: int) -> None:
+        total = sum(int(size) for size, _ in record.files.values())
+        self._db.execute(
+            "INSERT INTO builds VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (record.id, mtime_ns, record.platform, record.config, record.dir, record.created, record.host,
+             json.dumps(record.tags), len(record.files), total),
+        )
+        self._db.executemany(
+            "INSERT INTO files VALUES (?, ?, ?, ?)",
+            ((record.id, rel, int(size), digest or f"{record.dir}/{rel}") for rel, (size, digest) in record.files.items()),
+        )
+
+    def builds(self) -> list[Build]:
+        rows = self._db.execute(
+            "SELECT id, platform, config, dir, created, host, tags, files, bytes FROM builds ORDER BY created DESC, id DESC"
+        )
+        return [Build(r[0], r[1], r[2], r[3], r[4], r[5], tuple(json.loads(r[6])), r[7], r[8]) for r in rows]
+
+    def stored_bytes(self, build_ids: list[str]) -> int:
+        """Bytes on the share for these builds: content shared through the CAS counts once."""
+        self._db.execute("CREATE TEMP TABLE IF NOT EXISTS sel (id TEXT PRIMARY KEY)")
+        self._db.execute("DELETE FROM sel")
+        self._db.executemany("INSERT OR IGNORE INTO sel VALUES (?)", ((b,) for b in build_ids))
+        row = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM files WHERE build IN (SELECT id FROM sel) GROUP BY key)"
+        ).fetchone()
+        return int(row[0])
+
+    def refcounts(self, build_ids: list[str]) -> dict[str, tuple[int, int]]:
+        """key -> (size, number of these builds referencing it)."""
+        self._db.execute("CREATE TEMP TABLE IF NOT EXISTS sel (id TEXT PRIMARY KEY)")
+        self._db.execute("DELETE FROM sel")
+        self._db.executemany("INSERT OR IGNORE INTO sel VALUES (?)", ((b,) for b in build_ids))
+        rows = self._db.execute(
+            "SELECT key, MAX(size), COUNT(DISTINCT build) FROM files WHERE build IN (SELECT id FROM sel) GROUP BY key"
+        )
+        return {key: (size, count) for key, size, count in rows}
+
+    def files(self, build_id: str) -> list[tuple[str, int, str]]:
+        return list(self._db.execute("SELECT path, size, key FROM files WHERE build = ?", (build_id,)))
+
+    def find(self, build_id: str, *, platform: str | None = None, config: str | None = None) -> Build | None:
+        """A build by id, or ``latest`` (optionally of one platform/config)."""
+        for b in self.builds():
+            if build_id == "latest":
+                if (platform is None or b.platform == platform) and (config is None or b.config == config):
+                    return b
+            elif b.id == build_id:
+                return b
+        return None
+
+    def set_tags(self, build_id: str, add: list[str], remove: list[str]) -> list[str]:
+        """Rewrite the build's record on the share with new tags."""
+        path = self.records / f"{build_id}.json"
+        record = BuildRecord.from_json(json.loads(path.read_text(encoding="utf-8")))
+        record.tags = sorted((set(record.tags) | set(add)) - set(remove))
+        write_record(self.root, record)
+        self.sync()
+        return record.tags
+
+
+@dataclass
+class GcPlan:
+    keep: list[Build] = field(default_factory=list)
+    drop: list[Build] = field(default_factory=list)  # directory and unshared CAS content deleted
+    replaced: list[Build] = field(default_factory=list)  # a newer build reused the directory: record only
+    reasons: dict[str, str] = field(default_factory=dict)
+    cas_objects: list[tuple[str, int]] = field(default_factory=list)  # digests only dropped builds used
+    reclaim_bytes: int = 0
+    stored_before: int = 0
+    stored_after: int = 0
+    seconds: float = 0.0
+
+
+def plan_gc(index: ArtifactIndex, retention: Retention) -> GcPlan:
+    """Decide what to collect, from the index alone.
+
+    Newest KeepLast builds per platform/config and tagged builds stay; then, while the kept
+    set is over MaxTotalGB, the oldest untagged builds go (never a platform/config's newest).
+    """
+    t0 = time.monotonic()
+    plan = GcPlan()
+    newest_in_dir: set[str] = set()
+    per_group: dict[tuple[str, str], int] = {}
+    builds = index.builds()
+    for b in builds:  # newest first
+        tag = next((t for t in b.tags if any(fnmatch.fnmatchcase(t, p) for p in retention.keep_tags)), None)
+        if b.dir in newest_in_dir:
+            if tag is not None:
+                # Its files were overwritten, but published content survives in the CAS.
+                plan.keep.append(b)
+                plan.reasons[b.id] = f"tagged {tag} (directory reused; content only in the CAS)"
+            else:
+                plan.replaced.append(b)
+                plan.reasons[b.id] = "directory reused by a newer build"
+            continue
+        newest_in_dir.add(b.dir)
+        rank = per_group.get(b.group, 0)
+        per_group[b.group] = rank + 1
+        if rank < retention.keep_last:
+            plan.keep.append(b)
+            plan.reasons[b.id] = f"newest {rank + 1} of {b.platform}-{b.config}"
+        elif tag is not None:
+            plan.keep.append(b)
+            plan.reasons[b.id] = f"tagged {tag}"
+        else:
+            plan.drop.append(b)
+            plan.reasons[b.id] = f"beyond the newest {retention.keep_last}"
+
+    refs = index.refcounts([b.id for b in plan.keep])
+    stored = sum(size for size, _ in refs.values())
+    plan.stored_before = index.stored_bytes([b.id for b in builds])
+    if retention.max_total_bytes is not None and stored > retention.max_total_bytes:
+        newest = {}
+        for b in plan.keep:
+            newest.setdefault(b.group, b.id)
+        evictable = [b for b in reversed(plan.keep) if b.id not in newest.values() and not plan.reasons[b.id].startswith("tagged")]
+        evictable.sort(key=lambda b: b.created)
+        for b in evictable:
+            if stored <= retention.max_total_bytes:
+                break
+            # refcounts() counts builds, not files: a build holding a digest twice releases it once.
+            for key in {k for _, _, k in index.files(b.id)}:
+                size, count = refs[key]
+                refs[key] = (size, count - 1)
+                if count == 1:
+                    stored -= size
+            plan.keep.remove(b)
+            plan.drop.append(b)
+            plan.reasons[b.id] = f"over MaxTotalGB ({retention.max_total_bytes / 1024**3:g})"
+    plan.stored_after = stored
+
+    kept = {key for key, (_, count) in refs.items() if count > 0}
+    freed: dict[str, int] = {}
+    for b in plan.drop + plan.replaced:
+        for _, size, key in index.files(b.id):
+            # A replaced build's own directory entries are the newer build's files now.
+            if key not in kept and (b in plan.drop or "/" not in key):
+                freed[key] = size
+    plan.cas_objects = sorted((key, size) for key, size in freed.items() if "/" not in key)
+    plan.reclaim_bytes = sum(freed.values())
+    plan.drop.sort(key=lambda b: b.created)
+    plan.seconds = time.monotonic() - t0
+    return plan
+
+
+@dataclass
+class GcResult:
+    files: int = 0
+    objects: int = 0
+    bytes: int = 0
+    records: int = 0
+    errors: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+def _unlink(path: Path) -> str | None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as exc:
+        return f"{path}: {exc}"
+    return None
+
+
+def run_gc(index: ArtifactIndex, plan: GcPlan, *, workers: int) -> GcResult:
+    """Delete what ``plan`` drops, ``workers`` files at a time; records go last, per build, on success."""
+    t0 = time.monotonic()
+    result = GcResult()
+    cas_root = index.root / uepublish._CAS_DIR
+    failed: set[str] = set()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="artifacts-gc") as pool:
+        for b in plan.drop:
+            build_dir = index.root / b.dir
+            files = index.files(b.id)
+            paths = [build_dir / rel for rel, _, _ in files] + [build_dir / uepublish._DEST_MANIFEST]
+            errors = [e for e in pool.map(_unlink, paths) if e]
+            if errors:
+                failed.add(b.id)
+                result.errors.extend(errors)
+            result.files += len(files) - len(errors)
+            # Directories are known from the file list: deepest first, no walk of the share.
+            dirs = {build_dir.joinpath(*Path(rel).parts[:i]) for rel, _, _ in files for i in range(1, len(Path(rel).parts))}
+            for d in sorted(dirs, key=lambda p: len(p.parts), reverse=True) + [build_dir]:
+                try:
+                    d.rmdir()
+                except OSError:
+                    pass  # not empty: files this index never recorded stay untouched
+        objects = [uepublish._cas_object(cas_root, digest) for digest, _ in plan.cas_objects]
+        errors = [e for e in pool.map(_unlink, objects) if e]
+        result.errors.extend(errors)
+        result.objects = len(objects) - len(errors)
+    if not result.errors:
+        result.bytes = plan.reclaim_bytes
+    for b in plan.drop + plan.replaced:
+        if b.id in failed:
+            continue
+        if _unlink(index.records / f"{b.id}.json") is None:
+            result.records += 1
+    index.sync()
+    result.seconds = time.monotonic() - t0
+    return result
+
+
+def collect_orphans(index: ArtifactIndex, *, workers: int, dry_run: bool) -> tuple[int, int]:
+    """CAS objects no record references (published before the index existed, or by a crashed publish).
+
+    This walks ``.cas`` once, so it is the slow, occasional companion of ``run_gc``.
+    """
+    referenced = {key for (key,) in index._db.execute("SELECT DISTINCT key FROM files") if "/" not in key}
+    cutoff = time.time() - index.settings.retention.orphan_age_hours * 3600
+    orphans: list[tuple[Path, int]] = []
+    cas_root = index.root / uepublish._CAS_DIR
+    try:
+        shards = [Path(e.path) for e in os.scandir(cas_root) if e.is_dir()]
+    except OSError:
+        shards = []
+    for shard in shards:
+        for entry in os.scandir(shard):
+            if entry.is_file() and entry.name not in referenced and ".tmp-" not in entry.name:
+                st = entry.stat()
+                if st.st_mtime < cutoff:
+                    orphans.append((Path(entry.path), st.st_size))
+    if not dry_run:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="artifacts-gc") as pool:
+            list(pool.map(_unlink, (p for p, _ in orphans)))
+    return len(orphans), sum(size for _, size in orphans)
+
+
+def record_build(
+    *,
+    artifacts_root: Path,
+    build_dir: Path,
+    build_id: str,
+    platform: str,
+    build_config: str,
+    published: bool,
+) -> BuildRecord | None:
+    """Index a freshly archived build; None when the build is not under ArtifactsDir."""
+    try:
+        rel = build_dir.resolve().relative_to(artifacts_root.resolve()).as_posix()
+    except ValueError:
+        return None
+    files = published_files(build_dir) if published else None
+    record = BuildRecord(
+        id=build_id,
+        platform=platform,
+        config=build_config,
+        dir=rel,
+        created=time.time(),
+        host=socket.gethostname(),
+        files=files if files is not None else files_in(build_dir),
+    )
+    record.files.pop(uepublish._DEST_MANIFEST, None)
+    write_record(artifacts_root, record)
+    return record
+
+
+def format_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024:
+            return f"{n:.1f} {unit}" if unit != "B" else f"{int(n)} B"
+        n /= 1024
+    return f"{n:.1f} TB"
@@ -0,0 +1,430 @@
+from __future__ import annotations
+
+import itertools
+import json
+import math
+import random
+import shutil
+import statistics
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+import ueartifacts
+import uebuildlib
+import ueconfig
+import uegovernor
+import uepak
+import uepipeline
+import ueprofile
+import uestream
+
+# What "cold" wipes before every measured run (relative to the project root). A shared DDC is
+# never touched: benchmark "DDC local vs shared" by overriding SharedDDC per variant instead.
+COLD_PATHS = ("DerivedDataCache", "Intermediate", "Binaries", "Saved/Cooked", "Saved/StagedBuilds")
+TOTAL = "total"
+OVERHEAD = "sdk_overhead"
+# Features the benchmark harness turns off so only the UAT run itself is measured.
+_QUIET = {
+    "Publish": {"Enabled": False},
+    "Symbols": {"Enabled": False},
+    "Metrics": {"Enabled": False},
+    "BuildCache": {"Enabled": False},
+    "PakReport": {"Enabled": False},
+}
+
+
+@dataclass
+class Variant:
+    name: str
+    overrides: dict[str, Any] = field(default_factory=dict)
+    extra_args: list[str] = field(default_factory=list)
+    env: dict[str, str] = field(default_factory=dict)
+    cache: str = "warm"
+
+
+@dataclass
+class BenchSpec:
+    platform: str
+    build_config: str
+    runs: int
+    warmup: int
+    variants: list[Variant]
+    baseline: str
+    clean_paths: list[str]
+    alpha: float
+
+    @classmethod
+    def load(cls, path: Path) -> "BenchSpec":
+        data = uebuildlib.read_json(path)
+        raw = data.get("Variants")
+        if not isinstance(raw, dict) or not raw:
+            raise uebuildlib.ConfigError(f"{path}: Variants must be a non-empty object")
+        default_cache = str(data.get("Cache", "warm"))
+        variants: list[Variant] = []
+        for name, v in raw.items():
+            v = v if isinstance(v, dict) else {}
+            cache = str(v.get("Cache", default_cache))
+            if cache not in ("cold", "warm"):
+                raise uebuildlib.ConfigError(f"{path}: Variants.{name}.Cache must be cold or warm")
+            variants.append(
+                Variant(
+                    name=name,
+                    overrides=uebuildlib._get_dict(v, "Overrides"),
+                    extra_args=[a for a in v.get("ExtraArgs", []) if isinstance(a, str) and a.strip()],
+                    env={str(k): str(val) for k, val in uebuildlib._get_dict(v, "Env").items()},
+                    cache=cache,
+                )
+            )
+        baseline = data.get("Baseline", variants[0].name)
+        if baseline not in raw:
+            raise uebuildlib.ConfigError(f"{path}: Baseline '{baseline}' is not one of the variants")
+        runs = data.get("Runs", 3)
+        warmup = data.get("Warmup", 1)
+        clean = data.get("CleanPaths", list(COLD_PATHS))
+        return cls(
+            platform=str(data.get("Platform", "Win64")),
+            build_config=str(data.get("Config", "Development")),
+            runs=runs if isinstance(runs, int) and runs > 0 else 3,
+            warmup=warmup if isinstance(warmup, int) and warmup >= 0 else 1,
+            variants=variants,
+            baseline=baseline,
+            clean_paths=[p for p in clean if isinstance(p, str)] if isinstance(clean, list) else list(COLD_PATHS),
+            alpha=float(data.get("Alpha", 0.05)),
+        )
+
+
+@dataclass
+class Sample:
+    variant: str
+    round: int
+    returncode: int
+    stages: dict[str, float]
+    peak_rss_gb: float = 0.0
+
+
+def clean(project_root: Path, paths: Iterable[str]) -> None:
+    for rel in paths:
+        target = (project_root / rel).resolve()
+        # Never follow a CleanPaths entry out of the project.
+        if project_root.resolve() not in target.parents:
+            print(f"[warn] Not cleaning {target}: outside the project")
+            continue
+        shutil.rmtree(target, ignore_errors=True)
+
+
+def run_once(
+    *,
+    cfg: dict[str, Any],
+    config_path: Path,
+    spec: BenchSpec,
+    variant: Variant,
+    log_dir: Path,
+    console: str,
+) -> Sample:
+    vcfg = ueconfig.merge(ueconfig.merge(cfg, _QUIET), variant.overrides)
+    project_root = uebuildlib.resolve_project_root(config_path)
+    job = uepipeline.plan_job(
+        cfg=vcfg,
+        config_path=config_path,
+        platform=spec.platform,
+        build_config=spec.build_config,
+        extra_uat_args=variant.extra_args,
+        log_root=log_dir,
+        archive_dir=log_dir / "Archive",
+    )
+    job.env.update(variant.env)
+    profiler = ueprofile.StageProfiler(job.name)
+    sampler: list[uegovernor.ProcessTreeSampler] = []
+    start = time.monotonic()
+    profiler.mark_process_start()
+    rc = uebuildlib.run(
+        job.cmd,
+        cwd=project_root,
+        env=job.env,
+        log_path=job.log_dir / "UAT.log",
+        job=f"{variant.name}",
+        log_settings=uestream.LogSettings.from_config(vcfg, console=console),
+        sinks=[profiler.feed],
+        on_spawn=lambda pid: sampler.append(uegovernor.ProcessTreeSampler(pid, interval=1.0).start()),
+    )
+    profiler.finish()
+    stages = profiler.summary()
+    stages[TOTAL] = round(time.monotonic() - start, 3)
+    # The bundled FakeEngine reports its own wall time: the rest is uebuild's overhead.
+    fake_stats = job.log_dir / "FakeUAT-Stats.json"
+    if fake_stats.exists():
+        stages[OVERHEAD] = round(stages[TOTAL] - float(json.loads(fake_stats.read_text(encoding="utf-8"))["seconds"]), 3)
+    usage = sampler[0].stop() if sampler else uegovernor.Usage()
+    shutil.rmtree(job.archive_dir, ignore_errors=True)
+    return Sample(variant.name, 0, rc, stages, round(usage.peak_ram_gb, 2))
+
+
+def run_bench(
+    *,
+    cfg: dict[str, Any],
+    config_path: Path,
+    spec: BenchSpec,
+    out_dir: Path,
+    console: str = "off",
+) -> list[Sample]:
+    """Run every variant ``spec.runs`` times, round-robin so slow drift hits all variants alike."""
+    project_root = uebuildlib.resolve_project_root(config_path)
+    samples: list[Sample] = []
+    for variant in spec.variants:
+        # Warm variants get unmeasured runs first so the first measured run isn't a cold one.
+        for i in range(spec.warmup if variant.cache == "warm" else 0):
+            print(f"[info] [bench] {variant.name}: warm-up {i + 1}/{spec.warmup}")
+            run_once(cfg=cfg, config_path=config_path, spec=spec, variant=variant, log_dir=out_dir / variant.name / f"warmup-{i}", console=console)
+    for rnd in range(spec.runs):
+        for variant in spec.variants:
+            if variant.cache == "cold":
+                clean(project_root, spec.clean_paths)
+            sample = run_once(
+                cfg=cfg, config_path=config_path, spec=spec, variant=variant, log_dir=out_dir / variant.name / f"run-{rnd}", console=console
+            )
+            sample.round = rnd
+            status = "ok" if sample.returncode == 0 else f"FAILED (rc={sample.returncode})"
+            print(f"[info] [bench] {variant.name}: run {rnd + 1}/{spec.runs} {sample.stages[TOTAL]:.1f}s {status}")
+            samples.append(sample)
+    return samples
+
+
+# --- statistics -----------------------------------------------------------------------------
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Linear-interpolated percentile (``q`` in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100.0
+    lo, hi = math.floor(pos), math.ceil(pos)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def permutation_p(a: list[float], b: list[float], *, rounds: int = 20000) -> float:
+    """Two-sided permutation test on the difference of means.
+
+    Exact when the number of relabelings is small (typical 3-10 runs per side), otherwise
+    Monte Carlo with a fixed seed so reports are reproducible. No normality assumption,
+    which matters for build times (long right tails from the odd slow cook).
+    """
+    if not a or not b:
+        return 1.0
+    pooled = a + b
+    observed = abs(statistics.fmean(a) - statistics.fmean(b))
+    total = sum(pooled)
+    n = len(a)
+
+    def extreme(idx: Iterable[int]) -> bool:
+        s = sum(pooled[i] for i in idx)
+        return abs(s / n - (total - s) / len(b)) >= observed - 1e-12
+
+    if math.comb(len(pooled), n) <= rounds:
+        hits = count = 0
+        for idx in itertools.combinations(range(len(pooled)), n):
+            count += 1
+            hits += extreme(idx)
+        return hits / count
+    rng = random.Random(0)
+    hits = sum(extreme(rng.sample(range(len(pooled)), n)) for _ in range(rounds))
+    return (hits + 1) / (rounds + 1)
+
+
+def describe(values: list[float]) -> dict[str, float]:
+    return {
+        "n": len(values),
+        "median": round(statistics.median(values), 3),
+        "p95": round(percentile(values, 95), 3),
+        "mean": round(statistics.fmean(values), 3),
+        "variance": round(statistics.variance(values), 4) if len(values) > 1 else 0.0,
+    }
+
+
+def by_stage(samples: Iterable[Sample]) -> dict[str, dict[str, list[float]]]:
+    """``{variant: {stage: [seconds, ...]}}`` from successful samples."""
+    out: dict[str, dict[str, list[float]]] = {}
+    for s in samples:
+        if s.returncode != 0:
+            continue
+        for stage, seconds in s.stages.items():
+            out.setdefault(s.variant, {}).setdefault(stage, []).append(seconds)
+    return out
+
+
+def compare(
+    current: dict[str, dict[str, list[float]]],
+    reference: dict[str, dict[str, list[float]]],
+    *,
+    alpha: float,
+    against: str | None = None,
+) -> list[dict[str, Any]]:
+    """Per variant and stage: stats, median change vs the reference and whether it is significant.
+
+    ``reference`` is a stored baseline (same variant names) or, with ``against``, one variant
+    of the current run that every other variant is compared with.
+    """
+    rows: list[dict[str, Any]] = []
+    for variant, stages in current.items():
+        ref_stages = reference.get(against or variant, {})
+        for stage, values in sorted(stages.items(), key=lambda kv: (kv[0] != TOTAL, kv[0])):
+            row: dict[str, Any] = {"variant": variant, "stage": stage, **describe(values)}
+            ref = ref_stages.get(stage)
+            if ref and not (against and variant == against):
+                ref_median = statistics.median(ref)
+                row["reference_median"] = round(ref_median, 3)
+                row["change_pct"] = round(100.0 * (row["median"] - ref_median) / ref_median, 1) if ref_median else 0.0
+                row["p_value"] = round(permutation_p(values, ref), 4)
+                if row["p_value"] < alpha:
+                    row["verdict"] = "slower" if row["median"] > ref_median else "faster"
+                else:
+                    row["verdict"] = "same"
+            rows.append(row)
+    return rows
+
+
+def format_rows(rows: list[dict[str, Any]]) -> list[str]:
+    lines = [f"  {'variant':<20} {'stage':<12} {'n':>3} {'median':>9} {'p95':>9} {'var':>9} {'vs ref':>8} {'p':>7}"]
+    for r in rows:
+        change = f"{r['change_pct']:+.1f}%" if "change_pct" in r else "-"
+        p = f"{r['p_value']:.3f}" if "p_value" in r else "-"
+        verdict = f"  {r['verdict']}" if r.get("verdict") not in (None, "same") else ""
+        lines.append(
+            f"  {r['variant']:<20} {r['stage']:<12} {r['n']:>3} {r['median']:>8.1f}s {r['p95']:>8.1f}s "
+            f"{r['variance']:>9.2f} {change:>8} {p:>7}{verdict}"
+        )
+    return lines
+
+
+def write_results(path: Path, spec: BenchSpec, samples: list[Sample], rows: list[dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "platform": spec.platform,
+        "config": spec.build_config,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "samples": [s.__dict__ for s in samples],
+        "comparison": rows,
+    }
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def load_samples(path: Path) -> list[Sample]:
+    data = uebuildlib.read_json(path)
+    return [Sample(**s) for s in data.get("samples", []) if isinstance(s, dict)]
+
+
+# --- pak compression variants ---------------------------------------------------------------
+
+
+@dataclass
+class PakVariantResult:
+    variant: str
+    returncode: int
+    pak_seconds: float
+    report: dict[str, Any] | None = None
+    decode: list[uepak.DecodeTiming] = field(default_factory=list)
+
+    @property
+    def decode_seconds(self) -> float:
+        return statistics.median(d.seconds for d in self.decode) if self.decode else 0.0
+
+    def to_json(self) -> dict[str, Any]:
+        totals = self.report["totals"] if self.report else {}
+        methods: dict[str, int] = {}
+        for container in (self.report or {}).get("containers", {}).values():
+            for method, stored in container["methods"].items():
+                methods[method] = methods.get(method, 0) + stored
+        return {
+            "variant": self.variant,
+            "returncode": self.returncode,
+            "pak_seconds": self.pak_seconds,
+            "disk": totals.get("disk"),
+            "stored": totals.get("stored"),
+            "raw": totals.get("raw"),
+            "decode_seconds": [round(d.seconds, 4) for d in self.decode],
+            "decode_mbps": round(self.decode[0].raw / 1048576 / self.decode_seconds, 1) if self.decode and self.decode_seconds else None,
+            "untimed": self.decode[0].untimed if self.decode else {},
+            "methods": methods,
+        }
+
+
+def run_pak_variants(
+    *,
+    cfg: dict[str, Any],
+    config_path: Path,
+    spec: BenchSpec,
+    out_dir: Path,
+    console: str = "off",
+    keep_staged: bool = False,
+) -> list[PakVariantResult]:
+    """Re-run only the stage/pak step over the existing cooked data once per variant, then size and decode its output.
+
+    Uses the bench spec format (Platform, Config, Variants with Overrides/ExtraArgs/Env);
+    ``Runs`` is the number of timed decompression passes per variant (the median is reported).
+    """
+    project_root = uebuildlib.resolve_project_root(config_path)
+    results: list[PakVariantResult] = []
+    for variant in spec.variants:
+        vcfg = ueconfig.merge(ueconfig.merge(cfg, _QUIET), variant.overrides)
+        log_dir = out_dir / variant.name
+        staging = log_dir / "Staged"
+        cmd, env = uebuildlib.build_uat_command(
+            cfg=vcfg,
+            config_path=config_path,
+            platform=spec.platform,
+            build_config=spec.build_config,
+            extra_uat_args=variant.extra_args,
+            archive_dir=log_dir / "Archive",
+            steps=["-skipcook", "-stage", "-pak", f"-stagingdirectory={staging}"],
+        )
+        uebuildlib.tag_job_env(env, job=variant.name, log_dir=log_dir, archive_dir=log_dir / "Archive")
+        env.update(variant.env)
+        profiler = ueprofile.StageProfiler(variant.name)
+        start = time.monotonic()
+        profiler.mark_process_start()
+        rc = uebuildlib.run(
+            cmd,
+            cwd=project_root,
+            env=env,
+            log_path=log_dir / "UAT.log",
+            job=variant.name,
+            log_settings=uestream.LogSettings.from_config(vcfg, console=console),
+            sinks=[profiler.feed],
+        )
+        profiler.finish()
+        result = PakVariantResult(variant.name, rc, profiler.summary().get("pak", round(time.monotonic() - start, 3)))
+        if rc == 0:
+            result.report = uepak.analyze(staging)
+            for _ in range(spec.runs):
+                result.decode.append(uepak.time_decompression(staging))
+            print(
+                f"[info] [pak-bench] {variant.name}: {ueartifacts.format_bytes(result.report['totals']['stored'])} stored, "
+                f"pak {result.pak_seconds:.1f}s, decode {result.decode_seconds:.3f}s"
+            )
+        else:
+            print(f"[error] [pak-bench] {variant.name}: stage/pak failed (rc={rc}); log: {log_dir / 'UAT.log'}")
+        if not keep_staged:
+            shutil.rmtree(staging, ignore_errors=True)
+        results.append(result)
+    return results
+
+
+def format_pak_variants(results: list[PakVariantResult], baseline: str) -> list[str]:
+    base = next((r for r in results if r.variant == baseline and r.report), None)
+    base_stored = base.report["totals"]["stored"] if base and base.report else 0
+    lines = [f"  {'variant':<24} {'stored':>10} {'ratio':>5} {'vs ' + baseline:>12} {'pak':>7} {'decode':>8} {'MB/s':>8}  methods"]
+    for r in results:
+        if r.report is None:
+            lines.append(f"  {r.variant:<24} {'failed':>10}")
+            continue
+        t = r.report["totals"]
+        delta = f"{100.0 * (t['stored'] - base_stored) / base_stored:+.1f}%" if base_stored else "-"
+        row = r.to_json()
+        untimed = ", ".join(f"{m} {ueartifacts.format_bytes(b)}" for m, b in row["untimed"].items())
+        mbps = f"{row['decode_mbps']:.0f}" if row["decode_mbps"] else "-"
+        methods = ", ".join(sorted(m for m, b in row["methods"].items() if b))
+        lines.append(
+            f"  {r.variant:<24} {ueartifacts.format_bytes(t['stored']):>10} {uepak.ratio(t['stored'], t['raw']):>5} {delta:>12} "
+            f"{r.pak_seconds:>6.1f}s {r.decode_seconds:>7.3f}s {mbps:>8}  {methods}" + (f"  (not timed: {untimed})" if untimed else "")
+        )
+    return lines
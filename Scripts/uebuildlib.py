@@ -2,11 +2,14 @@ from __future__ import annotations
 
 import json
 import os
-import subprocess
 import sys
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Callable, Iterable
+
+import ueengines
+import uestream
 
 
 class ConfigError(RuntimeError):
@@ -82,6 +85,14 @@ def uat_path(engine_root: Path) -> Path:
     return engine_root / "Engine" / "Build" / "BatchFiles" / "RunUAT.sh"
 
 
+def resolve_uat(cfg: dict[str, Any]) -> Path:
+    """``UAT.Path`` if set (a stand-in script, e.g. for testing), else RunUAT under ``EngineRoot``."""
+    override = _get_dict(cfg, "UAT").get("Path")
+    if isinstance(override, str) and override.strip():
+        return Path(override).expanduser()
+    return uat_path(Path(str(cfg["EngineRoot"])))
+
+
 def format_cmd(cmd: list[str]) -> str:
     def q(s: str) -> str:
         if any(c.isspace() for c in s) or '"' in s:
@@ -97,6 +108,11 @@ def run(
     cwd: Path | None = None,
     env: dict[str, str] | None = None,
     dry_run: bool = False,
+    log_path: Path | None = None,
+    job: str = "",
+    log_settings: uestream.LogSettings | None = None,
+    sinks: Iterable[Callable[[uestream.LogLine], None]] = (),
+    on_spawn: Callable[[int], None] | None = None,
 ) -> int:
     actual_cmd = cmd
     if _is_windows() and cmd:
@@ -107,8 +123,27 @@ def run(
     print(format_cmd(actual_cmd))
     if dry_run:
         return 0
-    completed = subprocess.run(actual_cmd, cwd=str(cwd) if cwd else None, env=env)
-    return int(completed.returncode)
+
+    # Stream the child's output line by line (timestamped, tagged with the job) to
+    # the per-job log, the console view and any extra sinks instead of inheriting stdout.
+    proc = uestream.StreamingProcess(actual_cmd, cwd=cwd, env=env, job=job)
+    if on_spawn is not None:
+        on_spawn(proc.pid)
+    uestream.pump(proc, log_path=log_path, settings=log_settings or uestream.LogSettings(), sinks=sinks)
+    return int(proc.returncode or 0)
+
+
+def build_log_dir(project_root: Path) -> Path:
+    return project_root / "Saved" / "BuildLogs" / f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+
+def tag_job_env(env: dict[str, str], *, job: str, log_dir: Path, archive_dir: Path) -> dict[str, str]:
+    # uebp_LogFolder makes UAT write its own logs next to ours instead of the shared engine folder.
+    env["uebp_LogFolder"] = str(log_dir)
+    env["UEBUILD_JOB"] = job
+    env["UEBUILD_LOG_DIR"] = str(log_dir)
+    env["UEBUILD_ARCHIVE_DIR"] = str(archive_dir)
+    return env
 
 
 def run_hook(
@@ -122,7 +157,7 @@ def run_hook(
     if not hook_script.exists():
         return 0
     cmd = [sys.executable, str(hook_script)]
-    return run(cmd, cwd=hooks_dir, env=env, dry_run=dry_run)
+    return run(cmd, cwd=hooks_dir, env=env, dry_run=dry_run, job=stage_name)
 
 
 def _bool(v: Any, default: bool = False) -> bool:
@@ -137,20 +172,34 @@ def _get_dict(d: dict[str, Any], key: str) -> dict[str, Any]:
 
 
 def validate_config(cfg: dict[str, Any], *, config_path: Path) -> ValidationResult:
+    """Check ``cfg``; an unset or ``"auto"`` EngineRoot is replaced by the discovered engine."""
     errors: list[str] = []
     warnings: list[str] = []
 
     engine_root = cfg.get("EngineRoot")
-    if not isinstance(engine_root, str) or not engine_root.strip():
-        errors.append("EngineRoot is required (string)")
-    else:
-        p = Path(engine_root)
-        if not p.exists():
-            errors.append(f"EngineRoot does not exist: {engine_root}")
+    uat_override = _get_dict(cfg, "UAT").get("Path")
+    if uat_override is not None and (not isinstance(uat_override, str) or not uat_override.strip()):
+        errors.append("UAT.Path must be a non-empty string if provided")
+    elif isinstance(uat_override, str):
+        if not Path(uat_override).expanduser().exists():
+            errors.append(f"UAT.Path does not exist: {uat_override}")
+    elif engine_root is not None and not isinstance(engine_root, str):
+        errors.append("EngineRoot must be a string if provided")
+    elif not engine_root or not engine_root.strip() or engine_root.strip().lower() == "auto":
+        # Discovered engines are cached in the engine registry; resolve in place for the caller.
+        try:
+            project_file: Path | None = find_uproject(resolve_project_root(config_path), cfg.get("ProjectName") if isinstance(cfg.get("ProjectName"), str) else None)
+        except ConfigError:
+            project_file = None
+        engine, reason = ueengines.resolve(cfg, project_file)
+        if engine is None or not engine.valid:
+            errors.append(f"EngineRoot auto-discovery failed: {reason or (engine.problem if engine else '')}")
         else:
-            uat = uat_path(p)
-            if not uat.exists():
-                errors.append(f"RunUAT not found under EngineRoot: {uat}")
+            cfg["EngineRoot"] = engine.root
+    else:
+        engine = ueengines.EngineRegistry.from_config(cfg).check(Path(engine_root))
+        if not engine.valid:
+            errors.append(engine.problem)
 
     project_name = cfg.get("ProjectName")
     if project_name is not None and not isinstance(project_name, str):
@@ -235,6 +284,21 @@ def platform_uat_args(cfg: dict[str, Any], platform: str) -> list[str]:
     return args
 
 
+def resolve_project_root(config_path: Path) -> Path:
+    # Prefer deriving ProjectRoot from config path when it matches the standard layout:
+    # <ProjectRoot>/Config/BuildSystem/BuildConfig.json
+    if config_path.parent.name == "BuildSystem" and config_path.parent.parent.name == "Config":
+        return config_path.parent.parent.parent.resolve()
+    # Fallback to deriving from this SDK's location (expects <ProjectRoot>/Build/...)
+    build_root_from_lib = get_build_root(Path(__file__))
+    return get_project_root(build_root_from_lib)
+
+
+def artifacts_root(cfg: dict[str, Any], project_root: Path) -> Path:
+    artifacts_dir = cfg.get("ArtifactsDir") if isinstance(cfg.get("ArtifactsDir"), str) else ""
+    return Path(artifacts_dir.strip() or str(project_root / "Saved" / "BuildArtifacts"))
+
+
 def build_uat_command(
     *,
     cfg: dict[str, Any],
@@ -242,37 +306,30 @@ def build_uat_command(
     platform: str,
     build_config: str,
     extra_uat_args: Iterable[str],
+    archive_dir: Path | None = None,
+    steps: Iterable[str] | None = None,
 ) -> tuple[list[str], dict[str, str]]:
-    engine_root = Path(str(cfg["EngineRoot"]))
-    uat = uat_path(engine_root)
-
-    # Prefer deriving ProjectRoot from config path when it matches the standard layout:
-    # <ProjectRoot>/Config/BuildSystem/BuildConfig.json
-    if config_path.parent.name == "BuildSystem" and config_path.parent.parent.name == "Config":
-        project_root = config_path.parent.parent.parent.resolve()
-    else:
-        # Fallback to deriving from this SDK's location (expects <ProjectRoot>/Build/...)
-        build_root_from_lib = get_build_root(Path(__file__))
-        project_root = get_project_root(build_root_from_lib)
+    """UAT BuildCookRun command + env; ``steps`` replaces ``-build`` and the BuildCookRun flags (phase mode)."""
+    uat = resolve_uat(cfg)
 
+    project_root = resolve_project_root(config_path)
     project_name = cfg.get("ProjectName") if isinstance(cfg.get("ProjectName"), str) else None
     project_file = find_uproject(project_root, project_name)
 
-    artifacts_dir = cfg.get("ArtifactsDir") if isinstance(cfg.get("ArtifactsDir"), str) else ""
-    archive_dir = artifacts_dir.strip() or str(project_root / "Saved" / "BuildArtifacts")
-    archive_dir = str(Path(archive_dir) / platform)
+    if archive_dir is None:
+        archive_dir = artifacts_root(cfg, project_root) / platform
 
     cmd: list[str] = [
         str(uat),
         "BuildCookRun",
         f"-project={project_file}",
         "-noP4",
-        "-build",
-        f"-clientconfig={build_config}",
-        f"-archivedirectory={archive_dir}",
     ]
+    if steps is None:
+        cmd.append("-build")
+    cmd.extend([f"-clientconfig={build_config}", f"-archivedirectory={archive_dir}"])
 
-    cmd.extend(buildcookrun_flags(cfg))
+    cmd.extend(buildcookrun_flags(cfg) if steps is None else steps)
     cmd.extend(platform_uat_args(cfg, platform))
 
     uba = _get_dict(cfg, "UBA")
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import ueconfig
+import ueengines
+import uetreeindex
+
+# Project inputs that decide what BuildCookRun produces.
+_INPUT_TREES = ("Source", "Config", "Content", "Plugins")
+# Never part of the fingerprint: generated output and our own cache/config bookkeeping.
+_IGNORED_DIRS = uetreeindex.DEFAULT_IGNORED_DIRS | {"BuildSystem"}
+
+
+def stable_cmd(cmd: list[str]) -> list[str]:
+    """The command without ``-archivedirectory=``: a versioned archive path changes on every build."""
+    return [a for a in cmd if not a.startswith("-archivedirectory=")]
+
+
+@dataclass(frozen=True)
+class CacheDecision:
+    fingerprint: str
+    action: str  # "build" | "skip" | "restore"
+    reason: str
+
+
+class BuildCache:
+    """Skip BuildCookRun when the same fingerprint already produced a valid archive."""
+
+    def __init__(self, cache_dir: Path, project_root: Path, *, store_artifacts: bool = False) -> None:
+        self.cache_dir = cache_dir
+        self.project_root = project_root
+        self.store_artifacts = store_artifacts
+        self._lock = threading.Lock()
+        self._inputs_digest: str | None = None
+        self._input_digests: dict[str, str] | None = None
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any], project_root: Path) -> "BuildCache | None":
+        cache_cfg = ueconfig.model(cfg).build_cache
+        if not cache_cfg.enabled:
+            return None
+        return cls(
+            Path(cache_cfg.dir) if cache_cfg.dir else project_root / "Saved" / "BuildCache",
+            project_root,
+            store_artifacts=cache_cfg.store_artifacts,
+        )
+
+    def input_digests(self, project_file: Path) -> dict[str, str]:
+        """Digest per project input (the .uproject and each input tree), from one shared scan."""
+        # Shared by every job of a matrix run: the project tree is hashed once per process.
+        with self._lock:
+            if self._input_digests is None:
+                include = [project_file.name, *_INPUT_TREES]
+                with uetreeindex.TreeIndex(
+                    self.cache_dir / "file-index.sqlite", self.project_root, include=include, ignored_dirs=_IGNORED_DIRS
+                ) as index:
+                    stats = index.scan()
+                    self._inputs_digest = index.digest()
+                    self._input_digests = {name: index.digest(name) for name in include}
+                print(
+                    f"[info] Build cache: indexed {stats.files} input files, rehashed {stats.hashed} in {stats.seconds:.1f}s"
+                )
+            return self._input_digests
+
+    def inputs_digest(self, project_file: Path) -> str:
+        self.input_digests(project_file)
+        assert self._inputs_digest is not None
+        return self._inputs_digest
+
+    def fingerprint(
+        self, *, cmd: list[str], project_file: Path, engine_root: Path, cfg: dict[str, Any], archive_base: Path
+    ) -> str:
+        """``archive_base`` is the stable archive location (without the per-build id) hashed in place of the cmd's."""
+        payload = {
+            "inputs": self.inputs_digest(project_file),
+            "cmd": stable_cmd(cmd),
+            "archive": str(archive_base),
+            "engine": ueengines.engine_version(engine_root, cfg),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _record_path(self, fingerprint: str) -> Path:
+        return self.cache_dir / "builds" / f"{fingerprint}.json"
+
+    def _stored_dir(self, fingerprint: str) -> Path:
+        return self.cache_dir / "artifacts" / fingerprint
+
+    def decide(self, fingerprint: str, archive_dir: Path) -> CacheDecision:
+        try:
+            record = json.loads(self._record_path(fingerprint).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return CacheDecision(fingerprint, "build", "no previous build with this fingerprint")
+
+        files = record.get("files", {}) if isinstance(record, dict) else {}
+        # Versioned builds never reuse a directory: check the archive of the build that made this record.
+        previous = record.get("archive_dir") if isinstance(record, dict) else None
+        previous_dir = Path(previous) if isinstance(previous, str) and previous else archive_dir
+        if files and _archive_matches(previous_dir, files):
+            return CacheDecision(fingerprint, "skip", f"archive up to date in {previous_dir} ({len(files)} files)")
+        if self._stored_dir(fingerprint).is_dir():
+            return CacheDecision(fingerprint, "restore", "archive changed; stored artifacts available")
+        return CacheDecision(fingerprint, "build", "archive missing or modified since last build")
+
+    def restore(self, fingerprint: str, archive_dir: Path) -> None:
+        if archive_dir.exists():
+            shutil.rmtree(archive_dir)
+        shutil.copytree(self._stored_dir(fingerprint), archive_dir)
+
+    def record(self, fingerprint: str, archive_dir: Path) -> None:
+        files: dict[str, list[int]] = {}
+        if archive_dir.is_dir():
+            for path in archive_dir.rglob("*"):
+                if path.is_file():
+                    st = path.stat()
+                    files[path.relative_to(archive_dir).as_posix()] = [st.st_size, st.st_mtime_ns]
+        record_path = self._record_path(fingerprint)
+        record_path.parent.mkdir(parents=True, exist_ok=True)
+        record_path.write_text(
+            json.dumps({"fingerprint": fingerprint, "archive_dir": str(archive_dir), "created": time.time(), "files": files}),
+            encoding="utf-8",
+        )
+        if self.store_artifacts and files:
+            stored = self._stored_dir(fingerprint)
+            if stored.exists():
+                shutil.rmtree(stored)
+            shutil.copytree(archive_dir, stored)
+
+
+def _archive_matches(archive_dir: Path, files: dict[str, list[int]]) -> bool:
+    for rel, (size, mtime_ns) in files.items():
+        try:
+            st = (archive_dir / rel).stat()
+            if st.st_size != size or st.st_mtime_ns != mtime_ns:
+                return False
+        except OSError:
+            return False
+    return True
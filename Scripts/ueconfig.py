@@ -0,0 +1,460 @@
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+import uebuildlib
+
+# Bump when the schema or validate_config rules change: older cached results are then ignored.
+SCHEMA_VERSION = 1
+ENV_PREFIX = "UEBUILD_CFG__"
+# A cached "config is valid" also vouches for EngineRoot/RunUAT on disk: re-check that this often.
+CACHE_SECONDS = 3600.0
+
+_SLOTS: dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+def merge(base: dict[str, Any], overrides: dict[str, Any]) -> dict[str, Any]:
+    """Deep-merge ``overrides`` into a copy of ``base`` (dicts merge, everything else replaces)."""
+    out = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(out.get(key), dict):
+            out[key] = merge(out[key], value)
+        else:
+            out[key] = copy.deepcopy(value)
+    return out
+
+
+# --- schema ----------------------------------------------------------------------------------
+
+# Types of the keys that aren't checked by uebuildlib.validate_config. ``[str]`` is a list of
+# strings, a tuple means "any of", "*" matches every key (e.g. each platform).
+SCHEMA: dict[str, Any] = {
+    "EngineVersion": str,
+    "ArtifactsDir": str,
+    "SharedDDC": str,
+    "Platforms": {
+        "*": {
+            "ExtraUATArgs": [str],
+            "RemoteBuild": bool,
+            "RemoteServer": (str, [str]),
+            "RemoteUser": str,
+            "SshKeyPath": str,
+            "SshPort": int,
+            "RemoteEngineRoot": str,
+            "RemoteProjectDir": str,
+            "SyncExcludes": [str],
+        }
+    },
+    "UBA": {"Enabled": bool, "CoordinatorIP": str},
+    "UAT": {"BuildCookRun": {"Cook": bool, "Stage": bool, "Package": bool, "Archive": bool, "Pak": bool}},
+    "Engines": {"RegistryFile": str, "SearchPaths": [str]},
+    "Publish": {"Enabled": bool},
+    "Symbols": {"Enabled": bool},
+    "Metrics": {"Enabled": bool, "Dir": str, "PrometheusFile": str},
+    "Phases": {"Enabled": bool, "Budget": dict},
+    "BuildCache": {"Enabled": bool},
+    "Governor": {"Enabled": bool},
+    "Matrix": {"MaxParallelJobs": int},
+    "Tune": {"ProfilePath": str, "Keys": dict},
+    "Artifacts": {
+        "Index": bool,
+        "Versioned": bool,
+        "Workers": int,
+        "KeepLast": int,
+        "KeepTags": [str],
+        "MaxTotalGB": (int, float),
+        "OrphanAgeHours": (int, float),
+    },
+    "CookShards": {"Count": int, "Dir": str, "Finalize": bool, "Regenerated": [str]},
+    "PakReport": {"Enabled": bool, "BaselineDir": str, "UpdateBaseline": bool, "MaxGrowthPercent": (int, float), "Top": int},
+    "Queue": {"Dir": str, "MaxWorkers": int, "CancelRunning": bool, "PollSeconds": (int, float)},
+    "Logging": {"Console": str},
+    "DDC": dict,
+}
+# Top-level keys read somewhere in the SDK; anything else is most likely a typo.
+KNOWN_SECTIONS = frozenset(SCHEMA) | {"ProjectName", "EngineRoot"}
+
+
+@dataclass(frozen=True, **_SLOTS)
+class _Rule:
+    path: tuple[str, ...]
+    types: tuple[Any, ...]
+
+    def describe(self) -> str:
+        names = ["an array of strings" if t == [str] else {str: "a string", bool: "true/false", int: "an integer", float: "a number", dict: "an object"}[t] for t in self.types]
+        return " or ".join(names)
+
+    def accepts(self, value: Any) -> bool:
+        for t in self.types:
+            if t == [str]:
+                if isinstance(value, list) and all(isinstance(x, str) for x in value):
+                    return True
+            elif t is int:
+                if isinstance(value, int) and not isinstance(value, bool):
+                    return True
+            elif isinstance(value, t):
+                return True
+        return False
+
+
+def compile_schema(schema: dict[str, Any], prefix: tuple[str, ...] = ()) -> list[_Rule]:
+    """Flatten the nested schema once into path rules (done at import)."""
+    rules: list[_Rule] = []
+    for key, spec in schema.items():
+        path = (*prefix, key)
+        if isinstance(spec, dict):
+            rules.append(_Rule(path, (dict,)))
+            rules.extend(compile_schema(spec, path))
+        else:
+            rules.append(_Rule(path, spec if isinstance(spec, tuple) else (spec,)))
+    return rules
+
+
+_RULES = compile_schema(SCHEMA)
+
+
+def _values(cfg: Any, path: tuple[str, ...], seen: tuple[str, ...] = ()) -> Iterator[tuple[str, Any]]:
+    if not path:
+        yield ".".join(seen), cfg
+        return
+    if not isinstance(cfg, dict):
+        return
+    head, rest = path[0], path[1:]
+    keys = list(cfg) if head == "*" else [head] if head in cfg else []
+    for key in keys:
+        yield from _values(cfg[key], rest, (*seen, key))
+
+
+def check_schema(cfg: dict[str, Any]) -> tuple[list[str], list[str]]:
+    errors = [
+        f"{name} must be {rule.describe()}"
+        for rule in _RULES
+        for name, value in _values(cfg, rule.path)
+        if not rule.accepts(value)
+    ]
+    warnings = [
+        f"Unknown setting {key!r} (ignored; typo?)"
+        for key in cfg
+        if key not in KNOWN_SECTIONS and not key.startswith(("_", "$", "//"))
+    ]
+    return errors, warnings
+
+
+# --- typed model -----------------------------------------------------------------------------
+
+
+@dataclass(frozen=True, **_SLOTS)
+class PlatformConfig:
+    name: str
+    extra_uat_args: tuple[str, ...]
+    remote_build: bool
+    settings: dict[str, Any]  # the raw Platforms.<name> object, for platform-specific extras
+
+
+@dataclass(frozen=True, **_SLOTS)
+class PublishConfig:
+    enabled: bool
+    staging_dir: str | None
+    workers: int
+    hardlink: bool
+
+
+@dataclass(frozen=True, **_SLOTS)
+class BuildCacheConfig:
+    enabled: bool
+    dir: str | None
+    store_artifacts: bool
+
+
+@dataclass(frozen=True, **_SLOTS)
+class BuildConfig:
+    """Typed view of the effective config (compiled once from the merged layers)."""
+
+    project_name: str | None
+    engine_root: str | None  # None: discovered (unset or "auto")
+    engine_version: str | None
+    artifacts_dir: str | None
+    shared_ddc: str | None
+    uat_path: str | None
+    uat_extra_args: tuple[str, ...]
+    buildcookrun_flags: tuple[str, ...]
+    uba_enabled: bool
+    uba_coordinator: str | None
+    publish: PublishConfig
+    build_cache: BuildCacheConfig
+    platforms: dict[str, PlatformConfig]
+
+    @classmethod
+    def compile(cls, cfg: dict[str, Any]) -> "BuildConfig":
+        def text(value: Any) -> str | None:
+            return value.strip() if isinstance(value, str) and value.strip() else None
+
+        uat = uebuildlib._get_dict(cfg, "UAT")
+        uba = uebuildlib._get_dict(cfg, "UBA")
+        publish = uebuildlib._get_dict(cfg, "Publish")
+        build_cache = uebuildlib._get_dict(cfg, "BuildCache")
+        engine_root = text(cfg.get("EngineRoot"))
+        workers = publish.get("Workers")
+        platforms = {
+            name: PlatformConfig(
+                name=name,
+                extra_uat_args=tuple(
+                    x for x in pcfg.get("ExtraUATArgs") or [] if isinstance(x, str) and x.strip()
+                ) if isinstance(pcfg.get("ExtraUATArgs"), list) else (),
+                remote_build=uebuildlib._bool(pcfg.get("RemoteBuild"), False),
+                settings=pcfg,
+            )
+            for name, pcfg in uebuildlib._get_dict(cfg, "Platforms").items()
+            if isinstance(pcfg, dict)
+        }
+        return cls(
+            project_name=text(cfg.get("ProjectName")),
+            engine_root=None if engine_root is None or engine_root.lower() == "auto" else engine_root,
+            engine_version=text(cfg.get("EngineVersion")),
+            artifacts_dir=text(cfg.get("ArtifactsDir")),
+            shared_ddc=text(cfg.get("SharedDDC")),
+            uat_path=text(uat.get("Path")),
+            uat_extra_args=tuple(uebuildlib.merged_uat_extra_args(cfg, [])),
+            buildcookrun_flags=tuple(uebuildlib.buildcookrun_flags(cfg)),
+            uba_enabled=uebuildlib._bool(uba.get("Enabled"), False),
+            uba_coordinator=text(uba.get("CoordinatorIP")),
+            publish=PublishConfig(
+                enabled=uebuildlib._bool(publish.get("Enabled"), False),
+                staging_dir=text(publish.get("StagingDir")),
+                workers=workers if isinstance(workers, int) and not isinstance(workers, bool) and workers > 0 else 8,
+                hardlink=uebuildlib._bool(publish.get("Hardlink"), True),
+            ),
+            build_cache=BuildCacheConfig(
+                enabled=uebuildlib._bool(build_cache.get("Enabled"), False),
+                dir=text(build_cache.get("Dir")),
+                store_artifacts=uebuildlib._bool(build_cache.get("StoreArtifacts"), False),
+            ),
+            platforms=platforms,
+        )
+
+
+# id(cfg) -> (cfg, its EngineRoot when compiled, model). Holding cfg keeps the id from being reused.
+_models: dict[int, tuple[dict[str, Any], Any, BuildConfig]] = {}
+_MODELS_MAX = 32
+_models_lock = threading.Lock()
+
+
+def model(cfg: dict[str, Any]) -> BuildConfig:
+    """The compiled model of this effective-config dict, compiled once per dict.
+
+    Discovery fills in ``EngineRoot`` after loading; that is the one in-place change, so it
+    is the one that triggers a recompile.
+    """
+    with _models_lock:
+        entry = _models.get(id(cfg))
+        if entry is not None and entry[0] is cfg and entry[1] == cfg.get("EngineRoot"):
+            return entry[2]
+        compiled = BuildConfig.compile(cfg)
+        if len(_models) >= _MODELS_MAX:
+            _models.pop(next(iter(_models)))
+        _models[id(cfg)] = (cfg, cfg.get("EngineRoot"), compiled)
+        return compiled
+
+
+# --- layers ----------------------------------------------------------------------------------
+
+
+@dataclass(frozen=True, **_SLOTS)
+class Layer:
+    name: str  # defaults | project | machine | env
+    source: str  # file path or "environment"
+    data: dict[str, Any]
+
+
+def machine_config_path() -> Path:
+    override = os.environ.get("UEBUILD_MACHINE_CONFIG")
+    return Path(override).expanduser() if override else Path.home() / ".uebuild" / "machine.json"
+
+
+def _match_key(d: dict[str, Any], schema: Any, name: str) -> str:
+    # Windows upper-cases environment variable names: match existing/schema keys case-insensitively.
+    candidates = list(d) + (list(schema) if isinstance(schema, dict) else [])
+    return next((k for k in candidates if k.lower() == name.lower() and k != "*"), name)
+
+
+def env_layer(environ: dict[str, str], base: dict[str, Any]) -> dict[str, Any]:
+    """``UEBUILD_CFG__UBA__Enabled=false`` -> ``{"UBA": {"Enabled": false}}`` (values parsed as JSON if they can be)."""
+    out: dict[str, Any] = {}
+    for var in sorted(environ):
+        if not var.upper().startswith(ENV_PREFIX) or len(var) == len(ENV_PREFIX):
+            continue
+        parts = [p for p in var[len(ENV_PREFIX):].split("__") if p]
+        raw = environ[var]
+        try:
+            value: Any = json.loads(raw)
+        except ValueError:
+            value = raw
+        node, known, schema = out, base, SCHEMA
+        for i, part in enumerate(parts):
+            key = _match_key(known if isinstance(known, dict) else {}, schema, part)
+            schema = schema.get(key, schema.get("*")) if isinstance(schema, dict) else None
+            known = known.get(key) if isinstance(known, dict) else None
+            if i == len(parts) - 1:
+                node[key] = value
+            else:
+                node = node.setdefault(key, {})
+    return out
+
+
+def _layer_files(config_path: Path, build_root: Path | None) -> list[Path]:
+    build_root = build_root or uebuildlib.get_build_root(Path(__file__))
+    return [build_root / "Templates" / "BuildConfig.defaults.json", config_path, machine_config_path()]
+
+
+def stamp(config_path: Path, *, build_root: Path | None = None) -> tuple[Any, ...]:
+    """Cheap change detector for all layers (stats + environment), for long-lived processes."""
+    stats: list[Any] = []
+    for path in _layer_files(config_path, build_root):
+        try:
+            st = path.stat()
+            stats.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            stats.append(None)
+    env = sorted((k, v) for k, v in os.environ.items() if k.upper().startswith(ENV_PREFIX))
+    return (*stats, *env)
+
+
+def load_layers(config_path: Path, *, build_root: Path | None = None, environ: dict[str, str] | None = None) -> list[Layer]:
+    defaults, _, machine = _layer_files(config_path, build_root)
+    layers: list[Layer] = []
+    if defaults.exists():
+        layers.append(Layer("defaults", str(defaults), uebuildlib.read_json(defaults)))
+    layers.append(Layer("project", str(config_path), uebuildlib.read_json(config_path)))
+    if machine.exists():
+        layers.append(Layer("machine", str(machine), uebuildlib.read_json(machine)))
+    merged: dict[str, Any] = {}
+    for layer in layers:
+        merged = merge(merged, layer.data)
+    env = env_layer(dict(os.environ if environ is None else environ), merged)
+    if env:
+        layers.append(Layer("env", "environment", env))
+    return layers
+
+
+@dataclass(**_SLOTS)
+class LoadedConfig:
+    path: Path
+    layers: list[Layer]
+    cfg: dict[str, Any]  # effective config; what every module reads
+    digest: str  # content hash of all layers: the validation cache key
+
+    @property
+    def model(self) -> BuildConfig:
+        return model(self.cfg)
+
+
+def load(config_path: Path, *, build_root: Path | None = None, environ: dict[str, str] | None = None) -> LoadedConfig:
+    """Merge defaults < project BuildConfig.json < machine overlay < ``UEBUILD_CFG__*`` environment."""
+    layers = load_layers(config_path, build_root=build_root, environ=environ)
+    cfg: dict[str, Any] = {}
+    h = hashlib.sha256(f"{SCHEMA_VERSION}\0{config_path}".encode())
+    for layer in layers:
+        cfg = merge(cfg, layer.data)
+        h.update(f"\0{layer.name}\0".encode())
+        h.update(json.dumps(layer.data, sort_keys=True).encode())
+    if model(cfg).engine_root is None:
+        # Discovery depends on the project's EngineAssociation.
+        project_name = cfg.get("ProjectName") if isinstance(cfg.get("ProjectName"), str) else None
+        try:
+            h.update(uebuildlib.find_uproject(uebuildlib.resolve_project_root(config_path), project_name).read_bytes())
+        except (uebuildlib.ConfigError, OSError):
+            pass
+    return LoadedConfig(path=config_path, layers=layers, cfg=cfg, digest=h.hexdigest())
+
+
+# --- cached validation -----------------------------------------------------------------------
+
+
+def _cache_path(digest: str) -> Path:
+    return Path.home() / ".uebuild" / "config-cache" / f"{digest}.json"
+
+
+def validate(loaded: LoadedConfig, *, use_cache: bool = True) -> uebuildlib.ValidationResult:
+    """Schema + ``validate_config`` on the effective config; a passing result is cached by content hash.
+
+    A hit skips every filesystem check (EngineRoot, RunUAT, engine discovery on network drives)
+    for ``CACHE_SECONDS``. Failures are never cached, so fixing the machine takes effect at once.
+    """
+    cache = _cache_path(loaded.digest)
+    if use_cache:
+        try:
+            entry = json.loads(cache.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            entry = None
+        if isinstance(entry, dict) and time.time() - float(entry.get("checked_at", 0)) < CACHE_SECONDS:
+            if isinstance(entry.get("EngineRoot"), str):
+                loaded.cfg["EngineRoot"] = entry["EngineRoot"]  # as resolved by discovery
+            return uebuildlib.ValidationResult(errors=[], warnings=list(entry.get("warnings", [])))
+
+    schema_errors, schema_warnings = check_schema(loaded.cfg)
+    result = uebuildlib.validate_config(loaded.cfg, config_path=loaded.path)
+    prefix = f"{loaded.path}: "
+    result = uebuildlib.ValidationResult(
+        errors=[prefix + e for e in schema_errors] + result.errors,
+        warnings=[prefix + w for w in schema_warnings] + result.warnings,
+    )
+    if result.ok:
+        try:
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache.with_suffix(f".tmp-{os.getpid()}")
+            tmp.write_text(
+                json.dumps({"checked_at": time.time(), "warnings": result.warnings, "EngineRoot": loaded.cfg.get("EngineRoot")}),
+                encoding="utf-8",
+            )
+            os.replace(tmp, cache)
+            _prune_cache(cache.parent)
+        except OSError:
+            pass  # a read-only home only costs the cache
+    return result
+
+
+def _prune_cache(cache_dir: Path) -> None:
+    """Drop expired entries; runs only on a full validation, so hits never list the directory."""
+    cutoff = time.time() - CACHE_SECONDS
+    for entry in os.scandir(cache_dir):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def load_validated(config_path: Path, *, build_root: Path | None = None) -> tuple[LoadedConfig, uebuildlib.ValidationResult]:
+    loaded = load(config_path, build_root=build_root)
+    return loaded, validate(loaded)
+
+
+def origins(layers: list[Layer]) -> dict[str, str]:
+    """Dotted key -> name of the layer that set its effective value."""
+    out: dict[str, str] = {}
+
+    def walk(data: dict[str, Any], prefix: str, layer: str) -> None:
+        for key, value in data.items():
+            name = f"{prefix}{key}"
+            # A parent that was a leaf (e.g. an empty default object) is now described by its children.
+            for parent in [name.rsplit(".", i)[0] for i in range(1, name.count(".") + 1)]:
+                out.pop(parent, None)
+            if isinstance(value, dict) and value:
+                walk(value, name + ".", layer)
+            else:
+                for k in [k for k in out if k == name or k.startswith(name + ".")]:
+                    del out[k]
+                out[name] = layer
+
+    for layer in layers:
+        walk(layer.data, "", layer.name)
+    return out
@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import os
+import queue
+import shutil
+import socket
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+import uebuildlib
+
+_MB = 1024 * 1024
+
+# Defaults for `ddc doctor`; override under "DDC" in BuildConfig.json.
+DEFAULT_THRESHOLDS = {
+    "MaxSmallReadMs": 20.0,
+    "MaxSmallWriteMs": 50.0,
+    "MinLargeReadMBps": 100.0,
+    "MinLargeWriteMBps": 50.0,
+}
+
+
+def shared_ddc_path(cfg: dict[str, Any]) -> Path | None:
+    shared = cfg.get("SharedDDC")
+    if isinstance(shared, str) and shared.strip():
+        return Path(shared)
+    return None
+
+
+def local_ddc_path(cfg: dict[str, Any]) -> Path:
+    """``DDC.LocalPath`` if set, else the engine-wide default local DDC for this host."""
+    ddc = uebuildlib._get_dict(cfg, "DDC")
+    local = ddc.get("LocalPath")
+    if isinstance(local, str) and local.strip():
+        return Path(local)
+    if os.name == "nt":
+        base = Path(os.environ.get("LOCALAPPDATA", str(Path.home() / "AppData" / "Local")))
+        return base / "UnrealEngine" / "Common" / "DerivedDataCache"
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Application Support" / "Epic" / "UnrealEngine" / "Common" / "DerivedDataCache"
+    return Path.home() / ".config" / "Epic" / "UnrealEngine" / "Common" / "DerivedDataCache"
+
+
+@dataclass
+class ProbeResult:
+    path: str
+    reachable: bool
+    small_files: int = 0
+    small_write_ms_p50: float = 0.0
+    small_write_ms_p95: float = 0.0
+    small_read_ms_p50: float = 0.0
+    small_read_ms_p95: float = 0.0
+    large_files: int = 0
+    large_write_mbps: float = 0.0
+    large_read_mbps: float = 0.0
+    seconds: float = 0.0
+    errors: list[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _p95(values: list[float]) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+
+
+def _drop_cache(fh: Any) -> None:
+    # Best effort: keep the client page cache from turning the read pass into a memory benchmark.
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+
+
+def _write_file(path: Path, data: bytes) -> float:
+    started = time.perf_counter()
+    with path.open("wb") as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+        _drop_cache(fh)
+    return time.perf_counter() - started
+
+
+def _read_file(path: Path) -> tuple[float, int]:
+    started = time.perf_counter()
+    total = 0
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(_MB), b""):
+            total += len(chunk)
+    return time.perf_counter() - started, total
+
+
+def probe(
+    ddc_path: Path,
+    *,
+    small_count: int = 64,
+    small_kb: int = 16,
+    large_count: int = 4,
+    large_mb: int = 64,
+    workers: int = 8,
+) -> ProbeResult:
+    """Parallel small-file latency and large-file throughput benchmark against a DDC share."""
+    started = time.monotonic()
+    result = ProbeResult(path=str(ddc_path), reachable=ddc_path.is_dir())
+    if not result.reachable:
+        result.errors.append(f"DDC path is not reachable: {ddc_path}")
+        return result
+
+    probe_dir = ddc_path / ".uebuild-probe" / f"{socket.gethostname()}-{os.getpid()}"
+    try:
+        probe_dir.mkdir(parents=True, exist_ok=True)
+        small_data = os.urandom(small_kb * 1024)
+        small_paths = [probe_dir / f"small-{i:04d}.bin" for i in range(small_count)]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ddc-probe") as pool:
+            write_ms = [t * 1000 for t in pool.map(lambda p: _write_file(p, small_data), small_paths)]
+            read_ms = [r[0] * 1000 for r in pool.map(_read_file, small_paths)]
+        result.small_files = small_count
+        result.small_write_ms_p50 = round(statistics.median(write_ms), 2) if write_ms else 0.0
+        result.small_write_ms_p95 = round(_p95(write_ms), 2)
+        result.small_read_ms_p50 = round(statistics.median(read_ms), 2) if read_ms else 0.0
+        result.small_read_ms_p95 = round(_p95(read_ms), 2)
+
+        large_data = os.urandom(_MB) * large_mb
+        large_paths = [probe_dir / f"large-{i:02d}.bin" for i in range(large_count)]
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, large_count)), thread_name_prefix="ddc-probe") as pool:
+            t0 = time.perf_counter()
+            list(pool.map(lambda p: _write_file(p, large_data), large_paths))
+            write_s = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            read_bytes = sum(r[1] for r in pool.map(_read_file, large_paths))
+            read_s = time.perf_counter() - t0
+        result.large_files = large_count
+        result.large_write_mbps = round(large_count * large_mb / write_s, 1) if write_s > 0 else 0.0
+        result.large_read_mbps = round(read_bytes / _MB / read_s, 1) if read_s > 0 else 0.0
+    except OSError as exc:
+        result.errors.append(f"Probe I/O failed: {exc}")
+    finally:
+        shutil.rmtree(probe_dir, ignore_errors=True)
+        result.seconds = round(time.monotonic() - started, 2)
+    return result
+
+
+def check_thresholds(result: ProbeResult, cfg: dict[str, Any]) -> list[str]:
+    ddc = uebuildlib._get_dict(cfg, "DDC")
+    limits = dict(DEFAULT_THRESHOLDS)
+    for key in limits:
+        value = ddc.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            limits[key] = float(value)
+
+    warnings: list[str] = []
+    if not result.reachable or result.errors:
+        return list(result.errors)
+    if result.small_read_ms_p95 > limits["MaxSmallReadMs"]:
+        warnings.append(f"small-file read p95 {result.small_read_ms_p95} ms > {limits['MaxSmallReadMs']} ms")
+    if result.small_write_ms_p95 > limits["MaxSmallWriteMs"]:
+        warnings.append(f"small-file write p95 {result.small_write_ms_p95} ms > {limits['MaxSmallWriteMs']} ms")
+    if result.large_read_mbps < limits["MinLargeReadMBps"]:
+        warnings.append(f"large-file read {result.large_read_mbps} MB/s < {limits['MinLargeReadMBps']} MB/s")
+    if result.large_write_mbps < limits["MinLargeWriteMBps"]:
+        warnings.append(f"large-file write {result.large_write_mbps} MB/s < {limits['MinLargeWriteMBps']} MB/s")
+    return warnings
+
+
+@dataclass(frozen=True)
+class DdcEntry:
+    rel: str
+    size: int
+    mtime: float
+
+
+def scan_entries(root: Path, *, since: float, workers: int = 16) -> list[DdcEntry]:
+    """Parallel directory walk (one scandir per task): SMB listing latency dominates, not CPU."""
+    found: list[DdcEntry] = []
+    lock = threading.Lock()
+    dirs: queue.Queue[tuple[str, str] | None] = queue.Queue()
+    dirs.put((str(root), ""))
+    pending = [1]
+
+    def _worker() -> None:
+        while True:
+            item = dirs.get()
+            if item is None:
+                return
+            directory, rel_dir = item
+            local: list[DdcEntry] = []
+            subdirs: list[tuple[str, str]] = []
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.name.startswith(".uebuild"):
+                            continue
+                        rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append((entry.path, rel))
+                        elif entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            if st.st_mtime >= since:
+                                local.append(DdcEntry(rel=rel, size=st.st_size, mtime=st.st_mtime))
+            except OSError:
+                pass
+            with lock:
+                found.extend(local)
+                pending[0] += len(subdirs) - 1
+                finished = pending[0] == 0
+            for sub in subdirs:
+                dirs.put(sub)
+            if finished:
+                for _ in range(workers):
+                    dirs.put(None)
+
+    threads = [threading.Thread(target=_worker, name=f"ddc-scan-{i}", daemon=True) for i in range(max(1, workers))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return found
+
+
+@dataclass
+class WarmStats:
+    candidates: int = 0
+    copied: int = 0
+    already_local: int = 0
+    failed: int = 0
+    copied_bytes: int = 0
+    seconds: float = 0.0
+
+
+def warm(
+    shared: Path,
+    local: Path,
+    *,
+    days: float = 7.0,
+    max_files: int = 200_000,
+    max_bytes: int = 20 * 1024 * _MB,
+    workers: int = 16,
+    dry_run: bool = False,
+) -> WarmStats:
+    """Prefetch the most recently used shared DDC entries into the local DDC."""
+    started = time.monotonic()
+    entries = scan_entries(shared, since=time.time() - days * 86400, workers=workers)
+    entries.sort(key=lambda e: e.mtime, reverse=True)
+
+    selected: list[DdcEntry] = []
+    budget = max_bytes
+    for entry in entries:
+        if len(selected) >= max_files or entry.size > budget:
+            break
+        selected.append(entry)
+        budget -= entry.size
+
+    stats = WarmStats(candidates=len(selected))
+    lock = threading.Lock()
+
+    def _copy(entry: DdcEntry) -> None:
+        dst = local / entry.rel
+        try:
+            if dst.exists() and dst.stat().st_size == entry.size:
+                with lock:
+                    stats.already_local += 1
+                return
+            if not dry_run:
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                tmp = dst.with_name(f"{dst.name}.tmp-{threading.get_ident()}")
+                shutil.copyfile(shared / entry.rel, tmp)
+                os.replace(tmp, dst)
+            with lock:
+                stats.copied += 1
+                stats.copied_bytes += entry.size
+        except OSError:
+            with lock:
+                stats.failed += 1
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ddc-warm") as pool:
+        list(pool.map(_copy, selected))
+    stats.seconds = round(time.monotonic() - started, 2)
+    return stats
+
+
+def format_probe(result: ProbeResult) -> list[str]:
+    return [
+        f"[info] DDC: {result.path} (reachable: {'yes' if result.reachable else 'no'})",
+        f"[info]   small files ({result.small_files}): write p50/p95 {result.small_write_ms_p50}/{result.small_write_ms_p95} ms, "
+        f"read p50/p95 {result.small_read_ms_p50}/{result.small_read_ms_p95} ms",
+        f"[info]   large files ({result.large_files}): write {result.large_write_mbps} MB/s, read {result.large_read_mbps} MB/s",
+        f"[info]   probe took {result.seconds}s",
+    ]
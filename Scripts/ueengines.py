@@ -0,0 +1,354 @@
+from __future__ import annotations
+
+import configparser
+import hashlib
+import json
+import os
+import sys
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+# Where engines usually live when nobody told us. Children of these are scanned one level deep.
+_DEFAULT_SEARCH_ROOTS = {
+    "win32": ["C:/Program Files/Epic Games", "D:/Epic Games", "C:/UnrealEngine"],
+    "darwin": ["/Users/Shared/Epic Games", "~/UnrealEngine"],
+    "linux": ["~/UnrealEngine", "/opt/UnrealEngine", "/opt/Epic Games"],
+}
+_REGISTRY_VERSION = 1
+
+
+def _uat(root: Path) -> Path:
+    name = "RunUAT.bat" if sys.platform == "win32" else "RunUAT.sh"
+    return root / "Engine" / "Build" / "BatchFiles" / name
+
+
+def _version_file(root: Path) -> Path:
+    return root / "Engine" / "Build" / "Build.version"
+
+
+@dataclass
+class EngineInstall:
+    root: str
+    version: str = ""  # "5.3.2"
+    changelist: int = 0
+    branch: str = ""
+    uat: str = ""
+    valid: bool = False
+    problem: str = ""
+    source: str = ""  # launcher | install.ini | registry | search:<dir> | config | project
+    association: str = ""  # "5.3" or a source build's "{GUID}"
+    mtime_ns: int = 0  # _stamp() when probed
+
+    @property
+    def major_minor(self) -> str:
+        return ".".join(self.version.split(".")[:2])
+
+    def describe(self) -> str:
+        cl = f" CL{self.changelist}" if self.changelist else ""
+        status = "ok" if self.valid else f"INVALID: {self.problem}"
+        return f"{self.version or '?'}{cl} {self.root} (via {self.source}; {status})"
+
+
+def probe(root: Path, *, source: str, association: str = "") -> EngineInstall:
+    """Read ``Build.version`` and check RunUAT under ``root`` (a few stats on the engine tree)."""
+    info = EngineInstall(root=str(root), source=source, association=association, uat=str(_uat(root)))
+    if not root.exists():
+        info.problem = f"EngineRoot does not exist: {root}"
+        return info
+    info.mtime_ns = _stamp(root)
+    try:
+        data = json.loads(_version_file(root).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        data = None  # stripped-down installs may lack it; RunUAT is what we actually need
+    if isinstance(data, dict):
+        info.version = ".".join(str(data.get(k, 0)) for k in ("MajorVersion", "MinorVersion", "PatchVersion"))
+        info.changelist = data.get("Changelist", 0) if isinstance(data.get("Changelist"), int) else 0
+        info.branch = str(data.get("BranchName", ""))
+    if not info.association:
+        info.association = info.major_minor
+    if not Path(info.uat).exists():
+        info.problem = f"RunUAT not found under EngineRoot: {info.uat}"
+        return info
+    info.valid = True
+    return info
+
+
+# --- discovery sources ----------------------------------------------------------------------
+
+
+def _launcher_dat() -> Path | None:
+    if sys.platform == "win32":
+        return Path(os.environ.get("PROGRAMDATA", "C:/ProgramData")) / "Epic" / "UnrealEngineLauncher" / "LauncherInstalled.dat"
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Application Support" / "Epic" / "UnrealEngineLauncher" / "LauncherInstalled.dat"
+    return None
+
+
+def _install_ini() -> Path | None:
+    """Source builds registered by UnrealVersionSelector on Linux/macOS."""
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Application Support" / "Epic" / "UnrealEngine" / "Install.ini"
+    if sys.platform.startswith("linux"):
+        return Path.home() / ".config" / "Epic" / "UnrealEngine" / "Install.ini"
+    return None
+
+
+def _launcher_installs(path: Path) -> list[tuple[Path, str]]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    out: list[tuple[Path, str]] = []
+    for item in data.get("InstallationList", []) if isinstance(data, dict) else []:
+        app = str(item.get("AppName", ""))
+        location = item.get("InstallLocation")
+        if app.startswith("UE_") and isinstance(location, str):
+            out.append((Path(location), app[3:]))
+    return out
+
+
+def _ini_installs(path: Path) -> list[tuple[Path, str]]:
+    parser = configparser.ConfigParser()
+    parser.optionxform = str  # type: ignore[assignment]  # keep GUID case
+    try:
+        parser.read(path, encoding="utf-8")
+    except (OSError, configparser.Error):
+        return []
+    if not parser.has_section("Installations"):
+        return []
+    return [(Path(v), k) for k, v in parser.items("Installations")]
+
+
+def _registry_builds() -> list[tuple[Path, str]]:
+    """Source builds registered under HKCU\\Software\\Epic Games\\Unreal Engine\\Builds (Windows)."""
+    if sys.platform != "win32":
+        return []
+    import winreg
+
+    out: list[tuple[Path, str]] = []
+    try:
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Epic Games\Unreal Engine\Builds") as key:
+            i = 0
+            while True:
+                try:
+                    name, value, _ = winreg.EnumValue(key, i)
+                except OSError:
+                    break
+                out.append((Path(str(value)), name))
+                i += 1
+    except OSError:
+        pass
+    return out
+
+
+def _mtime(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _stamp(root: Path) -> int:
+    """Changes when the install is updated or removed: Build.version's mtime (RunUAT's without it)."""
+    return _mtime(_version_file(root)) or _mtime(_uat(root))
+
+
+def search_roots(extra: Iterable[str] = ()) -> list[Path]:
+    roots = [*extra, *_DEFAULT_SEARCH_ROOTS.get(sys.platform if sys.platform in _DEFAULT_SEARCH_ROOTS else "linux", [])]
+    return [Path(r).expanduser() for r in dict.fromkeys(roots)]
+
+
+def source_signature(extra_search: Iterable[str] = ()) -> dict[str, str]:
+    """Cheap fingerprint of every discovery source: one stat each, no walking of engine trees.
+
+    A search root's own mtime changes when an engine directory is added to or removed from it.
+    """
+    sig: dict[str, str] = {}
+    for name, path in (("launcher", _launcher_dat()), ("install.ini", _install_ini())):
+        if path is not None:
+            sig[f"{name}:{path}"] = str(_mtime(path))
+    builds = _registry_builds()
+    if builds:
+        sig["registry"] = hashlib.sha1(repr(sorted(map(str, builds))).encode()).hexdigest()
+    for root in search_roots(extra_search):
+        sig[f"search:{root}"] = str(_mtime(root))
+    return sig
+
+
+def scan(extra_search: Iterable[str] = ()) -> list[EngineInstall]:
+    """Probe every engine the discovery sources know about (the slow path)."""
+    found: dict[str, EngineInstall] = {}
+
+    def add(root: Path, source: str, association: str = "") -> None:
+        key = os.path.normcase(str(root))
+        if key not in found:
+            found[key] = probe(root, source=source, association=association)
+
+    dat = _launcher_dat()
+    if dat is not None:
+        for root, assoc in _launcher_installs(dat):
+            add(root, "launcher", assoc)
+    ini = _install_ini()
+    if ini is not None:
+        for root, assoc in _ini_installs(ini):
+            add(root, "install.ini", assoc)
+    for root, assoc in _registry_builds():
+        add(root, "registry", assoc)
+    for search in search_roots(extra_search):
+        if _version_file(search).exists():
+            add(search, f"search:{search}")
+            continue
+        try:
+            children = sorted(p for p in search.iterdir() if p.is_dir())
+        except OSError:
+            continue
+        for child in children:
+            if _version_file(child).exists():
+                add(child, f"search:{search}")
+    return list(found.values())
+
+
+# --- cached registry ------------------------------------------------------------------------
+
+
+class EngineRegistry:
+    """Engines found on this machine, cached in a JSON file and invalidated by source mtimes."""
+
+    def __init__(self, path: Path, *, search_paths: Iterable[str] = ()) -> None:
+        self.path = path
+        self.search_paths = list(search_paths)
+        self._lock = threading.Lock()
+        self._data: dict[str, Any] | None = None
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any]) -> "EngineRegistry":
+        engines = cfg.get("Engines") if isinstance(cfg.get("Engines"), dict) else {}
+        path = engines.get("RegistryFile")
+        search = engines.get("SearchPaths", [])
+        return registry(
+            Path(path).expanduser() if isinstance(path, str) and path.strip() else Path.home() / ".uebuild" / "engines.json",
+            tuple(s for s in search if isinstance(s, str) and s.strip()) if isinstance(search, list) else (),
+        )
+
+    def _load(self) -> dict[str, Any]:
+        if self._data is None:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            if not isinstance(data, dict) or data.get("version") != _REGISTRY_VERSION:
+                data = {"version": _REGISTRY_VERSION, "sources": {}, "engines": {}}
+            self._data = data
+        return self._data
+
+    def _save(self) -> None:
+        assert self._data is not None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(self._data, indent=2, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as exc:
+            print(f"[warn] Could not write engine registry {self.path}: {exc}")
+
+    def engines(self, *, refresh: bool = False) -> list[EngineInstall]:
+        """All known engines; rescans only when a discovery source changed (or ``refresh``)."""
+        with self._lock:
+            data = self._load()
+            sig = source_signature(self.search_paths)
+            if refresh or data.get("sources") != sig:
+                # Keep engines registered by check() (explicit EngineRoot) across rescans.
+                kept = {k: v for k, v in data["engines"].items() if v.get("source") in ("config", "project")}
+                data["engines"] = {**kept, **{os.path.normcase(e.root): asdict(e) for e in scan(self.search_paths)}}
+                data["sources"] = sig
+                self._save()
+            return [EngineInstall(**e) for e in data["engines"].values()]
+
+    def check(self, root: Path, *, source: str = "config") -> EngineInstall:
+        """Validation status of ``root``: a single stat while the install is unchanged."""
+        key = os.path.normcase(str(root))
+        with self._lock:
+            data = self._load()
+            cached = data["engines"].get(key)
+            if cached is not None and cached.get("valid") and cached.get("mtime_ns") == _stamp(root):
+                return EngineInstall(**cached)
+            info = probe(root, source=cached.get("source", source) if cached else source, association=cached.get("association", "") if cached else "")
+            data["engines"][key] = asdict(info)
+            self._save()
+            return info
+
+    def find(self, association: str) -> tuple[EngineInstall | None, str]:
+        """The engine for a ``.uproject`` EngineAssociation (``"5.3"`` or ``"{GUID}"``), or why not."""
+        engines = self.engines()
+        if association.startswith("{"):
+            matches = [e for e in engines if e.association.lower() == association.lower()]
+        else:
+            want = association.strip()
+            matches = [e for e in engines if e.major_minor == want or e.version == want or e.association == want]
+        valid = [e for e in matches if e.valid]
+        if not valid:
+            known = ", ".join(sorted({e.association or e.version for e in engines if e.valid})) or "none"
+            bad = f"; invalid matches: {'; '.join(e.describe() for e in matches)}" if matches else ""
+            return None, f"no installed engine matches EngineAssociation '{association}' (found: {known}){bad}"
+        # Launcher installs first, then search paths, then source builds; newest patch wins.
+        rank = {"launcher": 0, "install.ini": 2, "registry": 2}
+        best = min(valid, key=lambda e: (rank.get(e.source, 1), [-int(x) if x.isdigit() else 0 for x in e.version.split(".")]))
+        # Re-validate the winner (one stat) in case it was removed since the scan.
+        checked = self.check(Path(best.root), source=best.source)
+        return (checked, "") if checked.valid else (None, checked.problem)
+
+
+_registries: dict[tuple[Path, tuple[str, ...]], EngineRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def registry(path: Path, search_paths: tuple[str, ...] = ()) -> EngineRegistry:
+    """Shared in-process registry per file (the daemon resolves engines without re-reading it)."""
+    with _registries_lock:
+        key = (path, search_paths)
+        if key not in _registries:
+            _registries[key] = EngineRegistry(path, search_paths=search_paths)
+        return _registries[key]
+
+
+def engine_version(engine_root: Path, cfg: dict[str, Any] | None = None) -> str:
+    """``5.3.2`` (plus ``-CL<changelist>`` when known) from the registry; the config's ``EngineVersion`` or ``unknown`` without ``Build.version``.
+
+    The one engine label shared by build cache fingerprints and run metrics.
+    """
+    engine = EngineRegistry.from_config(cfg or {}).check(engine_root)
+    if not engine.version:
+        version = (cfg or {}).get("EngineVersion")
+        return version if isinstance(version, str) and version.strip() else "unknown"
+    return f"{engine.version}-CL{engine.changelist}" if engine.changelist > 0 else engine.version
+
+
+def project_association(project_file: Path) -> str:
+    try:
+        data = json.loads(project_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return ""
+    value = data.get("EngineAssociation") if isinstance(data, dict) else None
+    return value if isinstance(value, str) else ""
+
+
+def resolve(cfg: dict[str, Any], project_file: Path | None) -> tuple[EngineInstall | None, str]:
+    """Pick the engine for a config without ``EngineRoot`` (or ``"auto"``).
+
+    Order: the ``.uproject``'s EngineAssociation, a project living inside an engine tree,
+    then the config's ``EngineVersion``.
+    """
+    reg = EngineRegistry.from_config(cfg)
+    association = project_association(project_file) if project_file is not None else ""
+    if association:
+        return reg.find(association)
+    if project_file is not None:
+        for parent in project_file.resolve().parents:
+            if _version_file(parent).exists():
+                return reg.check(parent, source="project"), ""
+    version = cfg.get("EngineVersion")
+    if isinstance(version, str) and version.strip():
+        return reg.find(version.strip())
+    return None, "EngineRoot is not set and neither the .uproject EngineAssociation nor EngineVersion names an engine"
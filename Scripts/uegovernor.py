@@ -0,0 +1,662 @@
+from __future__ import annotations
+
+import ctypes
+import json
+import os
+import signal
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import IO, Any, Iterator
+
+import uebuildlib
+
+_GB = 1024**3
+# Windows byte-range locks block reads of the locked range: lock a byte past any content.
+_LOCK_OFFSET = 1 << 30
+
+
+@dataclass(frozen=True)
+class PhaseCost:
+    cores: float
+    ram_gb: float
+    disk_gb: float
+
+
+def default_costs(cpu: int) -> dict[str, PhaseCost]:
+    # UBT spreads over every local core it is given (more with UBA); the cooker is mostly a
+    # few busy threads but memory hungry; stage/pak and package are I/O bound.
+    return {
+        "buildcookrun": PhaseCost(cores=cpu, ram_gb=32, disk_gb=50),
+        "compile": PhaseCost(cores=max(1, cpu // 2), ram_gb=16, disk_gb=10),
+        "cook": PhaseCost(cores=max(1, cpu // 4), ram_gb=16, disk_gb=30),
+        "stage": PhaseCost(cores=2, ram_gb=4, disk_gb=30),
+        "package": PhaseCost(cores=2, ram_gb=4, disk_gb=30),
+        # Merging cook shards is hard links and hashes of the few files several shards wrote.
+        "merge": PhaseCost(cores=1, ram_gb=1, disk_gb=1),
+    }
+
+
+if os.name == "nt":
+    import msvcrt
+
+    class _MemoryStatus(ctypes.Structure):
+        _fields_ = [
+            ("dwLength", ctypes.c_ulong),
+            ("dwMemoryLoad", ctypes.c_ulong),
+            ("ullTotalPhys", ctypes.c_ulonglong),
+            ("ullAvailPhys", ctypes.c_ulonglong),
+            ("ullTotalPageFile", ctypes.c_ulonglong),
+            ("ullAvailPageFile", ctypes.c_ulonglong),
+            ("ullTotalVirtual", ctypes.c_ulonglong),
+            ("ullAvailVirtual", ctypes.c_ulonglong),
+            ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+        ]
+
+    def _memory_status() -> tuple[float, float] | None:
+        status = _MemoryStatus()
+        status.dwLength = ctypes.sizeof(_MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):  # type: ignore[attr-defined]
+            return status.ullTotalPhys / _GB, status.ullAvailPhys / _GB
+        return None
+
+    def _try_lock(fh: IO[Any]) -> bool:
+        fh.seek(_LOCK_OFFSET)
+        try:
+            msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fh: IO[Any]) -> None:
+        fh.seek(_LOCK_OFFSET)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _memory_status() -> tuple[float, float] | None:
+        try:
+            with open("/proc/meminfo", encoding="ascii") as fh:
+                info = {line.split(":")[0]: int(line.split()[1]) * 1024 for line in fh if ":" in line}
+            return info["MemTotal"] / _GB, info.get("MemAvailable", info.get("MemFree", 0)) / _GB
+        except (OSError, KeyError, ValueError, IndexError):
+            pass
+        try:
+            total = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / _GB
+        except (ValueError, OSError, AttributeError):
+            return None
+        if sys.platform == "darwin":
+            try:
+                out = subprocess.run(["vm_stat"], capture_output=True, text=True, timeout=5).stdout
+                page = int(out.split("page size of")[1].split()[0])
+                pages = {
+                    k.strip(): int(v.strip().rstrip("."))
+                    for k, v in (line.split(":", 1) for line in out.splitlines()[1:] if ":" in line)
+                }
+                free = pages.get("Pages free", 0) + pages.get("Pages inactive", 0) + pages.get("Pages speculative", 0)
+                return total, free * page / _GB
+            except (OSError, ValueError, IndexError, subprocess.SubprocessError):
+                pass
+        return total, total * 0.5
+
+    def _try_lock(fh: IO[Any]) -> bool:
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fh: IO[Any]) -> None:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def physical_ram_gb() -> float:
+    status = _memory_status()
+    return status[0] if status else 32.0
+
+
+def available_ram_gb() -> float:
+    status = _memory_status()
+    return status[1] if status else 16.0
+
+
+def _existing(path: Path) -> Path:
+    while not path.exists() and path.parent != path:
+        path = path.parent
+    return path
+
+
+def free_disk_gb(path: Path) -> float:
+    try:
+        return shutil.disk_usage(_existing(path)).free / _GB
+    except OSError:
+        return float("inf")
+
+
+def _device(path: Path) -> int:
+    try:
+        return os.stat(_existing(path)).st_dev
+    except OSError:
+        return -1
+
+
+# --- process tree sampling ------------------------------------------------------------------
+
+
+def _parse_ps_time(value: str) -> float:
+    days, _, rest = value.rpartition("-")
+    parts = [float(p) for p in rest.split(":")]
+    seconds = 0.0
+    for p in parts:
+        seconds = seconds * 60 + p
+    return seconds + (int(days) * 86400 if days else 0)
+
+
+def _process_table() -> dict[int, tuple[int, int, float]]:
+    """``pid -> (ppid, rss_bytes, cpu_seconds)`` for every visible process."""
+    table: dict[int, tuple[int, int, float]] = {}
+    if os.name == "nt":
+        return _process_table_windows()
+    if os.path.isdir("/proc/self"):
+        ticks = os.sysconf("SC_CLK_TCK")
+        page = os.sysconf("SC_PAGE_SIZE")
+        for name in os.listdir("/proc"):
+            if not name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{name}/stat", encoding="ascii", errors="replace") as fh:
+                    data = fh.read()
+            except OSError:
+                continue
+            rest = data[data.rindex(")") + 2 :].split()
+            table[int(name)] = (int(rest[1]), int(rest[21]) * page, (int(rest[11]) + int(rest[12])) / ticks)
+        return table
+    try:
+        out = subprocess.run(["ps", "-A", "-o", "pid=,ppid=,rss=,time="], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return table
+    for line in out.splitlines():
+        fields = line.split()
+        if len(fields) == 4:
+            try:
+                table[int(fields[0])] = (int(fields[1]), int(fields[2]) * 1024, _parse_ps_time(fields[3]))
+            except ValueError:
+                continue
+    return table
+
+
+def _process_table_windows() -> dict[int, tuple[int, int, float]]:
+    from ctypes import wintypes
+
+    class PROCESSENTRY32W(ctypes.Structure):
+        _fields_ = [
+            ("dwSize", wintypes.DWORD),
+            ("cntUsage", wintypes.DWORD),
+            ("th32ProcessID", wintypes.DWORD),
+            ("th32DefaultHeapID", ctypes.c_void_p),
+            ("th32ModuleID", wintypes.DWORD),
+            ("cntThreads", wintypes.DWORD),
+            ("th32ParentProcessID", wintypes.DWORD),
+            ("pcPriClassBase", ctypes.c_long),
+            ("dwFlags", wintypes.DWORD),
+            ("szExeFile", ctypes.c_wchar * 260),
+        ]
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    kernel32 = ctypes.windll.kernel32  # type: ignore[attr-defined]
+    psapi = ctypes.windll.psapi  # type: ignore[attr-defined]
+    kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    table: dict[int, tuple[int, int, float]] = {}
+    snap = kernel32.CreateToolhelp32Snapshot(0x2, 0)  # TH32CS_SNAPPROCESS
+    if not snap or snap == wintypes.HANDLE(-1).value:
+        return table
+    try:
+        entry = PROCESSENTRY32W()
+        entry.dwSize = ctypes.sizeof(PROCESSENTRY32W)
+        ok = kernel32.Process32FirstW(snap, ctypes.byref(entry))
+        while ok:
+            pid, ppid, rss, cpu = entry.th32ProcessID, entry.th32ParentProcessID, 0, 0.0
+            handle = kernel32.OpenProcess(0x1000 | 0x0010, False, pid)  # QUERY_LIMITED_INFORMATION | VM_READ
+            if handle:
+                counters = PROCESS_MEMORY_COUNTERS()
+                counters.cb = ctypes.sizeof(counters)
+                if psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                    rss = counters.WorkingSetSize
+                times = [wintypes.FILETIME() for _ in range(4)]
+                if kernel32.GetProcessTimes(handle, *(ctypes.byref(t) for t in times)):
+                    cpu = sum((t.dwHighDateTime << 32 | t.dwLowDateTime) for t in times[2:]) / 1e7
+                kernel32.CloseHandle(handle)
+            table[pid] = (ppid, rss, cpu)
+            ok = kernel32.Process32NextW(snap, ctypes.byref(entry))
+    finally:
+        kernel32.CloseHandle(snap)
+    return table
+
+
+def _descendants(table: dict[int, tuple[int, int, float]], root: int) -> set[int]:
+    children: dict[int, list[int]] = {}
+    for pid, (ppid, _, _) in table.items():
+        if pid != ppid:
+            children.setdefault(ppid, []).append(pid)
+    tree, stack = set(), [root]
+    while stack:
+        pid = stack.pop()
+        if pid in tree:
+            continue
+        tree.add(pid)
+        stack.extend(children.get(pid, ()))
+    return tree
+
+
+def kill_tree(pid: int, *, grace: float = 5.0) -> None:
+    """Stop ``pid`` and all its descendants (UAT -> UBT -> compilers / the cooking editor)."""
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(pid)], capture_output=True)
+        return
+    tree = _descendants(_process_table(), pid)
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        alive = []
+        for p in tree:
+            try:
+                os.kill(p, sig)
+                alive.append(p)
+            except OSError:
+                continue
+        deadline = time.monotonic() + grace
+        while alive and time.monotonic() < deadline:
+            time.sleep(0.2)
+            alive = [p for p in alive if _exists(p)]
+        if not alive:
+            return
+        tree = set(alive)
+
+
+def _exists(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    try:
+        # A zombie still "exists" until its parent reaps it; it is dead for our purposes.
+        with open(f"/proc/{pid}/stat", encoding="ascii", errors="replace") as fh:
+            return fh.read().rsplit(")", 1)[-1].split()[0] != "Z"
+    except OSError:
+        return True
+
+
+@dataclass
+class Usage:
+    peak_ram_gb: float = 0.0
+    cores: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_disk_gb: float = 0.0
+    seconds: float = 0.0
+    samples: int = 0
+
+
+class ProcessTreeSampler:
+    """Polls RSS/CPU of a process and all its descendants, plus free disk of some paths."""
+
+    def __init__(self, pid: int, *, interval: float = 2.0, disk_paths: list[Path] | None = None) -> None:
+        self.pid = pid
+        self.interval = interval
+        self.disk_paths = disk_paths or []
+        self.usage = Usage()
+        self._disk_before = {p: free_disk_gb(p) for p in self.disk_paths}
+        self._core_samples: list[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name=f"sampler-{pid}", daemon=True)
+        self._started = time.monotonic()
+
+    def start(self) -> "ProcessTreeSampler":
+        self._thread.start()
+        return self
+
+    def _loop(self) -> None:
+        prev: dict[int, float] = {}
+        prev_t = time.monotonic()
+        while True:
+            table = _process_table()
+            now = time.monotonic()
+            tree = _descendants(table, self.pid) & table.keys()
+            rss = sum(table[p][1] for p in tree)
+            cpu = {p: table[p][2] for p in tree}
+            if prev and now > prev_t:
+                # Only processes seen in both samples: a new pid's lifetime CPU is not "this interval".
+                used = sum(max(0.0, cpu[p] - prev[p]) for p in cpu if p in prev)
+                self.usage.cpu_seconds += used
+                self._core_samples.append(used / (now - prev_t))
+            prev, prev_t = cpu, now
+            u = self.usage
+            u.peak_ram_gb = max(u.peak_ram_gb, rss / _GB)
+            for path, before in self._disk_before.items():
+                u.peak_disk_gb = max(u.peak_disk_gb, before - free_disk_gb(path))
+            u.samples += 1
+            if self._stop.wait(self.interval):
+                return
+
+    def stop(self) -> Usage:
+        """Stop sampling (idempotent) and return the usage seen so far."""
+        if self._stop.is_set():
+            return self.usage
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=30)
+        if self._core_samples:
+            ordered = sorted(self._core_samples)
+            self.usage.cores = ordered[int(0.9 * (len(ordered) - 1))]
+        self.usage.seconds = time.monotonic() - self._started
+        return self.usage
+
+
+# --- cross-process admission ----------------------------------------------------------------
+
+
+@dataclass
+class Lease:
+    id: str
+    key: str
+    pid: int
+    host: str
+    cores: float
+    ram_gb: float
+    disk_gb: float
+    disk_devs: list[int]
+    started: float = field(default_factory=time.time)
+
+
+@dataclass(frozen=True)
+class GovernorSettings:
+    state_dir: Path
+    cores: float
+    reserve_ram_gb: float
+    reserve_disk_gb: float
+    poll_seconds: float
+    ramp_seconds: float
+    sample_seconds: float
+    safety: float
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any]) -> "GovernorSettings | None":
+        gov = uebuildlib._get_dict(cfg, "Governor")
+        if not uebuildlib._bool(gov.get("Enabled"), False):
+            return None
+
+        def num(key: str, default: float) -> float:
+            value = gov.get(key)
+            return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0 else default
+
+        state_dir = gov.get("StateDir")
+        return cls(
+            # Machine-wide on purpose: every project and checkout on the runner shares one budget.
+            state_dir=Path(state_dir) if isinstance(state_dir, str) and state_dir.strip() else Path(tempfile.gettempdir()) / "uebuild-governor",
+            cores=num("Cores", float(os.cpu_count() or 1)),
+            reserve_ram_gb=num("ReserveRamGB", 4.0),
+            reserve_disk_gb=num("ReserveDiskGB", 20.0),
+            poll_seconds=num("PollSeconds", 5.0) or 5.0,
+            ramp_seconds=num("RampSeconds", 300.0),
+            sample_seconds=num("SampleSeconds", 2.0) or 2.0,
+            safety=num("SafetyFactor", 1.2) or 1.2,
+        )
+
+
+class Governor:
+    """Admits UAT runs across all ``uebuild`` processes on this machine.
+
+    Every admitted run holds a lease file in ``<state_dir>/leases`` that stays locked for
+    its lifetime, so leases of crashed processes are detected (the lock is gone) and
+    reclaimed. Decisions are made under ``<state_dir>/governor.lock``; waiters are served
+    in arrival order.
+    """
+
+    def __init__(self, settings: GovernorSettings) -> None:
+        self.settings = settings
+        self.leases_dir = settings.state_dir / "leases"
+        self.waiting_dir = settings.state_dir / "waiting"
+        self.estimates_path = settings.state_dir / "estimates.json"
+        self.leases_dir.mkdir(parents=True, exist_ok=True)
+        self.waiting_dir.mkdir(parents=True, exist_ok=True)
+        self._cpu = os.cpu_count() or 1
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any]) -> "Governor | None":
+        settings = GovernorSettings.from_config(cfg)
+        return cls(settings) if settings is not None else None
+
+    def _global_lock(self) -> "LockedFile":
+        return LockedFile(self.settings.state_dir / "governor.lock", blocking=True)
+
+    # estimates
+
+    def _read_estimates(self) -> dict[str, dict[str, float]]:
+        try:
+            data = json.loads(self.estimates_path.read_text(encoding="utf-8"))
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def estimate(self, key: str, kind: str) -> PhaseCost:
+        """Learned peak usage for ``key`` (times the safety factor), else the default for ``kind``."""
+        default = default_costs(self._cpu).get(kind, default_costs(self._cpu)["buildcookrun"])
+        learned = self._read_estimates().get(key)
+        if not learned:
+            return default
+        s = self.settings.safety
+        return PhaseCost(
+            cores=max(1.0, min(self.settings.cores, learned.get("cores", default.cores) * s)),
+            ram_gb=max(0.5, learned.get("ram_gb", default.ram_gb) * s),
+            disk_gb=max(0.0, learned.get("disk_gb", default.disk_gb) * s),
+        )
+
+    def learn(self, key: str, usage: Usage) -> None:
+        if usage.samples < 2:
+            return
+        with self._global_lock():
+            data = self._read_estimates()
+            old = data.get(key)
+            new = {"ram_gb": usage.peak_ram_gb, "cores": usage.cores, "disk_gb": max(0.0, usage.peak_disk_gb)}
+            if old:
+                # Bias upwards: one lean run must not shrink a reservation that prevents an OOM.
+                new = {k: max(v, 0.7 * float(old.get(k, v)) + 0.3 * v) for k, v in new.items()}
+            new.update(runs=int(old.get("runs", 0)) + 1 if old else 1, seconds=round(usage.seconds, 1), updated=time.time())
+            data[key] = {k: round(v, 3) if isinstance(v, float) else v for k, v in new.items()}
+            tmp = self.estimates_path.with_suffix(f".tmp-{os.getpid()}")
+            tmp.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, self.estimates_path)
+
+    # leases
+
+    def _live(self, directory: Path) -> Iterator[tuple[Path, dict[str, Any]]]:
+        return live_files(directory)
+
+    def leases(self) -> list[dict[str, Any]]:
+        with self._global_lock():
+            return [data for _, data in self._live(self.leases_dir)]
+
+    def waiters(self) -> list[dict[str, Any]]:
+        with self._global_lock():
+            return [data for _, data in self._live(self.waiting_dir)]
+
+    def _blockers(self, cost: PhaseCost, disk_paths: list[Path], leases: list[dict[str, Any]]) -> list[str]:
+        s = self.settings
+        now = time.time()
+        reasons: list[str] = []
+        cores = sum(float(lease["cores"]) for lease in leases)
+        if cores + cost.cores > s.cores:
+            reasons.append(f"cores {cores:g}+{cost.cores:g} > {s.cores:g}")
+        ram = sum(float(lease["ram_gb"]) for lease in leases)
+        total = physical_ram_gb()
+        if ram + cost.ram_gb > total - s.reserve_ram_gb:
+            reasons.append(f"reserved RAM {ram:.0f}+{cost.ram_gb:.0f} GB > {total - s.reserve_ram_gb:.0f} GB")
+        # Recently admitted runs have not reached their peak yet: treat their reservation as still to come.
+        ramping = sum(float(lease["ram_gb"]) for lease in leases if now - float(lease["started"]) < s.ramp_seconds)
+        free = available_ram_gb() - ramping - s.reserve_ram_gb
+        if free < cost.ram_gb:
+            reasons.append(f"free RAM {free:.1f} GB < {cost.ram_gb:.1f} GB")
+        for path in disk_paths:
+            dev = _device(path)
+            reserved = sum(float(lease["disk_gb"]) for lease in leases if dev in lease.get("disk_devs", []))
+            free_disk = free_disk_gb(path) - reserved - s.reserve_disk_gb
+            if free_disk < cost.disk_gb:
+                reasons.append(f"free disk under {path} {free_disk:.0f} GB < {cost.disk_gb:.0f} GB")
+        return reasons
+
+    def slot(self, key: str, kind: str, *, disk_paths: list[Path], label: str = "") -> "Slot":
+        return Slot(self, key, self.estimate(key, kind), disk_paths=disk_paths, label=label or key)
+
+
+def live_files(directory: Path) -> Iterator[tuple[Path, dict[str, Any]]]:
+    """JSON ``LockedFile``s in ``directory`` still held by a running process; stale ones are removed."""
+    for path in sorted(directory.glob("*.json")):
+        try:
+            fh = path.open("r+", encoding="utf-8")
+        except OSError:
+            continue
+        with fh:
+            if _try_lock(fh):
+                # Nobody holds it: the owner exited without cleaning up.
+                _unlock(fh)
+                fh.close()
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+                continue
+            try:
+                fh.seek(0)
+                yield path, json.loads(fh.read())
+            except ValueError:
+                continue
+
+
+class LockedFile:
+    """A file held open and locked by this process (released on exit)."""
+
+    def __init__(self, path: Path, *, blocking: bool, content: str = "", remove_on_exit: bool = False) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.remove_on_exit = remove_on_exit
+        self._fh = path.open("a+", encoding="utf-8")
+        while not _try_lock(self._fh):
+            if not blocking:
+                self._fh.close()
+                raise BlockingIOError(str(path))
+            time.sleep(0.05)
+        if content:
+            self._fh.seek(0)
+            self._fh.truncate()
+            self._fh.write(content)
+            self._fh.flush()
+
+    def __enter__(self) -> "LockedFile":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.release(remove=self.remove_on_exit)
+
+    def release(self, *, remove: bool = False) -> None:
+        if self._fh.closed:
+            return
+        try:
+            _unlock(self._fh)
+        finally:
+            self._fh.close()
+        if remove:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+
+class Slot:
+    """``with governor.slot(...) as slot:`` waits for admission; ``slot.attach(pid)`` starts sampling."""
+
+    def __init__(self, governor: Governor, key: str, cost: PhaseCost, *, disk_paths: list[Path], label: str) -> None:
+        self.governor = governor
+        self.key = key
+        self.cost = cost
+        self.disk_paths = disk_paths
+        self.label = label
+        self.waited = 0.0
+        self._lease: LockedFile | None = None
+        self._sampler: ProcessTreeSampler | None = None
+
+    def __enter__(self) -> "Slot":
+        gov = self.governor
+        ticket = f"{time.time_ns():020d}-{os.getpid()}-{threading.get_ident()}"
+        lease = Lease(
+            id=ticket,
+            key=self.key,
+            pid=os.getpid(),
+            host=socket.gethostname(),
+            cores=self.cost.cores,
+            ram_gb=round(self.cost.ram_gb, 2),
+            disk_gb=round(self.cost.disk_gb, 2),
+            disk_devs=sorted({_device(p) for p in self.disk_paths}),
+        )
+        started = time.monotonic()
+        # Created under the global lock so nobody can mistake the not-yet-locked file for a stale one.
+        with gov._global_lock():
+            waiting = LockedFile(gov.waiting_dir / f"{ticket}.json", blocking=True, content=json.dumps(asdict(lease)))
+        last_reason = ""
+        try:
+            while True:
+                with gov._global_lock():
+                    ahead = [w for p, w in gov._live(gov.waiting_dir) if w["id"] < ticket]
+                    leases = [lease for _, lease in gov._live(gov.leases_dir)]
+                    reasons = [f"{len(ahead)} earlier request(s) waiting"] if ahead else []
+                    if not reasons and leases:
+                        reasons = gov._blockers(self.cost, self.disk_paths, leases)
+                    if not reasons:
+                        lease.started = time.time()
+                        self._lease = LockedFile(gov.leases_dir / f"{ticket}.json", blocking=False, content=json.dumps(asdict(lease)))
+                        break
+                reason = "; ".join(reasons)
+                if reason != last_reason:
+                    print(f"[info] [{self.label}] waiting for resources: {reason}")
+                    last_reason = reason
+                time.sleep(gov.settings.poll_seconds)
+        finally:
+            waiting.release(remove=True)
+        self.waited = time.monotonic() - started
+        if last_reason:
+            print(f"[info] [{self.label}] admitted after {self.waited:.0f}s")
+        return self
+
+    def attach(self, pid: int) -> None:
+        self.adopt(ProcessTreeSampler(pid, interval=self.governor.settings.sample_seconds, disk_paths=self.disk_paths).start())
+
+    def adopt(self, sampler: ProcessTreeSampler) -> None:
+        """Learn from a sampler someone else started (one sampler per process tree is enough)."""
+        self._sampler = sampler
+
+    def __exit__(self, exc_type: object, *exc: object) -> None:
+        try:
+            if self._sampler is not None:
+                usage = self._sampler.stop()
+                if exc_type is None:
+                    self.governor.learn(self.key, usage)
+        finally:
+            if self._lease is not None:
+                self._lease.release(remove=True)
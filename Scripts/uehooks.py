@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import ast
+import asyncio
+import importlib.util
+import inspect
+import threading
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable
+
+# Callables a hook module may define at top level.
+HOOK_NAMES = ("pre_build", "post_build", "on_stage", "on_artifact")
+# Legacy script hooks, still run as `python <Hooks>/<Stage>.py` when they don't use the API.
+LEGACY_SCRIPTS = {"pre_build": "PreBuild", "post_build": "PostBuild"}
+
+
+@dataclass
+class HookContext:
+    """What a hook can see about the build it is attached to.
+
+    ``timings`` fills in as stages finish; ``artifacts`` is set once UAT has archived.
+    ``data`` is free-form storage shared by all hooks of the same job.
+    """
+
+    job: str
+    platform: str
+    build_config: str
+    cmd: list[str]
+    env: dict[str, str]
+    archive_dir: Path
+    log_dir: Path
+    publish_dir: Path | None = None
+    dry_run: bool = False
+    returncode: int | None = None
+    timings: dict[str, float] = field(default_factory=dict)
+    artifacts: list[Path] = field(default_factory=list)
+    data: dict[str, Any] = field(default_factory=dict)
+
+
+def _defines_api(path: Path) -> bool:
+    """True if the file defines any hook callable at top level (checked without executing it)."""
+    try:
+        tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    except (OSError, SyntaxError, ValueError):
+        return False
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name in HOOK_NAMES:
+            return True
+    return False
+
+
+def _call(fn: Callable[..., Any], *args: Any) -> Any:
+    if inspect.iscoroutinefunction(fn):
+        return asyncio.run(fn(*args))
+    result = fn(*args)
+    if inspect.isawaitable(result):
+        return asyncio.run(_await(result))
+    return result
+
+
+async def _await(awaitable: Any) -> Any:
+    return await awaitable
+
+
+class HookRegistry:
+    """Hook modules under ``hooks_dir``, imported once per process."""
+
+    def __init__(self, hooks_dir: Path) -> None:
+        self.hooks_dir = hooks_dir
+        self.modules: list[ModuleType] = []
+        self.api_scripts: set[str] = set()
+        self.failed: list[str] = []  # hook modules that raised on import
+        self._lock = threading.Lock()
+        for path in sorted(hooks_dir.glob("*.py")) if hooks_dir.is_dir() else []:
+            if path.name.startswith("_") or not _defines_api(path):
+                continue
+            spec = importlib.util.spec_from_file_location(f"uebuild_hooks.{path.stem}", path)
+            if spec is None or spec.loader is None:
+                continue
+            module = importlib.util.module_from_spec(spec)
+            self.api_scripts.add(path.stem)
+            try:
+                spec.loader.exec_module(module)
+            except Exception as exc:
+                print(f"[error] hook {path.stem} failed to load: {exc}")
+                self.failed.append(path.stem)
+                continue
+            self.modules.append(module)
+
+    def handlers(self, name: str) -> list[Callable[..., Any]]:
+        return [getattr(m, name) for m in self.modules if callable(getattr(m, name, None))]
+
+    def run(
+        self,
+        name: str,
+        ctx: HookContext,
+        *,
+        legacy_runner: Callable[..., int] | None = None,
+    ) -> int:
+        """Run ``pre_build``/``post_build`` handlers; returns the first non-zero status.
+
+        A handler fails by raising or by returning ``False`` or a non-zero int. Legacy
+        ``PreBuild.py``/``PostBuild.py`` scripts without the API go through ``legacy_runner``.
+        A hook module that failed to load fails every stage: its handlers would silently be skipped.
+        """
+        if self.failed:
+            print(f"[error] Hook stage {name} not run: {', '.join(self.failed)} failed to load")
+            return 1
+        for fn in self.handlers(name):
+            label = f"{fn.__module__.rsplit('.', 1)[-1]}.{name}"
+            print(f"[hook] {label}")
+            if ctx.dry_run:
+                continue
+            try:
+                result = _call(fn, ctx)
+            except Exception:
+                traceback.print_exc()
+                print(f"[error] Hook {label} raised")
+                return 1
+            if result is False or (isinstance(result, int) and not isinstance(result, bool) and result != 0):
+                print(f"[error] Hook {label} failed ({result})")
+                return result if isinstance(result, int) and result else 1
+
+        script = LEGACY_SCRIPTS.get(name)
+        if legacy_runner is not None and script and script not in self.api_scripts:
+            return legacy_runner(script, hooks_dir=self.hooks_dir, env=ctx.env, dry_run=ctx.dry_run)
+        return 0
+
+    def notify(self, name: str, ctx: HookContext, *args: Any) -> None:
+        """Fire-and-forget events (``on_stage``/``on_artifact``): errors are reported, never fatal."""
+        if ctx.dry_run:
+            return
+        for fn in self.handlers(name):
+            try:
+                with self._lock:
+                    _call(fn, ctx, *args)
+            except Exception:
+                traceback.print_exc()
+                print(f"[warn] Hook {fn.__module__.rsplit('.', 1)[-1]}.{name} raised; continuing")
+
+
+_registries: dict[Path, tuple[tuple[tuple[str, int], ...], HookRegistry]] = {}
+_registries_lock = threading.Lock()
+
+
+def _signature(hooks_dir: Path) -> tuple[tuple[str, int], ...]:
+    if not hooks_dir.is_dir():
+        return ()
+    return tuple(sorted((p.name, p.stat().st_mtime_ns) for p in hooks_dir.glob("*.py")))
+
+
+def registry(hooks_dir: Path) -> HookRegistry:
+    """Shared registry for ``hooks_dir``; re-imported only when a hook file changes."""
+    with _registries_lock:
+        key = hooks_dir.resolve()
+        sig = _signature(key)
+        cached = _registries.get(key)
+        if cached is None or cached[0] != sig:
+            cached = (sig, HookRegistry(key))
+            _registries[key] = cached
+        return cached[1]
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any
+
+import uebuildlib
+import uegovernor
+import ueremote
+
+
+@dataclass
+class HostStatus:
+    """Last probe of one pool member (cached in ``<Saved>/Remote/pool.json``)."""
+
+    host: str
+    reachable: bool = False
+    load: float = 0.0  # 1-minute load average
+    cpus: int = 1
+    free_gb: float = 0.0  # on the volume holding the project copy
+    warm: bool = False  # holds our last full sync: a delta sync is enough
+    error: str = ""
+    probed_at: float = 0.0
+    claims: int = 0  # builds this machine is running there right now (not cached)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "HostStatus":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    @property
+    def pressure(self) -> float:
+        """Load per core, counting our own in-flight builds as one busy core each."""
+        return (self.load + self.claims) / max(1, self.cpus)
+
+    def describe(self) -> str:
+        if not self.reachable:
+            return f"unreachable ({self.error})" if self.error else "unreachable"
+        checkout = "warm" if self.warm else "cold"
+        return f"load {self.load:.1f} on {self.cpus} cores, {self.claims} claimed, {self.free_gb:.0f} GB free, {checkout} checkout"
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    probe_seconds: float  # reuse cached probes this long
+    min_free_gb: float
+    affinity_max_load: float  # a warm host is preferred while its pressure stays below this
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any], platform: str) -> "PoolSettings":
+        pcfg = uebuildlib._get_dict(uebuildlib._get_dict(cfg, "Platforms"), platform)
+
+        def num(key: str, default: float) -> float:
+            value = pcfg.get(key, default)
+            return float(value) if isinstance(value, (int, float)) and value >= 0 else default
+
+        return cls(
+            probe_seconds=num("PoolProbeSeconds", 60.0),
+            min_free_gb=num("MinFreeGB", 30.0),
+            affinity_max_load=num("AffinityMaxLoad", 1.0),
+        )
+
+
+def _probe_script(remote: ueremote.RemoteSettings) -> str:
+    # One round trip: sync token, cores, load and free space (macOS first, Linux fallbacks).
+    return (
+        f'd={ueremote._remote_path(remote.project_dir)}; t=$(cat "$d/{ueremote._TOKEN}" 2>/dev/null); [ -d "$d" ] || d=.; '
+        'echo "token=$t"; '
+        'echo "cpus=$(sysctl -n hw.ncpu 2>/dev/null || nproc)"; '
+        'echo "load=$(sysctl -n vm.loadavg 2>/dev/null || cat /proc/loadavg)"; '
+        'echo "df=$(df -Pk "$d" | tail -n 1)"'
+    )
+
+
+def parse_probe(host: str, out: str, token: str) -> HostStatus:
+    values = {}
+    for line in out.splitlines():
+        key, sep, value = line.partition("=")
+        if sep:
+            values[key.strip()] = value.strip()
+    status = HostStatus(host=host, reachable=True, probed_at=time.time())
+    try:
+        status.load = float(values.get("load", "").replace("{", " ").split()[0])  # macOS: "{ 1.52 1.40 1.33 }"
+    except (IndexError, ValueError):
+        pass
+    try:
+        status.cpus = max(1, int(values.get("cpus", "1")))
+    except ValueError:
+        pass
+    try:
+        status.free_gb = int(values.get("df", "").split()[3]) / 1024**2
+    except (IndexError, ValueError):
+        pass
+    remote_token = values.get("token", "")
+    status.warm = bool(remote_token) and remote_token == token
+    return status
+
+
+class Pool:
+    """``RemoteServer`` as a list: probe the Macs, rank them, remember who is down.
+
+    Probes are cached (``PoolProbeSeconds``) so back-to-back builds don't re-probe every host,
+    and a host that failed is left out until its cached probe expires. Builds this machine has
+    in flight are held as lock files under ``pool-claims/`` and count as load, so concurrent
+    builds from here spread out before the Macs' own load average catches up.
+    """
+
+    def __init__(self, remote: ueremote.RemoteSettings, settings: PoolSettings, state_dir: Path) -> None:
+        self.remote = remote
+        self.settings = settings
+        self.state_dir = state_dir
+        self.path = state_dir / "pool.json"
+        self.claims_dir = state_dir / "pool-claims"
+
+    def _lock(self) -> uegovernor.LockedFile:
+        return uegovernor.LockedFile(self.state_dir / "pool.lock", blocking=True)
+
+    def _read(self) -> dict[str, dict[str, Any]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _save(self, statuses: list[HostStatus]) -> None:
+        with self._lock():
+            data = self._read()
+            for status in statuses:
+                entry = asdict(status)
+                entry.pop("claims")
+                data[status.host] = entry
+            tmp = self.path.with_suffix(f".tmp-{os.getpid()}-{threading.get_ident()}")
+            tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+    def _probe_one(self, host: str) -> HostStatus:
+        remote = self.remote.on(host)
+        try:
+            rc, out = ueremote.Transport(remote).run(_probe_script(remote), timeout=30)
+        except OSError as exc:
+            rc, out = -1, str(exc)
+        if rc != 0:
+            return HostStatus(host=host, error=out.strip().splitlines()[-1] if out.strip() else f"exit {rc}", probed_at=time.time())
+        return parse_probe(host, out, ueremote.sync_token(remote, self.state_dir))
+
+    def _claims(self) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        with self._lock():
+            for _, data in uegovernor.live_files(self.claims_dir):
+                host = str(data.get("host", ""))
+                counts[host] = counts.get(host, 0) + 1
+        return counts
+
+    def status(self, *, refresh: bool = False) -> list[HostStatus]:
+        """Every pool member, probing (in parallel) those whose cached probe is missing or stale."""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock():
+            cached = self._read()
+        now = time.time()
+        known: dict[str, HostStatus] = {}
+        stale: list[str] = []
+        for host in self.remote.hosts:
+            entry = cached.get(host)
+            if not refresh and isinstance(entry, dict) and now - float(entry.get("probed_at", 0)) < self.settings.probe_seconds:
+                known[host] = HostStatus.from_dict(entry)
+            else:
+                stale.append(host)
+        if stale:
+            with ThreadPoolExecutor(max_workers=len(stale)) as pool:
+                probed = list(pool.map(self._probe_one, stale))
+            self._save(probed)
+            known.update((s.host, s) for s in probed)
+        claims = self._claims()
+        for status in known.values():
+            status.claims = claims.get(status.host, 0)
+        return [known[host] for host in self.remote.hosts]
+
+    def rank(self, statuses: list[HostStatus]) -> list[HostStatus]:
+        """Usable hosts, best first: a warm checkout that isn't saturated, then by load per core."""
+        usable = [s for s in statuses if s.reachable and s.free_gb >= self.settings.min_free_gb]
+
+        def key(s: HostStatus) -> tuple[bool, float]:
+            sticky = s.warm and s.pressure < self.settings.affinity_max_load
+            return (not sticky, s.pressure)
+
+        return sorted(usable, key=key)
+
+    def claim(self, host: str) -> uegovernor.LockedFile:
+        """Mark one build from this machine as running on ``host`` until the returned lock is released."""
+        ticket = f"{time.time_ns():020d}-{os.getpid()}-{threading.get_ident()}"
+        # Created under the pool lock so a concurrent count can't mistake it for a stale claim.
+        with self._lock():
+            return uegovernor.LockedFile(
+                self.claims_dir / f"{ticket}.json",
+                blocking=False,
+                content=json.dumps({"host": host, "pid": os.getpid()}),
+                remove_on_exit=True,
+            )
+
+    def mark_failed(self, host: str, error: str) -> None:
+        """Leave ``host`` out until its cached probe expires."""
+        self._save([HostStatus(host=host, error=error, probed_at=time.time())])
+
+    def mark_synced(self, host: str) -> None:
+        with self._lock():
+            entry = self._read().get(host)
+        if isinstance(entry, dict):
+            status = HostStatus.from_dict(entry)
+            status.warm = True
+            self._save([status])
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+import uebuildlib
+import uecache
+import uepipeline
+import uestream
+import uetriage
+
+
+@dataclass(frozen=True)
+class MatrixJob:
+    platform: str
+    build_config: str
+
+    @property
+    def name(self) -> str:
+        return f"{self.platform}-{self.build_config}"
+
+
+@dataclass(frozen=True)
+class JobResult:
+    job: MatrixJob
+    returncode: int
+    seconds: float
+    archive_dir: Path
+    log_dir: Path
+
+
+def parse_matrix(spec: str) -> list[MatrixJob]:
+    """Parse ``Win64,Android:Development,Shipping`` into the platform x config product."""
+    if ":" not in spec:
+        raise uebuildlib.ConfigError(f"Invalid --matrix (expected <Platforms>:<Configs>): {spec}")
+    platforms_part, configs_part = spec.split(":", 1)
+    platforms = [p.strip() for p in platforms_part.split(",") if p.strip()]
+    configs = [c.strip() for c in configs_part.split(",") if c.strip()]
+    if not platforms or not configs:
+        raise uebuildlib.ConfigError(f"Invalid --matrix (empty platform or config list): {spec}")
+
+    jobs: list[MatrixJob] = []
+    for platform in platforms:
+        for build_config in configs:
+            job = MatrixJob(platform=platform, build_config=build_config)
+            if job not in jobs:
+                jobs.append(job)
+    return jobs
+
+
+def default_max_jobs(cfg: dict[str, Any]) -> int:
+    matrix = uebuildlib._get_dict(cfg, "Matrix")
+    value = matrix.get("MaxParallelJobs")
+    if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+        return value
+    # A single BuildCookRun already saturates ~16 cores during compile/cook.
+    return max(1, (os.cpu_count() or 1) // 16)
+
+
+def run_matrix(
+    *,
+    cfg: dict[str, Any],
+    config_path: Path,
+    build_root: Path,
+    jobs: Iterable[MatrixJob],
+    extra_uat_args: Iterable[str],
+    max_jobs: int,
+    dry_run: bool,
+    console: str | None = None,
+    use_cache: bool = True,
+    phases: bool = False,
+    cook_shards: int | None = None,
+) -> int:
+    jobs = list(jobs)
+    extra_uat_args = list(extra_uat_args)
+    project_root = uebuildlib.resolve_project_root(config_path)
+    log_root = uebuildlib.build_log_dir(project_root)
+    # Parallel jobs share one terminal: default to the compact view, full output goes to each job's log.
+    log_settings = uestream.LogSettings.from_config(cfg, console=console or "compact")
+
+    planned = [
+        # Isolate each job so parallel archives and UAT logs never overwrite each other.
+        uepipeline.plan_job(
+            cfg=cfg,
+            config_path=config_path,
+            platform=job.platform,
+            build_config=job.build_config,
+            extra_uat_args=extra_uat_args,
+            log_root=log_root,
+            archive_dir=uebuildlib.artifacts_root(cfg, project_root) / job.platform / job.build_config,
+        )
+        for job in jobs
+    ]
+    if not planned:
+        return 0
+    if phases:
+        import uephases
+
+        return uephases.run_phases(
+            cfg=cfg,
+            config_path=config_path,
+            build_root=build_root,
+            jobs=planned,
+            extra_uat_args=extra_uat_args,
+            dry_run=dry_run,
+            log_settings=log_settings,
+            use_cache=use_cache,
+            cook_shards=cook_shards,
+        )
+    cache = uecache.BuildCache.from_config(cfg, project_root) if use_cache else None
+
+    rc = uepipeline.run_pre_hooks(planned[0], build_root=build_root, dry_run=dry_run)
+    if rc != 0:
+        return rc
+
+    max_jobs = max(1, min(max_jobs, len(planned)))
+    print(f"[info] Matrix: {len(planned)} job(s), up to {max_jobs} in parallel")
+
+    def _run_one(planned_job: uepipeline.BuildJob) -> JobResult:
+        started = time.monotonic()
+        print(f"[info] [{planned_job.name}] started (log: {planned_job.log_dir})")
+        job_rc = uepipeline.run_job(
+            planned_job,
+            build_root=build_root,
+            cwd=project_root,
+            dry_run=dry_run,
+            log_settings=log_settings,
+            pre_hook=False,
+            cfg=cfg,
+            cache=cache,
+        )
+        seconds = time.monotonic() - started
+        status = "ok" if job_rc == 0 else f"failed rc={job_rc}"
+        print(f"[info] [{planned_job.name}] {status} in {seconds:.1f}s")
+        return JobResult(
+            job=MatrixJob(platform=planned_job.platform, build_config=planned_job.build_config),
+            returncode=job_rc,
+            seconds=seconds,
+            archive_dir=planned_job.archive_dir,
+            log_dir=planned_job.log_dir,
+        )
+
+    with ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="uebuild-job") as pool:
+        results = list(pool.map(_run_one, planned))
+
+    return summarize(results)
+
+
+def summarize(results: list[JobResult]) -> int:
+    print("[info] Matrix summary:")
+    for r in results:
+        status = "ok" if r.returncode == 0 else f"FAILED (rc={r.returncode})"
+        print(f"  {r.job.name:<28} {status:<16} {r.seconds:8.1f}s  {r.archive_dir}")
+        first = uetriage.first_error(r.log_dir) if r.returncode != 0 else None
+        if first:
+            print(f"  {'':<28} first error: {first[:160]}")
+
+    failed = [r for r in results if r.returncode != 0]
+    if failed:
+        print(f"[error] {len(failed)}/{len(results)} matrix job(s) failed")
+        return failed[0].returncode
+    print(f"[ok] {len(results)} matrix job(s) succeeded")
+    return 0
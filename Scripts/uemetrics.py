@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import statistics
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import uebuildlib
+import uegovernor
+
+_LABELS = ("project", "job", "platform", "config", "mode")
+_history_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class MetricsSettings:
+    dir: Path
+    prom_file: Path | None
+    sample_seconds: float
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any], project_root: Path) -> "MetricsSettings | None":
+        metrics = uebuildlib._get_dict(cfg, "Metrics")
+        if not uebuildlib._bool(metrics.get("Enabled"), True):
+            return None
+        directory = metrics.get("Dir")
+        prom = metrics.get("PrometheusFile")
+        sample = metrics.get("SampleSeconds")
+        return cls(
+            dir=Path(directory) if isinstance(directory, str) and directory.strip() else project_root / "Saved" / "BuildMetrics",
+            prom_file=Path(prom) if isinstance(prom, str) and prom.strip() else None,
+            sample_seconds=float(sample) if isinstance(sample, (int, float)) and not isinstance(sample, bool) and sample > 0 else 2.0,
+        )
+
+    @property
+    def history(self) -> Path:
+        return self.dir / "history.jsonl"
+
+
+def _dir_size(path: Path) -> tuple[int, int]:
+    files = total = 0
+    if path.is_dir():
+        for p in path.rglob("*"):
+            if p.is_file():
+                files += 1
+                total += p.stat().st_size
+    return files, total
+
+
+class RunRecorder:
+    """Collects one run's numbers; ``finish`` appends them to the history (and the .prom file)."""
+
+    def __init__(
+        self,
+        settings: MetricsSettings,
+        *,
+        project: str,
+        job: str,
+        platform: str,
+        build_config: str,
+        cmd: list[str],
+        engine: str,
+        mode: str,
+    ) -> None:
+        self.settings = settings
+        self.labels = {"project": project, "job": job, "platform": platform, "config": build_config, "mode": mode}
+        self.cmd = cmd
+        self.engine = engine
+        self.sampler: uegovernor.ProcessTreeSampler | None = None
+        self.waited = 0.0
+        self._started = time.time()
+        self._t0 = time.monotonic()
+
+    def finish(
+        self,
+        *,
+        returncode: int,
+        stages: dict[str, float],
+        cache: str,
+        archive_dir: Path | None = None,
+    ) -> dict[str, Any]:
+        usage = self.sampler.stop() if self.sampler is not None else uegovernor.Usage()
+        files, size = _dir_size(archive_dir) if archive_dir is not None and returncode == 0 else (0, 0)
+        record = {
+            **self.labels,
+            "ts": round(self._started, 3),
+            "host": socket.gethostname(),
+            "engine": self.engine,
+            "cmd": uebuildlib.format_cmd(self.cmd),
+            "returncode": returncode,
+            "seconds": round(time.monotonic() - self._t0, 3),
+            "waited_seconds": round(self.waited, 3),
+            "stages": stages,
+            "peak_rss_bytes": int(usage.peak_ram_gb * 1024**3),
+            "cpu_seconds": round(usage.cpu_seconds, 3),
+            "cores_p90": round(usage.cores, 2),
+            "archived_files": files,
+            "archived_bytes": size,
+            "cache": cache,
+            "uba": "-uba" in self.cmd,
+        }
+        try:
+            append(self.settings, record)
+        except OSError as exc:
+            print(f"[warn] Could not record build metrics: {exc}")
+        return record
+
+
+def append(settings: MetricsSettings, record: dict[str, Any]) -> None:
+    settings.dir.mkdir(parents=True, exist_ok=True)
+    line = json.dumps(record, sort_keys=True) + "\n"
+    with _history_lock, settings.history.open("a", encoding="utf-8") as fh:
+        fh.write(line)  # one write per record: appends from parallel processes never interleave
+    if settings.prom_file is not None:
+        _update_prom(settings, record)
+
+
+def _label_key(record: dict[str, Any]) -> str:
+    return "|".join(str(record.get(k, "")) for k in _LABELS)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(record: dict[str, Any], **extra: str) -> str:
+    pairs = [(k, record.get(k, "")) for k in _LABELS] + list(extra.items())
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+_GAUGES = (
+    ("uebuild_run_duration_seconds", "Wall time of the last run.", lambda r: r["seconds"]),
+    ("uebuild_run_success", "1 if the last run succeeded.", lambda r: int(r["returncode"] == 0)),
+    ("uebuild_run_timestamp_seconds", "Start time of the last run (unix seconds).", lambda r: r["ts"]),
+    ("uebuild_run_wait_seconds", "Time the last run waited for a governor slot.", lambda r: r.get("waited_seconds", 0)),
+    ("uebuild_peak_rss_bytes", "Peak RSS of the UAT process tree in the last run.", lambda r: r["peak_rss_bytes"]),
+    ("uebuild_cpu_seconds", "CPU time of the UAT process tree in the last run (sampled).", lambda r: r["cpu_seconds"]),
+    ("uebuild_archived_bytes", "Bytes in the local Publish staging dir after the last run (0 without Publish).", lambda r: r["archived_bytes"]),
+    ("uebuild_cache_hit", "1 if the last run was served from the build/phase cache.", lambda r: int(r["cache"] in ("skip", "restore", "cached"))),
+    ("uebuild_uba_enabled", "1 if the last run used UBA.", lambda r: int(bool(r["uba"]))),
+)
+
+
+def render_prom(state: dict[str, Any]) -> str:
+    lines: list[str] = []
+    entries = [state[k] for k in sorted(state)]
+    for name, help_text, value in _GAUGES:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        lines += [f"{name}{_labels(e['last'])} {value(e['last'])}" for e in entries]
+    lines += ["# HELP uebuild_stage_duration_seconds Stage durations of the last run.", "# TYPE uebuild_stage_duration_seconds gauge"]
+    for e in entries:
+        for stage, seconds in sorted(e["last"].get("stages", {}).items()):
+            lines.append(f"uebuild_stage_duration_seconds{_labels(e['last'], stage=stage)} {seconds}")
+    lines += ["# HELP uebuild_runs_total Runs recorded, by result.", "# TYPE uebuild_runs_total counter"]
+    for e in entries:
+        for result in ("success", "failure"):
+            lines.append(f"uebuild_runs_total{_labels(e['last'], result=result)} {e.get(result, 0)}")
+    return "\n".join(lines) + "\n"
+
+
+def _update_prom(settings: MetricsSettings, record: dict[str, Any]) -> None:
+    assert settings.prom_file is not None
+    state_path = settings.dir / "prom-state.json"
+    # Several uebuild processes may share one textfile: serialize read-modify-write of the state.
+    with uegovernor.LockedFile(settings.dir / "prom.lock", blocking=True):
+        try:
+            state = json.loads(state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            state = {}
+        entry = state.setdefault(_label_key(record), {})
+        entry["last"] = record
+        result = "success" if record["returncode"] == 0 else "failure"
+        entry[result] = int(entry.get(result, 0)) + 1
+        tmp = state_path.with_suffix(f".tmp-{os.getpid()}")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, state_path)
+
+        # node_exporter's textfile collector must never see a half-written file.
+        settings.prom_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_prom = settings.prom_file.with_name(f".{settings.prom_file.name}.{os.getpid()}.tmp")
+        tmp_prom.write_text(render_prom(state), encoding="utf-8")
+        os.replace(tmp_prom, settings.prom_file)
+
+
+# --- querying -------------------------------------------------------------------------------
+
+
+def read_history(path: Path) -> Iterator[dict[str, Any]]:
+    try:
+        fh = path.open("r", encoding="utf-8")
+    except OSError:
+        return
+    with fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line of a crashed writer
+            if isinstance(record, dict):
+                yield record
+
+
+def _value(record: dict[str, Any], stage: str | None) -> float | None:
+    if stage is None:
+        return float(record.get("seconds", 0.0))
+    value = record.get("stages", {}).get(stage)
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def compare(records: Iterable[dict[str, Any]], *, group_by: str, stage: str | None = None) -> list[dict[str, Any]]:
+    """Median/p90 of a stage (or the whole run) per group, in order of first appearance.
+
+    ``change_pct`` is relative to the first group, e.g. grouping by ``engine`` shows how
+    much slower cook got after an engine upgrade.
+    """
+    groups: dict[str, list[float]] = {}
+    for r in records:
+        if r.get("returncode") != 0:
+            continue
+        value = _value(r, stage)
+        if value is None:
+            continue
+        groups.setdefault(str(r.get(group_by, "")), []).append(value)
+    rows: list[dict[str, Any]] = []
+    baseline: float | None = None
+    for key, values in groups.items():
+        ordered = sorted(values)
+        median = statistics.median(ordered)
+        if baseline is None:
+            baseline = median
+        rows.append(
+            {
+                "group": key,
+                "runs": len(values),
+                "median": round(median, 3),
+                "p90": round(ordered[int(0.9 * (len(ordered) - 1))], 3),
+                "change_pct": round(100.0 * (median - baseline) / baseline, 1) if baseline else 0.0,
+            }
+        )
+    return rows
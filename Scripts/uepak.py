@@ -0,0 +1,672 @@
+from __future__ import annotations
+
+import heapq
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import ueartifacts
+import uebuildlib
+
+# Pak footer (FPakInfo), read from the end of the file: [EncryptionKeyGuid 16][bEncryptedIndex 1]
+# Magic, Version, IndexOffset, IndexSize, IndexHash[20], [bIndexIsFrozen (v9)], [method names].
+_PAK_MAGIC = struct.pack("<I", 0x5A6F12E1)
+_PAK_NAME_LEN = 32
+# Version thresholds (EPakFileVersion).
+_PAK_NO_TIMESTAMPS = 2
+_PAK_COMPRESSION_ENCRYPTION = 3
+_PAK_RELATIVE_CHUNK_OFFSETS = 5
+_PAK_FNAME_METHODS = 8
+_PAK_FROZEN_INDEX = 9
+_PAK_PATH_HASH_INDEX = 10
+_LEGACY_METHODS = ((0x01, "Zlib"), (0x02, "Gzip"), (0x04, "Custom"))
+
+# IoStore .utoc header (FIoStoreTocHeader), 144 bytes.
+_TOC_MAGIC = b"-==--==--==--==-"
+_TOC_HEADER = struct.Struct("<16sBBH9IQ16sBBHIQII5Q")
+_TOC_PERFECT_HASH = 4
+_TOC_PERFECT_HASH_OVERFLOW = 5
+_TOC_ENCRYPTED = 0x02
+_TOC_SIGNED = 0x04
+_TOC_INDEXED = 0x08
+_NO_INDEX = 0xFFFFFFFF
+# EIoChunkType; UE5 (from the perfect-hash TOC version on) renumbered it.
+_CHUNK_TYPES_UE4 = (
+    "Invalid", "InstallManifest", "ExportBundleData", "BulkData", "OptionalBulkData", "MemoryMappedBulkData",
+    "LoaderGlobalMeta", "LoaderInitialLoadMeta", "LoaderGlobalNames", "LoaderGlobalNameHashes", "ContainerHeader",
+)
+_CHUNK_TYPES_UE5 = (
+    "Invalid", "ExportBundleData", "BulkData", "OptionalBulkData", "MemoryMappedBulkData", "ScriptObjects",
+    "ContainerHeader", "ExternalFile", "ShaderCodeLibrary", "ShaderCode", "PackageStoreEntry", "DerivedData",
+    "EditorDerivedData", "PackageResource",
+)
+
+# Asset class by file name suffix (longest first); anything else is "Other".
+_CLASSES = (
+    (".m.ubulk", "MemoryMappedBulkData"),
+    (".umap", "Map"),
+    (".uasset", "Package"),
+    (".uexp", "Package"),
+    (".ubulk", "BulkData"),
+    (".uptnl", "OptionalBulkData"),
+    (".ushaderbytecode", "ShaderCode"),
+    (".ushadercode", "ShaderCode"),
+    (".upipelinecache", "PipelineCache"),
+    (".locres", "Localization"),
+    (".ini", "Config"),
+    (".bin", "Metadata"),
+    (".ttf", "Fonts"),
+    (".otf", "Fonts"),
+    (".bnk", "Audio"),
+    (".wem", "Audio"),
+    (".ogg", "Audio"),
+    (".wav", "Audio"),
+    (".mp4", "Movies"),
+    (".bk2", "Movies"),
+    (".webm", "Movies"),
+)
+# Decoders the standard library has; other methods (Oodle, LZ4) are reported, not timed.
+_DECODERS: dict[str, Callable[[bytes], bytes] | None] = {
+    "None": None,
+    "Zlib": zlib.decompress,
+    "Gzip": lambda data: zlib.decompress(data, 31),
+}
+
+
+@dataclass(frozen=True)
+class PakReportSettings:
+    baseline_dir: Path  # <Platform>-<Config>.json: the report the next build is compared with
+    update_baseline: bool  # rolling, build-over-build baseline; off to keep a pinned one
+    max_growth_percent: float | None  # fail the build when the stored size grows more than this
+    top: int
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any], artifacts_root: Path) -> "PakReportSettings | None":
+        rep = uebuildlib._get_dict(cfg, "PakReport")
+        if not uebuildlib._bool(rep.get("Enabled"), False):
+            return None
+        baseline_dir = rep.get("BaselineDir")
+        growth = rep.get("MaxGrowthPercent")
+        top = rep.get("Top")
+        return cls(
+            baseline_dir=Path(baseline_dir) if isinstance(baseline_dir, str) and baseline_dir.strip() else artifacts_root / ".pakreports",
+            update_baseline=uebuildlib._bool(rep.get("UpdateBaseline"), True),
+            max_growth_percent=float(growth) if isinstance(growth, (int, float)) and growth >= 0 else None,
+            top=top if isinstance(top, int) and top > 0 else 10,
+        )
+
+    def baseline_path(self, platform: str, build_config: str) -> Path:
+        return self.baseline_dir / f"{platform}-{build_config}.json"
+
+
+# --- container parsing ----------------------------------------------------------------------
+
+
+@dataclass
+class Entry:
+    path: str  # relative to the mount point ("" when the container has no names for it)
+    stored: int
+    raw: int
+    method: str
+    encrypted: bool = False
+    kind: str = ""  # IoStore chunk type
+    blocks: list[tuple[int, int, int, str]] = field(default_factory=list)  # (offset, stored, raw, method); offset in the data file
+
+
+class _Reader:
+    """Little-endian cursor over a slice of a mapped container."""
+
+    def __init__(self, buf: Any, pos: int = 0) -> None:
+        self.buf = buf
+        self.pos = pos
+
+    def take(self, n: int) -> bytes:
+        if n < 0 or self.pos + n > len(self.buf):
+            raise ValueError(f"truncated at {self.pos} (+{n})")
+        data = self.buf[self.pos : self.pos + n]
+        self.pos += n
+        return data
+
+    def unpack(self, fmt: str) -> Any:
+        values = struct.unpack_from(fmt, self.buf, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return values[0] if len(values) == 1 else values
+
+    def fstring(self) -> str:
+        n = self.unpack("<i")
+        if n == 0:
+            return ""
+        if abs(n) > 1 << 16:
+            raise ValueError(f"implausible string length {n} at {self.pos - 4}")
+        if n > 0:
+            return bytes(self.take(n)).rstrip(b"\0").decode("latin-1")
+        return bytes(self.take(-2 * n)).decode("utf-16-le", "replace").rstrip("\0")
+
+
+def _strip_mount(mount: str, path: str) -> str:
+    full = mount + path
+    while full.startswith("../"):
+        full = full[3:]
+    return full.lstrip("/")
+
+
+def _method_name(names: list[str], index: int) -> str:
+    if index == 0:
+        return "None"
+    return names[index - 1] if index - 1 < len(names) and names[index - 1] else f"#{index}"
+
+
+def _pak_footer(mm: Any) -> tuple[int, int, int, bool, list[str], bool]:
+    """(version, index offset, index size, encrypted index, method names, 8a) from the footer."""
+    size = len(mm)
+    # The footer length depends on the version; try each layout and keep the one that agrees.
+    for names, frozen in ((5, 0), (4, 0), (5, 1), (0, 0)):
+        magic_at = size - 44 - frozen - names * _PAK_NAME_LEN
+        if magic_at < 1 or mm[magic_at : magic_at + 4] != _PAK_MAGIC:
+            continue
+        version, index_offset, index_size = struct.unpack_from("<iqq", mm, magic_at + 4)
+        if (version >= _PAK_FNAME_METHODS) != (names > 0) or (version == _PAK_FROZEN_INDEX) != bool(frozen):
+            continue
+        encrypted = version >= 4 and mm[magic_at - 1] != 0
+        start = size - names * _PAK_NAME_LEN
+        methods = [bytes(mm[start + i * _PAK_NAME_LEN : start + (i + 1) * _PAK_NAME_LEN]).split(b"\0", 1)[0].decode("ascii", "replace") for i in range(names)]
+        return version, index_offset, index_size, encrypted, methods, names == 4
+    raise ValueError("no pak footer (not a .pak, or an unsupported version)")
+
+
+def _header_size(version: int, compressed: bool, blocks: int, v8a: bool) -> int:
+    """Size of the FPakEntry copy UnrealPak writes in front of every entry's data."""
+    n = 8 + 8 + 8 + (1 if v8a else 4) + 20
+    if version < _PAK_NO_TIMESTAMPS:
+        n += 8
+    if version >= _PAK_COMPRESSION_ENCRYPTION:
+        n += (4 + 16 * blocks if compressed else 0) + 1 + 4
+    return n
+
+
+def _legacy_entry(r: _Reader, version: int, names: list[str], v8a: bool) -> Entry:
+    offset, stored, raw = r.unpack("<qqq")
+    if version < _PAK_FNAME_METHODS:
+        flags = r.unpack("<i")
+        method = next((name for bit, name in _LEGACY_METHODS if flags & bit), "None")
+    else:
+        method = _method_name(names, r.unpack("<B" if v8a else "<I"))
+    if version < _PAK_NO_TIMESTAMPS:
+        r.take(8)
+    r.take(20)
+    spans: list[tuple[int, int]] = []
+    encrypted = False
+    if version >= _PAK_COMPRESSION_ENCRYPTION:
+        if method != "None":
+            spans = [r.unpack("<qq") for _ in range(r.unpack("<I"))]
+        encrypted = bool(r.unpack("<B") & 0x01)
+        block_size = r.unpack("<I")
+    else:
+        block_size = raw
+    base = offset if version >= _PAK_RELATIVE_CHUNK_OFFSETS else 0
+    if method == "None":
+        start = offset + _header_size(version, False, 0, v8a)
+        blocks = [(start, stored, raw, method)]
+    else:
+        blocks = [
+            (base + a, b - a, min(block_size, raw - i * block_size) if block_size else raw, method)
+            for i, (a, b) in enumerate(spans)
+        ]
+    return Entry("", stored, raw, method, encrypted, blocks=blocks)
+
+
+def _encoded_entry(r: _Reader, version: int, names: list[str]) -> Entry:
+    """One entry of the v10+ bit-packed entry table (FPakFile::DecodePakEntry)."""
+    value = r.unpack("<I")
+    block_size = (value & 0x3F) << 11
+    if value & 0x3F == 0x3F:
+        block_size = r.unpack("<I")
+    count = (value >> 6) & 0xFFFF
+    encrypted = bool(value & (1 << 22))
+    method = _method_name(names, (value >> 23) & 0x3F)
+    offset = r.unpack("<I" if value & (1 << 31) else "<Q")
+    raw = r.unpack("<I" if value & (1 << 30) else "<Q")
+    stored = r.unpack("<I" if value & (1 << 29) else "<Q") if method != "None" else raw
+    sizes = [r.unpack("<I") for _ in range(count)] if count and (encrypted or count != 1) else [stored]
+    start = offset + _header_size(version, method != "None", count, False)
+    blocks = []
+    for i, size in enumerate(sizes):
+        left = raw - i * block_size if block_size else raw
+        blocks.append((start, size, min(block_size, left) if block_size else raw, method))
+        start += (size + 15) & ~15 if encrypted else size
+    return Entry("", stored, raw, method, encrypted, blocks=blocks)
+
+
+class _Mapping:
+    """A read-only mapping of one file; empty files map to b""."""
+
+    def __init__(self, path: Path) -> None:
+        self._fh = path.open("rb")
+        try:
+            self.mm: Any = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(self._fh.fileno()).st_size else b""
+        except (OSError, ValueError):
+            self._fh.close()
+            raise
+
+    def close(self) -> None:
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self._fh.close()
+
+
+class PakFile:
+    """A .pak read through its footer and index only; entry data is touched by ``data()`` alone."""
+
+    format = "pak"
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._map = _Mapping(path)
+        self.mm = self._map.mm
+        try:
+            self.version, self._index_offset, index_size, encrypted, self._names, self._v8a = _pak_footer(self.mm)
+            if encrypted:
+                raise ValueError("the index is encrypted")
+            if self._index_offset < 0 or self._index_offset + index_size > len(self.mm):
+                raise ValueError("index out of range")
+        except ValueError:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> "PakFile":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def data(self, offset: int, size: int) -> bytes:
+        return self.mm[offset : offset + size]
+
+    def entries(self) -> Iterator[Entry]:
+        version, names = self.version, self._names
+        r = _Reader(self.mm, self._index_offset)
+        mount = r.fstring()
+        count = r.unpack("<i")
+        if version < _PAK_PATH_HASH_INDEX:
+            for _ in range(count):
+                name = r.fstring()
+                entry = _legacy_entry(r, version, names, self._v8a)
+                entry.path = _strip_mount(mount, name)
+                yield entry
+            return
+        r.take(8)  # path hash seed
+        if r.unpack("<I"):
+            r.take(8 + 8 + 20)  # the path hash index is for runtime lookups only
+        directory: int | None = None
+        if r.unpack("<I"):
+            directory, _ = r.unpack("<qq")
+            r.take(20)
+        encoded_size = r.unpack("<i")
+        encoded_at = r.pos
+        r.take(encoded_size)
+        listed = [_legacy_entry(r, version, names, self._v8a) for _ in range(r.unpack("<i"))]
+        if directory is None:
+            # Written without names: walk the bit-packed table, then the entries that did not fit it.
+            enc = _Reader(self.mm, encoded_at)
+            while enc.pos < encoded_at + encoded_size:
+                yield _encoded_entry(enc, version, names)
+            yield from listed
+            return
+        d = _Reader(self.mm, directory)
+        for _ in range(d.unpack("<i")):
+            dir_name = d.fstring()
+            for _ in range(d.unpack("<i")):
+                file_name = d.fstring()
+                location = d.unpack("<i")
+                if location >= 0:
+                    entry = _encoded_entry(_Reader(self.mm, encoded_at + location), version, names)
+                elif location != -(1 << 31):
+                    entry = listed[-location - 1]
+                else:
+                    continue
+                entry.path = _strip_mount(mount, ("" if dir_name == "/" else dir_name) + file_name)
+                yield entry
+
+
+class IoStoreContainer:
+    """A .utoc and its .ucas partitions; the .ucas files are mapped only when ``data()`` needs them."""
+
+    format = "iostore"
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._map = _Mapping(path)
+        self._partitions: dict[int, _Mapping] = {}
+        try:
+            self._parse(self._map.mm)
+        except (ValueError, struct.error) as exc:
+            self.close()
+            raise ValueError(str(exc)) from None
+
+    def _parse(self, mm: Any) -> None:
+        if len(mm) < _TOC_HEADER.size or mm[:16] != _TOC_MAGIC:
+            raise ValueError("not an IoStore TOC")
+        (
+            _, self.version, _, _, header_size, entries, block_count, block_size, name_count, name_len,
+            self.block_bytes, dir_size, partitions, _, _, flags, _, _, seeds, partition_size, no_hash, _, *_,
+        ) = _TOC_HEADER.unpack_from(mm, 0)
+        if block_size != 12:
+            raise ValueError(f"unexpected compressed block entry size {block_size}")
+        self.partition_count = max(1, partitions)
+        self.partition_size = partition_size if partition_size and partitions > 1 else 1 << 64
+        self._chunk_types = _CHUNK_TYPES_UE5 if self.version >= _TOC_PERFECT_HASH else _CHUNK_TYPES_UE4
+        r = _Reader(mm, header_size)
+        self._ids = r.take(12 * entries)
+        self._spans = r.take(10 * entries)
+        r.take(4 * seeds if self.version >= _TOC_PERFECT_HASH else 0)
+        r.take(4 * no_hash if self.version >= _TOC_PERFECT_HASH_OVERFLOW else 0)
+        self._blocks = r.take(12 * block_count)
+        self._names = [bytes(r.take(name_len)).split(b"\0", 1)[0].decode("ascii", "replace") for _ in range(name_count)]
+        if flags & _TOC_SIGNED:
+            r.take(2 * r.unpack("<i") + 20 * block_count)
+        # Names come from the directory index, which is encrypted along with an encrypted container.
+        self._directory = r.take(dir_size) if flags & _TOC_INDEXED and not flags & _TOC_ENCRYPTED and dir_size else b""
+        self.encrypted = bool(flags & _TOC_ENCRYPTED)
+        self.entry_count = entries
+
+    def close(self) -> None:
+        for part in self._partitions.values():
+            part.close()
+        self._map.close()
+
+    def __enter__(self) -> "IoStoreContainer":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def partition_paths(self) -> list[Path]:
+        stem = self.path.with_suffix("")
+        return [stem.with_name(stem.name + (f"_s{i}" if i else "") + ".ucas") for i in range(self.partition_count)]
+
+    def data(self, offset: int, size: int) -> bytes:
+        index, local = divmod(offset, self.partition_size)
+        part = self._partitions.get(index)
+        if part is None:
+            part = self._partitions[index] = _Mapping(self.partition_paths()[index])
+        return part.mm[local : local + size]
+
+    def _paths(self) -> dict[int, str]:
+        """TOC entry index -> file name, from the directory index (FIoDirectoryIndexResource)."""
+        if not self._directory:
+            return {}
+        r = _Reader(self._directory)
+        mount = r.fstring()
+        dirs = [r.unpack("<4I") for _ in range(r.unpack("<i"))]  # name, first child, next sibling, first file
+        files = [r.unpack("<3I") for _ in range(r.unpack("<i"))]  # name, next file, TOC entry index
+        strings = [r.fstring() for _ in range(r.unpack("<i"))]
+        paths: dict[int, str] = {}
+        stack = [(0, "")] if dirs else []
+        while stack:
+            index, prefix = stack.pop()
+            name, child, sibling, file = dirs[index]
+            if sibling != _NO_INDEX:
+                stack.append((sibling, prefix))
+            here = prefix + (strings[name] + "/" if name != _NO_INDEX else "")
+            while file != _NO_INDEX:
+                file_name, file, toc_index = files[file]
+                paths[toc_index] = _strip_mount(mount, here + strings[file_name])
+            if child != _NO_INDEX:
+                stack.append((child, here))
+        return paths
+
+    def entries(self) -> Iterator[Entry]:
+        paths = self._paths()
+        block_bytes = self.block_bytes or 1
+        for i in range(self.entry_count):
+            kind_index = self._ids[12 * i + 11]
+            kind = self._chunk_types[kind_index] if kind_index < len(self._chunk_types) else f"#{kind_index}"
+            span = self._spans[10 * i : 10 * i + 10]
+            offset, length = int.from_bytes(span[:5], "big"), int.from_bytes(span[5:], "big")
+            blocks = []
+            if length:
+                for b in range(offset // block_bytes, (offset + length - 1) // block_bytes + 1):
+                    raw = self._blocks[12 * b : 12 * b + 12]
+                    blocks.append(
+                        (
+                            int.from_bytes(raw[:5], "little"),
+                            int.from_bytes(raw[5:8], "little"),
+                            int.from_bytes(raw[8:11], "little"),
+                            _method_name(self._names, raw[11]),
+                        )
+                    )
+            yield Entry(
+                paths.get(i, ""),
+                stored=sum(b[1] for b in blocks),
+                raw=length,
+                method=blocks[0][3] if blocks else "None",
+                encrypted=self.encrypted,
+                kind=kind,
+                blocks=blocks,
+            )
+
+
+def open_container(path: Path) -> PakFile | IoStoreContainer:
+    """Open a .pak or .utoc; raises ValueError for anything this reader does not understand."""
+    if path.suffix.lower() == ".utoc":
+        return IoStoreContainer(path)
+    return PakFile(path)
+
+
+def find_containers(root: Path) -> list[Path]:
+    if root.is_file():
+        return [root]
+    return sorted(p for p in root.rglob("*") if p.suffix.lower() in (".pak", ".utoc") and p.is_file())
+
+
+# --- report ---------------------------------------------------------------------------------
+
+
+def asset_class(entry: Entry) -> str:
+    name = entry.path.lower()
+    for suffix, cls in _CLASSES:
+        if name.endswith(suffix):
+            return cls
+    if not name:
+        return entry.kind or "Unnamed"
+    return "Other"
+
+
+def folder(path: str) -> str:
+    """Where an entry lives: up to the first directory below a Content/ root, else its top directory."""
+    parts = path.split("/")[:-1]
+    if "Content" in parts:
+        return "/".join(parts[: parts.index("Content") + 2])
+    return parts[0] if parts else "(root)"
+
+
+def _add(table: dict[str, list[int]], key: str, stored: int, raw: int) -> None:
+    row = table.setdefault(key, [0, 0, 0])
+    row[0] += 1
+    row[1] += stored
+    row[2] += raw
+
+
+def _rows(table: dict[str, list[int]]) -> dict[str, dict[str, int]]:
+    return {k: {"entries": v[0], "stored": v[1], "raw": v[2]} for k, v in sorted(table.items(), key=lambda kv: -kv[1][1])}
+
+
+def analyze(root: Path, *, top: int = 10) -> dict[str, Any]:
+    """Size report for every container under ``root``: per container, asset class and folder, plus the largest entries."""
+    started = time.monotonic()
+    containers: dict[str, dict[str, Any]] = {}
+    classes: dict[str, list[int]] = {}
+    folders: dict[str, list[int]] = {}
+    largest: list[tuple[int, str, int, str]] = []
+    base = root if root.is_dir() else root.parent
+    for path in find_containers(root):
+        name = path.relative_to(base).as_posix()
+        row: dict[str, Any] = {"format": "iostore" if path.suffix.lower() == ".utoc" else "pak", "disk": path.stat().st_size}
+        containers[name] = row
+        methods: dict[str, int] = {}
+        entries = stored = raw = 0
+        try:
+            with open_container(path) as container:
+                row["version"] = container.version
+                if isinstance(container, IoStoreContainer):
+                    row["disk"] += sum(p.stat().st_size for p in container.partition_paths() if p.exists())
+                for entry in container.entries():
+                    entries += 1
+                    stored += entry.stored
+                    raw += entry.raw
+                    methods[entry.method] = methods.get(entry.method, 0) + entry.stored
+                    _add(classes, asset_class(entry), entry.stored, entry.raw)
+                    _add(folders, folder(entry.path) if entry.path else f"({name})", entry.stored, entry.raw)
+                    item = (entry.stored, entry.path or f"{name}#{entries - 1} ({entry.kind})", entry.raw, name)
+                    if len(largest) < top:
+                        heapq.heappush(largest, item)
+                    elif item > largest[0]:
+                        heapq.heapreplace(largest, item)
+        except (OSError, ValueError, struct.error) as exc:
+            row["error"] = str(exc)
+        row.update(entries=entries, stored=stored, raw=raw, methods=methods)
+    return {
+        "root": str(root),
+        "created": time.time(),
+        "seconds": round(time.monotonic() - started, 3),
+        "totals": {
+            "containers": len(containers),
+            "entries": sum(c["entries"] for c in containers.values()),
+            "disk": sum(c["disk"] for c in containers.values()),
+            "stored": sum(c["stored"] for c in containers.values()),
+            "raw": sum(c["raw"] for c in containers.values()),
+        },
+        "containers": containers,
+        "classes": _rows(classes),
+        "folders": _rows(folders),
+        "largest": [{"path": p, "stored": s, "raw": r, "container": c} for s, p, r, c in sorted(largest, reverse=True)],
+    }
+
+
+def ratio(stored: int, raw: int) -> str:
+    return f"{stored / raw:.2f}" if raw else "-"
+
+
+def format_report(report: dict[str, Any], *, top: int = 10) -> list[str]:
+    size = ueartifacts.format_bytes
+    t = report["totals"]
+    lines = [
+        f"[info] {t['containers']} container(s), {t['entries']} entries: {size(t['disk'])} on disk, "
+        f"{size(t['stored'])} stored / {size(t['raw'])} raw (ratio {ratio(t['stored'], t['raw'])}), read in {report['seconds']:.2f}s"
+    ]
+    lines.append(f"  {'container':<52} {'format':<8} {'entries':>7} {'disk':>10} {'raw':>10} {'ratio':>5}  methods")
+    for name, c in sorted(report["containers"].items(), key=lambda kv: -kv[1]["disk"])[:top]:
+        methods = ", ".join(f"{m} {size(b)}" for m, b in sorted(c["methods"].items(), key=lambda kv: -kv[1]))
+        tail = f"  [error: {c['error']}]" if c.get("error") else ""
+        lines.append(f"  {name:<52} {c['format']:<8} {c['entries']:>7} {size(c['disk']):>10} {size(c['raw']):>10} {ratio(c['stored'], c['raw']):>5}  {methods}{tail}")
+    for title, key in (("asset class", "classes"), ("folder", "folders")):
+        lines.append(f"  {title:<52} {'':<8} {'entries':>7} {'stored':>10} {'raw':>10} {'ratio':>5}")
+        for name, row in list(report[key].items())[:top]:
+            lines.append(f"  {name:<52} {'':<8} {row['entries']:>7} {size(row['stored']):>10} {size(row['raw']):>10} {ratio(row['stored'], row['raw']):>5}")
+    lines.append(f"  {'largest entry':<52} {'':<8} {'':>7} {'stored':>10} {'raw':>10} {'ratio':>5}  container")
+    for row in report["largest"][:top]:
+        lines.append(f"  {row['path'][-52:]:<52} {'':<8} {'':>7} {size(row['stored']):>10} {size(row['raw']):>10} {ratio(row['stored'], row['raw']):>5}  {Path(row['container']).name}")
+    return lines
+
+
+def diff(current: dict[str, Any], baseline: dict[str, Any]) -> dict[str, Any]:
+    """Stored-size changes per container, asset class and folder, largest change first."""
+
+    def changes(cur: dict[str, dict[str, Any]], base: dict[str, dict[str, Any]]) -> list[dict[str, Any]]:
+        rows = []
+        for key in set(cur) | set(base):
+            before = base.get(key, {}).get("stored", 0)
+            after = cur.get(key, {}).get("stored", 0)
+            if before != after:
+                rows.append({"name": key, "before": before, "after": after, "delta": after - before})
+        return sorted(rows, key=lambda r: -abs(r["delta"]))
+
+    before, after = baseline["totals"]["stored"], current["totals"]["stored"]
+    return {
+        "baseline_created": baseline.get("created"),
+        "before": before,
+        "after": after,
+        "delta": after - before,
+        "percent": round(100.0 * (after - before) / before, 2) if before else None,
+        "containers": changes(current["containers"], baseline["containers"]),
+        "classes": changes(current["classes"], baseline["classes"]),
+        "folders": changes(current["folders"], baseline["folders"]),
+    }
+
+
+def format_diff(d: dict[str, Any], *, top: int = 10) -> list[str]:
+    size = ueartifacts.format_bytes
+    when = time.strftime("%Y-%m-%d %H:%M", time.localtime(d["baseline_created"])) if d.get("baseline_created") else "?"
+    pct = f" ({d['percent']:+.2f}%)" if d["percent"] is not None else ""
+    sign = "+" if d["delta"] >= 0 else "-"
+    lines = [f"[info] Stored size vs baseline of {when}: {size(d['before'])} -> {size(d['after'])}, {sign}{size(abs(d['delta']))}{pct}"]
+    for title, key in (("container", "containers"), ("asset class", "classes"), ("folder", "folders")):
+        for row in d[key][:top]:
+            sign = "+" if row["delta"] >= 0 else "-"
+            lines.append(f"  {title:<12} {row['name']:<52} {size(row['before']):>10} -> {size(row['after']):>10}  {sign}{size(abs(row['delta']))}")
+    return lines
+
+
+def read_report(path: Path) -> dict[str, Any] | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) and "totals" in data else None
+
+
+def write_report(path: Path, report: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+# --- decompression timing -------------------------------------------------------------------
+
+
+@dataclass
+class DecodeTiming:
+    seconds: float = 0.0
+    stored: int = 0
+    raw: int = 0
+    untimed: dict[str, int] = field(default_factory=dict)  # method -> stored bytes with no stdlib decoder, or encrypted
+
+    @property
+    def mbps(self) -> float:
+        return self.raw / 1048576 / self.seconds if self.seconds > 0 else 0.0
+
+
+def time_decompression(root: Path) -> DecodeTiming:
+    """Read every block of every container through its mapping and decode it, timing only that (not the index walk)."""
+    timing = DecodeTiming()
+    for path in find_containers(root):
+        try:
+            with open_container(path) as container:
+                for entry in container.entries():
+                    if entry.encrypted or any(b[3] not in _DECODERS for b in entry.blocks):
+                        key = "Encrypted" if entry.encrypted else entry.method
+                        timing.untimed[key] = timing.untimed.get(key, 0) + entry.stored
+                        continue
+                    for offset, stored, raw, method in entry.blocks:
+                        decode = _DECODERS[method]
+                        t0 = time.perf_counter()
+                        data = container.data(offset, stored)
+                        if decode is not None:
+                            decode(data)
+                        timing.seconds += time.perf_counter() - t0
+                        timing.stored += stored
+                        timing.raw += raw
+        except (OSError, ValueError, struct.error) as exc:
+            print(f"[warn] {path}: {exc}")
+    return timing
+
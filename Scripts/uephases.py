@@ -0,0 +1,642 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+import uebuildlib
+import uecache
+import ueengines
+import uegovernor
+import uehooks
+import uepipeline
+import ueprofile
+import ueshard
+import uestream
+import uetriage
+
+PHASES = ("compile", "cook", "stage", "package")  # + "merge" when the cook is sharded
+# Project inputs each phase reads directly; stage/package only depend on upstream phases.
+_PHASE_INPUTS = {
+    "compile": ("Source", "Plugins", "Config"),
+    "cook": ("Content", "Plugins", "Config"),
+    "stage": (),
+    "package": (),
+    "merge": (),
+}
+_OTHER_CONFIGS = ("DebugGame", "Test", "Shipping")
+
+
+def _num(d: dict[str, Any], key: str, default: float) -> float:
+    value = d.get(key)
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+        return float(value)
+    return default
+
+
+@dataclass(frozen=True)
+class Budget:
+    cores: float
+    ram_gb: float
+    disk_gb: float
+    costs: dict[str, uegovernor.PhaseCost]
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any], project_root: Path) -> "Budget":
+        phases = uebuildlib._get_dict(cfg, "Phases")
+        budget = uebuildlib._get_dict(phases, "Budget")
+        cpu = os.cpu_count() or 1
+        try:
+            free_gb = shutil.disk_usage(project_root).free / 1024**3
+        except OSError:
+            free_gb = 100.0
+        costs = uegovernor.default_costs(cpu)
+        overrides = uebuildlib._get_dict(phases, "Costs")
+        for kind, cost in list(costs.items()):
+            o = uebuildlib._get_dict(overrides, kind)
+            costs[kind] = uegovernor.PhaseCost(
+                cores=_num(o, "Cores", cost.cores), ram_gb=_num(o, "RamGB", cost.ram_gb), disk_gb=_num(o, "DiskGB", cost.disk_gb)
+            )
+        return cls(
+            cores=_num(budget, "Cores", float(cpu)),
+            # Leave headroom for the OS, the shell and the file cache.
+            ram_gb=_num(budget, "RamGB", max(4.0, uegovernor.physical_ram_gb() * 0.85)),
+            disk_gb=_num(budget, "DiskGB", max(1.0, free_gb - 10)),
+            costs=costs,
+        )
+
+    def describe(self) -> str:
+        return f"{self.cores:g} cores, {self.ram_gb:.0f} GB RAM, {self.disk_gb:.0f} GB disk"
+
+
+@dataclass
+class Phase:
+    id: str
+    kind: str
+    platform: str
+    jobs: list[uepipeline.BuildJob]
+    cmd: list[str]
+    env: dict[str, str]
+    log_dir: Path
+    outputs: list[Path]
+    deps: list[str] = field(default_factory=list)
+    inputs: tuple[str, ...] = ()
+    # Compile phases share Binaries/<Platform> across configs; only this config's files count.
+    owner_config: str | None = None
+    # Phases sharing a group never overlap (UBT allows one instance per project).
+    group: str | None = None
+    # Cook shards and their merge: the plan saying which maps/directories each shard cooks.
+    shards: ueshard.ShardPlan | None = None
+    shard_index: int | None = None
+    fingerprint: str = ""
+    state: str = "pending"  # pending | running | cached | ok | failed | blocked
+    returncode: int | None = None
+    started: float | None = None
+    finished: float | None = None
+
+    @property
+    def seconds(self) -> float:
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    def to_dict(self, origin: float) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "deps": self.deps,
+            "state": self.state,
+            "returncode": self.returncode,
+            "fingerprint": self.fingerprint,
+            "start": round(self.started - origin, 3) if self.started is not None else None,
+            "seconds": round(self.seconds, 3),
+            "log": str(self.log_dir / "UAT.log"),
+        }
+
+
+def _enabled_phases(cfg: dict[str, Any]) -> list[str]:
+    bcr = uebuildlib._get_dict(uebuildlib._get_dict(cfg, "UAT"), "BuildCookRun")
+    kinds = ["compile"]
+    if uebuildlib._bool(bcr.get("Cook"), True):
+        kinds.append("cook")
+    if uebuildlib._bool(bcr.get("Stage"), True):
+        kinds.append("stage")
+    if uebuildlib._bool(bcr.get("Package"), True) or uebuildlib._bool(bcr.get("Archive"), True):
+        kinds.append("package")
+    return kinds
+
+
+def _steps(kind: str, cfg: dict[str, Any], staging_dir: Path) -> list[str]:
+    bcr = uebuildlib._get_dict(uebuildlib._get_dict(cfg, "UAT"), "BuildCookRun")
+    if kind == "compile":
+        return ["-build"]
+    if kind == "cook":
+        return ["-cook"]
+    stage_dir = f"-stagingdirectory={staging_dir}"
+    if kind == "stage":
+        return ["-skipcook", "-stage", *(["-pak"] if uebuildlib._bool(bcr.get("Pak"), True) else []), stage_dir]
+    steps = ["-skipcook", "-skipstage", stage_dir]
+    if uebuildlib._bool(bcr.get("Package"), True):
+        steps.append("-package")
+    if uebuildlib._bool(bcr.get("Archive"), True):
+        steps.append("-archive")
+    return steps
+
+
+def plan_graph(
+    *,
+    cfg: dict[str, Any],
+    config_path: Path,
+    jobs: list[uepipeline.BuildJob],
+    extra_uat_args: Iterable[str],
+    log_root: Path,
+    cook_shards: int | None = None,
+) -> list[Phase]:
+    """compile -> stage <- cook, stage -> package per job; one cook per platform shared by its configs.
+
+    With more than one cook shard (CookShards.Count / ``cook_shards``) the cook becomes
+    ``<Platform>:cook-<i>`` shards -> ``<Platform>:cook-merge`` -> ``<Platform>:cook``, the
+    last being an incremental cook over the merged tree (or nothing, if Finalize is off).
+    """
+    extra_uat_args = list(extra_uat_args)
+    project_root = uebuildlib.resolve_project_root(config_path)
+    kinds = _enabled_phases(cfg)
+    shard_settings = ueshard.ShardSettings.from_config(cfg, project_root)
+    phases: dict[str, Phase] = {}
+    cooks: dict[str, str] = {}  # platform -> phase that leaves the final cooked data
+
+    def _phase(
+        kind: str, pid: str, job: uepipeline.BuildJob, staging_dir: Path, outputs: list[Path], steps: list[str] | None = None
+    ) -> Phase:
+        cmd, env = uebuildlib.build_uat_command(
+            cfg=cfg,
+            config_path=config_path,
+            platform=job.platform,
+            build_config=job.build_config,
+            extra_uat_args=extra_uat_args,
+            archive_dir=job.archive_dir,
+            steps=steps if steps is not None else _steps(kind, cfg, staging_dir),
+        )
+        log_dir = log_root / pid.replace(":", "-")
+        uebuildlib.tag_job_env(env, job=pid, log_dir=log_dir, archive_dir=job.archive_dir)
+        return Phase(
+            id=pid, kind=kind, platform=job.platform, jobs=[job], cmd=cmd, env=env, log_dir=log_dir,
+            outputs=outputs, inputs=_PHASE_INPUTS[kind],
+        )
+
+    def _sharded_cook(job: uepipeline.BuildJob, staging_dir: Path, count: int) -> str | None:
+        plan = ueshard.plan(shard_settings, job.project_file, job.platform, count)
+        if len(plan.shards) < 2:
+            print(f"[warn] {job.platform}: fewer than 2 maps to shard the cook over; cooking in one process")
+            return None
+        plan.write()
+        merge_id = f"{job.platform}:cook-merge"
+        merge = Phase(
+            id=merge_id, kind="merge", platform=job.platform, jobs=[job], cmd=[], env={}, log_dir=log_root / merge_id.replace(":", "-"),
+            outputs=[project_root / "Saved" / "Cooked" / ueshard.cook_dir_name(job.platform)], shards=plan,
+        )
+        for shard in plan.shards:
+            sid = f"{job.platform}:cook-{shard.index}"
+            phases[sid] = _phase("cook", sid, job, staging_dir, [plan.shard_dir(shard.index)], ueshard.shard_steps(plan, shard.index, project_root))
+            phases[sid].shards = plan
+            phases[sid].shard_index = shard.index
+            merge.deps.append(sid)
+        phases[merge_id] = merge
+        if not shard_settings.finalize:
+            return merge_id
+        cook_id = f"{job.platform}:cook"
+        phases[cook_id] = _phase("cook", cook_id, job, staging_dir, merge.outputs, ["-cook", "-iterate"])
+        phases[cook_id].deps = [merge_id]
+        return cook_id
+
+    for job in jobs:
+        staging_dir = project_root / "Saved" / "StagedBuilds" / job.name
+        chain: list[str] = []
+        for kind in kinds:
+            if kind == "cook":
+                if job.platform in cooks:
+                    phases[cooks[job.platform]].jobs.append(job)
+                    continue
+                count = cook_shards or shard_settings.count
+                cook_id = _sharded_cook(job, staging_dir, count) if count > 1 else None
+                if cook_id is None:
+                    cook_id = f"{job.platform}:cook"
+                    cooked = project_root / "Saved" / "Cooked" / f"{ueshard.cook_dir_name(job.platform)}*"
+                    phases[cook_id] = _phase("cook", cook_id, job, staging_dir, [cooked])
+                cooks[job.platform] = cook_id
+                continue
+            pid = f"{job.name}:{kind}"
+            if kind == "compile":
+                outputs = [project_root / "Binaries" / job.platform]
+            elif kind == "stage":
+                outputs = [staging_dir]
+            else:
+                outputs = [job.archive_dir]
+            phase = _phase(kind, pid, job, staging_dir, outputs)
+            if kind == "compile":
+                phase.group = "ubt"  # UBT holds a per-project mutex; parallel compiles just fail
+                phase.owner_config = job.build_config
+            else:
+                phase.deps = [chain[-1]]
+                # Cooked data is first consumed by whichever step comes right after the cook.
+                if job.platform in cooks and (kind == "stage" or "stage" not in kinds):
+                    phase.deps.append(cooks[job.platform])
+            phases[pid] = phase
+            chain.append(pid)
+    return list(phases.values())
+
+
+def _owned_by(name: str, platform: str, build_config: str | None) -> bool:
+    """UE names non-Development binaries ``<Name>-<Platform>-<Config>.*``; Development has no suffix."""
+    if build_config is None:
+        return True
+    if build_config == "Development":
+        return not any(f"-{platform}-{c}" in name for c in _OTHER_CONFIGS)
+    return f"-{platform}-{build_config}" in name
+
+
+class PhaseCache:
+    """Per-phase records: fingerprint -> snapshot of the phase's output files."""
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.dir = cache_dir / "phases"
+
+    @staticmethod
+    def _expand(outputs: list[Path]) -> list[Path]:
+        dirs: list[Path] = []
+        for out in outputs:
+            if "*" in out.name:
+                dirs.extend(sorted(out.parent.glob(out.name)) if out.parent.is_dir() else [])
+            else:
+                dirs.append(out)
+        return dirs
+
+    def _snapshot(self, phase: Phase) -> dict[str, list[int]]:
+        files: dict[str, list[int]] = {}
+        for d in self._expand(phase.outputs):
+            if d.is_dir():
+                for path in d.rglob("*"):
+                    if path.is_file() and _owned_by(path.name, phase.platform, phase.owner_config):
+                        st = path.stat()
+                        files[path.as_posix()] = [st.st_size, st.st_mtime_ns]
+        return files
+
+    def is_fresh(self, phase: Phase) -> bool:
+        try:
+            record = json.loads((self.dir / f"{phase.fingerprint}.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        files = record.get("files") if isinstance(record, dict) else None
+        if not files:
+            return False
+        for path, (size, mtime_ns) in files.items():
+            try:
+                st = os.stat(path)
+            except OSError:
+                return False
+            if st.st_size != size or st.st_mtime_ns != mtime_ns:
+                return False
+        return True
+
+    def record(self, phase: Phase) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        payload = {"phase": phase.id, "created": time.time(), "files": self._snapshot(phase)}
+        (self.dir / f"{phase.fingerprint}.json").write_text(json.dumps(payload), encoding="utf-8")
+
+
+def fingerprint_graph(
+    phases: list[Phase], *, inputs: dict[str, str], engine: str
+) -> None:
+    """Each fingerprint covers the phase command, its direct inputs and its dependencies' fingerprints."""
+    by_id = {p.id: p for p in phases}
+    for phase in phases:  # plan order is topological
+        # A versioned -archivedirectory changes every build: hash the stable base dir instead.
+        cmd = uecache.stable_cmd(phase.cmd)
+        archive: str | None = None
+        if phase.kind == "cook":
+            # The cook is shared across configs: its -clientconfig/archive dir don't change cooked data.
+            cmd = [a for a in cmd if not a.startswith("-clientconfig=")]
+        elif phase.kind != "merge":
+            job = phase.jobs[0]
+            archive = str(job.base_dir or job.archive_dir)
+        payload = {
+            "kind": phase.kind,
+            "cmd": cmd,
+            "archive": archive,
+            "engine": engine,
+            "inputs": {name: inputs.get(name, "") for name in (*phase.inputs, "uproject")},
+            "deps": [by_id[d].fingerprint for d in phase.deps],
+        }
+        phase.fingerprint = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class PhaseScheduler:
+    """Runs ready phases concurrently while their summed cost fits the budget.
+
+    A phase that does not fit still starts when nothing else is running, so an
+    over-budget phase degrades to serial execution instead of deadlocking.
+    """
+
+    def __init__(self, phases: list[Phase], budget: Budget, run_phase: Callable[[Phase], str]) -> None:
+        self.phases = phases
+        self.budget = budget
+        self.run_phase = run_phase
+        self._cv = threading.Condition()
+        self._used = uegovernor.PhaseCost(0.0, 0.0, 0.0)
+        self._groups: set[str] = set()
+
+    def _fits(self, cost: uegovernor.PhaseCost) -> bool:
+        return (
+            self._used.cores + cost.cores <= self.budget.cores
+            and self._used.ram_gb + cost.ram_gb <= self.budget.ram_gb
+            and self._used.disk_gb + cost.disk_gb <= self.budget.disk_gb
+        )
+
+    def _add(self, cost: uegovernor.PhaseCost, sign: int) -> None:
+        u = self._used
+        self._used = uegovernor.PhaseCost(u.cores + sign * cost.cores, u.ram_gb + sign * cost.ram_gb, u.disk_gb + sign * cost.disk_gb)
+
+    def _worker(self, phase: Phase, cost: uegovernor.PhaseCost) -> None:
+        try:
+            state = self.run_phase(phase)
+        except Exception as exc:  # a crashing phase must not wedge the scheduler
+            print(f"[error] [{phase.id}] {exc}")
+            state = "failed"
+        with self._cv:
+            phase.state = state
+            phase.finished = time.monotonic()
+            self._add(cost, -1)
+            if phase.group:
+                self._groups.discard(phase.group)
+            self._cv.notify_all()
+
+    def run(self) -> None:
+        by_id = {p.id: p for p in self.phases}
+        running = 0
+        with self._cv:
+            while True:
+                for phase in self.phases:
+                    if phase.state == "pending" and any(by_id[d].state in ("failed", "blocked") for d in phase.deps):
+                        phase.state = "blocked"
+                running = sum(1 for p in self.phases if p.state == "running")
+                started_any = False
+                for phase in self.phases:
+                    if phase.state != "pending" or any(by_id[d].state not in ("ok", "cached") for d in phase.deps):
+                        continue
+                    if phase.group and phase.group in self._groups:
+                        continue
+                    cost = self.budget.costs[phase.kind]
+                    if running and not self._fits(cost):
+                        continue
+                    phase.state = "running"
+                    phase.started = time.monotonic()
+                    self._add(cost, +1)
+                    if phase.group:
+                        self._groups.add(phase.group)
+                    running += 1
+                    started_any = True
+                    threading.Thread(target=self._worker, args=(phase, cost), name=f"phase-{phase.id}", daemon=True).start()
+                if not running and not started_any:
+                    return
+                self._cv.wait()
+
+
+def run_phases(
+    *,
+    cfg: dict[str, Any],
+    config_path: Path,
+    build_root: Path,
+    jobs: list[uepipeline.BuildJob],
+    extra_uat_args: Iterable[str],
+    dry_run: bool,
+    log_settings: uestream.LogSettings,
+    use_cache: bool = True,
+    cook_shards: int | None = None,
+) -> int:
+    """Phase-graph build of ``jobs``: each phase is a separate, separately cached UAT run."""
+    if not jobs:
+        return 0
+    remote = [job for job in jobs if job.remote is not None]
+    if remote:
+        return _run_with_remote(
+            remote,
+            [job for job in jobs if job.remote is None],
+            cfg=cfg,
+            config_path=config_path,
+            build_root=build_root,
+            extra_uat_args=extra_uat_args,
+            dry_run=dry_run,
+            log_settings=log_settings,
+            use_cache=use_cache,
+            cook_shards=cook_shards,
+        )
+    project_root = uebuildlib.resolve_project_root(config_path)
+    log_root = jobs[0].log_dir.parent
+    phases = plan_graph(
+        cfg=cfg, config_path=config_path, jobs=jobs, extra_uat_args=extra_uat_args, log_root=log_root, cook_shards=cook_shards
+    )
+    budget = Budget.from_config(cfg, project_root)
+
+    build_cache = uecache.BuildCache.from_config(cfg, project_root) or uecache.BuildCache(
+        project_root / "Saved" / "BuildCache", project_root
+    )
+    digests = build_cache.input_digests(jobs[0].project_file)
+    fingerprint_graph(
+        phases,
+        inputs={**digests, "uproject": digests.get(jobs[0].project_file.name, "")},
+        engine=ueengines.engine_version(jobs[0].engine_root, cfg),
+    )
+    cache = PhaseCache(build_cache.cache_dir) if use_cache else None
+
+    print(f"[info] Phase graph: {len(phases)} phase(s) for {len(jobs)} job(s); budget {budget.describe()}")
+    for phase in phases:
+        deps = f" <- {', '.join(phase.deps)}" if phase.deps else ""
+        print(f"[info]   {phase.id}{deps}")
+
+    rc = uepipeline.run_pre_hooks(jobs[0], build_root=build_root, dry_run=dry_run)
+    if rc != 0:
+        return rc
+
+    hooks = uehooks.registry(build_root / "Hooks")
+    governor = uegovernor.Governor.from_config(cfg)
+    by_id = {p.id: p for p in phases}
+    final = {job.name: [p for p in phases if p.kind not in ("cook", "merge") and p.jobs[0] is job][-1].id for job in jobs}
+    shard_settings = ueshard.ShardSettings.from_config(cfg, project_root)
+    weights = ueshard.CookWeights(shard_settings.dir / "weights.json")
+    weights_lock = threading.Lock()
+    finish_rc: dict[str, int] = {}
+
+    def _run_phase(phase: Phase) -> str:
+        # A dependency that actually re-ran may have produced new outputs: rebuild downstream too.
+        upstream_ran = any(by_id[d].state == "ok" for d in phase.deps)
+        recorder = uepipeline.metrics_recorder(
+            cfg, phase.jobs[0], mode=f"phase:{phase.kind}", dry_run=dry_run, name=phase.id, cmd=phase.cmd
+        )
+        if cache is not None and not upstream_ran and not dry_run and cache.is_fresh(phase):
+            print(f"[info] [{phase.id}] up to date ({phase.fingerprint[:12]}), skipped")
+            if recorder is not None:
+                recorder.finish(returncode=0, stages={}, cache="cached")
+            return "cached"
+        print(f"[info] [{phase.id}] started (log: {phase.log_dir})")
+        if phase.kind == "merge":
+            state = _merge(phase)
+            if recorder is not None:
+                recorder.finish(returncode=phase.returncode or 0, stages={}, cache="disabled" if cache is None else "miss")
+            return state
+        profiler = ueprofile.StageProfiler(phase.id, progress=log_settings.console != "off" and not dry_run)
+        triage = uepipeline.error_triage(phase.jobs[0], name=phase.id)
+        timer = ueshard.CookTimer(phase.shards.units()) if phase.shards is not None else None
+        if phase.shards is not None and phase.shard_index is not None and not dry_run:
+            ueshard.prepare_shard_dir(phase.shards, phase.shard_index)
+        with uepipeline.admission(governor, phase.jobs[0], kind=phase.kind, dry_run=dry_run, label=phase.id) as slot:
+            profiler.mark_process_start()
+            phase.returncode = uebuildlib.run(
+                phase.cmd,
+                cwd=project_root,
+                env=phase.env,
+                dry_run=dry_run,
+                log_path=phase.log_dir / "UAT.log",
+                job=phase.id,
+                log_settings=log_settings,
+                sinks=[profiler.feed, triage.feed, *([timer.feed] if timer is not None else [])],
+                on_spawn=uepipeline.observe(slot, recorder, phase.jobs[0]),
+            )
+            profiler.finish()
+            if recorder is not None and slot is not None:
+                recorder.waited = slot.waited
+        state = "ok" if phase.returncode == 0 else "failed"
+        if state == "ok" and cache is not None and not dry_run:
+            cache.record(phase)
+            # The finalize cook rewrites the merged tree; the merge is up to date with what it left.
+            for dep in (by_id[d] for d in phase.deps if by_id[d].kind == "merge"):
+                cache.record(dep)
+        if state == "ok" and timer is not None and not dry_run:
+            with weights_lock:
+                weights.update(phase.platform, timer.seconds)
+        is_final = final[phase.jobs[0].name] == phase.id
+        if state == "ok" and is_final:
+            job = phase.jobs[0]
+            ctx = uepipeline.hook_context(job, dry_run=dry_run)
+            ctx.returncode = 0
+            finish_rc[job.name] = uepipeline.finish_job(job, hooks=hooks, ctx=ctx, profiler=profiler)
+        if recorder is not None:
+            recorder.finish(
+                returncode=phase.returncode or (finish_rc.get(phase.jobs[0].name, 0) if is_final else 0),
+                stages=profiler.summary(),
+                cache="disabled" if cache is None else "miss",
+                archive_dir=uepipeline.metrics_archive_dir(phase.jobs[0]) if is_final else None,
+            )
+        if not dry_run:
+            profiler.write(phase.log_dir)
+            if phase.returncode and triage.error_lines:
+                uetriage.report(triage, log_dir=phase.log_dir, index=uetriage.FailureIndex.for_project(project_root))
+        print(f"[info] [{phase.id}] {state} in {time.monotonic() - (phase.started or 0):.1f}s")
+        return state
+
+    def _merge(phase: Phase) -> str:
+        """Cook-merge phases run in-process: combine the shard outputs, then verify them."""
+        assert phase.shards is not None
+        report = ueshard.MergeReport() if dry_run else ueshard.merge(phase.shards, phase.outputs[0], regenerated=shard_settings.regenerated)
+        if not dry_run:
+            ueshard.print_report(report, phase.outputs[0])
+        phase.returncode = 0 if report.ok else 7
+        state = "ok" if report.ok else "failed"
+        if state == "ok" and cache is not None and not dry_run:
+            cache.record(phase)
+        print(f"[info] [{phase.id}] {state} in {time.monotonic() - (phase.started or 0):.1f}s")
+        return state
+
+    origin = time.monotonic()
+    PhaseScheduler(phases, budget, _run_phase).run()
+    wall = time.monotonic() - origin
+
+    if not dry_run:
+        log_root.mkdir(parents=True, exist_ok=True)
+        (log_root / "phases.json").write_text(
+            json.dumps({"wall_seconds": round(wall, 3), "phases": [p.to_dict(origin) for p in phases]}, indent=2),
+            encoding="utf-8",
+        )
+    return summarize(phases, wall, finish_rc)
+
+
+def _run_with_remote(
+    remote: list[uepipeline.BuildJob],
+    local: list[uepipeline.BuildJob],
+    *,
+    cfg: dict[str, Any],
+    config_path: Path,
+    build_root: Path,
+    extra_uat_args: Iterable[str],
+    dry_run: bool,
+    log_settings: uestream.LogSettings,
+    use_cache: bool,
+    cook_shards: int | None,
+) -> int:
+    """Remote jobs can't be split into phases: run each whole on its Mac while the local graph runs."""
+    project_root = uebuildlib.resolve_project_root(config_path)
+    results: dict[str, int] = {}
+
+    def _remote() -> None:
+        for job in remote:
+            print(f"[info] [{job.name}] remote build on {job.remote.destination}, outside the phase graph")
+            results[job.name] = uepipeline.run_job(
+                job,
+                build_root=build_root,
+                cwd=project_root,
+                dry_run=dry_run,
+                log_settings=log_settings,
+                pre_hook=not local,  # the local graph runs the pre-build hooks once
+                cfg=cfg,
+            )
+
+    worker = threading.Thread(target=_remote, name="uebuild-remote", daemon=True)
+    worker.start()
+    rc = run_phases(
+        cfg=cfg,
+        config_path=config_path,
+        build_root=build_root,
+        jobs=local,
+        extra_uat_args=extra_uat_args,
+        dry_run=dry_run,
+        log_settings=log_settings,
+        use_cache=use_cache,
+        cook_shards=cook_shards,
+    )
+    worker.join()
+    return rc or next((r for r in results.values() if r != 0), 0)
+
+
+def summarize(phases: list[Phase], wall: float, finish_rc: dict[str, int]) -> int:
+    print("[info] Phase summary:")
+    for p in phases:
+        status = p.state if p.state != "failed" else f"FAILED (rc={p.returncode})"
+        print(f"  {p.id:<32} {status:<16} {p.seconds:8.1f}s")
+        first = uetriage.first_error(p.log_dir) if p.state == "failed" else None
+        if first:
+            print(f"  {'':<32} first error: {first[:160]}")
+    busy = sum(p.seconds for p in phases)
+    if busy > 0 and wall > 0:
+        print(f"[info] Wall {wall:.1f}s for {busy:.1f}s of phase time ({busy / wall:.2f}x overlap)")
+
+    failed = [p for p in phases if p.state == "failed"]
+    if failed:
+        print(f"[error] {len(failed)} phase(s) failed; rerun to resume from the failed phase")
+        return failed[0].returncode or 1
+    bad = [rc for rc in finish_rc.values() if rc != 0]
+    if bad:
+        return bad[0]
+    print("[ok] All phases succeeded")
+    return 0
+
+
+def enabled(cfg: dict[str, Any]) -> bool:
+    """Phases.Enabled, or a sharded cook (CookShards.Count > 1), which only exists in the phase graph."""
+    count = uebuildlib._get_dict(cfg, "CookShards").get("Count")
+    sharded = isinstance(count, int) and not isinstance(count, bool) and count > 1
+    return uebuildlib._bool(uebuildlib._get_dict(cfg, "Phases").get("Enabled"), False) or sharded
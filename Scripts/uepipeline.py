@@ -0,0 +1,530 @@
+from __future__ import annotations
+
+import contextlib
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+import ueartifacts
+import uebuildlib
+import uecache
+import ueconfig
+import ueengines
+import uegovernor
+import uehooks
+import uemacpool
+import uemetrics
+import uepak
+import uepublish
+import ueprofile
+import ueremote
+import uestream
+import uesymbols
+import uetriage
+
+
+@dataclass
+class BuildJob:
+    name: str
+    platform: str
+    build_config: str
+    cmd: list[str]
+    env: dict[str, str]
+    archive_dir: Path
+    log_dir: Path
+    project_file: Path
+    engine_root: Path
+    artifacts_root: Path
+    publish_dir: Path | None = None
+    publish: uepublish.PublishSettings | None = None
+    symbols: uesymbols.SymbolSettings | None = None
+    remote: ueremote.RemoteSettings | None = None
+    build_id: str = ""
+    artifacts: ueartifacts.ArtifactSettings | None = None  # None: this build is not indexed
+    paks: uepak.PakReportSettings | None = None
+    # The archive location without the per-build id: what the build cache fingerprints.
+    base_dir: Path | None = None
+
+
+def plan_job(
+    *,
+    cfg: dict[str, Any],
+    config_path: Path,
+    platform: str,
+    build_config: str,
+    extra_uat_args: Iterable[str],
+    log_root: Path,
+    archive_dir: Path | None = None,
+) -> BuildJob:
+    name = f"{platform}-{build_config}"
+    project_root = uebuildlib.resolve_project_root(config_path)
+    artifacts_root = uebuildlib.artifacts_root(cfg, project_root)
+    artifacts = ueartifacts.ArtifactSettings.from_config(cfg, project_root)
+    build_id = ueartifacts.new_build_id(platform, build_config)
+    if archive_dir is None:
+        archive_dir = artifacts_root / platform / build_config if artifacts.versioned else artifacts_root / platform
+    # Versioned layout: every build under ArtifactsDir gets its own directory, left to `artifacts gc`.
+    base_dir = archive_dir
+    if artifacts.versioned and artifacts_root in (archive_dir, *archive_dir.parents):
+        archive_dir = archive_dir / build_id
+    log_dir = log_root / name
+
+    # With Publish enabled UAT archives to fast local disk; run_job uploads to the real destination.
+    publish = uepublish.PublishSettings.from_config(cfg, project_root)
+    publish_dir: Path | None = None
+    if publish is not None:
+        publish_dir = archive_dir
+        # Staging stays per platform/config so local disk does not grow with every build.
+        archive_dir = publish.staging_dir_for(base_dir, artifacts_root)
+    cmd, env = uebuildlib.build_uat_command(
+        cfg=cfg,
+        config_path=config_path,
+        platform=platform,
+        build_config=build_config,
+        extra_uat_args=extra_uat_args,
+        archive_dir=archive_dir,
+    )
+    uebuildlib.tag_job_env(env, job=name, log_dir=log_dir, archive_dir=archive_dir)
+    if publish_dir is not None:
+        env["UEBUILD_PUBLISH_DIR"] = str(publish_dir)
+    model = ueconfig.model(cfg)
+    project_file = uebuildlib.find_uproject(project_root, model.project_name)
+    # Remote Mac builds run the same BuildCookRun over ssh in a synced copy of the project.
+    remote = ueremote.RemoteSettings.from_config(cfg, platform, project_file.stem)
+    if remote is not None:
+        cmd = ueremote.remote_command(remote, cmd, project_file=project_file, archive_subdir=name)
+    return BuildJob(
+        name=name,
+        platform=platform,
+        build_config=build_config,
+        cmd=cmd,
+        env=env,
+        archive_dir=archive_dir,
+        log_dir=log_dir,
+        project_file=project_file,
+        engine_root=Path(model.engine_root or ""),
+        artifacts_root=artifacts_root,
+        publish_dir=publish_dir,
+        publish=publish,
+        symbols=uesymbols.SymbolSettings.from_config(cfg, artifacts_root),
+        remote=remote,
+        build_id=build_id,
+        artifacts=artifacts if artifacts.index else None,
+        paks=uepak.PakReportSettings.from_config(cfg, artifacts_root),
+        base_dir=base_dir,
+    )
+
+
+def run_job(
+    job: BuildJob,
+    *,
+    build_root: Path,
+    cwd: Path,
+    dry_run: bool,
+    log_settings: uestream.LogSettings,
+    pre_hook: bool = True,
+    post_hook: bool = True,
+    cfg: dict[str, Any] | None = None,
+    cache: uecache.BuildCache | None = None,
+    hook_runner: Callable[..., int] = uebuildlib.run_hook,
+    on_spawn: Callable[[int], None] | None = None,
+) -> int:
+    """PreBuild -> BuildCookRun -> [publish] -> [symbols] -> [pak report] -> PostBuild for one job, with a stage timing profile in its log dir."""
+    hooks_dir = build_root / "Hooks"
+    recorder = metrics_recorder(cfg, job, mode="buildcookrun", dry_run=dry_run)
+
+    fingerprint: str | None = None
+    if cache is not None:
+        fingerprint = cache.fingerprint(
+            cmd=job.cmd,
+            project_file=job.project_file,
+            engine_root=job.engine_root,
+            cfg=cfg or {},
+            archive_base=job.base_dir or job.archive_dir,
+        )
+        decision = cache.decide(fingerprint, job.archive_dir)
+        print(f"[info] [{job.name}] Build cache {fingerprint[:12]}: {decision.action} ({decision.reason})")
+        if decision.action == "skip":
+            if recorder is not None:
+                recorder.finish(returncode=0, stages={}, cache="skip")
+            return 0
+        if decision.action == "restore" and not dry_run:
+            cache.restore(fingerprint, job.archive_dir)
+            print(f"[ok] [{job.name}] Restored stored artifacts into {job.archive_dir}")
+            if recorder is not None:
+                recorder.finish(returncode=0, stages={}, cache="restore", archive_dir=metrics_archive_dir(job))
+            return 0
+
+    hooks = uehooks.registry(hooks_dir)
+    ctx = hook_context(job, dry_run=dry_run)
+
+    def _on_stage(event: str, span: ueprofile.Span) -> None:
+        if event == "finished":
+            ctx.timings[span.name] = round(ctx.timings.get(span.name, 0.0) + span.seconds, 3)
+        hooks.notify("on_stage", ctx, event, span)
+
+    profiler = ueprofile.StageProfiler(
+        job.name, progress=log_settings.console != "off" and not dry_run, on_event=_on_stage
+    )
+    triage = error_triage(job)
+
+    rc = 0
+    if pre_hook:
+        with profiler.span("hook:PreBuild"):
+            rc = hooks.run("pre_build", ctx, legacy_runner=hook_runner)
+    lost: list[str] = []  # Macs that dropped the connection mid-build; the build moves on to the next one
+    while True:
+        retry = False
+        claim: contextlib.AbstractContextManager[Any] = contextlib.nullcontext()
+        if rc == 0 and job.remote is not None and not dry_run:
+            with profiler.span("remote:sync"):
+                job, rc, claim = sync_remote(job, cfg or {}, exclude=lost)
+        with claim:
+            if rc == 0:
+                # A remote build barely loads this machine: no governor slot for it.
+                governor = uegovernor.Governor.from_config(cfg) if cfg and job.remote is None else None
+                with admission(governor, job, kind="buildcookrun", dry_run=dry_run) as slot:
+                    profiler.mark_process_start()
+                    rc = uebuildlib.run(
+                        job.cmd,
+                        cwd=cwd,
+                        env=job.env,
+                        dry_run=dry_run,
+                        log_path=job.log_dir / "UAT.log",
+                        job=job.name,
+                        log_settings=log_settings,
+                        sinks=[profiler.feed, triage.feed],
+                        on_spawn=observe(slot, recorder, job, on_spawn),
+                    )
+                    profiler.finish()
+                    if recorder is not None and slot is not None:
+                        recorder.waited = slot.waited
+            if job.remote is not None and not dry_run:
+                if rc == 255 and job.remote.transport == "ssh":
+                    # ssh's own exit code: the connection dropped mid-build. Keep the next builds off that Mac.
+                    print(f"[error] [{job.name}] Lost the connection to {job.remote.destination} during the build")
+                    remote_pool(job, cfg or {}).mark_failed(job.remote.host, "connection lost during build")
+                    lost.append(job.remote.host)
+                    rc = 6
+                    # A transport failure says nothing about the build itself: retry it on another Mac.
+                    retry = len(lost) < len(job.remote.hosts)
+                elif rc == 0:
+                    with profiler.span("remote:pull"):
+                        rc = pull_remote(job)
+        if not retry:
+            break
+        print(f"[warn] [{job.name}] Retrying the build on another Mac")
+        rc = 0
+    ctx.returncode = rc
+    if rc == 0:
+        rc = finish_job(job, hooks=hooks, ctx=ctx, profiler=profiler, post_hook=post_hook, hook_runner=hook_runner)
+
+    if rc == 0 and fingerprint is not None and not dry_run:
+        cache.record(fingerprint, job.archive_dir)
+
+    if recorder is not None:
+        recorder.finish(
+            returncode=rc,
+            stages=profiler.summary(),
+            cache="disabled" if cache is None else "miss",
+            archive_dir=metrics_archive_dir(job),
+        )
+    if not dry_run:
+        json_path, trace_path = profiler.write(job.log_dir)
+        print(f"[info] [{job.name}] Log: {job.log_dir / 'UAT.log'}")
+        print(f"[info] [{job.name}] Stage timings: {json_path} (Chrome trace: {trace_path})")
+        if rc != 0 and triage.error_lines:
+            uetriage.report(triage, log_dir=job.log_dir, index=uetriage.FailureIndex.for_project(job.project_file.parent))
+    return rc
+
+
+def error_triage(job: BuildJob, *, name: str | None = None) -> uetriage.ErrorTriage:
+    """Error extraction for ``job``'s UAT output, with its machine-specific roots stripped from fingerprints."""
+    roots = [job.project_file.parent, job.engine_root]
+    if job.remote is not None:
+        roots += [Path(job.remote.project_dir), Path(job.remote.engine_root)]
+    return uetriage.ErrorTriage(name or job.name, roots=tuple(roots))
+
+
+def metrics_recorder(
+    cfg: dict[str, Any] | None,
+    job: BuildJob,
+    *,
+    mode: str,
+    dry_run: bool,
+    name: str | None = None,
+    cmd: list[str] | None = None,
+) -> uemetrics.RunRecorder | None:
+    """A metrics recorder for one run of ``job`` (None when dry-running or ``Metrics.Enabled`` is false).
+
+    ``name``/``cmd`` override the job's for runs that are only part of it (phase builds).
+    """
+    if dry_run:
+        return None
+    settings = uemetrics.MetricsSettings.from_config(cfg or {}, job.project_file.parent)
+    if settings is None:
+        return None
+    return uemetrics.RunRecorder(
+        settings,
+        project=job.project_file.stem,
+        job=name or job.name,
+        platform=job.platform,
+        build_config=job.build_config,
+        cmd=cmd or job.cmd,
+        engine=ueengines.engine_version(job.engine_root, cfg),
+        mode=mode,
+    )
+
+
+def observe(
+    slot: uegovernor.Slot | None,
+    recorder: uemetrics.RunRecorder | None,
+    job: BuildJob,
+    also: Callable[[int], None] | None = None,
+) -> Callable[[int], None] | None:
+    """``on_spawn`` callback starting one process-tree sampler shared by the governor slot and metrics."""
+    if slot is None and recorder is None:
+        return also
+
+    def _on_spawn(pid: int) -> None:
+        intervals = [slot.governor.settings.sample_seconds] if slot is not None else []
+        if recorder is not None:
+            intervals.append(recorder.settings.sample_seconds)
+        disk_paths = slot.disk_paths if slot is not None else [job.archive_dir]
+        sampler = uegovernor.ProcessTreeSampler(pid, interval=min(intervals), disk_paths=disk_paths).start()
+        if slot is not None:
+            slot.adopt(sampler)
+        if recorder is not None:
+            recorder.sampler = sampler
+        if also is not None:
+            also(pid)
+
+    return _on_spawn
+
+
+@contextlib.contextmanager
+def admission(
+    governor: uegovernor.Governor | None,
+    job: BuildJob,
+    *,
+    kind: str,
+    dry_run: bool,
+    label: str = "",
+) -> Iterator[uegovernor.Slot | None]:
+    """Hold a machine-wide governor slot for one UAT run (no-op without ``Governor.Enabled``)."""
+    if governor is None or dry_run:
+        yield None
+        return
+    # Cooked data is per platform; everything else is per platform x config.
+    key = f"{job.project_file.stem}/{kind}/{job.platform}" + ("" if kind == "cook" else f"/{job.build_config}")
+    disk_paths = [job.archive_dir, job.project_file.parent / "Saved"]
+    with governor.slot(key, kind, disk_paths=disk_paths, label=label or job.name) as slot:
+        yield slot
+
+
+def remote_pool(job: BuildJob, cfg: dict[str, Any]) -> uemacpool.Pool:
+    assert job.remote is not None
+    settings = uemacpool.PoolSettings.from_config(cfg, job.platform)
+    return uemacpool.Pool(job.remote, settings, job.project_file.parent / "Saved" / "Remote")
+
+
+def sync_remote(
+    job: BuildJob, cfg: dict[str, Any], *, exclude: Iterable[str] = ()
+) -> tuple[BuildJob, int, contextlib.AbstractContextManager[Any]]:
+    """Pick a Mac from the pool and delta-sync the project to it, failing over on connection errors.
+
+    Returns the job retargeted at the chosen host, 0 or 6, and a claim on that host to hold
+    for the rest of the build. ``exclude``: hosts this build already lost mid-run.
+    """
+    assert job.remote is not None
+    pool = remote_pool(job, cfg)
+    if len(job.remote.hosts) > 1:
+        statuses = pool.status()
+        for status in statuses:
+            print(f"[info] [{job.name}] Mac pool: {status.host}: {status.describe()}")
+        hosts = [status.host for status in pool.rank(statuses)]
+    else:
+        hosts = [job.remote.host]  # a single builder: nothing to choose, no probe round trip
+    for host in (h for h in hosts if h not in exclude):
+        remote = job.remote.on(host)
+        claim = pool.claim(host)
+        print(f"[info] [{job.name}] Syncing project to {remote.destination}:{remote.project_dir}")
+        try:
+            stats = ueremote.sync(remote, job.project_file.parent, state_dir=pool.state_dir)
+        except (ConnectionError, OSError) as exc:
+            claim.release(remove=True)
+            print(f"[warn] [{job.name}] Remote sync to {remote.destination} failed: {exc}")
+            pool.mark_failed(host, str(exc))
+            continue
+        pool.mark_synced(host)
+        print(f"[ok] [{job.name}] Remote {stats.describe()}")
+        return replace(job, remote=remote, cmd=ueremote.rehost(job.cmd, remote)), 0, claim
+    print(f"[error] [{job.name}] No remote builder available (of {', '.join(job.remote.hosts)})")
+    return job, 6, contextlib.nullcontext()
+
+
+def pull_remote(job: BuildJob) -> int:
+    """Bring back the archive tree the remote build produced; 6 on failure."""
+    assert job.remote is not None
+    try:
+        files, size = ueremote.pull(job.remote, job.name, job.archive_dir)
+    except (ConnectionError, OSError, ueremote.tarfile.TarError) as exc:
+        print(f"[error] [{job.name}] Pulling remote artifacts failed: {exc}")
+        return 6
+    print(f"[ok] [{job.name}] Pulled {files} artifact(s), {size / 1024**2:.1f} MB into {job.archive_dir}")
+    return 0
+
+
+def finish_job(
+    job: BuildJob,
+    *,
+    hooks: uehooks.HookRegistry,
+    ctx: uehooks.HookContext,
+    profiler: ueprofile.StageProfiler,
+    post_hook: bool = True,
+    hook_runner: Callable[..., int] = uebuildlib.run_hook,
+) -> int:
+    """Everything after a successful UAT run: artifact events, publish, symbols, pak report, PostBuild."""
+    rc = 0
+    if not ctx.dry_run:
+        ctx.artifacts = list_artifacts(job.archive_dir)
+        for path in ctx.artifacts:
+            hooks.notify("on_artifact", ctx, path)
+    if job.publish is not None and job.publish_dir is not None and not ctx.dry_run:
+        with profiler.span("publish"):
+            rc = publish_job(job)
+    if rc == 0 and job.artifacts is not None and not ctx.dry_run:
+        with profiler.span("index"):
+            index_artifacts(job)
+    if rc == 0 and job.symbols is not None and not ctx.dry_run:
+        with profiler.span("symbols"):
+            rc = upload_symbols(job)
+    if rc == 0 and job.paks is not None and not ctx.dry_run:
+        with profiler.span("pak-report"):
+            rc = report_paks(job)
+    if rc == 0 and post_hook:
+        with profiler.span("hook:PostBuild"):
+            rc = hooks.run("post_build", ctx, legacy_runner=hook_runner)
+    return rc
+
+
+def metrics_archive_dir(job: BuildJob) -> Path | None:
+    """The archive metrics may size: the local Publish staging dir only, never a (network) destination."""
+    return job.archive_dir if job.publish_dir is not None else None
+
+
+def hook_context(job: BuildJob, *, dry_run: bool) -> uehooks.HookContext:
+    return uehooks.HookContext(
+        job=job.name,
+        platform=job.platform,
+        build_config=job.build_config,
+        cmd=list(job.cmd),
+        env=job.env,
+        archive_dir=job.archive_dir,
+        log_dir=job.log_dir,
+        publish_dir=job.publish_dir,
+        dry_run=dry_run,
+    )
+
+
+def run_pre_hooks(
+    job: BuildJob,
+    *,
+    build_root: Path,
+    dry_run: bool,
+    hook_runner: Callable[..., int] = uebuildlib.run_hook,
+) -> int:
+    """PreBuild on its own, for callers (e.g. --matrix) that run it once for many jobs."""
+    hooks = uehooks.registry(build_root / "Hooks")
+    return hooks.run("pre_build", hook_context(job, dry_run=dry_run), legacy_runner=hook_runner)
+
+
+def list_artifacts(archive_dir: Path) -> list[Path]:
+    if not archive_dir.is_dir():
+        return []
+    return sorted(p for p in archive_dir.rglob("*") if p.is_file())
+
+
+def publish_job(job: BuildJob) -> int:
+    assert job.publish is not None and job.publish_dir is not None
+    print(f"[info] [{job.name}] Publishing {job.archive_dir} -> {job.publish_dir}")
+    try:
+        stats = uepublish.publish(
+            job.archive_dir,
+            job.publish_dir,
+            artifacts_root=job.artifacts_root,
+            state_dir=job.publish.state_dir_for(job.archive_dir),
+            workers=job.publish.workers,
+            hardlink=job.publish.hardlink,
+        )
+    except OSError as exc:
+        print(f"[error] [{job.name}] Publish failed (rerun `uebuild publish` to resume): {exc}")
+        return 3
+    print(f"[ok] [{job.name}] Published: {stats.describe()}")
+    return 0
+
+
+def index_artifacts(job: BuildJob) -> None:
+    """Record the archived build in ArtifactsDir's index; a failure only costs `artifacts gc` this build."""
+    try:
+        record = ueartifacts.record_build(
+            artifacts_root=job.artifacts_root,
+            build_dir=job.publish_dir or job.archive_dir,
+            build_id=job.build_id,
+            platform=job.platform,
+            build_config=job.build_config,
+            published=job.publish_dir is not None,
+        )
+    except OSError as exc:
+        print(f"[warn] [{job.name}] Could not index the build's artifacts: {exc}")
+        return
+    if record is not None:
+        size = sum(entry[0] for entry in record.files.values())
+        print(f"[info] [{job.name}] Indexed build {record.id}: {len(record.files)} files, {ueartifacts.format_bytes(size)}")
+
+
+def report_paks(job: BuildJob) -> int:
+    """Size the archived .pak/.utoc containers and compare them with the stored baseline (8: grew past MaxGrowthPercent)."""
+    assert job.paks is not None
+    report = uepak.analyze(job.archive_dir, top=job.paks.top)
+    if not report["containers"]:
+        print(f"[warn] [{job.name}] No .pak/.utoc containers under {job.archive_dir}")
+        return 0
+    report.update(platform=job.platform, config=job.build_config, build_id=job.build_id)
+    for line in uepak.format_report(report, top=job.paks.top):
+        print(line)
+    baseline_path = job.paks.baseline_path(job.platform, job.build_config)
+    baseline = uepak.read_report(baseline_path)
+    rc = 0
+    if baseline is not None:
+        report["baseline"] = uepak.diff(report, baseline)
+        for line in uepak.format_diff(report["baseline"], top=job.paks.top):
+            print(line)
+        growth, limit = report["baseline"]["percent"], job.paks.max_growth_percent
+        if limit is not None and growth is not None and growth > limit:
+            print(f"[error] [{job.name}] Paks grew {growth:+.2f}%, over PakReport.MaxGrowthPercent ({limit:g}%)")
+            rc = 8
+    uepak.write_report(job.log_dir / "paks.json", report)
+    print(f"[info] [{job.name}] Pak report: {job.log_dir / 'paks.json'}")
+    if rc == 0 and (job.paks.update_baseline or baseline is None):
+        report.pop("baseline", None)
+        try:
+            uepak.write_report(baseline_path, report)
+        except OSError as exc:
+            print(f"[warn] [{job.name}] Could not store the pak baseline {baseline_path}: {exc}")
+    return rc
+
+
+def upload_symbols(job: BuildJob) -> int:
+    assert job.symbols is not None
+    print(f"[info] [{job.name}] Uploading symbols from {job.archive_dir} -> {job.symbols.store_dir}")
+    try:
+        stats = uesymbols.upload(job.archive_dir, job.symbols)
+    except OSError as exc:
+        print(f"[error] [{job.name}] Symbol upload failed: {exc}")
+        return 4
+    report = uesymbols.write_report(stats, job.log_dir)
+    print(f"[{'ok' if not stats.count('failed') else 'error'}] [{job.name}] Symbols: {stats.describe()} (report: {report})")
+    for line in uesymbols.format_slowest(stats):
+        print(line)
+    return 4 if stats.count("failed") else 0
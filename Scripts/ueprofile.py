@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator
+
+from uestream import LogLine
+
+# UAT prints "********** <NAME> COMMAND STARTED/COMPLETED **********" around each BuildCookRun step.
+_UAT_STEP_RE = re.compile(r"\*{5,}\s*(BUILD|COOK|STAGE|PACKAGE|ARCHIVE)\s+COMMAND\s+(STARTED|COMPLETED)")
+# UBT action lines: "[12/345] Compile [x64] Foo.cpp", "[345/345] Link [x64] MyGame.exe", "Link (lld) libUnreal.so"
+_UBT_ACTION_RE = re.compile(r"^\s*(?:\[\d+/\d+\]\s*)?(Compile|Link)\b")
+# UBT finishing a target ("Total execution time: 12.34 seconds") or UAT reporting a tool run.
+_UBT_DONE_RE = re.compile(r"Total execution time:|Took [\d.]+s to run UnrealBuildTool")
+_PAK_START_RE = re.compile(r"UnrealPak|Creating pak|IoStore", re.IGNORECASE)
+_PAK_DONE_RE = re.compile(r"Took [\d.]+s to run UnrealPak")
+
+_STEP_NAMES = {"BUILD": "build", "COOK": "cook", "STAGE": "stage", "PACKAGE": "package", "ARCHIVE": "archive"}
+# Our own "[   12.345] [job]   text" log format, for replaying a finished UAT.log.
+_LOG_LINE_RE = re.compile(r"^\[\s*([\d.]+)\]\s+\[([^\]]*)\]\s(.)\s(.*)$")
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    end: float | None = None
+
+    @property
+    def seconds(self) -> float:
+        return (self.end if self.end is not None else self.start) - self.start
+
+
+class StageProfiler:
+    """Incrementally derive stage timings from a UAT line stream.
+
+    Feed lines with ``feed`` (usable directly as a ``uebuildlib.run`` sink). Times are
+    seconds relative to the profiler's creation so hook spans and UAT spans share a clock.
+    """
+
+    def __init__(
+        self,
+        job: str,
+        *,
+        on_event: Callable[[str, Span], None] | None = None,
+        progress: bool = False,
+    ) -> None:
+        self.job = job
+        self.progress = progress
+        self.spans: list[Span] = []
+        self._open: dict[str, Span] = {}
+        self._origin = time.monotonic()
+        self._offset = 0.0
+        self._last = 0.0
+        self._on_event = on_event
+
+    def now(self) -> float:
+        return time.monotonic() - self._origin
+
+    def mark_process_start(self) -> None:
+        """Call right before launching UAT: LogLine.t is relative to the child's start."""
+        self._offset = self.now()
+
+    def _start(self, name: str, t: float) -> None:
+        if name in self._open:
+            return
+        span = Span(name=name, start=t)
+        self._open[name] = span
+        self.spans.append(span)
+        self._emit("started", span)
+
+    def _end(self, name: str, t: float) -> None:
+        span = self._open.pop(name, None)
+        if span is None:
+            return
+        span.end = t
+        self._emit("finished", span)
+
+    def _emit(self, event: str, span: Span) -> None:
+        if self.progress:
+            if event == "started":
+                print(f"[stage] [{self.job}] {span.name} started at +{span.start:.1f}s")
+            else:
+                print(f"[stage] [{self.job}] {span.name} finished in {span.seconds:.1f}s")
+        if self._on_event:
+            self._on_event(event, span)
+
+    def feed(self, line: LogLine) -> None:
+        text = line.text
+        t = line.t + self._offset
+        self._last = t
+
+        # Cheap substring gates first; most UAT lines match none of them.
+        if "*****" in text:
+            m = _UAT_STEP_RE.search(text)
+            if m:
+                step = _STEP_NAMES[m.group(1)]
+                if m.group(2) == "STARTED":
+                    self._start(step, t)
+                else:
+                    self._end_nested(step, t)
+                    self._end(step, t)
+                return
+
+        if "build" in self._open and ("Compile" in text or "Link" in text or "Total" in text or "Took" in text):
+            m = _UBT_ACTION_RE.match(text)
+            if m:
+                if m.group(1) == "Compile":
+                    self._start("compile", t)
+                else:
+                    self._end("compile", t)
+                    self._start("link", t)
+                return
+            if _UBT_DONE_RE.search(text):
+                self._end("compile", t)
+                self._end("link", t)
+                return
+
+        if "stage" in self._open and ("Pak" in text or "pak" in text or "IoStore" in text):
+            if _PAK_DONE_RE.search(text):
+                self._end("pak", t)
+            elif _PAK_START_RE.search(text):
+                self._start("pak", t)
+
+    def _end_nested(self, step: str, t: float) -> None:
+        if step == "build":
+            self._end("compile", t)
+            self._end("link", t)
+        elif step == "stage":
+            self._end("pak", t)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time an SDK-side step (e.g. ``hook:PreBuild``) on the same clock as UAT stages."""
+        self._start(name, self.now())
+        try:
+            yield
+        finally:
+            self._end(name, self.now())
+
+    def finish(self, *, at: float | None = None) -> None:
+        end = at if at is not None else max(self._last, self.now())
+        for name in list(self._open):
+            self._end(name, end)
+
+    def summary(self) -> dict[str, float]:
+        totals: dict[str, float] = {}
+        for span in self.spans:
+            totals[span.name] = round(totals.get(span.name, 0.0) + span.seconds, 3)
+        return totals
+
+    def to_json(self) -> dict[str, object]:
+        total = max((s.end or s.start for s in self.spans), default=0.0)
+        return {
+            "job": self.job,
+            "total_seconds": round(total, 3),
+            "stages": [
+                {"name": s.name, "start": round(s.start, 3), "end": round(s.end or s.start, 3), "seconds": round(s.seconds, 3)}
+                for s in self.spans
+            ],
+            "summary": self.summary(),
+        }
+
+    def to_chrome_trace(self, *, tid: int = 1) -> dict[str, object]:
+        events: list[dict[str, object]] = [
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": self.job}},
+        ]
+        for s in self.spans:
+            events.append(
+                {
+                    "name": s.name,
+                    "cat": "uebuild",
+                    "ph": "X",
+                    "ts": int(s.start * 1_000_000),
+                    "dur": int(s.seconds * 1_000_000),
+                    "pid": 1,
+                    "tid": tid,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, out_dir: Path) -> tuple[Path, Path]:
+        self.finish()
+        out_dir.mkdir(parents=True, exist_ok=True)
+        json_path = out_dir / "stages.json"
+        trace_path = out_dir / "stages.trace.json"
+        json_path.write_text(json.dumps(self.to_json(), indent=2), encoding="utf-8")
+        trace_path.write_text(json.dumps(self.to_chrome_trace()), encoding="utf-8")
+        return json_path, trace_path
+
+
+def profile_log(path: Path, *, job: str = "") -> StageProfiler:
+    """Replay a finished ``UAT.log`` written by ``uestream.RotatingLogWriter``."""
+    profiler = StageProfiler(job or path.parent.name)
+    with path.open("r", encoding="utf-8", errors="replace") as fh:
+        for raw in fh:
+            m = _LOG_LINE_RE.match(raw.rstrip("\n"))
+            if not m:
+                continue
+            stream = "err" if m.group(3) == "E" else "out"
+            profiler.feed(LogLine(t=float(m.group(1)), job=m.group(2), stream=stream, text=m.group(4)))
+    profiler.finish(at=profiler._last)
+    return profiler
+
+
+def _format_table(summary: dict[str, float]) -> str:
+    return "\n".join(f"  {name:<16} {seconds:10.1f}s" for name, seconds in summary.items())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Stage timing breakdown from a UAT.log")
+    parser.add_argument("log", help="Path to a UAT.log written by uebuild")
+    parser.add_argument("--out-dir", default=None, help="Write stages.json / stages.trace.json here")
+    args = parser.parse_args()
+
+    profiler = profile_log(Path(args.log))
+    print(_format_table(profiler.summary()))
+    if args.out_dir:
+        json_path, trace_path = profiler.write(Path(args.out_dir))
+        print(f"[ok] Wrote {json_path} and {trace_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
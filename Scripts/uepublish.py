@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import ueconfig
+import uetreeindex
+
+_CAS_DIR = ".cas"
+_DEST_MANIFEST = ".uebuild-manifest.json"
+# Flush resume state every N completed files so an interrupted upload loses little work.
+_STATE_FLUSH_EVERY = 200
+
+
+@dataclass(frozen=True)
+class PublishSettings:
+    staging_root: Path
+    workers: int
+    hardlink: bool
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any], project_root: Path) -> "PublishSettings | None":
+        publish = ueconfig.model(cfg).publish
+        if not publish.enabled:
+            return None
+        return cls(
+            staging_root=Path(publish.staging_dir) if publish.staging_dir else project_root / "Saved" / "PublishStaging",
+            workers=publish.workers,
+            hardlink=publish.hardlink,
+        )
+
+    def staging_dir_for(self, dest_dir: Path, artifacts_root: Path) -> Path:
+        try:
+            rel = dest_dir.relative_to(artifacts_root)
+        except ValueError:
+            rel = Path(dest_dir.name)
+        return self.staging_root / rel
+
+    def state_dir_for(self, staging_dir: Path) -> Path:
+        # Kept outside the staging tree so nested matrix staging dirs never pick it up.
+        try:
+            key = "-".join(staging_dir.relative_to(self.staging_root).parts) or "root"
+        except ValueError:
+            key = staging_dir.name
+        return self.staging_root.parent / f"{self.staging_root.name}.state" / key
+
+
+@dataclass
+class PublishStats:
+    files: int = 0
+    skipped: int = 0
+    uploaded_bytes: int = 0
+    deduped_bytes: int = 0
+    copied_bytes: int = 0  # written to the destination as full copies (hardlinks off or unsupported)
+    seconds: float = 0.0
+
+    def describe(self) -> str:
+        total = self.uploaded_bytes + self.deduped_bytes + self.copied_bytes
+        saved = (100.0 * self.deduped_bytes / total) if total else 0.0
+        copied = f", {self.copied_bytes / 1048576:.1f} MB copied without hardlinks" if self.copied_bytes else ""
+        return (
+            f"{self.files} files, {self.skipped} already published, "
+            f"{self.uploaded_bytes / 1048576:.1f} MB uploaded, {self.deduped_bytes / 1048576:.1f} MB deduplicated "
+            f"({saved:.0f}%){copied} in {self.seconds:.1f}s"
+        )
+
+
+def _cas_object(cas_root: Path, digest: str) -> Path:
+    return cas_root / digest[:2] / digest
+
+
+def _atomic_copy(src: Path, dst: Path) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f"{dst.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def _materialize(obj: Path, src: Path, dst: Path) -> bool:
+    """Hardlink ``dst`` to the CAS object; False if the share can't, and ``src`` was copied instead."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f"{dst.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+    try:
+        os.link(obj, tmp)
+        os.replace(tmp, dst)
+        return True
+    except OSError:
+        pass  # share without hardlink support: fall back to a real copy
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+    return False
+
+
+def _dest_ok(path: Path, size: int) -> bool:
+    try:
+        return path.stat().st_size == size
+    except OSError:
+        return False
+
+
+def publish(
+    staging_dir: Path,
+    dest_dir: Path,
+    *,
+    artifacts_root: Path,
+    state_dir: Path,
+    workers: int = 8,
+    hardlink: bool = True,
+) -> PublishStats:
+    """Upload ``staging_dir`` to ``dest_dir`` through a content-addressed store under ``artifacts_root``.
+
+    Every file is stored once as ``<artifacts_root>/.cas/<aa>/<sha256>`` and hardlinked into
+    ``dest_dir``; content already present from earlier builds is never transferred again.
+    Progress is kept in ``state_dir`` so a rerun resumes where it stopped.
+    """
+    started = time.monotonic()
+    cas_root = artifacts_root / _CAS_DIR
+    state_path = state_dir / "publish-state.json"
+
+    with uetreeindex.TreeIndex(state_dir / "staging-index.sqlite", staging_dir) as index:
+        index.scan()
+        manifest = {path: {"size": size, "sha256": digest.hex()} for path, size, digest in index.entries()}
+
+    done: set[str] = set()
+    try:
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+        if state.get("dest") == str(dest_dir):
+            done = {
+                p
+                for p in state.get("done", [])
+                if p in manifest and state["manifest"].get(p) == manifest[p] and _dest_ok(dest_dir / p, manifest[p]["size"])
+            }
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
+    stats = PublishStats(files=len(manifest), skipped=len(done))
+    lock = threading.Lock()
+    # Without hardlinks a CAS object saves nothing: every file is copied to the destination anyway.
+    no_links = threading.Event()
+    if not hardlink:
+        no_links.set()
+    pending = [p for p in manifest if p not in done]
+
+    def _save_state() -> None:
+        tmp = state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"dest": str(dest_dir), "manifest": manifest, "done": sorted(done)}), encoding="utf-8")
+        os.replace(tmp, state_path)
+
+    def _publish_one(rel: str) -> None:
+        entry = manifest[rel]
+        src = staging_dir / rel
+        obj = _cas_object(cas_root, entry["sha256"])
+        uploaded = copied = 0
+        if no_links.is_set():
+            _atomic_copy(src, dest_dir / rel)
+            copied = entry["size"]
+        else:
+            if not obj.exists():
+                _atomic_copy(src, obj)
+                uploaded = entry["size"]
+            if not _materialize(obj, src, dest_dir / rel):
+                copied = entry["size"]
+        with lock:
+            if copied and not no_links.is_set():
+                no_links.set()
+                print(f"[warn] Hardlinks are not supported under {dest_dir}; copying the remaining files without the CAS")
+            done.add(rel)
+            stats.uploaded_bytes += uploaded
+            stats.copied_bytes += copied
+            if not uploaded and not copied:
+                stats.deduped_bytes += entry["size"]
+            if len(done) % _STATE_FLUSH_EVERY == 0:
+                _save_state()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="publish") as pool:
+            for _ in pool.map(_publish_one, pending):
+                pass
+    finally:
+        with lock:
+            _save_state()
+
+    # Drop files left over from the previous build published to the same destination.
+    previous = dest_dir / _DEST_MANIFEST
+    try:
+        old = json.loads(previous.read_text(encoding="utf-8")).get("files", {})
+    except (OSError, ValueError, AttributeError):
+        old = {}
+    for rel in old:
+        if rel not in manifest:
+            try:
+                (dest_dir / rel).unlink()
+            except OSError:
+                pass
+
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    tmp = previous.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"published": time.time(), "files": manifest}, indent=1), encoding="utf-8")
+    os.replace(tmp, previous)
+    stats.seconds = time.monotonic() - started
+    return stats
@@ -0,0 +1,369 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import uebuildlib
+import uecache
+import ueconfig
+import uegovernor
+import uepipeline
+import uestream
+
+FINAL_STATES = ("ok", "failed", "cancelled", "superseded")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS requests (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    config TEXT NOT NULL,
+    extra_args TEXT NOT NULL,
+    revision TEXT NOT NULL DEFAULT '',
+    no_cache INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL,
+    submitted REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    returncode INTEGER,
+    worker_pid INTEGER,
+    uat_pid INTEGER,
+    superseded_by INTEGER,
+    cancel INTEGER NOT NULL DEFAULT 0,
+    note TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS requests_state ON requests(state, key);
+"""
+
+
+@dataclass(frozen=True)
+class QueueSettings:
+    dir: Path
+    max_workers: int
+    cancel_running: bool  # a newer request for the same platform/config cancels the running build
+    poll_seconds: float
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any], project_root: Path) -> "QueueSettings":
+        q = uebuildlib._get_dict(cfg, "Queue")
+        directory = q.get("Dir")
+        workers = q.get("MaxWorkers", 1)
+        poll = q.get("PollSeconds", 5)
+        return cls(
+            dir=Path(directory).expanduser() if isinstance(directory, str) and directory.strip() else project_root / "Saved" / "BuildQueue",
+            max_workers=workers if isinstance(workers, int) and workers > 0 else 1,
+            cancel_running=uebuildlib._bool(q.get("CancelRunning"), False),
+            poll_seconds=float(poll) if isinstance(poll, (int, float)) and poll > 0 else 5.0,
+        )
+
+
+@dataclass(frozen=True)
+class QueuedBuild:
+    id: int
+    key: str
+    platform: str
+    config: str
+    extra_args: list[str]
+    revision: str
+    no_cache: bool
+    state: str  # pending | running | ok | failed | cancelled | superseded
+    submitted: float
+    started: float | None
+    finished: float | None
+    returncode: int | None
+    worker_pid: int | None
+    uat_pid: int | None
+    superseded_by: int | None
+    cancel: bool
+    note: str
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "QueuedBuild":
+        data = dict(row)
+        data["extra_args"] = json.loads(data["extra_args"])
+        data["no_cache"] = bool(data["no_cache"])
+        data["cancel"] = bool(data["cancel"])
+        return cls(**data)
+
+    @property
+    def name(self) -> str:
+        rev = f" @{self.revision}" if self.revision else ""
+        return f"#{self.id} {self.platform}-{self.config}{rev}"
+
+
+def request_key(platform: str, config: str, extra_args: list[str], no_cache: bool) -> str:
+    """Requests with the same key build the same thing: the newest one supersedes the rest."""
+    return json.dumps({"platform": platform, "config": config, "extra_uat_args": extra_args, "no_cache": no_cache}, sort_keys=True)
+
+
+class BuildQueue:
+    """SQLite build queue shared by every uebuild process of one project.
+
+    Pending requests for the same platform/config/args coalesce into the newest one, so a
+    burst of commits ends up as one build of the latest state. Workers hold a lock file per
+    running request; a running row whose lock is free belonged to a worker that died.
+    """
+
+    def __init__(self, settings: QueueSettings) -> None:
+        self.settings = settings
+        settings.dir.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(settings.dir / "queue.sqlite"), isolation_level=None, timeout=30, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "BuildQueue":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _write(self, fn: Any) -> Any:
+        # BEGIN IMMEDIATE takes the write lock up front: read-then-update is atomic across processes.
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._db)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return result
+
+    def _running_lock(self, request_id: int) -> Path:
+        return self.settings.dir / "running" / f"{request_id}.lock"
+
+    # --- submit / cancel ---------------------------------------------------------------------
+
+    def submit(
+        self, platform: str, config: str, extra_args: list[str], *, revision: str = "", no_cache: bool = False, cancel_running: bool | None = None
+    ) -> tuple[QueuedBuild, list[int], bool]:
+        """Queue a build; returns it, the ids it superseded and whether an identical pending request was reused."""
+        key = request_key(platform, config, extra_args, no_cache)
+        cancel_running = self.settings.cancel_running if cancel_running is None else cancel_running
+        now = time.time()
+
+        def _tx(db: sqlite3.Connection) -> tuple[int, list[int], bool]:
+            same = db.execute(
+                "SELECT id FROM requests WHERE key = ? AND state = 'pending' AND revision = ? ORDER BY id DESC LIMIT 1", (key, revision)
+            ).fetchone()
+            if same is not None:
+                return int(same["id"]), [], True
+            new_id = db.execute(
+                "INSERT INTO requests (key, platform, config, extra_args, revision, no_cache, state, submitted) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)",
+                (key, platform, config, json.dumps(extra_args), revision, int(no_cache), now),
+            ).lastrowid
+            older = [int(r["id"]) for r in db.execute("SELECT id FROM requests WHERE key = ? AND state = 'pending' AND id <> ?", (key, new_id))]
+            db.execute(
+                "UPDATE requests SET state = 'superseded', superseded_by = ?, finished = ?, note = ? WHERE key = ? AND state = 'pending' AND id <> ?",
+                (new_id, now, f"coalesced into #{new_id}", key, new_id),
+            )
+            if cancel_running:
+                running = [int(r["id"]) for r in db.execute("SELECT id FROM requests WHERE key = ? AND state = 'running'", (key,))]
+                db.execute(
+                    "UPDATE requests SET cancel = 1, superseded_by = ?, note = ? WHERE key = ? AND state = 'running'",
+                    (new_id, f"superseded by #{new_id}", key),
+                )
+                older += running
+            return int(new_id), older, False
+
+        request_id, superseded, reused = self._write(_tx)
+        return self.get(request_id), superseded, reused
+
+    def cancel(self, request_id: int) -> str:
+        def _tx(db: sqlite3.Connection) -> str:
+            row = db.execute("SELECT state FROM requests WHERE id = ?", (request_id,)).fetchone()
+            if row is None:
+                return "unknown"
+            if row["state"] == "pending":
+                db.execute("UPDATE requests SET state = 'cancelled', finished = ?, note = 'cancelled' WHERE id = ?", (time.time(), request_id))
+                return "cancelled"
+            if row["state"] == "running":
+                db.execute("UPDATE requests SET cancel = 1, note = 'cancel requested' WHERE id = ?", (request_id,))
+                return "cancelling"
+            return str(row["state"])
+
+        return self._write(_tx)
+
+    # --- queries -----------------------------------------------------------------------------
+
+    def get(self, request_id: int) -> QueuedBuild:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM requests WHERE id = ?", (request_id,)).fetchone()
+        if row is None:
+            raise KeyError(request_id)
+        return QueuedBuild.from_row(row)
+
+    def resolve(self, request_id: int) -> QueuedBuild:
+        """The request that actually builds ``request_id``'s state: follows the supersede chain."""
+        build = self.get(request_id)
+        while build.superseded_by is not None and build.state in ("superseded", "cancelled", "running"):
+            if build.state == "running" and not build.cancel:
+                break
+            build = self.get(build.superseded_by)
+        return build
+
+    def recent(self, limit: int = 30) -> list[QueuedBuild]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM requests WHERE state IN ('pending', 'running') OR id > (SELECT COALESCE(MAX(id), 0) - ? FROM requests) ORDER BY id",
+                (limit,),
+            ).fetchall()
+        return [QueuedBuild.from_row(r) for r in rows]
+
+    # --- worker side -------------------------------------------------------------------------
+
+    def reap(self) -> list[int]:
+        """Fail running requests whose worker is gone (its lock file is no longer held)."""
+        dead: list[int] = []
+        with self._lock:
+            running = [int(r["id"]) for r in self._db.execute("SELECT id FROM requests WHERE state = 'running'")]
+        for request_id in running:
+            try:
+                probe = uegovernor.LockedFile(self._running_lock(request_id), blocking=False)
+            except BlockingIOError:
+                continue  # still held by its worker
+            probe.release(remove=True)
+            dead.append(request_id)
+        if dead:
+            self._write(
+                lambda db: db.executemany(
+                    "UPDATE requests SET state = 'failed', finished = ?, note = 'worker exited' WHERE id = ? AND state = 'running'",
+                    [(time.time(), i) for i in dead],
+                )
+            )
+        return dead
+
+    def claim(self) -> tuple[QueuedBuild, uegovernor.LockedFile] | None:
+        """Oldest pending request, marked running by this process (with its liveness lock held)."""
+        self.reap()
+
+        def _tx(db: sqlite3.Connection) -> tuple[int, uegovernor.LockedFile] | None:
+            row = db.execute("SELECT id FROM requests WHERE state = 'pending' ORDER BY id LIMIT 1").fetchone()
+            if row is None:
+                return None
+            request_id = int(row["id"])
+            # Locked before the row says "running", so reap() never sees a running row without it.
+            held = uegovernor.LockedFile(self._running_lock(request_id), blocking=False, remove_on_exit=True)
+            db.execute(
+                "UPDATE requests SET state = 'running', started = ?, worker_pid = ? WHERE id = ?", (time.time(), os.getpid(), request_id)
+            )
+            return request_id, held
+
+        claimed = self._write(_tx)
+        if claimed is None:
+            return None
+        return self.get(claimed[0]), claimed[1]
+
+    def set_uat_pid(self, request_id: int, pid: int) -> None:
+        self._write(lambda db: db.execute("UPDATE requests SET uat_pid = ? WHERE id = ?", (pid, request_id)))
+
+    def cancel_requested(self, request_id: int) -> bool:
+        with self._lock:
+            row = self._db.execute("SELECT cancel FROM requests WHERE id = ?", (request_id,)).fetchone()
+        return bool(row and row["cancel"])
+
+    def finish(self, request_id: int, returncode: int) -> QueuedBuild:
+        def _tx(db: sqlite3.Connection) -> None:
+            row = db.execute("SELECT cancel, superseded_by FROM requests WHERE id = ?", (request_id,)).fetchone()
+            if row["cancel"]:
+                state = "superseded" if row["superseded_by"] is not None else "cancelled"
+            else:
+                state = "ok" if returncode == 0 else "failed"
+            db.execute("UPDATE requests SET state = ?, returncode = ?, finished = ? WHERE id = ?", (state, returncode, time.time(), request_id))
+
+        self._write(_tx)
+        return self.get(request_id)
+
+    def worker_slot(self) -> uegovernor.LockedFile | None:
+        """One of ``MaxWorkers`` worker slots, or None if that many workers are already running."""
+        for n in range(self.settings.max_workers):
+            try:
+                return uegovernor.LockedFile(self.settings.dir / "workers" / f"{n}.lock", blocking=False)
+            except BlockingIOError:
+                continue
+        return None
+
+
+def run_claimed(queue: BuildQueue, build: QueuedBuild, *, config_path: Path, build_root: Path, console: str | None = None) -> int:
+    """Run one claimed request through the normal pipeline; cancellation kills its UAT process tree."""
+    print(f"[info] [queue] Building {build.name}")
+    loaded, result = ueconfig.load_validated(config_path)
+    cfg = loaded.cfg
+    for w in result.warnings:
+        print(f"[warn] {w}")
+    if not result.ok:
+        for e in result.errors:
+            print(f"[error] {e}")
+        return 2
+    project_root = uebuildlib.resolve_project_root(config_path)
+    job = uepipeline.plan_job(
+        cfg=cfg,
+        config_path=config_path,
+        platform=build.platform,
+        build_config=build.config,
+        extra_uat_args=build.extra_args,
+        log_root=uebuildlib.build_log_dir(project_root),
+    )
+
+    done = threading.Event()
+    pids: list[int] = []
+
+    def _spawned(pid: int) -> None:
+        pids.append(pid)
+        queue.set_uat_pid(build.id, pid)
+
+    def _watch() -> None:
+        while not done.wait(min(2.0, queue.settings.poll_seconds)):
+            if queue.cancel_requested(build.id):
+                if pids:
+                    print(f"[warn] [queue] {build.name} cancelled: stopping UAT (pid {pids[0]})")
+                    uegovernor.kill_tree(pids[0])
+                    return
+
+    watcher = threading.Thread(target=_watch, name=f"queue-cancel-{build.id}", daemon=True)
+    watcher.start()
+    try:
+        return uepipeline.run_job(
+            job,
+            build_root=build_root,
+            cwd=project_root,
+            dry_run=False,
+            log_settings=uestream.LogSettings.from_config(cfg, console=console),
+            cfg=cfg,
+            cache=None if build.no_cache else uecache.BuildCache.from_config(cfg, project_root),
+            on_spawn=_spawned,
+        )
+    finally:
+        done.set()
+        watcher.join()
+
+
+def work_one(queue: BuildQueue, *, config_path: Path, build_root: Path, console: str | None = None) -> QueuedBuild | None:
+    """Claim and build the oldest pending request; None if there was nothing to do."""
+    claimed = queue.claim()
+    if claimed is None:
+        return None
+    build, held = claimed
+    with held:
+        if queue.cancel_requested(build.id):
+            return queue.finish(build.id, 1)
+        try:
+            rc = run_claimed(queue, build, config_path=config_path, build_root=build_root, console=console)
+        except Exception as exc:  # one broken build must not take the worker down
+            print(f"[error] [queue] {build.name} crashed: {exc}")
+            rc = 1
+        finished = queue.finish(build.id, rc)
+    print(f"[info] [queue] {finished.name}: {finished.state} (rc={rc})")
+    return finished
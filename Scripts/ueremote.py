@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+import json
+import os
+import shlex
+import subprocess
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import IO, Any, Iterable
+
+import uebuildlib
+import uetreeindex
+
+# Remote-side bookkeeping files inside the remote project dir.
+_TOKEN = ".uebuild-sync"
+REMOTE_ARCHIVE = "Saved/UEBuildArchive"
+
+
+@dataclass(frozen=True)
+class RemoteSettings:
+    """``Platforms.<Platform>`` with ``RemoteBuild: true``: run the whole BuildCookRun on a Mac."""
+
+    host: str  # the builder this job runs on (first of ``hosts`` until the pool dispatcher picks one)
+    hosts: tuple[str, ...]
+    user: str
+    key: str
+    port: int
+    engine_root: str  # on the Mac
+    project_dir: str  # on the Mac; relative paths are relative to the remote home
+    transport: str  # "ssh" | "local" (directory stand-in for tests)
+    control_persist: int
+    excludes: tuple[str, ...]
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any], platform: str, project_name: str) -> "RemoteSettings | None":
+        pcfg = uebuildlib._get_dict(uebuildlib._get_dict(cfg, "Platforms"), platform)
+        if not uebuildlib._bool(pcfg.get("RemoteBuild"), False):
+            return None
+        servers = pcfg.get("RemoteServer")
+        if isinstance(servers, str):
+            servers = [servers]
+        hosts = tuple(h.strip() for h in servers if isinstance(h, str) and h.strip()) if isinstance(servers, list) else ()
+        engine_root = pcfg.get("RemoteEngineRoot")
+        if not hosts:
+            raise uebuildlib.ConfigError(f"Platforms.{platform}.RemoteBuild needs RemoteServer (a host or a list of hosts)")
+        if not isinstance(engine_root, str) or not engine_root.strip():
+            raise uebuildlib.ConfigError(f"Platforms.{platform}.RemoteBuild needs RemoteEngineRoot (engine path on the Mac)")
+        transport = str(pcfg.get("RemoteTransport", "ssh"))
+        if transport not in ("ssh", "local"):
+            raise uebuildlib.ConfigError(f"Platforms.{platform}.RemoteTransport must be ssh or local")
+        port = pcfg.get("SshPort", 22)
+        persist = pcfg.get("ControlPersistSeconds", 600)
+        excludes = pcfg.get("SyncExcludes", [])
+        project_dir = pcfg.get("RemoteProjectDir")
+        return cls(
+            host=hosts[0],
+            hosts=hosts,
+            user=str(pcfg.get("RemoteUser") or ""),
+            key=str(pcfg.get("SshKeyPath") or ""),
+            port=port if isinstance(port, int) and port > 0 else 22,
+            engine_root=engine_root.strip(),
+            project_dir=project_dir.strip() if isinstance(project_dir, str) and project_dir.strip() else f"uebuild/{project_name}",
+            transport=transport,
+            control_persist=persist if isinstance(persist, int) and persist >= 0 else 600,
+            excludes=tuple(x for x in excludes if isinstance(x, str)) if isinstance(excludes, list) else (),
+        )
+
+    @property
+    def destination(self) -> str:
+        return f"{self.user}@{self.host}" if self.user else self.host
+
+    @property
+    def label(self) -> str:
+        """Stable name for this host + remote dir (manifest snapshots, state files)."""
+        return f"{self.destination}:{self.port}:{self.project_dir}"
+
+    def on(self, host: str) -> "RemoteSettings":
+        return replace(self, host=host)
+
+
+class Transport:
+    """Runs shell scripts on the builder; everything (sync, build, pull) goes through ``command``.
+
+    The ssh transport keeps one OpenSSH control master per host (``ControlPersist``), so the
+    handful of calls per build share a single authenticated connection. The local transport
+    runs the same scripts with ``sh`` in a local directory standing in for the Mac's home.
+    """
+
+    def __init__(self, settings: RemoteSettings) -> None:
+        self.settings = settings
+
+    def command(self, script: str) -> list[str]:
+        s = self.settings
+        # The script is always the last element, so ``rehost`` can move a command to another builder.
+        if s.transport == "local":
+            return ["sh", "-c", 'mkdir -p "$1" && cd "$1" && eval "$2"', "sh", s.host, script]
+        return [*self.ssh_base(), s.destination, script]
+
+    def ssh_base(self) -> list[str]:
+        s = self.settings
+        cmd = ["ssh", "-o", "BatchMode=yes", "-o", "ConnectTimeout=15", "-o", "ServerAliveInterval=30", "-p", str(s.port)]
+        if s.key:
+            cmd += ["-i", str(Path(s.key).expanduser())]
+        if sys.platform != "win32":
+            # Win32-OpenSSH has no connection multiplexing: there every call opens its own session.
+            control_dir = Path(tempfile.gettempdir()) / "uebuild-ssh"
+            control_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+            cmd += [
+                "-o", "ControlMaster=auto",
+                "-o", f"ControlPath={control_dir}/%C",
+                "-o", f"ControlPersist={s.control_persist}",
+            ]
+        return cmd
+
+    def run(self, script: str, *, stdin: bytes = b"", timeout: float | None = None) -> tuple[int, str]:
+        try:
+            proc = subprocess.run(self.command(script), input=stdin, capture_output=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return 255, f"no answer within {timeout:.0f}s"
+        out = proc.stdout.decode("utf-8", errors="replace")
+        if proc.returncode != 0:
+            out += proc.stderr.decode("utf-8", errors="replace")
+        return proc.returncode, out
+
+    def close(self) -> None:
+        """Stop this host's control master (it would otherwise exit after ControlPersist)."""
+        if self.settings.transport == "ssh" and sys.platform != "win32":
+            subprocess.run([*self.ssh_base(), "-O", "exit", self.settings.destination], capture_output=True)
+
+
+def _remote_path(path: str) -> str:
+    """Quote for the remote shell, keeping a leading ``~/`` expandable."""
+    if path.startswith("~/"):
+        return '"$HOME"/' + shlex.quote(path[2:])
+    return shlex.quote(path)
+
+
+def remote_command(settings: RemoteSettings, local_cmd: list[str], *, project_file: Path, archive_subdir: str) -> list[str]:
+    """Turn a local BuildCookRun command into the transport command running it on the Mac."""
+    uat = _remote_path(f"{settings.engine_root.rstrip('/')}/Engine/Build/BatchFiles/RunUAT.sh")
+    args: list[str] = []
+    for arg in local_cmd[1:]:
+        if arg.startswith("-project="):
+            args.append(f'-project="$PWD"/{shlex.quote(project_file.name)}')
+        elif arg.startswith("-archivedirectory="):
+            args.append(f'-archivedirectory="$PWD"/{shlex.quote(f"{REMOTE_ARCHIVE}/{archive_subdir}")}')
+        else:
+            args.append(shlex.quote(arg))
+    # Start from an empty archive dir: `pull` brings back the whole tree, so nothing stale may linger.
+    archive = shlex.quote(f"{REMOTE_ARCHIVE}/{archive_subdir}")
+    script = f"cd {_remote_path(settings.project_dir)} && rm -rf {archive} && exec {uat} {' '.join(args)}"
+    return Transport(settings).command(script)
+
+
+def rehost(cmd: list[str], settings: RemoteSettings) -> list[str]:
+    """The same remote command (from ``remote_command``), run on ``settings.host`` instead."""
+    return Transport(settings).command(cmd[-1])
+
+
+# --- delta sync -----------------------------------------------------------------------------
+
+
+@dataclass
+class SyncStats:
+    uploaded: int = 0
+    uploaded_bytes: int = 0
+    removed: int = 0
+    full: bool = False
+    seconds: float = 0.0
+
+    def describe(self) -> str:
+        kind = "full" if self.full else "delta"
+        return f"{kind} sync: {self.uploaded} file(s) {self.uploaded_bytes / 1024**2:.1f} MB up, {self.removed} removed in {self.seconds:.1f}s"
+
+
+def sync_token(settings: RemoteSettings, state_dir: Path) -> str:
+    """Token of our last full sync to this host ("" if never); the remote copy is warm if it has the same."""
+    return _Hosts(state_dir / "hosts.json").get(settings.label)
+
+
+class _Hosts:
+    """Per-host sync tokens (``<Saved>/Remote/hosts.json``) proving the remote tree is ours."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def _read(self) -> dict[str, str]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def get(self, label: str) -> str:
+        return str(self._read().get(label, ""))
+
+    def set(self, label: str, token: str) -> None:
+        data = self._read()
+        data[label] = token
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".tmp-{os.getpid()}")
+        tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def _stream_tar(proc: subprocess.Popen, root: Path, files: Iterable[str]) -> bool:
+    """Send ``files`` as a tar stream to ``proc``; False if the remote end went away mid-stream."""
+    assert proc.stdin is not None
+    try:
+        with tarfile.open(fileobj=proc.stdin, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+            for rel in files:
+                try:
+                    tar.add(str(root / rel), arcname=rel, recursive=False)
+                except FileNotFoundError:
+                    continue  # deleted since the scan; removed on the next sync
+        proc.stdin.close()
+    except BrokenPipeError:
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def sync(settings: RemoteSettings, project_root: Path, *, state_dir: Path) -> SyncStats:
+    """Push only what changed since the last sync to this host, by content.
+
+    The project tree is indexed incrementally (``uetreeindex``); each host gets a snapshot of
+    the tree as last pushed. A random token stored on both sides detects a remote checkout
+    that was wiped or replaced, which forces a full sync.
+    """
+    started = time.monotonic()
+    transport = Transport(settings)
+    remote_dir = _remote_path(settings.project_dir)
+    rc, out = transport.run(f"mkdir -p {remote_dir} && cat {remote_dir}/{_TOKEN} 2>/dev/null || true")
+    if rc != 0:
+        raise ConnectionError(f"{settings.destination}: {out.strip() or f'exit {rc}'}")
+
+    hosts = _Hosts(state_dir / "hosts.json")
+    snapshot = f"host:{settings.label}"
+    stats = SyncStats()
+    with uetreeindex.TreeIndex(
+        state_dir / "project-index.sqlite",
+        project_root,
+        ignored_dirs=uetreeindex.DEFAULT_IGNORED_DIRS | set(settings.excludes),
+    ) as index:
+        index.scan()
+        token = hosts.get(settings.label)
+        if not token or out.strip() != token:
+            stats.full = True
+            diff = index.diff(since=f"{snapshot}:none")  # no such snapshot: every file is "added"
+        else:
+            diff = index.diff(since=snapshot)
+
+        changed = diff.changed
+        if changed:
+            proc = subprocess.Popen(transport.command(f"tar -xf - -C {remote_dir}"), stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+            stderr: list[bytes] = []
+            reader = threading.Thread(target=lambda: stderr.append(proc.stderr.read() if proc.stderr else b""), daemon=True)
+            reader.start()
+            sent = _stream_tar(proc, project_root, changed)
+            reader.join()
+            if proc.wait() != 0 or not sent:
+                raise ConnectionError(f"{settings.destination}: upload failed: {b''.join(stderr).decode(errors='replace').strip()}")
+            stats.uploaded = len(changed)
+            stats.uploaded_bytes = sum((project_root / rel).stat().st_size for rel in changed if (project_root / rel).exists())
+        if diff.removed and not stats.full:
+            rc, out = transport.run(f"cd {remote_dir} && xargs -0 rm -f --", stdin=b"\0".join(p.encode() for p in diff.removed))
+            if rc != 0:
+                raise ConnectionError(f"{settings.destination}: delete failed: {out.strip()}")
+            stats.removed = len(diff.removed)
+
+        new_token = token if not stats.full else uuid.uuid4().hex
+        if stats.full:
+            rc, out = transport.run(f"printf %s {new_token} > {remote_dir}/{_TOKEN}")
+            if rc != 0:
+                raise ConnectionError(f"{settings.destination}: {out.strip()}")
+            hosts.set(settings.label, new_token)
+        index.snapshot(snapshot)
+    stats.seconds = time.monotonic() - started
+    return stats
+
+
+def _safe_members(tar: tarfile.TarFile, dest: Path) -> Iterable[tarfile.TarInfo]:
+    root = dest.resolve()
+    for member in tar:
+        target = (dest / member.name).resolve()
+        if member.isfile() and (root == target or root in target.parents):
+            yield member
+
+
+def pull(settings: RemoteSettings, archive_subdir: str, dest: Path) -> tuple[int, int]:
+    """Download the archive tree of the last remote build (emptied when that build started).
+
+    The whole tree comes back: UAT keeps the mtimes of files it archives from earlier
+    stages, so "newer than the build start" would miss some of them.
+    """
+    transport = Transport(settings)
+    remote_dir = _remote_path(settings.project_dir)
+    archive = shlex.quote(f"{REMOTE_ARCHIVE}/{archive_subdir}")
+    script = f"cd {remote_dir} && cd {archive} && tar -cf - ."
+
+    dest.mkdir(parents=True, exist_ok=True)
+    proc = subprocess.Popen(transport.command(script), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    assert proc.stdout is not None
+    stderr: list[bytes] = []
+    reader = threading.Thread(target=lambda: stderr.append(proc.stderr.read() if proc.stderr else b""), daemon=True)
+    reader.start()
+    files = size = 0
+    stdout: IO[bytes] = proc.stdout
+    error: Exception | None = None
+    try:
+        with tarfile.open(fileobj=stdout, mode="r|") as tar:
+            for member in _safe_members(tar, dest):
+                tar.extract(member, dest)
+                files += 1
+                size += member.size
+    except (tarfile.TarError, OSError) as exc:
+        error = exc  # truncated stream: the remote side's status says why
+        proc.kill()
+    rc = proc.wait()
+    reader.join()
+    if rc != 0 or error is not None:
+        detail = b"".join(stderr).decode(errors="replace").strip() or str(error or f"exit {rc}")
+        raise ConnectionError(f"{settings.destination}: pull failed: {detail}")
+    return files, size
@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import secrets
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import uebuildlib
+import uecache
+import ueconfig
+import uepipeline
+import uestream
+
+# Runs inside the warm hook interpreter: one JSON request per line on stdin, one reply per
+# line on the original stdout. fd 1 itself is pointed at stderr, so neither hook prints nor
+# the subprocesses a hook starts can corrupt the reply channel.
+_HOOK_WORKER_SRC = r"""
+import json, os, runpy, sys, traceback
+sys.stdout.flush()
+proto = os.fdopen(os.dup(1), "w", encoding="utf-8")
+os.dup2(2, 1)
+for raw in sys.stdin:
+    req = json.loads(raw)
+    rc = 0
+    saved_env, saved_cwd, saved_argv = dict(os.environ), os.getcwd(), list(sys.argv)
+    try:
+        os.environ.clear(); os.environ.update(req["env"]); os.chdir(req["cwd"]); sys.argv = [req["script"]]
+        runpy.run_path(req["script"], run_name="__main__")
+    except SystemExit as exc:
+        rc = exc.code if isinstance(exc.code, int) else (0 if exc.code is None else 1)
+    except BaseException:
+        traceback.print_exc()
+        rc = 1
+    finally:
+        os.environ.clear(); os.environ.update(saved_env); os.chdir(saved_cwd); sys.argv = saved_argv
+        sys.stdout.flush(); sys.stderr.flush()
+    proto.write(json.dumps({"rc": rc}) + "\n"); proto.flush()
+"""
+
+
+class HookWorker:
+    """A long-lived Python that runs hook scripts without paying interpreter startup per hook."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._proc: subprocess.Popen[str] | None = None
+
+    def _ensure(self) -> subprocess.Popen[str]:
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                [sys.executable, "-c", _HOOK_WORKER_SRC],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+            )
+        return self._proc
+
+    def run_hook(self, stage_name: str, *, hooks_dir: Path, env: dict[str, str] | None, dry_run: bool) -> int:
+        hook_script = hooks_dir / f"{stage_name}.py"
+        if not hook_script.exists():
+            return 0
+        print(f"[hook] {stage_name} (warm worker): {hook_script}")
+        if dry_run:
+            return 0
+        with self._lock:
+            proc = self._ensure()
+            assert proc.stdin is not None and proc.stdout is not None
+            request = {"script": str(hook_script), "cwd": str(hooks_dir), "env": dict(env or os.environ)}
+            try:
+                proc.stdin.write(json.dumps(request) + "\n")
+                proc.stdin.flush()
+                reply = proc.stdout.readline()
+                rc = json.loads(reply).get("rc", 1)
+            except (OSError, ValueError, AttributeError) as exc:
+                # The worker died or the channel is out of sync: start a fresh one for the next hook.
+                print(f"[error] [hook] {stage_name}: warm worker gave no valid reply ({exc}); restarting it")
+                self._kill()
+                return 1
+        return rc if isinstance(rc, int) else 1
+
+    def _kill(self) -> None:
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+
+    def close(self) -> None:
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.terminate()
+
+
+class ConfigCache:
+    """Effective, validated config, reloaded only when one of its layers changes."""
+
+    def __init__(self, config_path: Path) -> None:
+        self.config_path = config_path
+        self._lock = threading.Lock()
+        self._key: tuple[Any, ...] | None = None
+        self._cfg: dict[str, Any] = {}
+        self._result = uebuildlib.ValidationResult(errors=[], warnings=[])
+
+    def get(self) -> tuple[dict[str, Any], uebuildlib.ValidationResult]:
+        key = ueconfig.stamp(self.config_path)
+        with self._lock:
+            if key != self._key:
+                loaded = ueconfig.load(self.config_path)
+                # Validation stats EngineRoot/RunUAT (often on a network drive): once per change.
+                self._result = ueconfig.validate(loaded)
+                self._cfg = loaded.cfg
+                self._key = key
+                print(f"[serve] Loaded config {self.config_path}")
+            return self._cfg, self._result
+
+
+_ids = itertools.count(1)
+# Finished jobs kept for `serve --status`; older ones are dropped so a long-lived daemon stays small.
+_KEEP_FINISHED = 100
+
+
+@dataclass
+class DaemonJob:
+    id: int
+    key: str
+    request: dict[str, Any]
+    state: str = "queued"
+    returncode: int | None = None
+    submitted: float = field(default_factory=time.time)
+    started: float | None = None
+    finished: float | None = None
+    waiters: int = 1
+    done: threading.Event = field(default_factory=threading.Event)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "returncode": self.returncode,
+            "request": self.request,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+            "waiters": self.waiters,
+        }
+
+
+def request_key(request: dict[str, Any]) -> str:
+    return json.dumps(
+        {
+            "platform": request.get("platform"),
+            "config": request.get("config", "Development"),
+            "extra_uat_args": list(request.get("extra_uat_args") or []),
+            "dry_run": bool(request.get("dry_run")),
+            "no_cache": bool(request.get("no_cache")),
+        },
+        sort_keys=True,
+    )
+
+
+class BuildDaemon:
+    def __init__(self, *, config_path: Path, build_root: Path, workers: int = 1) -> None:
+        self.config_path = config_path
+        self.build_root = build_root
+        self.configs = ConfigCache(config_path)
+        self.hooks = HookWorker()
+        self._lock = threading.Condition()
+        self._queue: list[DaemonJob] = []
+        self._jobs: dict[int, DaemonJob] = {}
+        self._stopping = False
+        self._workers = [threading.Thread(target=self._work, name=f"serve-worker-{i}", daemon=True) for i in range(max(1, workers))]
+        for t in self._workers:
+            t.start()
+
+    def submit(self, request: dict[str, Any]) -> tuple[DaemonJob, bool]:
+        key = request_key(request)
+        with self._lock:
+            # Identical request already waiting: attach to it instead of queueing another build.
+            for job in self._queue:
+                if job.key == key:
+                    job.waiters += 1
+                    return job, True
+            job = DaemonJob(id=next(_ids), key=key, request=request)
+            self._queue.append(job)
+            self._jobs[job.id] = job
+            self._lock.notify()
+            return job, False
+
+    def status(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [j.to_dict() for j in sorted(self._jobs.values(), key=lambda j: j.id)[-50:]]
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopping = True
+            self._lock.notify_all()
+        self.hooks.close()
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                while not self._queue and not self._stopping:
+                    self._lock.wait()
+                if self._stopping:
+                    return
+                job = self._queue.pop(0)
+                job.state = "running"
+                job.started = time.time()
+            try:
+                rc = self._run(job.request)
+            except Exception as exc:  # keep the daemon alive whatever a single build does
+                print(f"[serve] job {job.id} crashed: {exc}")
+                rc = 1
+            with self._lock:
+                job.returncode = rc
+                job.state = "ok" if rc == 0 else "failed"
+                job.finished = time.time()
+                self._prune()
+            job.done.set()
+
+    def _prune(self) -> None:
+        """Forget all but the newest ``_KEEP_FINISHED`` finished jobs (caller holds the lock)."""
+        finished = sorted(j.id for j in self._jobs.values() if j.finished is not None)
+        for job_id in finished[:-_KEEP_FINISHED]:
+            del self._jobs[job_id]
+
+    def _run(self, request: dict[str, Any]) -> int:
+        cfg, result = self.configs.get()
+        for w in result.warnings:
+            print(f"[warn] {w}")
+        if not result.ok:
+            for e in result.errors:
+                print(f"[error] {e}")
+            return 2
+        project_root = uebuildlib.resolve_project_root(self.config_path)
+        job = uepipeline.plan_job(
+            cfg=cfg,
+            config_path=self.config_path,
+            platform=str(request["platform"]),
+            build_config=str(request.get("config") or "Development"),
+            extra_uat_args=[str(a) for a in request.get("extra_uat_args") or []],
+            log_root=uebuildlib.build_log_dir(project_root),
+        )
+        return uepipeline.run_job(
+            job,
+            build_root=self.build_root,
+            cwd=project_root,
+            dry_run=bool(request.get("dry_run")),
+            log_settings=uestream.LogSettings.from_config(cfg, console="compact"),
+            cfg=cfg,
+            cache=None if request.get("no_cache") else uecache.BuildCache.from_config(cfg, project_root),
+            hook_runner=self.hooks.run_hook,
+        )
+
+
+def state_file(config_path: Path) -> Path:
+    return uebuildlib.resolve_project_root(config_path) / "Saved" / "uebuild-daemon.json"
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_Server"
+
+    def _send(self, payload: dict[str, Any]) -> None:
+        self.wfile.write((json.dumps(payload) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        raw = self.rfile.readline()
+        try:
+            msg = json.loads(raw)
+        except ValueError:
+            self._send({"error": "invalid request"})
+            return
+        if not isinstance(msg, dict) or msg.get("token") != self.server.token:
+            self._send({"error": "unauthorized"})
+            return
+
+        daemon = self.server.daemon
+        op = msg.get("op")
+        if op == "ping":
+            self._send({"ok": True, "pid": os.getpid()})
+        elif op == "status":
+            self._send({"ok": True, "jobs": daemon.status()})
+        elif op == "build":
+            if not msg.get("platform"):
+                self._send({"error": "platform is required"})
+                return
+            job, deduped = daemon.submit(msg)
+            self._send({"ok": True, "id": job.id, "deduped": deduped})
+            if msg.get("wait"):
+                job.done.wait()
+                self._send({"ok": True, "id": job.id, "state": job.state, "returncode": job.returncode})
+        elif op == "shutdown":
+            self._send({"ok": True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        else:
+            self._send({"error": f"unknown op: {op}"})
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: tuple[str, int], daemon: BuildDaemon, token: str) -> None:
+        super().__init__(address, _Handler)
+        self.daemon = daemon
+        self.token = token
+
+
+def serve(*, config_path: Path, build_root: Path, port: int = 0, workers: int = 1) -> int:
+    daemon = BuildDaemon(config_path=config_path, build_root=build_root, workers=workers)
+    daemon.configs.get()  # warm the config/validation cache before accepting work
+    token = secrets.token_hex(16)
+    server = _Server(("127.0.0.1", port), daemon, token)
+    path = state_file(config_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"port": server.server_address[1], "pid": os.getpid(), "token": token}), encoding="utf-8")
+    print(f"[serve] Listening on 127.0.0.1:{server.server_address[1]} (state: {path})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.stop()
+        try:
+            path.unlink()
+        except OSError:
+            pass
+    return 0
+
+
+def request(config_path: Path, payload: dict[str, Any], *, timeout: float | None = None) -> list[dict[str, Any]]:
+    """Send one request to a running daemon; returns every reply line (two for ``wait`` builds)."""
+    try:
+        state = json.loads(state_file(config_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise ConnectionError("uebuild daemon is not running (no state file)") from exc
+    with socket.create_connection(("127.0.0.1", int(state["port"])), timeout=5) as sock:
+        sock.settimeout(timeout)
+        sock.sendall((json.dumps({**payload, "token": state["token"]}) + "\n").encode("utf-8"))
+        replies: list[dict[str, Any]] = []
+        with sock.makefile("r", encoding="utf-8") as fh:
+            expected = 2 if payload.get("op") == "build" and payload.get("wait") else 1
+            for line in fh:
+                replies.append(json.loads(line))
+                if "error" in replies[-1] or len(replies) >= expected:
+                    break
+        return replies
@@ -0,0 +1,423 @@
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import uebuildlib
+from uestream import LogLine
+
+# Saved/Cooked/<dir> prefix per UAT platform (e.g. Android cooks into Android_ASTC).
+_COOK_DIRS = {"WIN64": "Windows", "WINDOWS": "Windows", "ANDROID": "Android", "IOS": "IOS", "MAC": "Mac", "LINUX": "Linux"}
+# Files every shard writes for its own subset; only the finalize cook can rebuild them for the whole game.
+DEFAULT_REGENERATED = ("*/AssetRegistry.bin", "*/Metadata/*", "*.ushaderbytecode", "*.shk", "*/CookerOpenOrder.log")
+_COOKING = re.compile(r"LogCook: Display: Cooking (/\w+/\S+)")
+# Unknown units are estimated from their size until a cook has timed them.
+_DEFAULT_SECONDS_PER_MB = 1.0
+# The previous plan is kept while its slowest shard is within this factor of a fresh plan's:
+# a re-plan invalidates every shard's iterative output and phase cache for a small gain.
+_REPLAN_GAIN = 1.10
+
+
+def cook_dir_name(platform: str) -> str:
+    return _COOK_DIRS.get(platform.upper(), platform)
+
+
+@dataclass(frozen=True)
+class ShardSettings:
+    count: int  # 1: the cook runs as one process
+    dir: Path
+    finalize: bool  # incremental cook over the merged tree rebuilds the per-shard global files
+    regenerated: tuple[str, ...]
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any], project_root: Path) -> "ShardSettings":
+        s = uebuildlib._get_dict(cfg, "CookShards")
+        count = s.get("Count", 1)
+        directory = s.get("Dir")
+        regenerated = s.get("Regenerated")
+        return cls(
+            count=count if isinstance(count, int) and not isinstance(count, bool) and count > 0 else 1,
+            dir=Path(directory).expanduser() if isinstance(directory, str) and directory.strip() else project_root / "Saved" / "CookShards",
+            finalize=uebuildlib._bool(s.get("Finalize"), True),
+            regenerated=tuple(regenerated) if isinstance(regenerated, list) else DEFAULT_REGENERATED,
+        )
+
+
+@dataclass(frozen=True)
+class CookUnit:
+    """A map (cooked with everything it references) or a map-less Content directory."""
+
+    kind: str  # map | dir
+    name: str  # package path: /Game/Maps/Arena or /Game/UI
+    bytes: int
+
+
+def scan_units(project_root: Path) -> list[CookUnit]:
+    """Every map under Content, plus each top-level Content directory that holds no map.
+
+    Directories with maps are left to the maps: UE cooks what a map references, as an
+    unsharded cook does. Map-less directories are cooked with ``-cookdir`` so assets that
+    only code loads still arrive.
+    """
+    content = project_root / "Content"
+    if not content.is_dir():
+        return []
+    units: list[CookUnit] = []
+    for top in sorted(content.iterdir()):
+        if not top.is_dir():
+            continue
+        maps = sorted(top.rglob("*.umap"))
+        if not maps:
+            size = sum(p.stat().st_size for p in top.rglob("*") if p.is_file())
+            units.append(CookUnit("dir", f"/Game/{top.name}", size))
+            continue
+        for m in maps:
+            built = m.with_name(f"{m.stem}_BuiltData.uasset")
+            size = m.stat().st_size + (built.stat().st_size if built.is_file() else 0)
+            units.append(CookUnit("map", "/Game/" + m.relative_to(content).with_suffix("").as_posix(), size))
+    for m in sorted(content.glob("*.umap")):
+        units.append(CookUnit("map", f"/Game/{m.stem}", m.stat().st_size))
+    return units
+
+
+class CookWeights:
+    """Seconds each unit took to cook on earlier runs, per platform (``weights.json``)."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        self.data: dict[str, dict[str, float]] = data if isinstance(data, dict) else {}
+
+    def estimate(self, units: list[CookUnit], platform: str) -> dict[str, float]:
+        known = self.data.get(platform, {})
+        timed = [u for u in units if u.name in known]
+        timed_bytes = sum(u.bytes for u in timed)
+        rate = sum(known[u.name] for u in timed) / timed_bytes if timed_bytes else _DEFAULT_SECONDS_PER_MB / 1024**2
+        return {u.name: known.get(u.name, u.bytes * rate) for u in units}
+
+    def update(self, platform: str, seconds: dict[str, float]) -> None:
+        if not seconds:
+            return
+        known = self.data.setdefault(platform, {})
+        for name, s in seconds.items():
+            # Half-life of one run: follows content growth without trusting a single noisy cook.
+            known[name] = round(s if name not in known else 0.5 * known[name] + 0.5 * s, 3)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.data, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+@dataclass
+class Shard:
+    index: int
+    units: list[CookUnit]
+    estimate: float = 0.0
+
+    @property
+    def maps(self) -> list[str]:
+        return [u.name for u in self.units if u.kind == "map"]
+
+    @property
+    def dirs(self) -> list[str]:
+        return [u.name for u in self.units if u.kind == "dir"]
+
+
+def partition(units: list[CookUnit], estimate: dict[str, float], count: int) -> list[Shard]:
+    """Longest-first greedy split into at most ``count`` shards, maps placed before directories.
+
+    BuildCookRun without ``-map`` cooks the project's default map list, so a shard must never
+    be map-less: there are at most as many shards as maps, and every shard gets one first.
+    """
+    maps = [u for u in units if u.kind == "map"]
+    count = max(1, min(count, len(maps)))
+    shards = [Shard(i, []) for i in range(count)]
+    by_cost = lambda u: (-estimate.get(u.name, 0.0), u.name)  # noqa: E731
+    for group in (maps, [u for u in units if u.kind == "dir"]):
+        for unit in sorted(group, key=by_cost):
+            target = min(shards, key=lambda s: (s.estimate, s.index))
+            target.units.append(unit)
+            target.estimate += estimate.get(unit.name, 0.0)
+    return shards
+
+
+@dataclass
+class ShardPlan:
+    platform: str
+    project: str  # uproject name: cooked packages live under <cooked>/<project>/Content
+    root: Path  # shard outputs: <root>/shard-<i>; machine-local, not part of plan.json
+    shards: list[Shard]
+    created: float = field(default_factory=time.time)
+
+    def shard_dir(self, index: int) -> Path:
+        return self.root / f"shard-{index}"
+
+    def units(self) -> list[CookUnit]:
+        return [u for s in self.shards for u in s.units]
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "platform": self.platform,
+            "project": self.project,
+            "created": self.created,
+            "shards": [
+                {"index": s.index, "estimate": round(s.estimate, 3), "units": [[u.kind, u.name, u.bytes] for u in s.units]}
+                for s in self.shards
+            ],
+        }
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any], root: Path) -> "ShardPlan":
+        shards = [
+            Shard(int(s["index"]), [CookUnit(k, n, int(b)) for k, n, b in s["units"]], float(s.get("estimate", 0.0)))
+            for s in data["shards"]
+        ]
+        return cls(data["platform"], data["project"], root, shards, float(data.get("created", 0.0)))
+
+    def write(self, path: Path | None = None) -> Path:
+        path = path or self.root / "plan.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_json(), indent=2), encoding="utf-8")
+        return path
+
+    @classmethod
+    def load(cls, path: Path, settings: ShardSettings) -> "ShardPlan":
+        """A plan written on another machine (CI fan-out); shard outputs go under this machine's ``settings.dir``."""
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            return cls.from_json(data, settings.dir / cook_dir_name(data["platform"]))
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            raise uebuildlib.ConfigError(f"Cannot read cook shard plan {path}: {exc}") from exc
+
+
+def plan(settings: ShardSettings, project_file: Path, platform: str, count: int | None = None) -> ShardPlan:
+    units = scan_units(project_file.parent)
+    estimate = CookWeights(settings.dir / "weights.json").estimate(units, platform)
+    root = settings.dir / cook_dir_name(platform)
+    fresh = ShardPlan(platform, project_file.stem, root, partition(units, estimate, count or settings.count))
+    try:
+        previous = ShardPlan.load(root / "plan.json", settings)
+    except uebuildlib.ConfigError:
+        return fresh
+    current = {u.name: u for u in units}
+    if len(previous.shards) != len(fresh.shards) or sorted(u.name for u in previous.units()) != sorted(current):
+        return fresh
+    for shard in previous.shards:
+        shard.units = [current[u.name] for u in shard.units]
+        shard.estimate = sum(estimate[u.name] for u in shard.units)
+    if max(s.estimate for s in previous.shards) > _REPLAN_GAIN * max(s.estimate for s in fresh.shards):
+        return fresh
+    return previous
+
+
+def shard_steps(plan: ShardPlan, index: int, project_root: Path) -> list[str]:
+    """BuildCookRun cook steps for one shard, cooking into its own output directory."""
+    shard = plan.shards[index]
+    steps = ["-cook"]
+    if shard.maps:
+        steps.append(f"-map={'+'.join(shard.maps)}")
+    if shard.dirs:
+        # -cookdir takes directories on disk, not package paths.
+        content = project_root / "Content"
+        steps.append(f"-cookdir={'+'.join(str(content / d.split('/', 2)[2]) for d in shard.dirs)}")
+    steps.append(f"-cookoutputdir={plan.shard_dir(index)}")
+    return steps
+
+
+def prepare_shard_dir(plan: ShardPlan, index: int) -> None:
+    """Keep a shard's output for an iterative re-cook only while it is assigned the same units.
+
+    After a re-plan the old output holds packages of units now cooked elsewhere (or deleted),
+    which the merge would carry into the build.
+    """
+    marker = plan.root / f"shard-{index}.units"
+    units = "\n".join(sorted(f"{u.kind} {u.name}" for u in plan.shards[index].units))
+    try:
+        same = marker.read_text(encoding="utf-8") == units
+    except OSError:
+        same = False
+    if not same:
+        shutil.rmtree(plan.shard_dir(index), ignore_errors=True)
+        plan.root.mkdir(parents=True, exist_ok=True)
+        marker.write_text(units, encoding="utf-8")
+
+
+class CookTimer:
+    """Log sink attributing cook time to units from the ``Cooking <package>`` lines.
+
+    Time between two lines goes to the unit of the earlier one; a package outside every unit
+    (a dependency) is charged to the unit being cooked when it showed up. The last unit runs
+    until the cooker's last log line.
+    """
+
+    def __init__(self, units: list[CookUnit]) -> None:
+        self._maps = {u.name for u in units if u.kind == "map"}
+        self._dirs = {u.name for u in units if u.kind == "dir"}
+        self._seconds: dict[str, float] = {}
+        self._current: str | None = None
+        self._last = 0.0
+        self._end = 0.0
+
+    def _unit(self, package: str) -> str | None:
+        if package in self._maps:
+            return package
+        top = "/".join(package.split("/", 3)[:3])
+        return top if top in self._dirs else None
+
+    def feed(self, line: LogLine) -> None:
+        if "LogCook:" not in line.text:
+            return
+        self._end = line.t
+        m = _COOKING.search(line.text) if "Cooking /" in line.text else None
+        if m is None:
+            return
+        if self._current is not None:
+            self._seconds[self._current] = self._seconds.get(self._current, 0.0) + (line.t - self._last)
+        self._current = self._unit(m.group(1)) or self._current
+        self._last = line.t
+
+    @property
+    def seconds(self) -> dict[str, float]:
+        seconds = dict(self._seconds)
+        if self._current is not None:
+            seconds[self._current] = seconds.get(self._current, 0.0) + max(0.0, self._end - self._last)
+        return seconds
+
+
+@dataclass
+class MergeReport:
+    files: int = 0
+    bytes: int = 0
+    duplicates: int = 0  # identical files cooked by several shards (shared dependencies)
+    regenerated: list[str] = field(default_factory=list)
+    conflicts: list[str] = field(default_factory=list)
+    problems: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.conflicts and not self.problems
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "files": self.files,
+            "bytes": self.bytes,
+            "duplicates": self.duplicates,
+            "regenerated": self.regenerated,
+            "conflicts": self.conflicts,
+            "problems": self.problems,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+def _digest(path: Path) -> str:
+    h = hashlib.sha1()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _place(src: Path, dst: Path, *, link: bool) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if link:
+        try:
+            os.link(src, dst)  # shard outputs stay for the next iterative shard cook; links cost nothing
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+
+def merge(
+    plan: ShardPlan,
+    dest: Path,
+    *,
+    regenerated: tuple[str, ...] = DEFAULT_REGENERATED,
+    shard_dirs: list[Path] | None = None,
+) -> MergeReport:
+    """Rebuild ``dest`` (Saved/Cooked/<Platform>) from the shard outputs and verify the result.
+
+    Identical copies of a file are expected (shared dependencies cook in several shards).
+    Differing copies are conflicts unless they match ``regenerated``; those keep the first
+    shard's copy and are rewritten by the finalize cook. Every shard must have produced
+    output and every planned map must be in the merged tree.
+    """
+    t0 = time.monotonic()
+    report = MergeReport()
+    dirs = shard_dirs or [plan.shard_dir(s.index) for s in plan.shards]
+    if len(dirs) != len(plan.shards):
+        report.problems.append(f"plan has {len(plan.shards)} shard(s) but {len(dirs)} output dir(s) were given")
+        return report
+    for d in dirs:
+        if not d.is_dir() or not any(d.iterdir()):
+            report.problems.append(f"shard output {d} is missing or empty")
+    if report.problems:
+        return report
+
+    # Stale packages from an earlier cook must not survive into the stage.
+    shutil.rmtree(dest, ignore_errors=True)
+    origin: dict[str, tuple[Path, int, int]] = {}  # rel -> first copy, its shard, its size
+    first_digests: dict[str, str] = {}  # hashed once, on the first duplicate
+    for index, d in enumerate(dirs):
+        for src in sorted(d.rglob("*")):
+            if not src.is_file():
+                continue
+            rel = src.relative_to(d).as_posix()
+            size = src.stat().st_size
+            seen = origin.get(rel)
+            global_file = any(fnmatch.fnmatch(rel, pat) for pat in regenerated)
+            if seen is None:
+                # The finalize cook may rewrite global files in place; they must not alias a shard's copy.
+                _place(src, dest / rel, link=not global_file)
+                origin[rel] = (src, index, size)
+                report.files += 1
+                report.bytes += size
+                continue
+            same = seen[2] == size
+            if same:
+                if rel not in first_digests:
+                    first_digests[rel] = _digest(seen[0])
+                same = first_digests[rel] == _digest(src)
+            if same:
+                report.duplicates += 1
+            elif global_file:
+                if rel not in report.regenerated:
+                    report.regenerated.append(rel)
+            else:
+                report.conflicts.append(f"{rel}: shard {seen[1]} and shard {index} cooked different bytes")
+
+    content = dest / plan.project / "Content"
+    for name in (n for s in plan.shards for n in s.maps):
+        rel = name.split("/", 2)[2]
+        if not (content / f"{rel}.umap").is_file():
+            report.problems.append(f"map {name} is not in the merged output")
+    report.seconds = time.monotonic() - t0
+    plan.root.mkdir(parents=True, exist_ok=True)
+    (plan.root / "merge.json").write_text(json.dumps(report.to_json(), indent=2), encoding="utf-8")
+    return report
+
+
+def print_report(report: MergeReport, dest: Path) -> None:
+    print(
+        f"[info] Merged {report.files} file(s), {report.bytes / 1024**2:.1f} MB into {dest} in {report.seconds:.1f}s "
+        f"({report.duplicates} identical duplicate(s), {len(report.regenerated)} global file(s) left to the finalize cook)"
+    )
+    for c in report.conflicts[:20]:
+        print(f"[error] conflict: {c}")
+    if len(report.conflicts) > 20:
+        print(f"[error] ... {len(report.conflicts) - 20} more conflict(s)")
+    for p in report.problems:
+        print(f"[error] {p}")
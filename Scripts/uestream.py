@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import queue
+import re
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Callable, Iterable, Iterator
+
+# Bounded hand-off between reader threads and the consumer: when the consumer
+# (log file, console, parsers) falls behind, readers block and the child blocks
+# on its pipe instead of us buffering a multi-GB UAT log in memory.
+_QUEUE_LINES = 4096
+
+_CONSOLE_LOCK = threading.Lock()
+
+CONSOLE_MODES = ("full", "compact", "off")
+
+# Lines worth showing in the compact console view.
+_COMPACT_RE = re.compile(
+    r"error|warning|\*{5,}|BUILD SUCCESSFUL|AutomationTool exiting|Took \d|Total execution time",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class LogLine:
+    t: float
+    job: str
+    stream: str
+    text: str
+
+    def format(self) -> str:
+        return f"[{self.t:10.3f}] [{self.job}] {'E' if self.stream == 'err' else ' '} {self.text}"
+
+
+@dataclass(frozen=True)
+class LogSettings:
+    max_bytes: int = 512 * 1024 * 1024
+    backup_count: int = 5
+    console: str = "full"
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any], *, console: str | None = None) -> "LogSettings":
+        logging_cfg = cfg.get("Logging") if isinstance(cfg.get("Logging"), dict) else {}
+        max_mb = logging_cfg.get("MaxFileMB")
+        backups = logging_cfg.get("BackupCount")
+        default_console = logging_cfg.get("Console")
+        return cls(
+            max_bytes=int(max_mb) * 1024 * 1024 if isinstance(max_mb, int) and max_mb > 0 else cls.max_bytes,
+            backup_count=backups if isinstance(backups, int) and backups >= 0 else cls.backup_count,
+            console=console or (default_console if default_console in CONSOLE_MODES else cls.console),
+        )
+
+
+class StreamingProcess:
+    """Run a child process and iterate over its stdout/stderr as timestamped ``LogLine``s.
+
+    Iteration ends when both pipes are closed; ``returncode`` is set afterwards.
+    """
+
+    def __init__(
+        self,
+        cmd: list[str],
+        *,
+        cwd: Path | None = None,
+        env: dict[str, str] | None = None,
+        job: str = "",
+    ) -> None:
+        self.cmd = cmd
+        self.job = job
+        self.returncode: int | None = None
+        self._queue: queue.Queue[LogLine | None] = queue.Queue(maxsize=_QUEUE_LINES)
+        self._start = time.monotonic()
+        self._proc = subprocess.Popen(
+            cmd,
+            cwd=str(cwd) if cwd else None,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        self._readers = [
+            threading.Thread(target=self._pump, args=(self._proc.stdout, "out"), daemon=True),
+            threading.Thread(target=self._pump, args=(self._proc.stderr, "err"), daemon=True),
+        ]
+        for reader in self._readers:
+            reader.start()
+
+    @property
+    def pid(self) -> int:
+        return self._proc.pid
+
+    def _pump(self, pipe: IO[bytes] | None, stream: str) -> None:
+        try:
+            if pipe is None:
+                return
+            for raw in iter(pipe.readline, b""):
+                text = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+                self._queue.put(LogLine(t=time.monotonic() - self._start, job=self.job, stream=stream, text=text))
+        finally:
+            if pipe is not None:
+                pipe.close()
+            self._queue.put(None)
+
+    def __iter__(self) -> Iterator[LogLine]:
+        open_streams = len(self._readers)
+        try:
+            while open_streams:
+                item = self._queue.get()
+                if item is None:
+                    open_streams -= 1
+                    continue
+                yield item
+        finally:
+            if open_streams:
+                # Consumer bailed out early: stop the child and keep draining so
+                # the reader threads are never left blocked on a full queue.
+                self.terminate()
+                while open_streams:
+                    if self._queue.get() is None:
+                        open_streams -= 1
+            self.returncode = int(self._proc.wait())
+
+    def terminate(self) -> None:
+        if self._proc.poll() is None:
+            self._proc.terminate()
+
+
+def stream_lines(
+    cmd: list[str],
+    *,
+    cwd: Path | None = None,
+    env: dict[str, str] | None = None,
+    job: str = "",
+) -> Iterator[LogLine]:
+    """Iterator API for other tooling: yields lines live while the child runs."""
+    yield from StreamingProcess(cmd, cwd=cwd, env=env, job=job)
+
+
+class RotatingLogWriter:
+    """Append formatted lines to ``path``, rotating to ``path.1`` .. ``path.N`` by size."""
+
+    def __init__(self, path: Path, *, max_bytes: int, backup_count: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = path.open("w", encoding="utf-8", errors="replace", newline="\n")
+        self._size = 0
+
+    def write(self, line: LogLine) -> None:
+        data = line.format() + "\n"
+        if self.max_bytes and self._size + len(data) > self.max_bytes and self._size:
+            self._rotate()
+        self._fh.write(data)
+        self._size += len(data)
+
+    def _rotate(self) -> None:
+        self._fh.close()
+        if self.backup_count > 0:
+            oldest = self.path.with_name(f"{self.path.name}.{self.backup_count}")
+            if oldest.exists():
+                oldest.unlink()
+            for i in range(self.backup_count - 1, 0, -1):
+                src = self.path.with_name(f"{self.path.name}.{i}")
+                if src.exists():
+                    src.replace(self.path.with_name(f"{self.path.name}.{i + 1}"))
+            self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        self._fh = self.path.open("w", encoding="utf-8", errors="replace", newline="\n")
+        self._size = 0
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+class ConsoleView:
+    """Console sink: ``full`` echoes every line, ``compact`` only markers/warnings/errors."""
+
+    def __init__(self, mode: str = "full", *, width: int = 200) -> None:
+        self.mode = mode if mode in CONSOLE_MODES else "full"
+        self.width = width
+        self._lines = 0
+
+    def write(self, line: LogLine) -> None:
+        self._lines += 1
+        if self.mode == "off":
+            return
+        if self.mode == "full":
+            text = f"[{line.job}] {line.text}" if line.job else line.text
+        elif _COMPACT_RE.search(line.text):
+            text = f"[+{line.t:7.1f}s][{line.job}] {line.text}"
+            if len(text) > self.width:
+                text = text[: self.width - 3] + "..."
+        else:
+            return
+        out = sys.stderr if line.stream == "err" and self.mode == "full" else sys.stdout
+        with _CONSOLE_LOCK:
+            out.write(text + "\n")
+            out.flush()
+
+    @property
+    def lines_seen(self) -> int:
+        return self._lines
+
+
+def pump(
+    lines: Iterable[LogLine],
+    *,
+    log_path: Path | None,
+    settings: LogSettings,
+    sinks: Iterable[Callable[[LogLine], None]] = (),
+) -> None:
+    """Fan a line stream out to the per-job log file, the console and extra sinks."""
+    writer = RotatingLogWriter(log_path, max_bytes=settings.max_bytes, backup_count=settings.backup_count) if log_path else None
+    view = ConsoleView(settings.console)
+    sinks = list(sinks)
+    try:
+        for line in lines:
+            if writer is not None:
+                writer.write(line)
+            view.write(line)
+            for sink in sinks:
+                sink(line)
+    finally:
+        if writer is not None:
+            writer.close()
@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+import uebuildlib
+
+# Debug-info files UAT leaves in the archive: Windows PDBs, Android/Linux .so/.debug/.sym,
+# and the DWARF payload inside Apple .dSYM bundles (matched separately, see discover()).
+DEFAULT_EXTENSIONS = (".pdb", ".so", ".debug", ".sym")
+_PDB_MAGIC = b"Microsoft C/C++ MSF 7.00\r\n\x1aDS\x00\x00\x00"
+_MACHO_MAGICS = {b"\xcf\xfa\xed\xfe": "<", b"\xce\xfa\xed\xfe": "<", b"\xfe\xed\xfa\xcf": ">", b"\xfe\xed\xfa\xce": ">"}
+_FAT_MAGIC = b"\xca\xfe\xba\xbe"
+_LC_UUID = 0x1B
+_NT_GNU_BUILD_ID = 3
+_SHT_NOTE = 7
+
+
+@dataclass(frozen=True)
+class SymbolSettings:
+    store_dir: Path
+    extensions: tuple[str, ...]
+    workers: int
+    write_workers: int
+    compress: bool
+    level: int
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any], artifacts_root: Path) -> "SymbolSettings | None":
+        sym = uebuildlib._get_dict(cfg, "Symbols")
+        if not uebuildlib._bool(sym.get("Enabled"), False):
+            return None
+        store = sym.get("StoreDir")
+        exts = sym.get("Extensions")
+        workers = sym.get("Workers")
+        write_workers = sym.get("WriteWorkers")
+        level = sym.get("CompressLevel")
+        return cls(
+            store_dir=Path(store) if isinstance(store, str) and store.strip() else artifacts_root / "SymbolStore",
+            extensions=tuple(e.lower() for e in exts if isinstance(e, str)) if isinstance(exts, list) else DEFAULT_EXTENSIONS,
+            workers=workers if isinstance(workers, int) and workers > 0 else max(1, (os.cpu_count() or 2) // 2),
+            write_workers=write_workers if isinstance(write_workers, int) and write_workers > 0 else 4,
+            compress=uebuildlib._bool(sym.get("Compress"), True),
+            level=level if isinstance(level, int) and 1 <= level <= 9 else 6,
+        )
+
+
+def _read_at(fh: Any, offset: int, size: int) -> bytes:
+    fh.seek(offset)
+    return fh.read(size)
+
+
+def _pdb_id(fh: Any) -> str | None:
+    """GUID+Age from the PDB info stream (stream 1) of an MSF 7.0 file, symstore style."""
+    header = _read_at(fh, 0, 56)
+    if len(header) < 56 or not header.startswith(_PDB_MAGIC):
+        return None
+    block_size, _, _, dir_bytes, _, block_map_addr = struct.unpack_from("<6I", header, 32)
+    dir_block_count = -(-dir_bytes // block_size)
+    dir_blocks = struct.unpack(f"<{dir_block_count}I", _read_at(fh, block_map_addr * block_size, 4 * dir_block_count))
+    directory = b"".join(_read_at(fh, b * block_size, block_size) for b in dir_blocks)[:dir_bytes]
+    (num_streams,) = struct.unpack_from("<I", directory, 0)
+    if num_streams < 2:
+        return None
+    sizes = struct.unpack_from(f"<{num_streams}I", directory, 4)
+    # Stream 0's block list comes first; stream 1 starts right after it.
+    stream0_blocks = 0 if sizes[0] == 0xFFFFFFFF else -(-sizes[0] // block_size)
+    first_block_offset = 4 + 4 * num_streams + 4 * stream0_blocks
+    (info_block,) = struct.unpack_from("<I", directory, first_block_offset)
+    info = _read_at(fh, info_block * block_size, 28)
+    if len(info) < 28:
+        return None
+    _, _, age = struct.unpack_from("<3I", info, 0)
+    d1, d2, d3 = struct.unpack_from("<IHH", info, 12)
+    return f"{d1:08X}{d2:04X}{d3:04X}{info[20:28].hex().upper()}{age:X}"
+
+
+def _elf_build_id(fh: Any) -> str | None:
+    ident = _read_at(fh, 0, 16)
+    if len(ident) < 16 or ident[:4] != b"\x7fELF":
+        return None
+    is64, endian = ident[4] == 2, "<" if ident[5] == 1 else ">"
+    if is64:
+        shoff, = struct.unpack(endian + "Q", _read_at(fh, 0x28, 8))
+        shentsize, shnum = struct.unpack(endian + "HH", _read_at(fh, 0x3A, 4))
+    else:
+        shoff, = struct.unpack(endian + "I", _read_at(fh, 0x20, 4))
+        shentsize, shnum = struct.unpack(endian + "HH", _read_at(fh, 0x2E, 4))
+    for i in range(shnum):
+        sh = _read_at(fh, shoff + i * shentsize, shentsize)
+        if len(sh) < shentsize:
+            return None
+        if struct.unpack_from(endian + "I", sh, 4)[0] != _SHT_NOTE:
+            continue
+        if is64:
+            offset, size = struct.unpack_from(endian + "QQ", sh, 0x18)
+        else:
+            offset, size = struct.unpack_from(endian + "II", sh, 0x10)
+        notes = _read_at(fh, offset, size)
+        pos = 0
+        while pos + 12 <= len(notes):
+            namesz, descsz, ntype = struct.unpack_from(endian + "3I", notes, pos)
+            name_end = pos + 12 + ((namesz + 3) & ~3)
+            desc = notes[name_end : name_end + descsz]
+            if ntype == _NT_GNU_BUILD_ID and notes[pos + 12 : pos + 12 + namesz].rstrip(b"\0") == b"GNU":
+                return desc.hex().upper()
+            pos = name_end + ((descsz + 3) & ~3)
+    return None
+
+
+def _macho_uuid(fh: Any, base: int = 0) -> str | None:
+    magic = _read_at(fh, base, 4)
+    if magic == _FAT_MAGIC:
+        nfat, = struct.unpack(">I", _read_at(fh, 4, 4))
+        if nfat:
+            # All slices of one dSYM are built together; the first slice names the entry.
+            _, _, offset, _, _ = struct.unpack(">5I", _read_at(fh, 8, 20))
+            return _macho_uuid(fh, offset)
+        return None
+    endian = _MACHO_MAGICS.get(magic)
+    if endian is None:
+        return None
+    is64 = magic in (b"\xcf\xfa\xed\xfe", b"\xfe\xed\xfa\xcf")
+    ncmds, = struct.unpack(endian + "I", _read_at(fh, base + 16, 4))
+    pos = base + (32 if is64 else 28)
+    for _ in range(ncmds):
+        cmd, cmdsize = struct.unpack(endian + "II", _read_at(fh, pos, 8))
+        if cmd == _LC_UUID:
+            return _read_at(fh, pos + 8, 16).hex().upper()
+        if cmdsize <= 0:
+            return None
+        pos += cmdsize
+    return None
+
+
+def build_id(path: Path) -> str:
+    """Debugger-facing identity of a symbol file; content hash when the format carries none."""
+    try:
+        with path.open("rb") as fh:
+            for reader in (_pdb_id, _elf_build_id, _macho_uuid):
+                try:
+                    found = reader(fh)
+                except (struct.error, ValueError):
+                    found = None
+                if found:
+                    return found
+    except OSError:
+        pass
+    h = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(4 * 1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()[:32].upper()
+
+
+def discover(archive_dir: Path, extensions: tuple[str, ...] = DEFAULT_EXTENSIONS) -> list[Path]:
+    if not archive_dir.is_dir():
+        return []
+    found: list[Path] = []
+    for path in archive_dir.rglob("*"):
+        if not path.is_file():
+            continue
+        if path.suffix.lower() in extensions:
+            found.append(path)
+        elif ".dSYM/Contents/Resources/DWARF/" in path.as_posix():
+            found.append(path)
+    return sorted(found)
+
+
+@dataclass
+class SymbolRecord:
+    path: str
+    name: str
+    build_id: str
+    size: int
+    stored_size: int = 0
+    compress_seconds: float = 0.0
+    write_seconds: float = 0.0
+    status: str = "stored"
+
+    @property
+    def mbps(self) -> float:
+        busy = self.compress_seconds + self.write_seconds
+        return round(self.size / 1048576 / busy, 1) if busy > 0 else 0.0
+
+
+@dataclass
+class SymbolStats:
+    records: list[SymbolRecord] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def count(self, status: str) -> int:
+        return sum(1 for r in self.records if r.status == status)
+
+    def describe(self) -> str:
+        stored = [r for r in self.records if r.status == "stored"]
+        raw = sum(r.size for r in stored)
+        out = sum(r.stored_size for r in stored)
+        return (
+            f"{len(stored)} stored, {self.count('exists')} already in store, {self.count('failed')} failed; "
+            f"{raw / 1048576:.1f} MB -> {out / 1048576:.1f} MB in {self.seconds:.1f}s"
+        )
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "seconds": round(self.seconds, 3),
+            "files": [{**asdict(r), "mbps": r.mbps} for r in sorted(self.records, key=lambda r: -r.size)],
+        }
+
+
+def _compress(src: str, spool: str, level: int, compress: bool) -> tuple[int, float]:
+    # Runs in a worker process: symbol files are large and gzip is CPU bound.
+    started = time.perf_counter()
+    if compress:
+        with open(src, "rb") as fin, gzip.open(spool, "wb", compresslevel=level) as fout:
+            shutil.copyfileobj(fin, fout, 4 * 1024 * 1024)
+    else:
+        shutil.copyfile(src, spool)
+    return os.path.getsize(spool), time.perf_counter() - started
+
+
+def upload(
+    archive_dir: Path,
+    settings: SymbolSettings,
+    *,
+    spool_dir: Path | None = None,
+) -> SymbolStats:
+    """Compress symbols from ``archive_dir`` into ``settings.store_dir``.
+
+    Layout is ``<store>/<name>/<build-id>/<name>[.gz]``. Compression runs in a process pool;
+    finished files are handed to a bounded pool of writer threads so slow store I/O never
+    holds more than a few spooled files in flight. Entries already in the store are skipped.
+    """
+    started = time.monotonic()
+    stats = SymbolStats()
+    suffix = ".gz" if settings.compress else ""
+    if spool_dir is None:
+        with tempfile.TemporaryDirectory(prefix="uebuild-symbols-") as tmp:
+            return upload(archive_dir, settings, spool_dir=Path(tmp))
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    lock = threading.Lock()
+    # Caps spooled-but-unwritten files: compression may not run away from a slow store.
+    in_flight = threading.BoundedSemaphore(settings.workers + settings.write_workers * 2)
+
+    def _write(rec: SymbolRecord, spool: Path, fut: Future[tuple[int, float]]) -> None:
+        try:
+            rec.stored_size, rec.compress_seconds = fut.result()
+            t0 = time.perf_counter()
+            dst = settings.store_dir / rec.name / rec.build_id / f"{rec.name}{suffix}"
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dst.with_name(f"{dst.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+            shutil.copyfile(spool, tmp)
+            os.replace(tmp, dst)
+            rec.write_seconds = time.perf_counter() - t0
+        except Exception as exc:
+            rec.status = "failed"
+            print(f"[warn] Symbol upload failed: {rec.path}: {exc}")
+        finally:
+            spool.unlink(missing_ok=True)
+            in_flight.release()
+
+    with ProcessPoolExecutor(max_workers=settings.workers) as cpu, ThreadPoolExecutor(
+        max_workers=settings.write_workers, thread_name_prefix="symbols-write"
+    ) as io:
+        writes: list[Future[None]] = []
+        for i, path in enumerate(discover(archive_dir, settings.extensions)):
+            name = path.name  # for dSYM payloads this is the binary name debuggers ask for
+            rec = SymbolRecord(
+                path=path.relative_to(archive_dir).as_posix(), name=name, build_id=build_id(path), size=path.stat().st_size
+            )
+            with lock:
+                stats.records.append(rec)
+            if (settings.store_dir / name / rec.build_id / f"{name}{suffix}").exists():
+                rec.status = "exists"
+                continue
+            in_flight.acquire()
+            spool = spool_dir / f"{i:06d}-{name}{suffix}"
+            fut = cpu.submit(_compress, str(path), str(spool), settings.level, settings.compress)
+            fut.add_done_callback(lambda f, rec=rec, spool=spool: writes.append(io.submit(_write, rec, spool, f)))
+        cpu.shutdown(wait=True)
+        for w in list(writes):
+            w.result()
+    stats.seconds = time.monotonic() - started
+    return stats
+
+
+def write_report(stats: SymbolStats, out_dir: Path) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / "symbols.json"
+    path.write_text(json.dumps(stats.to_json(), indent=2), encoding="utf-8")
+    return path
+
+
+def format_slowest(stats: SymbolStats, limit: int = 5) -> list[str]:
+    done = [r for r in stats.records if r.status == "stored"]
+    done.sort(key=lambda r: r.compress_seconds + r.write_seconds, reverse=True)
+    return [
+        f"[info]   {r.name}: {r.size / 1048576:.1f} MB, compress {r.compress_seconds:.1f}s, "
+        f"write {r.write_seconds:.1f}s ({r.mbps} MB/s)"
+        for r in done[:limit]
+    ]
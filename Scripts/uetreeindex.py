@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator
+
+# Generated output, VCS metadata and caches never describe project state.
+DEFAULT_IGNORED_DIRS = frozenset({"Intermediate", "Saved", "Binaries", "DerivedDataCache", ".git", ".vs", ".svn", ".idea"})
+# Files at least this large (typically .uasset/.umap/.ubulk) are hashed through mmap.
+MMAP_THRESHOLD = 8 * 1024 * 1024
+_CHUNK = 4 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    PRIMARY KEY (name, path)
+) WITHOUT ROWID;
+"""
+
+
+def hash_file(path: Path, *, mmap_threshold: int = MMAP_THRESHOLD) -> bytes:
+    """SHA-256 of a file; large files are hashed chunk by chunk from a read-only mapping."""
+    h = hashlib.sha256()
+    with path.open("rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+        if size >= mmap_threshold:
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, size, _CHUNK):
+                        h.update(view[offset : offset + _CHUNK])
+                finally:
+                    view.release()
+        else:
+            for chunk in iter(lambda: fh.read(_CHUNK), b""):
+                h.update(chunk)
+    return h.digest()
+
+
+@dataclass(frozen=True)
+class TreeDiff:
+    added: list[str] = field(default_factory=list)
+    modified: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+    @property
+    def changed(self) -> list[str]:
+        return sorted(self.added + self.modified)
+
+
+@dataclass(frozen=True)
+class ScanStats:
+    files: int
+    hashed: int
+    hashed_bytes: int
+    seconds: float
+    diff: TreeDiff
+
+
+class TreeIndex:
+    """On-disk (SQLite) index of ``path, size, mtime, sha256`` for a directory tree.
+
+    ``scan`` stats the tree and rehashes only files whose size or mtime changed, in a
+    thread pool. Paths are POSIX-style and relative to ``root``. ``include`` limits the
+    scan to top-level entries (directories or files) of ``root``.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        root: Path,
+        *,
+        include: Iterable[str] | None = None,
+        ignored_dirs: Iterable[str] = DEFAULT_IGNORED_DIRS,
+        workers: int | None = None,
+        mmap_threshold: int = MMAP_THRESHOLD,
+    ) -> None:
+        self.db_path = db_path
+        self.root = root
+        self.include = list(include) if include is not None else None
+        self.ignored_dirs = frozenset(ignored_dirs)
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.mmap_threshold = mmap_threshold
+        self._lock = threading.Lock()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "TreeIndex":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _walk(self) -> Iterator[tuple[str, int, int]]:
+        if self.include is None:
+            stack = [(str(self.root), "")]
+        else:
+            stack = []
+            for name in self.include:
+                full = self.root / name
+                if full.is_file():
+                    st = full.stat()
+                    yield name, st.st_size, st.st_mtime_ns
+                elif full.is_dir():
+                    stack.append((str(full), name))
+        while stack:
+            directory, rel_dir = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in self.ignored_dirs:
+                                stack.append((entry.path, rel))
+                        elif entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            yield rel, st.st_size, st.st_mtime_ns
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+
+    def scan(self) -> ScanStats:
+        """Bring the index up to date; the returned diff is relative to the previous scan."""
+        started = time.monotonic()
+        with self._lock:
+            known = {row[0]: (row[1], row[2]) for row in self._db.execute("SELECT path, size, mtime_ns FROM files")}
+            seen: list[tuple[str, int, int]] = []
+            stale: list[tuple[str, int, int]] = []
+            for rel, size, mtime_ns in self._walk():
+                seen.append((rel, size, mtime_ns))
+                if known.get(rel) != (size, mtime_ns):
+                    stale.append((rel, size, mtime_ns))
+
+            def _hash(item: tuple[str, int, int]) -> tuple[str, int, int, bytes] | None:
+                rel, size, mtime_ns = item
+                try:
+                    return rel, size, mtime_ns, hash_file(self.root / rel, mmap_threshold=self.mmap_threshold)
+                except OSError:
+                    return None  # vanished or unreadable mid-scan; picked up next time
+
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="treeindex") as pool:
+                hashed = [r for r in pool.map(_hash, stale, chunksize=64) if r is not None]
+
+            seen_paths = {rel for rel, _, _ in seen}
+            removed = sorted(p for p in known if p not in seen_paths)
+            added = sorted(r[0] for r in hashed if r[0] not in known)
+            modified = sorted(r[0] for r in hashed if r[0] in known)
+            with self._db:
+                self._db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", hashed)
+                self._db.executemany("DELETE FROM files WHERE path = ?", ((p,) for p in removed))
+
+        return ScanStats(
+            files=len(seen),
+            hashed=len(hashed),
+            hashed_bytes=sum(r[1] for r in hashed),
+            seconds=time.monotonic() - started,
+            diff=TreeDiff(added=added, modified=modified, removed=removed),
+        )
+
+    def snapshot(self, name: str = "last") -> None:
+        """Remember the current index state under ``name`` for later ``diff`` calls."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM snapshots WHERE name = ?", (name,))
+            self._db.execute("INSERT INTO snapshots SELECT ?, path, digest FROM files", (name,))
+
+    def diff(self, since: str = "last") -> TreeDiff:
+        """Content changes between snapshot ``since`` and the current index (run ``scan`` first)."""
+        with self._lock:
+            snap = dict(self._db.execute("SELECT path, digest FROM snapshots WHERE name = ?", (since,)))
+            current = dict(self._db.execute("SELECT path, digest FROM files"))
+        return TreeDiff(
+            added=sorted(p for p in current if p not in snap),
+            modified=sorted(p for p, d in current.items() if p in snap and snap[p] != d),
+            removed=sorted(p for p in snap if p not in current),
+        )
+
+    def digest(self, prefix: str = "") -> str:
+        """Stable digest over every indexed file under ``prefix`` (or the whole tree)."""
+        h = hashlib.sha256()
+        with self._lock:
+            if prefix:
+                rows = self._db.execute(
+                    "SELECT path, size, digest FROM files WHERE path = ? OR (path >= ? AND path < ?) ORDER BY path",
+                    (prefix, prefix + "/", prefix + "0"),
+                )
+            else:
+                rows = self._db.execute("SELECT path, size, digest FROM files ORDER BY path")
+            for path, size, digest in rows:
+                h.update(f"{path}\0{size}\0".encode("utf-8"))
+                h.update(digest)
+        return h.hexdigest()
+
+    def entries(self) -> list[tuple[str, int, bytes]]:
+        """All indexed ``(path, size, digest)`` rows, sorted by path."""
+        with self._lock:
+            return list(self._db.execute("SELECT path, size, digest FROM files ORDER BY path"))
+
+    def lookup(self, rel: str) -> bytes | None:
+        with self._lock:
+            row = self._db.execute("SELECT digest FROM files WHERE path = ?", (rel,)).fetchone()
+        return row[0] if row else None
@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import uegovernor
+from uestream import LogLine
+
+# Kinds in the order a human would look at them: the first compile error explains the UAT
+# "BUILD FAILED" that follows it, never the other way round.
+KIND_ORDER = ("compile", "link", "cook", "asset", "exception", "engine", "uat")
+
+# (kind, pattern). Patterns are searched anywhere in the line (UBT/UAT prefix their output);
+# earlier rules win when several match. Named groups: file, line, code, msg, cat.
+_RULES: list[tuple[str, str]] = [
+    # MSVC: D:\P\Source\Foo.cpp(12): error C2065: 'x': undeclared identifier
+    ("compile", r"(?P<file>[^\s(]+?)\((?P<line>\d+)(?:,\d+)?\)\s*:\s*(?:fatal\s+)?error\s+(?P<code>C\d{4})\s*:\s*(?P<msg>.*)"),
+    # clang / gcc: /P/Source/Foo.cpp:12:5: error: use of undeclared identifier 'x'
+    ("compile", r"(?P<file>[^\s:]+?|[A-Za-z]:[^\s:]+?):(?P<line>\d+):(?:\d+:)?\s*(?:fatal\s+)?error:\s*(?P<msg>.*)"),
+    # MSVC linker: Foo.obj : error LNK2019: unresolved external symbol ...
+    ("link", r"(?:fatal\s+)?error\s+(?P<code>LNK\d{4})\s*:\s*(?P<msg>.*)"),
+    # ld / lld / ld64: ld.lld: error: undefined symbol: Foo::Bar()
+    ("link", r"\b(?:ld|ld\.lld|ld64(?:\.lld)?|lld-link):\s*error:\s*(?P<msg>.*)"),
+    ("link", r"(?P<msg>(?:Undefined symbols for architecture|linker command failed)\b.*)"),
+    # UAT / .NET exceptions
+    ("exception", r"(?P<code>(?:\w+\.)*\w*Exception)(?::\s*|\s+)(?P<msg>.*)"),
+    ("exception", r"(?P<code>Unhandled exception|Assertion failed|Fatal error)[:!]?\s*(?P<msg>.*)"),
+    # Engine log categories: LogCook: Error: ..., LogLinker: Error: /Game/Maps/Foo ...
+    ("engine", r"\bLog(?P<cat>\w+):\s*Error:\s*(?P<msg>.*)"),
+    # UAT's own errors: "ERROR: Missing precompiled manifest", "AutomationTool exiting with ExitCode=25 (Error_Unknown)"
+    ("uat", r"AutomationTool exiting with ExitCode=(?P<code>\d+)\s*(?P<msg>.*)"),
+    ("uat", r"(?:^|(?<=\s))ERROR:\s*(?P<msg>.+)"),
+]
+# Every rule as one alternation anchored at the line start: a single pass tells which rule matches
+# first (by priority, not by position), then only that rule's pattern is run for its fields. The
+# field names repeat across rules and re wants them unique, so they are dropped from the set.
+_RULE_RES = [re.compile(p) for _, p in _RULES]
+_PATTERN_SET = re.compile(
+    "^(?:" + "|".join(f"(?P<r{i}>.*?(?:{re.sub(r'[(][?]P<[a-z]+>', '(?:', p)}))" for i, (_, p) in enumerate(_RULES)) + ")"
+)
+
+# Second gate for lines that mention errors at all ("0 error(s)", "no error handling"): only the
+# tokens the rules above are built around. One search, no backtracking over the rule set.
+_TRIGGER = re.compile(
+    r"\berror(?::|\s+(?:C|LNK)\d)|Error:|ERROR:|Exception\b|ExitCode=|Undefined symbols|linker command failed"
+    r"|Unhandled exception|Assertion failed|Fatal error"
+)
+
+_COOK_CATEGORIES = ("Cook", "SavePackage", "CookCommandlet", "ShaderCompilers", "DerivedDataCache")
+_ASSET_RE = re.compile(r"/(?:Game|Engine|Script)/\S+|\.u(?:asset|map)\b")
+
+# Normalization: what changes between two builds of the same failure.
+_UE_PREFIX_RE = re.compile(r"^\[\d{4}\.\d\d\.\d\d-[\d.:]+\]\[\s*\d+\]")
+_WIN_DIR_RE = re.compile(r"[A-Za-z]:[\\/](?:[^\\/\s'\"():;,<>|]+[\\/])*")
+_POSIX_DIR_RE = re.compile(r"(?<![\w/])/(?!(?:Game|Engine|Script)/)(?:[^/\s'\"():;,<>|]+/)+")
+_LOCATION_RE = re.compile(r"(\((\d+)(?:,\d+)?\)|:\d+(?::\d+)?(?=:))")
+_HEX_RE = re.compile(r"\b0x[0-9A-Fa-f]+\b|\b[0-9A-Fa-f]{16,}\b|\b[0-9A-Fa-f]{8}-(?:[0-9A-Fa-f]{4}-){3}[0-9A-Fa-f]{12}\b")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r"\s+")
+
+MAX_DISTINCT = 200  # per build: beyond this only the line count grows
+MAX_INDEX_ENTRIES = 5000
+
+
+def normalize(text: str, roots: tuple[str, ...] = ()) -> str:
+    """A failure's stable signature: no machine paths, line numbers, addresses or counters."""
+    for root in roots:
+        if root:
+            text = text.replace(root, "")
+    text = _WIN_DIR_RE.sub("", text)
+    text = _POSIX_DIR_RE.sub("", text.replace("\\", "/"))
+    text = _LOCATION_RE.sub("", text)
+    text = _HEX_RE.sub("#", text)
+    text = _NUMBER_RE.sub("N", text)
+    return _SPACE_RE.sub(" ", text).strip()[:300]
+
+
+@dataclass
+class Failure:
+    fingerprint: str
+    kind: str
+    code: str
+    file: str  # basename only
+    line: int | None  # first occurrence
+    signature: str
+    example: str  # first raw line (trimmed)
+    t: float  # seconds into the UAT run
+    count: int = 1
+
+    def describe(self) -> str:
+        where = f"{self.file}({self.line}): " if self.file and self.line is not None else (f"{self.file}: " if self.file else "")
+        code = f"{self.code} " if self.code else ""
+        return f"{self.kind} {code}{where}{self.signature}"
+
+
+def classify(text: str) -> tuple[str, re.Match[str]] | None:
+    """``(kind, match)`` for an error line, None otherwise."""
+    m = _PATTERN_SET.match(text)
+    if m is None:
+        return None
+    index = int(m.lastgroup[1:])  # type: ignore[index]
+    kind = _RULES[index][0]
+    fields = _RULE_RES[index].search(text)
+    if fields is None:  # can't happen: same pattern
+        return None
+    if kind == "engine":
+        category = fields.group("cat")
+        if category.startswith(_COOK_CATEGORIES):
+            kind = "cook"
+        elif _ASSET_RE.search(fields.group("msg")):
+            kind = "asset"
+    return kind, fields
+
+
+class ErrorTriage:
+    """Streaming error extraction for one UAT run (usable directly as a ``uebuildlib.run`` sink).
+
+    Almost every line is rejected by a few substring checks, most of the rest by one trigger
+    regex; only actual error lines reach the precompiled pattern set. Failures are de-duplicated by fingerprint, so the UBT error summary UAT prints
+    again at the end only adds to the counts.
+    """
+
+    def __init__(self, job: str, *, roots: tuple[Path, ...] = ()) -> None:
+        self.job = job
+        self.failures: dict[str, Failure] = {}
+        self.error_lines = 0
+        self._roots = tuple(sorted({v for r in roots for v in (str(r) + os.sep, str(r).replace("\\", "/") + "/")}, key=len, reverse=True))
+        self._lock = threading.Lock()  # stdout and stderr are pumped by separate threads
+
+    def feed(self, line: LogLine) -> None:
+        text = line.text
+        if not ("rror" in text or "ERROR" in text or "xception" in text or "Undefined symbols" in text or "ssertion" in text):
+            return
+        if _TRIGGER.search(text) is None:
+            return
+        if text.startswith("[2"):
+            text = _UE_PREFIX_RE.sub("", text)
+        found = classify(text)
+        if found is None:
+            return
+        kind, m = found
+        groups = m.groupdict()
+        code = groups.get("code") or ""
+        file = (groups.get("file") or "").replace("\\", "/").rsplit("/", 1)[-1]
+        signature = normalize(groups.get("msg") or text, self._roots)
+        fingerprint = hashlib.sha1(f"{kind}|{code}|{file}|{signature}".encode("utf-8")).hexdigest()[:16]
+        with self._lock:
+            self.error_lines += 1
+            known = self.failures.get(fingerprint)
+            if known is not None:
+                known.count += 1
+            elif len(self.failures) < MAX_DISTINCT:
+                self.failures[fingerprint] = Failure(
+                    fingerprint=fingerprint,
+                    kind=kind,
+                    code=code,
+                    file=file,
+                    line=int(groups["line"]) if groups.get("line") else None,
+                    signature=signature,
+                    example=text.strip()[:500],
+                    t=round(line.t, 3),
+                )
+
+    def ranked(self) -> list[Failure]:
+        """Most useful first: by kind (compile errors before the UAT errors they cause), then by time."""
+        return sorted(self.failures.values(), key=lambda f: (KIND_ORDER.index(f.kind), f.t))
+
+    def to_json(self) -> dict[str, Any]:
+        return {"job": self.job, "error_lines": self.error_lines, "failures": [asdict(f) for f in self.ranked()]}
+
+    def write(self, out_dir: Path) -> Path:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        path = out_dir / "errors.json"
+        path.write_text(json.dumps(self.to_json(), indent=2, ensure_ascii=False), encoding="utf-8")
+        return path
+
+    def summary(self, history: dict[str, dict[str, Any]] | None = None, *, limit: int = 5) -> list[str]:
+        """A few lines for the console: the distinct errors, each with how often it failed builds before."""
+        ranked = self.ranked()
+        if not ranked:
+            return [f"[warn] [{self.job}] No recognizable error lines in the log; see UAT.log"]
+        lines = [f"[error] [{self.job}] {len(ranked)} distinct error(s) in {self.error_lines} line(s); first: {ranked[0].describe()}"]
+        for failure in ranked[:limit]:
+            seen = (history or {}).get(failure.fingerprint)
+            if seen and seen.get("count", 0) > 1:
+                note = f"seen in {seen['count']} failed builds since {seen.get('first_build', '?')}"
+            else:
+                note = "new"
+            lines.append(f"  {failure.fingerprint}  {failure.describe()[:160]}  x{failure.count} ({note})")
+        if len(ranked) > limit:
+            lines.append(f"  ... {len(ranked) - limit} more in errors.json")
+        return lines
+
+
+class FailureIndex:
+    """Fingerprint -> first failing build, number of failing builds and an example line.
+
+    One JSON file per project (``<ProjectRoot>/Saved/Triage/index.json``), updated under a lock
+    so concurrent matrix jobs don't lose each other's entries.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    @classmethod
+    def for_project(cls, project_root: Path) -> "FailureIndex":
+        return cls(project_root / "Saved" / "Triage" / "index.json")
+
+    def _lock(self) -> uegovernor.LockedFile:
+        return uegovernor.LockedFile(self.path.with_suffix(".lock"), blocking=True)
+
+    def read(self) -> dict[str, dict[str, Any]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def record(self, failures: list[Failure], *, build: str) -> dict[str, dict[str, Any]]:
+        """Count one failing build for each fingerprint; returns the updated entries."""
+        now = time.time()
+        with self._lock():
+            data = self.read()
+            for f in failures:
+                entry = data.get(f.fingerprint)
+                if entry is None:
+                    entry = data[f.fingerprint] = {
+                        "kind": f.kind,
+                        "code": f.code,
+                        "file": f.file,
+                        "signature": f.signature,
+                        "example": f.example,
+                        "first_build": build,
+                        "first_seen": now,
+                        "count": 0,
+                    }
+                entry["count"] += 1
+                entry["last_build"] = build
+                entry["last_seen"] = now
+            if len(data) > MAX_INDEX_ENTRIES:
+                keep = sorted(data, key=lambda k: data[k].get("last_seen", 0), reverse=True)[:MAX_INDEX_ENTRIES]
+                data = {k: data[k] for k in keep}
+            tmp = self.path.with_suffix(f".tmp-{os.getpid()}-{threading.get_ident()}")
+            tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+        return {f.fingerprint: data[f.fingerprint] for f in failures if f.fingerprint in data}
+
+
+def report(triage: ErrorTriage, *, log_dir: Path, index: FailureIndex | None) -> None:
+    """After a failed run: write ``errors.json``, count the failures in the index and print the summary."""
+    history = None
+    if index is not None and triage.failures:
+        try:
+            history = index.record(triage.ranked(), build=f"{log_dir.parent.name}/{log_dir.name}")
+        except OSError as exc:
+            print(f"[warn] [{triage.job}] Failure index not updated: {exc}")
+    path = triage.write(log_dir)
+    for line in triage.summary(history):
+        print(line)
+    print(f"[info] [{triage.job}] Errors: {path}")
+
+
+def first_error(log_dir: Path) -> str | None:
+    """One line for a failed job's summary, from the ``errors.json`` written by ``report``."""
+    try:
+        failures = json.loads((log_dir / "errors.json").read_text(encoding="utf-8")).get("failures") or []
+        return Failure(**failures[0]).describe() if failures else None
+    except (OSError, ValueError, AttributeError, TypeError):
+        return None
+
+
+def triage_log(path: Path, *, job: str = "") -> ErrorTriage:
+    """Replay a finished ``UAT.log`` written by ``uestream.RotatingLogWriter``."""
+    import ueprofile
+
+    triage = ErrorTriage(job or path.parent.name)
+    with path.open("r", encoding="utf-8", errors="replace") as fh:
+        for raw in fh:
+            m = ueprofile._LOG_LINE_RE.match(raw.rstrip("\n"))
+            if m:
+                triage.feed(LogLine(t=float(m.group(1)), job=m.group(2), stream="err" if m.group(3) == "E" else "out", text=m.group(4)))
+            else:  # a raw engine/UAT log
+                triage.feed(LogLine(t=0.0, job="", stream="out", text=raw.rstrip("\n")))
+    return triage
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Extract and fingerprint the errors in a UAT.log")
+    parser.add_argument("log", nargs="?", help="Path to a UAT.log written by uebuild (or a raw UAT/engine log)")
+    parser.add_argument("--index", default=None, help="Failure index to consult (e.g. <ProjectRoot>/Saved/Triage/index.json)")
+    parser.add_argument("--top", type=int, default=0, help="List the N most frequent failures in --index instead")
+    parser.add_argument("--json", action="store_true", help="Print all failures as JSON")
+    args = parser.parse_args()
+
+    index = FailureIndex(Path(args.index)) if args.index else None
+    if args.top:
+        if index is None:
+            parser.error("--top needs --index")
+        entries = sorted(index.read().items(), key=lambda kv: kv[1].get("count", 0), reverse=True)[: args.top]
+        for fingerprint, e in entries:
+            what = " ".join(str(v) for v in (e.get("kind"), e.get("code"), e.get("signature", "")[:120]) if v)
+            print(f"  {fingerprint}  x{e.get('count', 0):<4} {what}  (since {e.get('first_build')})")
+        return 0
+    if not args.log:
+        parser.error("log is required")
+
+    triage = triage_log(Path(args.log))
+    if args.json:
+        print(json.dumps(triage.to_json(), indent=2, ensure_ascii=False))
+        return 0
+    history = index.read() if index is not None else None
+    for line in triage.summary(history, limit=20):
+        print(line)
+    return 1 if triage.failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+import uebuildlib
+import uegovernor
+import uemetrics
+
+_GB = 1024**3
+
+# Where each tuned value lives in BuildConfiguration.xml ("<Section>/<Key>"). Engine branches
+# rename executor settings now and then: override single entries with ``Tune.Keys``.
+DEFAULT_KEYS = {
+    "max_parallel_actions": "BuildConfiguration/MaxParallelActions",
+    "max_processor_count": "ParallelExecutor/MaxProcessorCount",
+    "processor_count_multiplier": "ParallelExecutor/ProcessorCountMultiplier",
+    "memory_per_action": "ParallelExecutor/MemoryPerActionBytes",
+    "uba_local_actions": "UnrealBuildAccelerator/MaxLocalParallelActions",
+    "uba_remote_actions": "UnrealBuildAccelerator/MaxRemoteParallelActions",
+}
+
+
+@dataclass(frozen=True)
+class TuneSettings:
+    profile_path: Path
+    probe_dir: Path  # disk whose write speed matters: where UBT writes Intermediate
+    probe_mb: int
+    probe_days: float  # re-probe the hardware this often
+    reserve_ram_gb: float
+    memory_per_action_gb: float  # starting point until compile runs have been measured
+    slow_disk_mb_s: float
+    uba_remote_per_core: float
+    keys: dict[str, str]
+
+    @classmethod
+    def from_config(cls, cfg: dict[str, Any], project_root: Path) -> "TuneSettings":
+        tune = uebuildlib._get_dict(cfg, "Tune")
+
+        def num(key: str, default: float) -> float:
+            value = tune.get(key)
+            return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0 else default
+
+        profile = tune.get("ProfilePath")
+        keys = dict(DEFAULT_KEYS)
+        overrides = tune.get("Keys")
+        if isinstance(overrides, dict):
+            keys.update({k: v for k, v in overrides.items() if k in DEFAULT_KEYS and isinstance(v, str) and "/" in v})
+        return cls(
+            profile_path=Path(profile).expanduser() if isinstance(profile, str) and profile.strip() else Path.home() / ".uebuild" / "tune-profile.json",
+            probe_dir=project_root / "Intermediate",
+            probe_mb=int(num("DiskProbeMB", 256)),
+            probe_days=num("ProbeDays", 7.0),
+            reserve_ram_gb=num("ReserveRamGB", 0.0),
+            memory_per_action_gb=num("MemoryPerActionGB", 1.5),
+            slow_disk_mb_s=num("SlowDiskMBps", 250.0),
+            uba_remote_per_core=num("UBARemoteActionsPerCore", 4.0),
+            keys=keys,
+        )
+
+
+# --- probing -----------------------------------------------------------------------------
+
+
+def physical_cores() -> int:
+    logical = os.cpu_count() or 1
+    try:
+        if sys.platform == "darwin":
+            out = subprocess.run(["sysctl", "-n", "hw.physicalcpu"], capture_output=True, text=True, timeout=5).stdout
+            return max(1, int(out.strip()))
+        if os.name == "nt":
+            out = subprocess.run(
+                ["powershell", "-NoProfile", "-Command", "(Get-CimInstance Win32_Processor | Measure-Object NumberOfCores -Sum).Sum"],
+                capture_output=True,
+                text=True,
+                timeout=30,
+            ).stdout
+            return max(1, int(out.strip()))
+        cores: set[tuple[str, str]] = set()
+        package = core = ""
+        with open("/proc/cpuinfo", encoding="ascii", errors="replace") as fh:
+            for line in fh:
+                key, _, value = line.partition(":")
+                key = key.strip()
+                if key == "physical id":
+                    package = value.strip()
+                elif key == "core id":
+                    core = value.strip()
+                elif not key and core:
+                    cores.add((package, core))
+                    package = core = ""
+        if core:
+            cores.add((package, core))
+        return len(cores) or logical
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return logical
+
+
+def disk_write_mb_s(directory: Path, size_mb: int) -> float:
+    """Sequential write speed (fsync'd) of the volume holding ``directory``."""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f".uebuild-disk-probe-{os.getpid()}"
+    block = os.urandom(1024 * 1024) * 8  # incompressible, reused
+    written = 0
+    try:
+        start = time.perf_counter()
+        with path.open("wb", buffering=0) as fh:
+            while written < size_mb * 1024 * 1024:
+                written += fh.write(block)
+            os.fsync(fh.fileno())
+        seconds = time.perf_counter() - start
+    finally:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+    return round(written / 1024**2 / max(seconds, 1e-6), 1)
+
+
+@dataclass
+class HostProbe:
+    logical_cores: int
+    physical_cores: int
+    ram_gb: float
+    disk_mb_s: float
+    disk_path: str
+    probed_at: float
+
+    def describe(self) -> str:
+        return (
+            f"{self.physical_cores} cores / {self.logical_cores} threads, {self.ram_gb:.0f} GB RAM, "
+            f"{self.disk_mb_s:.0f} MB/s writes under {self.disk_path}"
+        )
+
+
+def probe_host(settings: TuneSettings) -> HostProbe:
+    return HostProbe(
+        logical_cores=os.cpu_count() or 1,
+        physical_cores=physical_cores(),
+        ram_gb=round(uegovernor.physical_ram_gb(), 1),
+        disk_mb_s=disk_write_mb_s(settings.probe_dir, settings.probe_mb),
+        disk_path=str(settings.probe_dir),
+        probed_at=time.time(),
+    )
+
+
+# --- machine profile ---------------------------------------------------------------------
+
+
+@dataclass
+class MachineProfile:
+    """What ``--tune`` knows about this machine (``~/.uebuild/tune-profile.json``).
+
+    ``applied`` is the history of parallel-action levels written, so compile runs from the
+    metrics history can be attributed to the level they ran with; ``written`` holds the XML
+    values we own, so a value someone changed by hand is recognised and left alone.
+    """
+
+    host: str = ""
+    probe: HostProbe | None = None
+    memory_per_action_gb: float = 0.0  # learned; 0 = not measured yet
+    applied: list[dict[str, Any]] = field(default_factory=list)  # [{"ts": ..., "actions": N}]
+    timings: dict[str, list[float]] = field(default_factory=dict)  # actions -> recent compile seconds
+    written: dict[str, str] = field(default_factory=dict)  # "Section/Key" -> value we wrote
+    seen_until: float = 0.0  # metrics records up to here are already folded in
+
+    @classmethod
+    def load(cls, path: Path) -> "MachineProfile":
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls(host=socket.gethostname())
+        if not isinstance(data, dict) or data.get("host") != socket.gethostname():
+            return cls(host=socket.gethostname())  # a copied home directory: start over
+        probe = data.get("probe")
+        return cls(
+            host=data["host"],
+            probe=HostProbe(**probe) if isinstance(probe, dict) else None,
+            memory_per_action_gb=float(data.get("memory_per_action_gb", 0.0)),
+            applied=list(data.get("applied", [])),
+            timings={str(k): [float(x) for x in v] for k, v in dict(data.get("timings", {})).items()},
+            written={str(k): str(v) for k, v in dict(data.get("written", {})).items()},
+            seen_until=float(data.get("seen_until", 0.0)),
+        )
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".tmp-{os.getpid()}")
+        tmp.write_text(json.dumps(asdict(self), indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def actions_at(self, ts: float) -> int | None:
+        level = None
+        for entry in self.applied:
+            if float(entry["ts"]) > ts:
+                break
+            level = int(entry["actions"])
+        return level
+
+    def refine(self, records: Iterable[dict[str, Any]], *, min_compile_seconds: float = 60.0) -> int:
+        """Fold this host's new successful compile runs in; returns how many were used.
+
+        Memory per action is peak RSS over the cores the run kept busy, biased upwards like the
+        governor's estimates (one lean incremental build must not invite an OOM on the next
+        full one). Compile times are bucketed by the action level they ran with.
+        """
+        used = 0
+        newest = self.seen_until
+        for r in records:
+            ts = float(r.get("ts", 0.0))
+            if ts <= self.seen_until or r.get("host") != self.host or r.get("returncode") != 0:
+                continue
+            newest = max(newest, ts)
+            if r.get("mode") not in ("buildcookrun", "phase:compile") or r.get("cache") in ("skip", "restore", "cached"):
+                continue
+            compile_seconds = float((r.get("stages") or {}).get("compile") or 0.0)
+            if compile_seconds < min_compile_seconds:
+                continue  # nothing (or next to nothing) was compiled
+            used += 1
+            busy = float(r.get("cores_p90") or 0.0)
+            peak = float(r.get("peak_rss_bytes") or 0) / _GB
+            if busy >= 2 and peak > 0:
+                per_action = peak / busy
+                old = self.memory_per_action_gb
+                self.memory_per_action_gb = round(per_action if not old else max(per_action, 0.7 * old + 0.3 * per_action), 3)
+            level = self.actions_at(ts)
+            if level is not None:
+                bucket = self.timings.setdefault(str(level), [])
+                bucket.append(round(compile_seconds, 1))
+                del bucket[:-10]
+        self.seen_until = newest
+        return used
+
+
+# --- recommendation ----------------------------------------------------------------------
+
+
+@dataclass
+class Recommendation:
+    actions: int
+    multiplier: float
+    memory_per_action_gb: float
+    uba_local: int | None
+    uba_remote: int | None
+    reasons: list[str]
+
+    def values(self, keys: dict[str, str]) -> dict[str, str]:
+        """"Section/Key" -> text for BuildConfiguration.xml."""
+        out = {
+            keys["max_parallel_actions"]: str(self.actions),
+            keys["max_processor_count"]: str(self.actions),
+            keys["processor_count_multiplier"]: f"{self.multiplier:g}",
+            keys["memory_per_action"]: str(int(self.memory_per_action_gb * _GB)),
+        }
+        if self.uba_local is not None and self.uba_remote is not None:
+            out[keys["uba_local_actions"]] = str(self.uba_local)
+            out[keys["uba_remote_actions"]] = str(self.uba_remote)
+        return out
+
+
+def recommend(probe: HostProbe, profile: MachineProfile, settings: TuneSettings, *, uba: bool) -> Recommendation:
+    reasons: list[str] = []
+    smt = max(1.0, probe.logical_cores / max(1, probe.physical_cores))
+    if probe.disk_mb_s < settings.slow_disk_mb_s:
+        multiplier = 1.0
+        if smt > 1:
+            reasons.append(f"disk writes {probe.disk_mb_s:.0f} MB/s < {settings.slow_disk_mb_s:.0f}: physical cores only")
+    else:
+        multiplier = round(smt, 2)
+    cpu_actions = max(1, int(probe.physical_cores * multiplier))
+
+    per_action = profile.memory_per_action_gb or settings.memory_per_action_gb
+    if profile.memory_per_action_gb:
+        reasons.append(f"memory per action {per_action:.2f} GB measured from previous compiles")
+    reserve = settings.reserve_ram_gb or max(4.0, probe.ram_gb * 0.1)
+    ram_actions = max(1, int((probe.ram_gb - reserve) / per_action))
+    actions = min(cpu_actions, ram_actions)
+    if ram_actions < cpu_actions:
+        reasons.append(f"RAM-bound: {probe.ram_gb:.0f} GB - {reserve:.0f} GB reserve fits {ram_actions} actions of {per_action:.2f} GB")
+
+    # Measured compile times beat the model: once the level it picks has been measured, go back to
+    # an earlier level if that one compiled clearly faster on this machine.
+    medians = {int(level): statistics.median(times) for level, times in profile.timings.items() if len(times) >= 2}
+    current = medians.get(actions)
+    if current is not None:
+        best = min((level for level in medians if level <= ram_actions), key=lambda level: medians[level])
+        if medians[best] < 0.95 * current:
+            reasons.append(f"compiles at {best} actions took {medians[best]:.0f}s median vs {current:.0f}s at {actions}")
+            actions = best
+
+    uba_local = uba_remote = None
+    if uba:
+        uba_local = actions
+        uba_remote = max(actions, int(probe.physical_cores * settings.uba_remote_per_core))
+    return Recommendation(
+        actions=actions,
+        multiplier=multiplier,
+        memory_per_action_gb=round(per_action, 3),
+        uba_local=uba_local,
+        uba_remote=uba_remote,
+        reasons=reasons,
+    )
+
+
+def history_records(cfg: dict[str, Any], project_root: Path) -> Iterable[dict[str, Any]]:
+    settings = uemetrics.MetricsSettings.from_config(cfg, project_root)
+    return uemetrics.read_history(settings.history) if settings is not None else ()
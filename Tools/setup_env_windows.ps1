@@ -1,5 +1,6 @@
 param(
-  [switch]$SkipInject
+  [switch]$SkipInject,
+  [switch]$Tune
 )
 
 $ErrorActionPreference = "Stop"
@@ -29,7 +30,9 @@ if (-not (Test-Path $ConfigPath)) {
 
 if (-not $SkipInject) {
   Write-Host "[info] Injecting UBT BuildConfiguration.xml (UBA coordinator)..."
-  python (Join-Path $BuildRoot "Scripts/Inject_Global_Config.py") --config-path $ConfigPath
+  $InjectArgs = @("--config-path", $ConfigPath)
+  if ($Tune) { $InjectArgs += "--tune" }
+  python (Join-Path $BuildRoot "Scripts/Inject_Global_Config.py") @InjectArgs
 }
 
 Write-Host "[info] Running doctor..."
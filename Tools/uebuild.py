@@ -15,6 +15,13 @@ def _import_lib() -> object:
     return uebuildlib
 
 
+def _load_config(config_path: Path) -> dict:
+    """Effective config: defaults < BuildConfig.json < machine overlay < UEBUILD_CFG__* environment."""
+    import ueconfig  # type: ignore
+
+    return ueconfig.load(config_path).cfg
+
+
 def _copy_if_missing(src: Path, dst: Path) -> None:
     if dst.exists():
         return
@@ -55,18 +62,28 @@ def cmd_doctor(args: argparse.Namespace) -> int:
     print(f"[info] BuildRoot:   {build_root}")
     print(f"[info] ConfigPath:  {config_path}")
 
+    import ueconfig  # type: ignore
+
     try:
-        cfg = uebuildlib.read_json(config_path)
+        loaded = ueconfig.load(config_path)
     except Exception as exc:
         print(f"[error] {exc}")
         return 2
+    cfg = loaded.cfg
+    for layer in loaded.layers:
+        print(f"[info] Config layer: {layer.name:<8} {layer.source}")
 
-    result = uebuildlib.validate_config(cfg, config_path=config_path)
+    # doctor is where you check the machine: always validate for real, then refresh the cache.
+    result = ueconfig.validate(loaded, use_cache=False)
     for w in result.warnings:
         print(f"[warn] {w}")
     for e in result.errors:
         ok = False
         print(f"[error] {e}")
+    if isinstance(cfg.get("EngineRoot"), str) and cfg["EngineRoot"].strip():
+        import ueengines  # type: ignore
+
+        print(f"[info] Engine:      {ueengines.EngineRegistry.from_config(cfg).check(Path(cfg['EngineRoot'])).describe()}")
 
     if ok:
         print("[ok] doctor passed")
@@ -76,12 +93,18 @@ def cmd_doctor(args: argparse.Namespace) -> int:
 
 def cmd_build(args: argparse.Namespace) -> int:
     uebuildlib = _import_lib()
+    import uecache  # type: ignore
+    import ueconfig  # type: ignore
+    import uephases  # type: ignore
+    import uepipeline  # type: ignore
+    import uestream  # type: ignore
+
     build_root = Path(__file__).resolve().parent.parent
     project_root = uebuildlib.get_project_root(build_root)
     config_path = Path(args.config_path).expanduser().resolve() if args.config_path else uebuildlib.default_config_path(build_root)
 
-    cfg = uebuildlib.read_json(config_path)
-    result = uebuildlib.validate_config(cfg, config_path=config_path)
+    loaded, result = ueconfig.load_validated(config_path)
+    cfg = loaded.cfg
     for w in result.warnings:
         print(f"[warn] {w}")
     if not result.ok:
@@ -89,24 +112,910 @@ def cmd_build(args: argparse.Namespace) -> int:
             print(f"[error] {e}")
         return 2
 
-    cmd, env = uebuildlib.build_uat_command(
+    if args.daemon and (args.matrix or args.phases or args.cook_shards):
+        print("[error] --daemon cannot be combined with --matrix, --phases or --cook-shards (the daemon runs single plain BuildCookRun builds)")
+        return 2
+
+    if args.matrix:
+        import uematrix  # type: ignore
+
+        try:
+            jobs = uematrix.parse_matrix(args.matrix)
+        except uebuildlib.ConfigError as exc:
+            print(f"[error] {exc}")
+            return 2
+        return uematrix.run_matrix(
+            cfg=cfg,
+            config_path=config_path,
+            build_root=build_root,
+            jobs=jobs,
+            extra_uat_args=args.extra_uat_arg,
+            max_jobs=args.max_jobs or uematrix.default_max_jobs(cfg),
+            dry_run=args.dry_run,
+            console=args.console,
+            use_cache=not args.no_cache,
+            phases=bool(args.phases or args.cook_shards) or uephases.enabled(cfg),
+            cook_shards=args.cook_shards,
+        )
+
+    if not args.platform:
+        print("[error] --platform is required unless --matrix is given")
+        return 2
+
+    if args.daemon:
+        import ueserve  # type: ignore
+
+        payload = {
+            "op": "build",
+            "platform": args.platform,
+            "config": args.config,
+            "extra_uat_args": args.extra_uat_arg,
+            "dry_run": args.dry_run,
+            "no_cache": args.no_cache,
+            "wait": True,
+        }
+        try:
+            replies = ueserve.request(config_path, payload)
+        except (ConnectionError, OSError) as exc:
+            print(f"[warn] {exc}; building in this process instead")
+        else:
+            for reply in replies:
+                if "error" in reply:
+                    print(f"[error] daemon: {reply['error']}")
+                    return 2
+            queued, final = replies[0], replies[-1]
+            note = " (merged with an identical queued request)" if queued.get("deduped") else ""
+            print(f"[info] Daemon job {queued['id']}{note}: {final.get('state')}")
+            return int(final.get("returncode") or 0)
+
+    job = uepipeline.plan_job(
         cfg=cfg,
         config_path=config_path,
         platform=args.platform,
         build_config=args.config,
         extra_uat_args=args.extra_uat_arg,
+        log_root=uebuildlib.build_log_dir(uebuildlib.resolve_project_root(config_path)),
+    )
+    log_settings = uestream.LogSettings.from_config(cfg, console=args.console)
+    if args.phases or args.cook_shards or uephases.enabled(cfg):
+        return uephases.run_phases(
+            cfg=cfg,
+            config_path=config_path,
+            build_root=build_root,
+            jobs=[job],
+            extra_uat_args=args.extra_uat_arg,
+            dry_run=args.dry_run,
+            log_settings=log_settings,
+            use_cache=not args.no_cache,
+            cook_shards=args.cook_shards,
+        )
+    return uepipeline.run_job(
+        job,
+        build_root=build_root,
+        cwd=project_root,
+        dry_run=args.dry_run,
+        log_settings=log_settings,
+        cfg=cfg,
+        cache=None if args.no_cache else uecache.BuildCache.from_config(cfg, uebuildlib.resolve_project_root(config_path)),
+    )
+
+
+def cmd_config(args: argparse.Namespace) -> int:
+    uebuildlib = _import_lib()
+    import json
+
+    import ueconfig  # type: ignore
+
+    build_root = Path(__file__).resolve().parent.parent
+    config_path = Path(args.config_path).expanduser().resolve() if args.config_path else uebuildlib.default_config_path(build_root)
+    try:
+        loaded = ueconfig.load(config_path)
+    except uebuildlib.ConfigError as exc:
+        print(f"[error] {exc}")
+        return 2
+
+    if args.origin:
+        for key, layer in sorted(ueconfig.origins(loaded.layers).items()):
+            print(f"  {key:<48} {layer}")
+        return 0
+    if not args.effective:
+        print(json.dumps(next(layer.data for layer in loaded.layers if layer.name == "project"), indent=2, ensure_ascii=False))
+        return 0
+    result = ueconfig.validate(loaded)  # also fills in a discovered EngineRoot
+    print(json.dumps(loaded.cfg, indent=2, ensure_ascii=False))
+    for w in result.warnings:
+        print(f"[warn] {w}", file=sys.stderr)
+    for e in result.errors:
+        print(f"[error] {e}", file=sys.stderr)
+    return 0 if result.ok else 2
+
+
+def cmd_publish(args: argparse.Namespace) -> int:
+    uebuildlib = _import_lib()
+    import uepublish  # type: ignore
+
+    build_root = Path(__file__).resolve().parent.parent
+    config_path = Path(args.config_path).expanduser().resolve() if args.config_path else uebuildlib.default_config_path(build_root)
+    cfg = _load_config(config_path)
+    project_root = uebuildlib.resolve_project_root(config_path)
+
+    settings = uepublish.PublishSettings.from_config(cfg, project_root)
+    if settings is None:
+        print("[error] Publish.Enabled is false in config; nothing to publish")
+        return 2
+
+    artifacts_root = uebuildlib.artifacts_root(cfg, project_root)
+    dest_dir = artifacts_root / args.platform
+    if args.config:
+        dest_dir = dest_dir / args.config
+    staging_dir = settings.staging_dir_for(dest_dir, artifacts_root)
+    if not staging_dir.is_dir():
+        print(f"[error] Staging dir not found: {staging_dir}")
+        return 2
+
+    print(f"[info] Publishing {staging_dir} -> {dest_dir}")
+    stats = uepublish.publish(
+        staging_dir,
+        dest_dir,
+        artifacts_root=artifacts_root,
+        state_dir=settings.state_dir_for(staging_dir),
+        workers=args.workers or settings.workers,
+        hardlink=settings.hardlink,
     )
+    print(f"[ok] Published: {stats.describe()}")
+    return 0
+
+
+def cmd_artifacts(args: argparse.Namespace) -> int:
+    uebuildlib = _import_lib()
+    import dataclasses
+    import time
+
+    import ueartifacts  # type: ignore
+
+    build_root = Path(__file__).resolve().parent.parent
+    config_path = Path(args.config_path).expanduser().resolve() if args.config_path else uebuildlib.default_config_path(build_root)
+    cfg = _load_config(config_path)
+    project_root = uebuildlib.resolve_project_root(config_path)
+    artifacts_root = uebuildlib.artifacts_root(cfg, project_root)
+    settings = ueartifacts.ArtifactSettings.from_config(cfg, project_root)
+    size = ueartifacts.format_bytes
+
+    if args.artifacts_cmd == "import":
+        if not args.id or not args.platform:
+            print("[error] artifacts import needs a directory under ArtifactsDir and --platform")
+            return 2
+        build_dir = Path(args.id).expanduser()
+        if not build_dir.is_absolute():
+            build_dir = artifacts_root / build_dir
+        if not build_dir.is_dir():
+            print(f"[error] Not a directory: {build_dir}")
+            return 2
+        record = ueartifacts.record_build(
+            artifacts_root=artifacts_root,
+            build_dir=build_dir,
+            build_id=ueartifacts.new_build_id(args.platform, args.config or "Development"),
+            platform=args.platform,
+            build_config=args.config or "Development",
+            published=(build_dir / ".uebuild-manifest.json").is_file(),
+        )
+        if record is None:
+            print(f"[error] {build_dir} is not under ArtifactsDir ({artifacts_root})")
+            return 2
+        print(f"[ok] Indexed {build_dir} as {record.id}: {len(record.files)} files")
+        return 0
+
+    with ueartifacts.ArtifactIndex(artifacts_root, settings) as index:
+        index.sync(force=args.rescan)
+
+        if args.artifacts_cmd in ("tag", "untag"):
+            if not args.id or not args.tag:
+                print(f"[error] artifacts {args.artifacts_cmd} needs a build id (or `latest`) and a tag")
+                return 2
+            build = index.find(args.id, platform=args.platform, config=args.config)
+            if build is None:
+                print(f"[error] No indexed build {args.id}")
+                return 2
+            add, remove = ([args.tag], []) if args.artifacts_cmd == "tag" else ([], [args.tag])
+            tags = index.set_tags(build.id, add, remove)
+            print(f"[ok] {build.id}: tags {', '.join(tags) or '(none)'}")
+            return 0
+
+        if args.artifacts_cmd == "list":
+            builds = [b for b in index.builds() if (not args.platform or b.platform == args.platform) and (not args.config or b.config == args.config)]
+            for b in builds[: args.last]:
+                stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(b.created))
+                tags = f"  [{', '.join(b.tags)}]" if b.tags else ""
+                print(f"  {b.id:<48} {stamp}  {b.files:>7} files {size(b.bytes):>10}  {b.dir}{tags}")
+            return 0
 
-    hooks_dir = build_root / "Hooks"
-    rc = uebuildlib.run_hook("PreBuild", hooks_dir=hooks_dir, env=env, dry_run=args.dry_run)
-    if rc != 0:
+        retention = dataclasses.replace(
+            settings.retention,
+            keep_last=args.keep_last or settings.retention.keep_last,
+            max_total_bytes=int(args.max_total_gb * 1024**3) if args.max_total_gb else settings.retention.max_total_bytes,
+        )
+        plan = ueartifacts.plan_gc(index, retention)
+
+        if args.artifacts_cmd == "du":
+            groups: dict[tuple[str, str], list] = {}
+            for b in index.builds():
+                groups.setdefault(b.group, []).append(b)
+            print(f"  {'platform-config':<28} {'builds':>6} {'tagged':>6} {'size':>10}  newest")
+            for (platform, config), builds in sorted(groups.items()):
+                newest = time.strftime("%Y-%m-%d %H:%M", time.localtime(builds[0].created))
+                tagged = sum(1 for b in builds if b.tags)
+                print(f"  {platform + '-' + config:<28} {len(builds):>6} {tagged:>6} {size(sum(b.bytes for b in builds)):>10}  {newest}")
+            logical = sum(b.bytes for bs in groups.values() for b in bs)
+            print(f"[info] {artifacts_root}: {size(logical)} in builds, {size(plan.stored_before)} stored (shared content counted once)")
+            print(
+                f"[info] gc would remove {len(plan.drop)} build(s) and {len(plan.replaced)} stale record(s), "
+                f"freeing {size(plan.reclaim_bytes)} (planned in {plan.seconds * 1000:.0f} ms)"
+            )
+            return 0
+
+        # gc
+        for b in plan.drop:
+            print(f"  drop {b.id:<48} {size(b.bytes):>10}  {plan.reasons[b.id]}")
+        print(
+            f"[info] Keeping {len(plan.keep)} build(s) ({size(plan.stored_after)}); removing {len(plan.drop)} build(s), "
+            f"{len(plan.cas_objects)} CAS object(s) and {len(plan.replaced)} stale record(s): {size(plan.reclaim_bytes)} "
+            f"(planned in {plan.seconds * 1000:.0f} ms)"
+        )
+        cap = retention.max_total_bytes
+        if cap is not None and plan.stored_after > cap:
+            print(f"[warn] Still {size(plan.stored_after)} after gc, over the {size(cap)} cap: the rest is tagged or newest per platform/config")
+        rc = 0
+        if not args.dry_run and (plan.drop or plan.replaced):
+            result = ueartifacts.run_gc(index, plan, workers=args.workers or settings.workers)
+            for e in result.errors[:20]:
+                print(f"[error] {e}")
+            print(
+                f"[{'ok' if not result.errors else 'warn'}] Deleted {result.files} file(s), {result.objects} CAS object(s) "
+                f"and {result.records} record(s) in {result.seconds:.1f}s"
+            )
+            rc = 1 if result.errors else 0
+        if args.orphans:
+            count, orphan_bytes = ueartifacts.collect_orphans(index, workers=args.workers or settings.workers, dry_run=args.dry_run)
+            verb = "would delete" if args.dry_run else "deleted"
+            print(f"[info] Unindexed CAS objects older than {settings.retention.orphan_age_hours:g}h: {verb} {count} ({size(orphan_bytes)})")
         return rc
 
-    rc = uebuildlib.run(cmd, cwd=project_root, env=env, dry_run=args.dry_run)
-    if rc != 0:
+
+def cmd_symbols(args: argparse.Namespace) -> int:
+    uebuildlib = _import_lib()
+    import uesymbols  # type: ignore
+
+    build_root = Path(__file__).resolve().parent.parent
+    config_path = Path(args.config_path).expanduser().resolve() if args.config_path else uebuildlib.default_config_path(build_root)
+    cfg = _load_config(config_path)
+    project_root = uebuildlib.resolve_project_root(config_path)
+    artifacts_root = uebuildlib.artifacts_root(cfg, project_root)
+
+    if not args.platform and not args.archive_dir:
+        print("[error] --platform or --archive-dir is required")
+        return 2
+    settings = uesymbols.SymbolSettings.from_config({**cfg, "Symbols": {**uebuildlib._get_dict(cfg, "Symbols"), "Enabled": True}}, artifacts_root)
+    archive_dir = Path(args.archive_dir) if args.archive_dir else artifacts_root / args.platform
+    if args.config and not args.archive_dir:
+        archive_dir = archive_dir / args.config
+    if not archive_dir.is_dir():
+        print(f"[error] Archive dir not found: {archive_dir}")
+        return 2
+
+    print(f"[info] Uploading symbols {archive_dir} -> {settings.store_dir}")
+    stats = uesymbols.upload(archive_dir, settings)
+    print(f"[{'ok' if not stats.count('failed') else 'error'}] Symbols: {stats.describe()}")
+    for line in uesymbols.format_slowest(stats):
+        print(line)
+    return 4 if stats.count("failed") else 0
+
+
+def cmd_pak(args: argparse.Namespace) -> int:
+    uebuildlib = _import_lib()
+    import time
+
+    import ueartifacts  # type: ignore
+    import uebench  # type: ignore
+    import uepak  # type: ignore
+    import ueshard  # type: ignore
+
+    build_root = Path(__file__).resolve().parent.parent
+    config_path = Path(args.config_path).expanduser().resolve() if args.config_path else uebuildlib.default_config_path(build_root)
+    cfg = _load_config(config_path)
+    project_root = uebuildlib.resolve_project_root(config_path)
+    artifacts_root = uebuildlib.artifacts_root(cfg, project_root)
+
+    if args.pak_cmd == "bench":
+        spec_path = Path(args.spec).expanduser().resolve() if args.spec else config_path.parent / "PakBench.json"
+        if not spec_path.exists():
+            print(f"[error] Pak bench spec not found: {spec_path} (same format as Bench.json; Variants carry the compression ExtraArgs)")
+            return 2
+        try:
+            spec = uebench.BenchSpec.load(spec_path)
+        except uebuildlib.ConfigError as exc:
+            print(f"[error] {exc}")
+            return 2
+        if args.runs:
+            spec.runs = args.runs
+        cooked = project_root / "Saved" / "Cooked" / ueshard.cook_dir_name(spec.platform)
+        if not cooked.is_dir():
+            print(f"[error] No cooked data in {cooked}: cook {spec.platform} first (the bench only re-runs stage/pak)")
+            return 2
+        out_dir = project_root / "Saved" / "PakBench" / time.strftime("%Y%m%d-%H%M%S")
+        print(f"[info] Pak bench: {len(spec.variants)} variant(s), {spec.runs} decode pass(es) each, {spec.platform} {spec.build_config}; logs in {out_dir}")
+        results = uebench.run_pak_variants(cfg=cfg, config_path=config_path, spec=spec, out_dir=out_dir, console=args.console, keep_staged=args.keep_staged)
+        for line in uebench.format_pak_variants(results, spec.baseline):
+            print(line)
+        uepak.write_report(out_dir / "pak-bench.json", {"spec": str(spec_path), "baseline": spec.baseline, "variants": [r.to_json() for r in results]})
+        print(f"[info] Results: {out_dir / 'pak-bench.json'}")
+        return 1 if any(r.returncode != 0 for r in results) else 0
+
+    # report
+    settings = uepak.PakReportSettings.from_config({**cfg, "PakReport": {**uebuildlib._get_dict(cfg, "PakReport"), "Enabled": True}}, artifacts_root)
+    assert settings is not None
+    top = args.top or settings.top
+    if args.dir:
+        root = Path(args.dir).expanduser().resolve()
+    else:
+        if not args.platform:
+            print("[error] --platform or --dir is required")
+            return 2
+        # The newest indexed build of this platform/config, else the unversioned archive dir.
+        root = artifacts_root / args.platform
+        if (artifacts_root / ".index").is_dir():
+            with ueartifacts.ArtifactIndex(artifacts_root, ueartifacts.ArtifactSettings.from_config(cfg, project_root)) as index:
+                index.sync()
+                latest = index.find("latest", platform=args.platform, config=args.config)
+            if latest is not None:
+                root = artifacts_root / latest.dir
+    if not root.exists():
+        print(f"[error] Not found: {root}")
+        return 2
+    report = uepak.analyze(root, top=top)
+    if not report["containers"]:
+        print(f"[error] No .pak/.utoc containers under {root}")
+        return 2
+    print(f"[info] {root}")
+    for line in uepak.format_report(report, top=top):
+        print(line)
+    if args.decode:
+        timing = uepak.time_decompression(root)
+        untimed = ", ".join(f"{m} {ueartifacts.format_bytes(b)}" for m, b in timing.untimed.items())
+        print(
+            f"[info] Decompression: {ueartifacts.format_bytes(timing.raw)} in {timing.seconds:.3f}s ({timing.mbps:.0f} MB/s, one thread)"
+            + (f"; not timed: {untimed}" if untimed else "")
+        )
+        report["decode"] = {"seconds": round(timing.seconds, 4), "raw": timing.raw, "stored": timing.stored, "untimed": timing.untimed}
+
+    baseline_path: Path | None = None
+    if args.baseline:
+        baseline_path = Path(args.baseline).expanduser().resolve()
+    elif args.platform:
+        baseline_path = settings.baseline_path(args.platform, args.config or "Development")
+    rc = 0
+    baseline = uepak.read_report(baseline_path) if baseline_path is not None and not args.save_baseline else None
+    if baseline is not None:
+        report["baseline"] = uepak.diff(report, baseline)
+        for line in uepak.format_diff(report["baseline"], top=top):
+            print(line)
+        growth = report["baseline"]["percent"]
+        limit = args.max_growth_pct if args.max_growth_pct is not None else settings.max_growth_percent
+        if limit is not None and growth is not None and growth > limit:
+            print(f"[error] Paks grew {growth:+.2f}%, over the {limit:g}% limit")
+            rc = 8
+    if args.json:
+        uepak.write_report(Path(args.json).expanduser().resolve(), report)
+        print(f"[info] Report: {args.json}")
+    if args.save_baseline:
+        if baseline_path is None:
+            print("[error] --save-baseline needs --platform or --baseline")
+            return 2
+        report.pop("baseline", None)
+        uepak.write_report(baseline_path, report)
+        print(f"[ok] Saved baseline: {baseline_path}")
+    return rc
+
+
+def cmd_governor(args: argparse.Namespace) -> int:
+    uebuildlib = _import_lib()
+    import time
+
+    import uegovernor  # type: ignore
+
+    build_root = Path(__file__).resolve().parent.parent
+    config_path = Path(args.config_path).expanduser().resolve() if args.config_path else uebuildlib.default_config_path(build_root)
+    cfg = _load_config(config_path)
+    governor = uegovernor.Governor.from_config(cfg)
+    if governor is None:
+        print("[error] Governor.Enabled is false in config")
+        return 2
+
+    s = governor.settings
+    print(f"[info] State: {s.state_dir}")
+    print(
+        f"[info] Machine: {s.cores:g} cores budget, {uegovernor.available_ram_gb():.1f}/{uegovernor.physical_ram_gb():.1f} GB RAM free, "
+        f"reserve {s.reserve_ram_gb:g} GB RAM / {s.reserve_disk_gb:g} GB disk"
+    )
+    now = time.time()
+    leases = governor.leases()
+    print(f"[info] Running ({len(leases)}):")
+    for lease in leases:
+        print(
+            f"  {lease['key']:<40} pid={lease['pid']:<7} {lease['cores']:g} cores {lease['ram_gb']:g} GB RAM "
+            f"{lease['disk_gb']:g} GB disk  {now - lease['started']:.0f}s"
+        )
+    waiters = governor.waiters()
+    print(f"[info] Waiting ({len(waiters)}):")
+    for w in waiters:
+        print(f"  {w['key']:<40} pid={w['pid']:<7} {w['cores']:g} cores {w['ram_gb']:g} GB RAM")
+    estimates = governor._read_estimates()
+    print(f"[info] Learned estimates ({len(estimates)}):")
+    for key, est in sorted(estimates.items()):
+        print(f"  {key:<40} peak {est.get('ram_gb', 0):.1f} GB RAM, {est.get('cores', 0):.1f} cores, {est.get('disk_gb', 0):.1f} GB disk ({est.get('runs', 0)} runs)")
+    return 0
+
+
+def cmd_metrics(args: argparse.Namespace) -> int:
+    uebuildlib = _import_lib()
+    import time
+
+    import uemetrics  # type: ignore
+
+    build_root = Path(__file__).resolve().parent.parent
+    config_path = Path(args.config_path).expanduser().resolve() if args.config_path else uebuildlib.default_config_path(build_root)
+    cfg = _load_config(config_path)
+    project_root = uebuildlib.resolve_project_root(config_path)
+    settings = uemetrics.MetricsSettings.from_config(
+        {**cfg, "Metrics": {**uebuildlib._get_dict(cfg, "Metrics"), "Enabled": True}}, project_root
+    )
+    records = [
+        r
+        for r in uemetrics.read_history(settings.history)
+        if (not args.job or r.get("job") == args.job) and (not args.mode or r.get("mode") == args.mode)
+    ]
+    if not records:
+        print(f"[warn] No runs recorded in {settings.history}")
+        return 0
+
+    print(f"[info] {len(records)} run(s) in {settings.history}; last {min(args.last, len(records))}:")
+    for r in records[-args.last :]:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(r.get("ts", 0)))
+        seconds = uemetrics._value(r, args.stage)
+        print(
+            f"  {when}  {r.get('job', ''):<24} {r.get('mode', ''):<14} rc={r.get('returncode', '?'):<3} "
+            f"{(f'{seconds:.1f}s' if seconds is not None else '-'):>9}  cache={r.get('cache', '')}  "
+            f"rss={r.get('peak_rss_bytes', 0) / 1024**3:.1f}GB cpu={r.get('cpu_seconds', 0):.0f}s engine={r.get('engine', '')}"
+        )
+
+    if args.group_by:
+        what = f"stage '{args.stage}'" if args.stage else "run time"
+        print(f"[info] Successful runs, {what} by {args.group_by}:")
+        for row in uemetrics.compare(records, group_by=args.group_by, stage=args.stage):
+            print(
+                f"  {row['group']:<24} {row['runs']:>4} run(s)  median {row['median']:8.1f}s  "
+                f"p90 {row['p90']:8.1f}s  {row['change_pct']:+6.1f}%"
+            )
+    return 0
+
+
+def cmd_bench(args: argparse.Namespace) -> int:
+    uebuildlib = _import_lib()
+    import time
+
+    import uebench  # type: ignore
+    import ueconfig  # type: ignore
+
+    build_root = Path(__file__).resolve().parent.parent
+    config_path = Path(args.config_path).expanduser().resolve() if args.config_path else uebuildlib.default_config_path(build_root)
+    project_root = uebuildlib.resolve_project_root(config_path)
+    cfg = _load_config(config_path)
+    if args.uat:
+        cfg = ueconfig.merge(cfg, {"UAT": {"Path": str(Path(args.uat).expanduser().resolve())}})
+    result = uebuildlib.validate_config(cfg, config_path=config_path)
+    for w in result.warnings:
+        print(f"[warn] {w}")
+    if not result.ok:
+        for e in result.errors:
+            print(f"[error] {e}")
+        return 2
+
+    spec_path = Path(args.spec).expanduser().resolve() if args.spec else config_path.parent / "Bench.json"
+    if not spec_path.exists():
+        print(f"[error] Bench spec not found: {spec_path} (start from {build_root / 'Templates' / 'Bench.template.json'})")
+        return 2
+    try:
+        spec = uebench.BenchSpec.load(spec_path)
+    except uebuildlib.ConfigError as exc:
+        print(f"[error] {exc}")
+        return 2
+    if args.runs:
+        spec.runs = args.runs
+
+    bench_root = project_root / "Saved" / "Bench"
+    out_dir = bench_root / time.strftime("%Y%m%d-%H%M%S")
+    print(f"[info] Bench: {len(spec.variants)} variant(s) x {spec.runs} run(s), {spec.platform} {spec.build_config}; logs in {out_dir}")
+    samples = uebench.run_bench(cfg=cfg, config_path=config_path, spec=spec, out_dir=out_dir, console=args.console)
+    current = uebench.by_stage(samples)
+
+    rc = 0
+    failed = sorted({s.variant for s in samples if s.returncode != 0})
+    if failed:
+        print(f"[error] Failed runs in: {', '.join(failed)} (excluded from statistics)")
+        rc = 1
+
+    rows = uebench.compare(current, current, alpha=spec.alpha, against=spec.baseline)
+    print(f"[info] Compared with variant '{spec.baseline}' (permutation test, alpha {spec.alpha:g}):")
+    for line in uebench.format_rows(rows):
+        print(line)
+
+    baseline_path = Path(args.baseline).expanduser().resolve() if args.baseline else bench_root / "baseline.json"
+    stored_rows: list[dict] = []
+    if baseline_path.exists() and not args.save_baseline:
+        stored = uebench.by_stage(uebench.load_samples(baseline_path))
+        stored_rows = uebench.compare(current, stored, alpha=spec.alpha)
+        print(f"[info] Compared with stored baseline {baseline_path}:")
+        for line in uebench.format_rows(stored_rows):
+            print(line)
+
+    uebench.write_results(out_dir / "bench.json", spec, samples, stored_rows or rows)
+    print(f"[info] Results: {out_dir / 'bench.json'}")
+    if args.save_baseline:
+        if failed:
+            print("[error] Not saving a baseline from a bench with failed runs")
+            return rc
+        uebench.write_results(baseline_path, spec, samples, rows)
+        print(f"[ok] Saved baseline: {baseline_path}")
+
+    regressions = [r for r in stored_rows or rows if r["stage"] == uebench.TOTAL and r.get("verdict") == "slower"]
+    if regressions and args.fail_on_regression:
+        print(f"[error] Significantly slower: {', '.join(r['variant'] for r in regressions)}")
+        return 5
+    return rc
+
+
+def cmd_engines(args: argparse.Namespace) -> int:
+    uebuildlib = _import_lib()
+    import ueengines  # type: ignore
+
+    build_root = Path(__file__).resolve().parent.parent
+    config_path = Path(args.config_path).expanduser().resolve() if args.config_path else uebuildlib.default_config_path(build_root)
+    cfg = _load_config(config_path) if config_path.exists() else {}
+    registry = ueengines.EngineRegistry.from_config(cfg)
+    engines = registry.engines(refresh=args.refresh)
+    print(f"[info] Engine registry: {registry.path}")
+    print(f"[info] Searched: {', '.join(str(p) for p in ueengines.search_roots(registry.search_paths))}")
+    for engine in sorted(engines, key=lambda e: (e.association, e.root)):
+        print(f"  {engine.association or '-':<40} {engine.describe()}")
+    if not engines:
+        print("[warn] No engines found; set EngineRoot or Engines.SearchPaths")
+    return 0
+
+
+def cmd_remote(args: argparse.Namespace) -> int:
+    uebuildlib = _import_lib()
+    import ueremote  # type: ignore
+
+    build_root = Path(__file__).resolve().parent.parent
+    config_path = Path(args.config_path).expanduser().resolve() if args.config_path else uebuildlib.default_config_path(build_root)
+    cfg = _load_config(config_path)
+    project_root = uebuildlib.resolve_project_root(config_path)
+    project_name = cfg.get("ProjectName") if isinstance(cfg.get("ProjectName"), str) else None
+    project_file = uebuildlib.find_uproject(project_root, project_name)
+    settings = ueremote.RemoteSettings.from_config(cfg, args.platform, project_file.stem)
+    if settings is None:
+        print(f"[error] Platforms.{args.platform}.RemoteBuild is not enabled (or RemoteServer/RemoteEngineRoot missing)")
+        return 2
+
+    import uemacpool  # type: ignore
+
+    pool = uemacpool.Pool(settings, uemacpool.PoolSettings.from_config(cfg, args.platform), project_root / "Saved" / "Remote")
+    if args.remote_cmd == "close":
+        for host in settings.hosts:
+            ueremote.Transport(settings.on(host)).close()
+            print(f"[ok] Closed the shared ssh connection to {settings.on(host).destination}")
+        return 0
+
+    if args.remote_cmd == "status":
+        statuses = pool.status(refresh=args.refresh)
+        ranked = [s.host for s in pool.rank(statuses)]
+        for status in statuses:
+            order = f"#{ranked.index(status.host) + 1}" if status.host in ranked else "-"
+            print(f"  {order:<4} {status.host:<32} {status.describe()}")
+        print(f"[info] Pool state: {pool.path}")
+        return 0 if ranked else 6
+
+    # Pre-warm every builder: with a warm checkout each one is then a cheap delta sync away.
+    rc = 0
+    for host in settings.hosts:
+        remote = settings.on(host)
+        print(f"[info] Syncing {project_root} to {remote.destination}:{remote.project_dir}")
+        try:
+            stats = ueremote.sync(remote, project_root, state_dir=pool.state_dir)
+        except (ConnectionError, OSError) as exc:
+            print(f"[error] Remote sync to {remote.destination} failed: {exc}")
+            pool.mark_failed(host, str(exc))
+            rc = 6
+            continue
+        pool.mark_synced(host)
+        print(f"[ok] {remote.destination}: {stats.describe()}")
+    return rc
+
+
+def cmd_ddc(args: argparse.Namespace) -> int:
+    uebuildlib = _import_lib()
+    import json
+
+    import ueddc  # type: ignore
+
+    build_root = Path(__file__).resolve().parent.parent
+    config_path = Path(args.config_path).expanduser().resolve() if args.config_path else uebuildlib.default_config_path(build_root)
+    cfg = _load_config(config_path)
+
+    shared = Path(args.path) if args.path else ueddc.shared_ddc_path(cfg)
+    if shared is None:
+        print("[error] SharedDDC is not set in config (or pass --path)")
+        return 2
+
+    if args.ddc_cmd == "warm":
+        local = Path(args.local) if args.local else ueddc.local_ddc_path(cfg)
+        print(f"[info] Warming {local} from {shared} (entries used in the last {args.days} days)")
+        stats = ueddc.warm(
+            shared,
+            local,
+            days=args.days,
+            max_files=args.max_files,
+            max_bytes=int(args.max_gb * 1024) * 1024 * 1024,
+            workers=args.workers,
+            dry_run=args.dry_run,
+        )
+        verb = "would copy" if args.dry_run else "copied"
+        print(
+            f"[ok] {stats.candidates} candidates: {verb} {stats.copied} ({stats.copied_bytes / 1048576:.1f} MB), "
+            f"{stats.already_local} already local, {stats.failed} failed in {stats.seconds}s"
+        )
+        return 0 if stats.failed == 0 else 1
+
+    result = ueddc.probe(
+        shared,
+        small_count=args.small_count,
+        large_count=args.large_count,
+        large_mb=args.large_mb,
+        workers=args.workers,
+    )
+    if args.json:
+        print(json.dumps(result.to_dict(), indent=2))
+    else:
+        for line in ueddc.format_probe(result):
+            print(line)
+
+    if args.ddc_cmd == "probe":
+        return 0 if result.reachable and not result.errors else 2
+
+    problems = ueddc.check_thresholds(result, cfg)
+    for p in problems:
+        print(f"[warn] {p}")
+    if not result.reachable or result.errors:
+        return 2
+    if problems:
+        return 1 if args.strict else 0
+    print("[ok] DDC doctor passed")
+    return 0
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    uebuildlib = _import_lib()
+    import ueserve  # type: ignore
+
+    build_root = Path(__file__).resolve().parent.parent
+    config_path = Path(args.config_path).expanduser().resolve() if args.config_path else uebuildlib.default_config_path(build_root)
+
+    if args.status or args.stop:
+        try:
+            replies = ueserve.request(config_path, {"op": "shutdown" if args.stop else "status"}, timeout=10)
+        except (ConnectionError, OSError) as exc:
+            print(f"[error] {exc}")
+            return 2
+        if args.stop:
+            print("[ok] Daemon stopping")
+            return 0
+        for job in replies[0].get("jobs", []):
+            req = job["request"]
+            print(f"  #{job['id']:<5} {job['state']:<8} {req.get('platform')}-{req.get('config')}  waiters={job['waiters']}  rc={job['returncode']}")
+        return 0
+
+    _load_config(config_path)
+    return ueserve.serve(config_path=config_path, build_root=build_root, port=args.port, workers=args.workers)
+
+
+def cmd_queue(args: argparse.Namespace) -> int:
+    uebuildlib = _import_lib()
+    import time
+
+    import uequeue  # type: ignore
+
+    build_root = Path(__file__).resolve().parent.parent
+    config_path = Path(args.config_path).expanduser().resolve() if args.config_path else uebuildlib.default_config_path(build_root)
+    cfg = _load_config(config_path)
+    settings = uequeue.QueueSettings.from_config(cfg, uebuildlib.resolve_project_root(config_path))
+
+    def work_while_possible(queue: "uequeue.BuildQueue", *, once: bool) -> bool:
+        """Run pending builds in this process while a worker slot is free; False if none was."""
+        slot = queue.worker_slot()
+        if slot is None:
+            return False
+        with slot:
+            while uequeue.work_one(queue, config_path=config_path, build_root=build_root, console=args.console) is not None and not once:
+                pass
+        return True
+
+    with uequeue.BuildQueue(settings) as queue:
+        if args.queue_cmd == "status":
+            for b in queue.recent(args.last):
+                rc = "" if b.returncode is None else f" rc={b.returncode}"
+                note = f"  ({b.note})" if b.note else ""
+                flag = " cancelling" if b.cancel and b.state == "running" else ""
+                print(f"  #{b.id:<5} {b.state:<10} {b.platform}-{b.config}  rev={b.revision or '-'}{rc}{flag}{note}")
+            return 0
+
+        if args.queue_cmd == "cancel":
+            if args.id is None:
+                print("[error] queue cancel needs a request id")
+                return 2
+            outcome = queue.cancel(args.id)
+            if outcome == "unknown":
+                print(f"[error] No queued build #{args.id}")
+                return 2
+            print(f"[ok] #{args.id}: {outcome}")
+            return 0
+
+        if args.queue_cmd == "work":
+            while True:
+                if not work_while_possible(queue, once=args.once):
+                    print(f"[info] All {settings.max_workers} queue worker slot(s) are busy (Queue.MaxWorkers)")
+                    return 0
+                if args.once or not args.follow:
+                    return 0
+                time.sleep(settings.poll_seconds)
+
+        if not args.platform:
+            print("[error] queue submit needs --platform")
+            return 2
+        build, superseded, reused = queue.submit(
+            args.platform,
+            args.config,
+            list(args.extra_uat_arg),
+            revision=args.rev or "",
+            no_cache=args.no_cache,
+            cancel_running=True if args.cancel_running else None,
+        )
+        print(f"[ok] {'Already queued' if reused else 'Queued'} {build.name}")
+        for old in superseded:
+            print(f"[info] #{old} superseded by #{build.id}")
+        if not args.wait:
+            return 0
+
+        # Follow the request (and whatever supersedes it) to the end, building it ourselves when a slot is free.
+        while True:
+            current = queue.resolve(build.id)
+            if current.state in uequeue.FINAL_STATES:
+                if current.id != build.id:
+                    print(f"[info] #{build.id} was built as {current.name}")
+                if current.state == "cancelled":
+                    print(f"[warn] {current.name} was cancelled")
+                    return 1
+                return current.returncode if current.returncode is not None else 1
+            if current.state != "pending" or not work_while_possible(queue, once=True):
+                time.sleep(settings.poll_seconds)
+
+
+def cmd_cookshard(args: argparse.Namespace) -> int:
+    uebuildlib = _import_lib()
+    import json
+
+    import uepipeline  # type: ignore
+    import ueshard  # type: ignore
+    import uestream  # type: ignore
+    import uetriage  # type: ignore
+
+    build_root = Path(__file__).resolve().parent.parent
+    config_path = Path(args.config_path).expanduser().resolve() if args.config_path else uebuildlib.default_config_path(build_root)
+    cfg = _load_config(config_path)
+    project_root = uebuildlib.resolve_project_root(config_path)
+    settings = ueshard.ShardSettings.from_config(cfg, project_root)
+    project_name = cfg.get("ProjectName") if isinstance(cfg.get("ProjectName"), str) else None
+    try:
+        project_file = uebuildlib.find_uproject(project_root, project_name)
+    except uebuildlib.ConfigError as exc:
+        print(f"[error] {exc}")
+        return 2
+    plan_path = Path(args.plan) if args.plan else settings.dir / ueshard.cook_dir_name(args.platform) / "plan.json"
+
+    if args.shard_cmd == "plan":
+        plan = ueshard.plan(settings, project_file, args.platform, args.shards)
+        path = plan.write(plan_path)
+        if args.json:
+            print(json.dumps(plan.to_json(), indent=2))
+            return 0
+        for shard in plan.shards:
+            names = ", ".join(u.name for u in shard.units[:4]) + (" ..." if len(shard.units) > 4 else "")
+            print(f"  shard {shard.index}: {len(shard.maps)} map(s), {len(shard.dirs)} dir(s), ~{shard.estimate:.0f}s  {names}")
+        print(f"[ok] {len(plan.shards)} shard(s) planned for {args.platform}: {path}")
+        return 0
+
+    try:
+        plan = ueshard.ShardPlan.load(plan_path, settings)
+    except uebuildlib.ConfigError as exc:
+        print(f"[error] {exc} (run `cookshard plan` first, or pass --plan)")
+        return 2
+    job = uepipeline.plan_job(
+        cfg=cfg,
+        config_path=config_path,
+        platform=plan.platform,
+        build_config=args.config,
+        extra_uat_args=args.extra_uat_arg,
+        log_root=uebuildlib.build_log_dir(project_root),
+    )
+    log_settings = uestream.LogSettings.from_config(cfg, console=args.console)
+
+    def cook(name: str, steps: list[str], timer: "ueshard.CookTimer | None" = None) -> int:
+        cmd, env = uebuildlib.build_uat_command(
+            cfg=cfg,
+            config_path=config_path,
+            platform=plan.platform,
+            build_config=args.config,
+            extra_uat_args=args.extra_uat_arg,
+            archive_dir=job.archive_dir,
+            steps=steps,
+        )
+        log_dir = job.log_dir.parent / name.replace(":", "-")
+        uebuildlib.tag_job_env(env, job=name, log_dir=log_dir, archive_dir=job.archive_dir)
+        triage = uepipeline.error_triage(job, name=name)
+        rc = uebuildlib.run(
+            cmd,
+            cwd=project_root,
+            env=env,
+            dry_run=args.dry_run,
+            log_path=log_dir / "UAT.log",
+            job=name,
+            log_settings=log_settings,
+            sinks=[triage.feed, *([timer.feed] if timer is not None else [])],
+        )
+        if rc and triage.error_lines:
+            uetriage.report(triage, log_dir=log_dir, index=uetriage.FailureIndex.for_project(project_root))
         return rc
 
-    return uebuildlib.run_hook("PostBuild", hooks_dir=hooks_dir, env=env, dry_run=args.dry_run)
+    if args.shard_cmd == "run":
+        if args.shard is None or not 0 <= args.shard < len(plan.shards):
+            print(f"[error] --shard must be 0..{len(plan.shards) - 1}")
+            return 2
+        timer = ueshard.CookTimer(plan.units())
+        if not args.dry_run:
+            ueshard.prepare_shard_dir(plan, args.shard)
+        rc = cook(f"{plan.platform}:cook-{args.shard}", ueshard.shard_steps(plan, args.shard, project_root), timer)
+        if rc != 0:
+            print(f"[error] Shard {args.shard} failed (rc={rc})")
+            return rc
+        if not args.dry_run:
+            ueshard.CookWeights(settings.dir / "weights.json").update(plan.platform, timer.seconds)
+            print(f"[ok] Shard {args.shard} cooked into {plan.shard_dir(args.shard)}")
+        return 0
+
+    dest = project_root / "Saved" / "Cooked" / ueshard.cook_dir_name(plan.platform)
+    if args.dry_run:
+        print(f"[info] Would merge {len(plan.shards)} shard output(s) into {dest}")
+        return 0
+    report = ueshard.merge(plan, dest, regenerated=settings.regenerated, shard_dirs=[Path(d) for d in args.shard_dir] or None)
+    ueshard.print_report(report, dest)
+    if not report.ok:
+        print("[error] Cook shard merge failed verification")
+        return 7
+    if settings.finalize and not args.no_finalize:
+        rc = cook(f"{plan.platform}:cook", ["-cook", "-iterate"])
+        if rc != 0:
+            print(f"[error] Finalize cook failed (rc={rc})")
+            return rc
+    print(f"[ok] {len(plan.shards)} shard(s) merged into {dest}; stage with -skipcook")
+    return 0
 
 
 def main() -> int:
@@ -123,12 +1032,181 @@ def main() -> int:
     p_doc.set_defaults(func=cmd_doctor)
 
     p_build = sub.add_parser("build", help="Run UAT BuildCookRun")
-    p_build.add_argument("--platform", required=True, help="Win64 / Android / IOS")
+    p_build.add_argument("--platform", default=None, help="Win64 / Android / IOS")
     p_build.add_argument("--config", default="Development", help="Development / Shipping / etc")
+    p_build.add_argument(
+        "--matrix",
+        default=None,
+        help="Build a platform x config matrix in parallel, e.g. Win64,Android:Development,Shipping",
+    )
+    p_build.add_argument(
+        "--phases",
+        action="store_true",
+        help="Split BuildCookRun into cached compile/cook/stage/package phases run concurrently (Phases.Enabled)",
+    )
+    p_build.add_argument(
+        "--cook-shards",
+        type=int,
+        default=None,
+        help="Cook as N parallel shards of the project's maps, then merge (implies --phases; CookShards.Count)",
+    )
+    p_build.add_argument("--daemon", action="store_true", help="Send the build to a running `uebuild serve` daemon")
+    p_build.add_argument("--no-cache", action="store_true", help="Ignore BuildCache and always run BuildCookRun")
+    p_build.add_argument(
+        "--console",
+        choices=["full", "compact", "off"],
+        default=None,
+        help="Console view of UAT output (default: Logging.Console, or compact for --matrix)",
+    )
+    p_build.add_argument("--max-jobs", type=int, default=0, help="Max parallel matrix jobs (default: Matrix.MaxParallelJobs)")
     p_build.add_argument("--dry-run", action="store_true", help="Print command without executing")
     p_build.add_argument("--extra-uat-arg", action="append", default=[], help="Append extra UAT args (repeatable)")
     p_build.set_defaults(func=cmd_build)
 
+    p_cfg = sub.add_parser("config", help="Show BuildConfig.json, or the effective config merged from all layers")
+    p_cfg.add_argument("config_cmd", choices=["show"])
+    p_cfg.add_argument("--effective", action="store_true", help="Merged defaults < BuildConfig.json < machine overlay < UEBUILD_CFG__* env")
+    p_cfg.add_argument("--origin", action="store_true", help="List which layer sets each effective value")
+    p_cfg.set_defaults(func=cmd_config)
+
+    p_serve = sub.add_parser("serve", help="Run a long-lived local build daemon (warm config, hooks and queue)")
+    p_serve.add_argument("--port", type=int, default=0, help="TCP port on 127.0.0.1 (default: any free port)")
+    p_serve.add_argument("--workers", type=int, default=1, help="Builds run concurrently by the daemon")
+    p_serve.add_argument("--status", action="store_true", help="Show the running daemon's jobs and exit")
+    p_serve.add_argument("--stop", action="store_true", help="Stop the running daemon")
+    p_serve.set_defaults(func=cmd_serve)
+
+    p_queue = sub.add_parser("queue", help="Build request queue: bursts of requests for one platform/config coalesce into the latest")
+    p_queue.add_argument("queue_cmd", choices=["submit", "status", "cancel", "work"])
+    p_queue.add_argument("id", nargs="?", type=int, default=None, help="cancel: request id")
+    p_queue.add_argument("--platform", default=None, help="submit: Win64 / Android / IOS")
+    p_queue.add_argument("--config", default="Development", help="submit: Development / Shipping / etc")
+    p_queue.add_argument("--rev", default=None, help="submit: source revision being built (an identical pending request is reused)")
+    p_queue.add_argument("--extra-uat-arg", action="append", default=[], help="submit: append extra UAT args (repeatable)")
+    p_queue.add_argument("--no-cache", action="store_true", help="submit: ignore BuildCache and always run BuildCookRun")
+    p_queue.add_argument("--cancel-running", action="store_true", help="submit: also cancel a running build it supersedes (Queue.CancelRunning)")
+    p_queue.add_argument("--wait", action="store_true", help="submit: wait for the build (running it here if a worker slot is free)")
+    p_queue.add_argument("--once", action="store_true", help="work: build at most one request")
+    p_queue.add_argument("--follow", action="store_true", help="work: keep polling for new requests")
+    p_queue.add_argument("--last", type=int, default=30, help="status: also list this many recent finished requests")
+    p_queue.add_argument("--console", choices=["full", "compact", "off"], default="compact", help="Console view of UAT output (default: compact)")
+    p_queue.set_defaults(func=cmd_queue)
+
+    p_shard = sub.add_parser("cookshard", help="Sharded cook for CI fan-out: plan shards, cook one per runner, merge and verify")
+    p_shard.add_argument("shard_cmd", choices=["plan", "run", "merge"])
+    p_shard.add_argument("--platform", required=True, help="Win64 / Android / IOS")
+    p_shard.add_argument("--config", default="Development", help="Development / Shipping / etc")
+    p_shard.add_argument("--plan", default=None, help="Plan file (default: <CookShards.Dir>/<CookDir>/plan.json)")
+    p_shard.add_argument("--shards", type=int, default=None, help="plan: number of shards (default: CookShards.Count)")
+    p_shard.add_argument("--json", action="store_true", help="plan: print the plan as JSON")
+    p_shard.add_argument("--shard", type=int, default=None, help="run: index of the shard to cook on this machine")
+    p_shard.add_argument("--shard-dir", action="append", default=[], help="merge: shard output dirs in shard order (default: CookShards.Dir)")
+    p_shard.add_argument("--no-finalize", action="store_true", help="merge: skip the incremental cook over the merged tree")
+    p_shard.add_argument("--extra-uat-arg", action="append", default=[], help="Append extra UAT args (repeatable)")
+    p_shard.add_argument("--console", choices=["full", "compact", "off"], default=None, help="Console view of UAT output")
+    p_shard.add_argument("--dry-run", action="store_true", help="Print commands without executing")
+    p_shard.set_defaults(func=cmd_cookshard)
+
+    p_pub = sub.add_parser("publish", help="Upload (or resume uploading) locally staged artifacts to ArtifactsDir")
+    p_pub.add_argument("--platform", required=True, help="Win64 / Android / IOS")
+    p_pub.add_argument("--config", default=None, help="Build config subdir (as produced by --matrix)")
+    p_pub.add_argument("--workers", type=int, default=0, help="Parallel copy workers (default: Publish.Workers)")
+    p_pub.set_defaults(func=cmd_publish)
+
+    p_art = sub.add_parser("artifacts", help="ArtifactsDir build index: du report, list, tag releases, retention gc")
+    p_art.add_argument("artifacts_cmd", choices=["du", "list", "gc", "tag", "untag", "import"])
+    p_art.add_argument("id", nargs="?", default=None, help="tag/untag: build id or `latest`; import: directory under ArtifactsDir")
+    p_art.add_argument("tag", nargs="?", default=None, help="tag/untag: tag name (e.g. release-1.4)")
+    p_art.add_argument("--platform", default=None, help="list/latest filter; import: the build's platform")
+    p_art.add_argument("--config", default=None, help="list/latest filter; import: the build's config")
+    p_art.add_argument("--last", type=int, default=50, help="list: show this many newest builds")
+    p_art.add_argument("--keep-last", type=int, default=0, help="gc/du: builds kept per platform/config (default: Artifacts.KeepLast)")
+    p_art.add_argument("--max-total-gb", type=float, default=0, help="gc/du: size cap for kept builds (default: Artifacts.MaxTotalGB)")
+    p_art.add_argument("--workers", type=int, default=0, help="gc: parallel deletions (default: Artifacts.Workers)")
+    p_art.add_argument("--dry-run", action="store_true", help="gc: only print the plan")
+    p_art.add_argument("--orphans", action="store_true", help="gc: also delete unindexed CAS objects (walks .cas once)")
+    p_art.add_argument("--rescan", action="store_true", help="Re-read the index directory even if its mtime is unchanged")
+    p_art.set_defaults(func=cmd_artifacts)
+
+    p_sym = sub.add_parser("symbols", help="Upload debug symbols from an archive dir into the symbol store")
+    p_sym.add_argument("--platform", default="", help="Win64 / Android / IOS (archive dir under ArtifactsDir)")
+    p_sym.add_argument("--config", default=None, help="Build config subdir (as produced by --matrix)")
+    p_sym.add_argument("--archive-dir", default=None, help="Explicit archive dir (overrides --platform/--config)")
+    p_sym.set_defaults(func=cmd_symbols)
+
+    p_pak = sub.add_parser("pak", help="Pak/IoStore size report with baseline deltas; benchmark compression variants")
+    p_pak.add_argument("pak_cmd", choices=["report", "bench"])
+    p_pak.add_argument("--platform", default="", help="report: archived build of this platform (newest indexed one if ArtifactsDir is indexed)")
+    p_pak.add_argument("--config", default=None, help="report: build config of that build (and of the baseline name)")
+    p_pak.add_argument("--dir", default=None, help="report: a directory (or a single .pak/.utoc) to analyze instead")
+    p_pak.add_argument("--baseline", default=None, help="report: baseline file (default: PakReport.BaselineDir/<Platform>-<Config>.json)")
+    p_pak.add_argument("--save-baseline", action="store_true", help="report: store this report as the baseline")
+    p_pak.add_argument("--max-growth-pct", type=float, default=None, help="report: exit 8 if the stored size grew more than this vs the baseline")
+    p_pak.add_argument("--json", default=None, help="report: also write the full report here")
+    p_pak.add_argument("--decode", action="store_true", help="report: also time decompressing every block (stdlib codecs)")
+    p_pak.add_argument("--top", type=int, default=0, help="report: rows per table (default: PakReport.Top)")
+    p_pak.add_argument("--spec", default=None, help="bench: variant spec (default: PakBench.json next to BuildConfig.json)")
+    p_pak.add_argument("--runs", type=int, default=0, help="bench: timed decompression passes per variant (default: spec Runs)")
+    p_pak.add_argument("--keep-staged", action="store_true", help="bench: keep each variant's staged output")
+    p_pak.add_argument("--console", choices=["full", "compact", "off"], default="off", help="bench: console view of UAT output (default: off)")
+    p_pak.set_defaults(func=cmd_pak)
+
+    p_gov = sub.add_parser("governor", help="Show machine-wide resource governor slots, waiters and learned estimates")
+    p_gov.set_defaults(func=cmd_governor)
+
+    p_eng = sub.add_parser("engines", help="List discovered engine installs (cached engine registry)")
+    p_eng.add_argument("--refresh", action="store_true", help="Rescan all discovery sources now")
+    p_eng.set_defaults(func=cmd_engines)
+
+    p_rem = sub.add_parser("remote", help="Remote Mac builders: pre-sync the project, show pool status, close shared ssh connections")
+    p_rem.add_argument("remote_cmd", choices=["sync", "status", "close"])
+    p_rem.add_argument("--platform", default="IOS", help="Platform whose RemoteBuild settings to use (default IOS)")
+    p_rem.add_argument("--refresh", action="store_true", help="status: probe every host now instead of using cached probes")
+    p_rem.set_defaults(func=cmd_remote)
+
+    p_bench = sub.add_parser("bench", help="Benchmark build variants (UBA, DDC, cook flags) against each other and a stored baseline")
+    p_bench.add_argument("--spec", default=None, help="Bench spec (default: Bench.json next to BuildConfig.json)")
+    p_bench.add_argument("--runs", type=int, default=0, help="Measured runs per variant (default: spec Runs)")
+    p_bench.add_argument("--uat", default=None, help="Stand-in for RunUAT (sets UAT.Path), e.g. a fake UAT script")
+    p_bench.add_argument("--baseline", default=None, help="Stored baseline file (default: Saved/Bench/baseline.json)")
+    p_bench.add_argument("--save-baseline", action="store_true", help="Store this bench as the new baseline")
+    p_bench.add_argument("--fail-on-regression", action="store_true", help="Exit 5 if a variant's total time is significantly slower")
+    p_bench.add_argument("--console", choices=["full", "compact", "off"], default="off", help="Console view of UAT output (default: off)")
+    p_bench.set_defaults(func=cmd_bench)
+
+    p_met = sub.add_parser("metrics", help="Show recorded build metrics and compare stage times across engines/configs/hosts")
+    p_met.add_argument("--last", type=int, default=20, help="How many recent runs to list (default 20)")
+    p_met.add_argument("--job", help="Only runs of this job/phase, e.g. Win64-Shipping")
+    p_met.add_argument("--mode", help="Only runs of this mode, e.g. buildcookrun or phase:cook")
+    p_met.add_argument("--stage", help="Compare this stage (e.g. cook) instead of the whole run")
+    p_met.add_argument("--group-by", choices=["engine", "config", "platform", "host", "uba", "cache"], help="Median/p90 per group, %% change vs the first group")
+    p_met.set_defaults(func=cmd_metrics)
+
+    p_ddc = sub.add_parser("ddc", help="Shared DDC probe / warm-up / health check")
+    ddc_sub = p_ddc.add_subparsers(dest="ddc_cmd", required=True)
+    for name, help_text in (
+        ("probe", "Measure shared DDC latency and throughput"),
+        ("doctor", "Probe the shared DDC and warn below DDC thresholds"),
+        ("warm", "Prefetch recently used shared DDC entries into the local DDC"),
+    ):
+        p = ddc_sub.add_parser(name, help=help_text)
+        p.add_argument("--path", default=None, help="Shared DDC path (default: SharedDDC)")
+        p.add_argument("--workers", type=int, default=8 if name != "warm" else 16, help="Parallel I/O workers")
+        if name == "warm":
+            p.add_argument("--local", default=None, help="Local DDC path (default: DDC.LocalPath or engine default)")
+            p.add_argument("--days", type=float, default=7.0, help="Only entries used within N days")
+            p.add_argument("--max-gb", type=float, default=20.0, help="Max bytes to prefetch")
+            p.add_argument("--max-files", type=int, default=200_000, help="Max entries to prefetch")
+            p.add_argument("--dry-run", action="store_true", help="Only report what would be copied")
+        else:
+            p.add_argument("--small-count", type=int, default=64, help="Number of 16 KB files")
+            p.add_argument("--large-count", type=int, default=4, help="Number of large files")
+            p.add_argument("--large-mb", type=int, default=64, help="Size of each large file in MB")
+            p.add_argument("--json", action="store_true", help="Print the probe result as JSON")
+        if name == "doctor":
+            p.add_argument("--strict", action="store_true", help="Exit 1 when below thresholds")
+        p.set_defaults(func=cmd_ddc)
+
     args = parser.parse_args()
     return int(args.func(args))
 
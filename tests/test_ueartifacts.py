@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Scripts"))
+
+import ueartifacts  # noqa: E402
+
+
+class PlanGcTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name) / "nas"
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _index(self, records: list[ueartifacts.BuildRecord], max_total_bytes: int) -> ueartifacts.ArtifactIndex:
+        for record in records:
+            ueartifacts.write_record(self.root, record)
+        settings = ueartifacts.ArtifactSettings(
+            index=True,
+            versioned=True,
+            cache_dir=Path(self._tmp.name) / "cache",
+            workers=1,
+            retention=ueartifacts.Retention(keep_last=5, keep_tags=(), max_total_bytes=max_total_bytes, orphan_age_hours=24.0),
+        )
+        index = ueartifacts.ArtifactIndex(self.root, settings)
+        index.sync(force=True)
+        return index
+
+    @staticmethod
+    def _record(build_id: str, created: float, files: dict[str, list[object]]) -> ueartifacts.BuildRecord:
+        return ueartifacts.BuildRecord(
+            id=build_id, platform="Win64", config="Development", dir=f"Win64/Development/{build_id}",
+            created=created, host="test", files=files,
+        )
+
+    def test_duplicate_digest_in_evicted_build_stays_for_kept_build(self) -> None:
+        records = [
+            self._record("b0", 1.0, {"a.pak": [1_000_000, "d" * 64], "b.pak": [1_000_000, "d" * 64], "c.pak": [500_000, "e" * 64]}),
+            self._record("b1", 2.0, {"x.pak": [500_000, "f" * 64]}),
+            self._record("b2", 3.0, {"y.pak": [1_000_000, "d" * 64]}),
+        ]
+        with self._index(records, max_total_bytes=1_500_000) as index:
+            plan = ueartifacts.plan_gc(index, index.settings.retention)
+        self.assertEqual([b.id for b in plan.drop], ["b0"])
+        self.assertEqual(plan.cas_objects, [("e" * 64, 500_000)])
+        self.assertEqual(plan.stored_after, 1_500_000)
+
+
+if __name__ == "__main__":
+    unittest.main()